@@ -0,0 +1,160 @@
+"""
+Chunker karşılaştırma benchmark'ı.
+
+Eski karakter bazlı `chunk_text` (500 karakter / 50 overlap) ile cümle ve
+token duyarlı `iter_chunks` karşılaştırılır:
+
+- Retrieval hit-rate: Sentetik dokümanlara yerleştirilmiş her "gerçek"
+  (fact) cümlesi için soru sorulur; ilk k sonuçtan birinde cümlenin
+  TAMAMI varsa isabet sayılır.
+- Bütünlük: Gerçek cümlesini bölmeden içeren en az bir parça olan soru yüzdesi
+  (embedder'dan bağımsız üst sınır).
+- Kesilme oranı: Model token sınırını (256) aşan, yani embedding sırasında
+  sessizce kesilen parça yüzdesi.
+- Ingest throughput: Chunking + embedding için MB/s ve chunk/s.
+
+Kullanım:
+    python -m benchmarks.bench_chunker
+    python -m benchmarks.bench_chunker --docs 200 --k 3
+    python -m benchmarks.bench_chunker --embedder hash   # Model indirmeden
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from rag_app.utils.text_processing import chunk_text, iter_chunks, get_token_counter
+
+MODEL_MAX_TOKENS = 256
+
+_FILLER = [
+    "Bu bölüm şirket içi süreçlerin genel çerçevesini açıklamaktadır.",
+    "Çalışanlar ilgili yönetmeliklere uymakla yükümlüdür.",
+    "Detaylı bilgi için insan kaynakları departmanına başvurulabilir.",
+    "Belge yıllık olarak gözden geçirilir ve güncellenir.",
+    "Tüm birimler bu politikayı kendi süreçlerine uyarlamalıdır.",
+    "Uygulama sırasında ortaya çıkan sorunlar yönetime raporlanır.",
+    "Bu kurallar tüm lokasyonlardaki personel için geçerlidir.",
+    "İstisnai durumlar komite tarafından ayrıca değerlendirilir.",
+]
+_SUBJECTS = ["Ankara ofisi", "Ar-Ge birimi", "finans ekibi", "lojistik deposu", "satış bölgesi",
+             "İzmir fabrikası", "destek merkezi", "eğitim programı", "kalite laboratuvarı", "bilgi işlem"]
+
+
+def build_corpus(n_docs: int, seed: int = 42):
+    """
+    Sentetik doküman korpusu üretir.
+
+    Returns:
+        tuple: (doküman listesi, [(soru, gerçek cümlesi)] listesi)
+    """
+    rng = random.Random(seed)
+    docs, facts = [], []
+    for d in range(n_docs):
+        paragraphs = []
+        for p in range(rng.randint(4, 8)):
+            sentences = rng.sample(_FILLER, rng.randint(3, 6))
+            if rng.random() < 0.5:
+                subject = f"{rng.choice(_SUBJECTS)} {d}-{p}"
+                code = rng.randint(1000, 9999)
+                fact = f"{subject.capitalize()} için yıllık bütçe kodu {code} olarak belirlenmiştir."
+                sentences.insert(rng.randint(0, len(sentences)), fact)
+                facts.append((f"{subject} için yıllık bütçe kodu nedir?", fact))
+            paragraphs.append(" ".join(sentences))
+        docs.append("\n\n".join(paragraphs))
+    return docs, facts
+
+
+class HashingEmbedder:
+    """Model indirilemeyen ortamlar için kelime + bigram feature-hashing embedder'ı."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _vec(self, text: str):
+        words = text.lower().replace(".", " ").replace("?", " ").split()
+        vec = np.zeros(self.dim, dtype="float32")
+        for token in words + [a + " " + b for a, b in zip(words, words[1:])]:
+            vec[hash(token) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def embed_documents(self, texts):
+        return np.stack([self._vec(t) for t in texts])
+
+    def embed_query(self, text):
+        return self._vec(text)
+
+
+def evaluate(name: str, chunker, docs, facts, embedder, count_tokens, k: int) -> dict:
+    """Bir chunker için ingest ve retrieval ölçümlerini yapar."""
+    total_bytes = sum(len(d.encode("utf-8")) for d in docs)
+
+    t0 = time.perf_counter()
+    chunks = [c for d in docs for c in chunker(d)]
+    chunk_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectors = np.asarray(embedder.embed_documents(chunks), dtype="float32")
+    embed_seconds = time.perf_counter() - t0
+
+    truncated = sum(1 for c in chunks if count_tokens(c) + 2 > MODEL_MAX_TOKENS)
+
+    joined = "\x00".join(chunks)
+    intact = sum(1 for _, fact in facts if fact in joined)
+
+    hits = 0
+    queries = np.asarray([embedder.embed_query(q) for q, _ in facts], dtype="float32")
+    top = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    for (_, fact), ids in zip(facts, top):
+        if any(fact in chunks[i] for i in ids):
+            hits += 1
+
+    return {
+        "name": name,
+        "chunks": len(chunks),
+        "truncated_pct": 100 * truncated / max(1, len(chunks)),
+        "intact_pct": 100 * intact / max(1, len(facts)),
+        "hit_rate": 100 * hits / max(1, len(facts)),
+        "chunk_mb_s": total_bytes / 1e6 / chunk_seconds,
+        "ingest_chunks_s": len(chunks) / (chunk_seconds + embed_seconds),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker karşılaştırma benchmark'ı")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    docs, facts = build_corpus(args.docs)
+    count_tokens = get_token_counter()
+
+    if args.embedder == "hash":
+        embedder = HashingEmbedder()
+    else:
+        from rag_app.services.embedding_service import EmbeddingService
+        embedder = EmbeddingService()
+        embedder.warm_up(background=False)
+        if embedder.load_error:
+            raise SystemExit(f"Model yüklenemedi: {embedder.load_error} (--embedder hash deneyin)")
+
+    chunkers = {
+        "chunk_text (500 kar.)": chunk_text,
+        "iter_chunks (token)": lambda d: iter_chunks(d, count_tokens=count_tokens),
+    }
+
+    print(f"Korpus: {len(docs)} doküman, {len(facts)} soru, k={args.k}, embedder={args.embedder}\n")
+    print(f"{'Chunker':<24} {'chunk':>6} {'kesilen %':>9} {'bütün %':>8} {'hit-rate %':>10} {'chunk MB/s':>10} {'ingest chunk/s':>14}")
+    print("-" * 89)
+    for name, chunker in chunkers.items():
+        r = evaluate(name, chunker, docs, facts, embedder, count_tokens, args.k)
+        print(f"{r['name']:<24} {r['chunks']:>6} {r['truncated_pct']:>9.1f} {r['intact_pct']:>8.1f} {r['hit_rate']:>10.1f} "
+              f"{r['chunk_mb_s']:>10.2f} {r['ingest_chunks_s']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
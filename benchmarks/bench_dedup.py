@@ -0,0 +1,115 @@
+"""
+Yakın-kopya chunk eleme benchmark'ı.
+
+bench_chunker korpusuna kurumsal arşivlerdeki tekrarları ekler:
+her dokümanın başında/sonunda aynı yasal uyarı paragrafı ve dokümanların
+bir kısmının küçük değişiklikli ikinci sürümleri. Her chunker için:
+
+- Elenen chunk oranı (birebir / yakın kopya)
+- Embedding süresi ve indeks belleği tasarrufu
+- Dedektörün chunk başına ek maliyeti
+- Retrieval hit-rate (kopyalar top-k'yı doldurmadığında değişimi)
+
+Kullanım:
+    python -m benchmarks.bench_dedup --embedder hash
+    python -m benchmarks.bench_dedup --docs 300 --revisions 0.3
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from benchmarks.bench_chunker import HashingEmbedder, build_corpus
+from rag_app.utils.dedup import NearDuplicateDetector
+from rag_app.utils.text_processing import chunk_text, get_token_counter, iter_chunks
+
+DISCLAIMER = (
+    "GİZLİLİK UYARISI: Bu belge ve ekleri yalnızca muhatabına yöneliktir ve gizli bilgi içerebilir. "
+    "Belgenin izinsiz kullanımı, kopyalanması veya üçüncü kişilerle paylaşılması yasaktır. "
+    "Bu belgeyi yanlışlıkla aldıysanız lütfen gönderene bilgi veriniz ve belgeyi sisteminizden siliniz. "
+    "Şirketimiz bu belgenin içeriğindeki hatalardan veya eksikliklerden sorumlu tutulamaz."
+)
+
+
+def add_boilerplate(docs, revisions: float, seed: int = 7):
+    """Uyarı paragrafı ekler ve dokümanların bir kısmının revize sürümünü üretir."""
+    rng = random.Random(seed)
+    out = [f"{DISCLAIMER}\n\n{d}\n\n{DISCLAIMER}" for d in docs]
+    for d in rng.sample(out, int(len(out) * revisions)):
+        words = d.split(" ")
+        words[rng.randrange(len(words))] = "revize"
+        out.append(" ".join(words))
+    return out
+
+
+def evaluate(chunks, facts, embedder, k: int, dedup: bool) -> dict:
+    t0 = time.perf_counter()
+    kept = chunks
+    dropped = {"exact": 0, "near": 0}
+    if dedup:
+        detector = NearDuplicateDetector()
+        kept = [c for n, c in enumerate(chunks) if not detector.check(c, str(n))[1]]
+        dropped = {"exact": detector.stats["exact"], "near": detector.stats["near"]}
+    dedup_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectors = np.asarray(embedder.embed_documents(kept), dtype="float32")
+    embed_seconds = time.perf_counter() - t0
+
+    queries = np.asarray([embedder.embed_query(q) for q, _ in facts], dtype="float32")
+    top = np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+    hits = sum(1 for (_, fact), ids in zip(facts, top) if any(fact in kept[i] for i in ids))
+    return {
+        "chunks": len(kept),
+        "dropped": dropped,
+        "dedup_ms_per_chunk": dedup_seconds * 1000 / max(1, len(chunks)),
+        "embed_seconds": embed_seconds,
+        "index_mb": vectors.nbytes / 1024 / 1024,
+        "hit_rate": 100 * hits / max(1, len(facts)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yakın-kopya chunk eleme benchmark'ı")
+    parser.add_argument("--docs", type=int, default=150)
+    parser.add_argument("--revisions", type=float, default=0.2, help="Revize sürümü eklenecek doküman oranı")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--embedder", choices=["model", "hash"], default="model")
+    args = parser.parse_args()
+
+    base_docs, facts = build_corpus(args.docs)
+    docs = add_boilerplate(base_docs, args.revisions)
+    count_tokens = get_token_counter()
+
+    if args.embedder == "hash":
+        embedder = HashingEmbedder()
+    else:
+        from rag_app.services.embedding_service import EmbeddingService
+        embedder = EmbeddingService()
+        embedder.warm_up(background=False)
+        if embedder.load_error:
+            raise SystemExit(f"Model yüklenemedi: {embedder.load_error} (--embedder hash deneyin)")
+
+    chunkers = {
+        "chunk_text (500 kar.)": chunk_text,
+        "iter_chunks (token)": lambda d: iter_chunks(d, count_tokens=count_tokens),
+    }
+
+    print(f"Korpus: {len(docs)} doküman ({len(docs) - len(base_docs)} revizyon), {len(facts)} soru, "
+          f"k={args.k}, embedder={args.embedder}\n")
+    print(f"{'Chunker':<24} {'dedup':>6} {'chunk':>6} {'birebir':>7} {'yakın':>6} {'dedup ms/chunk':>14} "
+          f"{'embed s':>8} {'indeks MB':>9} {'hit-rate %':>10}")
+    print("-" * 100)
+    for name, chunker in chunkers.items():
+        chunks = [c for d in docs for c in chunker(d)]
+        for dedup in (False, True):
+            r = evaluate(chunks, facts, embedder, args.k, dedup)
+            print(f"{name:<24} {'açık' if dedup else 'kapalı':>6} {r['chunks']:>6} {r['dropped']['exact']:>7} "
+                  f"{r['dropped']['near']:>6} {r['dedup_ms_per_chunk']:>14.3f} {r['embed_seconds']:>8.2f} "
+                  f"{r['index_mb']:>9.2f} {r['hit_rate']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Sorgu embedding mikro-batch benchmark'ı.
+
+Aynı anda gelen N sorguyu iki yöntemle vektörleştirir ve karşılaştırır:
+1. direct:  Her sorgu kendi `embed_query` çağrısını thread'de yapar (batch=1).
+2. batched: Sorgular EmbeddingBatcher üzerinden tek batch'lerde toplanır.
+
+Tek istek gecikmesi (concurrency=1) ve yük altındaki throughput raporlanır.
+
+Kullanım:
+    python -m benchmarks.bench_embedding_batching
+    python -m benchmarks.bench_embedding_batching --concurrency 1 8 64 --requests 256
+    python -m benchmarks.bench_embedding_batching --simulate   # Model indirmeden
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from rag_app.services.embedding_batcher import EmbeddingBatcher
+from rag_app.services.embedding_service import EmbeddingService
+from src.monitoring.metrics import metrics, percentile
+
+
+class SimulatedEncoder:
+    """
+    Model indirilemeyen ortamlar için maliyet modeli:
+    her forward pass sabit bir ek yük + sorgu başına küçük bir maliyet öder.
+    Gerçek modelde olduğu gibi forward pass'ler CPU'yu paylaşır (seri çalışır).
+    """
+
+    def __init__(self, overhead_ms: float = 8.0, per_item_ms: float = 0.4, dim: int = 384):
+        self.overhead_ms = overhead_ms
+        self.per_item_ms = per_item_ms
+        self.dim = dim
+        self._cpu = threading.Lock()
+
+    def _cost(self, n: int):
+        with self._cpu:
+            time.sleep((self.overhead_ms + self.per_item_ms * n) / 1000)
+
+    def embed_query(self, query: str):
+        self._cost(1)
+        return [0.0] * self.dim
+
+    def embed_documents(self, texts):
+        self._cost(len(texts))
+        return [[0.0] * self.dim for _ in texts]
+
+
+async def _run(embed, queries, concurrency: int) -> dict:
+    """Sorguları verilen eşzamanlılıkla gönderir, gecikme ve throughput ölçer."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(q):
+        async with semaphore:
+            t0 = time.perf_counter()
+            await embed(q)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "qps": len(queries) / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding mikro-batch benchmark'ı")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=256, help="Her senaryodaki toplam sorgu sayısı")
+    parser.add_argument("--window-ms", type=float, default=3.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--simulate", action="store_true", help="Gerçek model yerine maliyet modeli kullan")
+    args = parser.parse_args()
+
+    service = SimulatedEncoder() if args.simulate else EmbeddingService()
+    if not args.simulate:
+        service.warm_up(background=False)
+        if service.load_error:
+            raise SystemExit(f"Model yüklenemedi: {service.load_error} (--simulate deneyin)")
+
+    queries = [f"Örnek soru {i}: şirketin izin politikası nedir?" for i in range(args.requests)]
+
+    async def direct(q):
+        return await asyncio.to_thread(service.embed_query, q)
+
+    print(f"{'conc':>5} | {'direct qps':>10} {'p50 ms':>8} {'p95 ms':>8} | "
+          f"{'batched qps':>11} {'p50 ms':>8} {'p95 ms':>8} {'ort. batch':>10}")
+    print("-" * 86)
+    for conc in args.concurrency:
+        metrics.reset()
+        batcher = EmbeddingBatcher(service, max_wait_ms=args.window_ms, max_batch_size=args.max_batch)
+        d = asyncio.run(_run(direct, queries, conc))
+        b = asyncio.run(_run(batcher.embed_query, queries, conc))
+        batch = metrics.summary("embedding.batch_size")
+        print(f"{conc:>5} | {d['qps']:>10.1f} {d['p50_ms']:>8.2f} {d['p95_ms']:>8.2f} | "
+              f"{b['qps']:>11.1f} {b['p50_ms']:>8.2f} {b['p95_ms']:>8.2f} {batch['mean']:>10.1f}")
+
+    wait = metrics.summary("embedding.queue_wait_ms")
+    print(f"\nSon senaryo kuyruk bekleme: p50={wait['p50']:.2f} ms, p95={wait['p95']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Import süresi benchmark'ı.
+
+CLI (main.py) ve RAG tool'unun import edilmesinin ne kadar sürdüğünü ölçer
+ve import sırasında ağır embedding modelinin (sentence-transformers / torch)
+yüklenmediğini doğrular.
+
+Her ölçüm temiz bir Python process'inde yapılır (modül cache'i yok).
+
+Kullanım:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --repeat 7 --max-seconds 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Ölçülecek giriş noktaları
+TARGETS = {
+    "cli (main)": "main",
+    "rag_tool": "src.tools.rag_tool",
+    "embedding_service": "rag_app.services.embedding_service",
+}
+
+# Import sonrası belleğe yüklenmemesi gereken ağır modüller
+HEAVY_MODULES = ["sentence_transformers", "torch"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy_loaded": heavy}}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str, repeat: int) -> dict:
+    """
+    Bir modülün import süresini ayrı process'lerde ölçer.
+
+    Args:
+        module: Import edilecek modül yolu.
+        repeat: Tekrar sayısı.
+
+    Returns:
+        dict: median/min/max süre ve yüklenen ağır modüller.
+    """
+    times = []
+    heavy = set()
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"{module} import edilemedi:\n{proc.stderr}")
+        data = json.loads(proc.stdout.strip().splitlines()[-1])
+        times.append(data["seconds"])
+        heavy.update(data["heavy_loaded"])
+
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "heavy_loaded": sorted(heavy),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import süresi benchmark'ı")
+    parser.add_argument("--repeat", type=int, default=5, help="Her hedef için tekrar sayısı")
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="CLI import'u bu süreyi aşarsa hata kodu ile çık",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'Hedef':<20} {'median (s)':>11} {'min (s)':>9} {'max (s)':>9}  Ağır modüller")
+    print("-" * 72)
+    for label, module in TARGETS.items():
+        r = measure(module, args.repeat)
+        results[label] = r
+        heavy = ", ".join(r["heavy_loaded"]) or "-"
+        print(f"{label:<20} {r['median']:>11.3f} {r['min']:>9.3f} {r['max']:>9.3f}  {heavy}")
+
+    failed = False
+    for label, r in results.items():
+        if r["heavy_loaded"]:
+            print(f"[!] {label}: import sırasında ağır modül yüklendi: {r['heavy_loaded']}")
+            failed = True
+    if args.max_seconds is not None and results["cli (main)"]["median"] > args.max_seconds:
+        print(f"[!] CLI import süresi {args.max_seconds}s sınırını aştı.")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+"""
+FastAPI uygulaması için uçtan uca yük testi.
+
+Uygulama ayrı bir process'te, yerel mock arka uçlara bağlı olarak başlatılır:
+- LLM: benchmarks.mock_llm_server (Ollama + Gemini taklidi, ayrı process)
+- Web araması: sabit sonuç döndüren sahte DDGS (--search-latency-ms)
+- İndeks / spool: geçici dizin (çalışma dizinindeki indekse dokunulmaz)
+
+Her senaryo (/api/agent, /api/agent/stream, /ask, /upload) verilen
+eşzamanlılık seviyelerinde kapalı döngü (closed-loop) çalıştırılır ve
+raporlanır:
+- Throughput (istek/sn), p50/p95/p99 gecikme, hata oranı
+- Stream: ilk SSE olayına kadar geçen süre (ttfe) ve ilk ajan güncellemesi
+- Upload: HTTP yanıtı ve ingestion işinin bitmesine kadar geçen süre
+- Sunucu process'i: event loop gecikmesi (lag) ve RSS / tepe RSS
+
+Sonuçlar JSON olarak yazılır (--output); --compare ile önceki bir sonuç
+dosyasına göre throughput ve p95 değişimi yazdırılır.
+
+Kullanım:
+    python -m benchmarks.bench_load
+    python -m benchmarks.bench_load --scenarios agent stream --concurrency 1 8 32 --requests 100
+    python -m benchmarks.bench_load --simulate-embeddings   # Model indirmeden
+    python -m benchmarks.bench_load --compare benchmarks/results/load_onceki.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+import httpx
+import numpy as np
+
+from src.monitoring.metrics import percentile
+
+SCENARIOS = ["agent", "stream", "ask", "upload"]
+
+# Analist her soruda RAG'e, mantık uzmanı hesaplamada koda, master güncel
+# sorularda web aramasına gider; böylece tüm ajan ve tool yolları yük görür.
+MOCK_SCRIPT = {
+    "rules": [
+        {"match": ".", "tool_calls": [{"name": "rag_tool", "args": {"query": "şirket izin politikası"}}]},
+        {"match": "hesapla", "tool_calls": [{"name": "code_executor_tool",
+                                              "args": {"code": "print(sum(range(1, 101)))"}}]},
+        {"match": "güncel", "tool_calls": [{"name": "web_search_tool", "args": {"query": "güncel döviz kurları"}}]},
+        {"match": "hesapla", "text": "Analiz tamamlandı. HESAPLAMA GEREKLİ: toplam kod ile bulunmalı."},
+        {"match": ".", "text": "Belgelere göre çalışanlar yılda 14 gün ücretli izin kullanır ve "
+                               "izin talepleri en az bir hafta önceden yöneticiye iletilir."},
+    ]
+}
+
+QUERIES = [
+    "Şirketin yıllık izin politikası nedir?",
+    "1'den 100'e kadar sayıların toplamını hesapla",
+    "Bugün güncel döviz kurları ne durumda?",
+    "Uzaktan çalışma kuralları nelerdir?",
+]
+
+_POLICY = [
+    "Çalışanlar yılda 14 gün ücretli izin kullanır.",
+    "İzin talepleri en az bir hafta önceden yöneticiye iletilir.",
+    "Uzaktan çalışma haftada iki gün ile sınırlıdır.",
+    "Masraf beyanları ay sonuna kadar finans ekibine gönderilir.",
+    "Eğitim bütçesi yıllık olarak birim bazında planlanır.",
+    "Bilgi güvenliği eğitimi tüm personel için zorunludur.",
+]
+
+
+def make_document(i: int, size_kb: float = 4.0) -> str:
+    """Benzersiz bir belge numarası içeren sentetik politika dokümanı."""
+    rng = random.Random(i)
+    sentences = [f"Belge {i}: {rng.choice(['İnsan kaynakları', 'Finans', 'Bilgi işlem'])} politikası."]
+    while sum(len(s) for s in sentences) < size_kb * 1024:
+        sentences.append(f"{rng.choice(_POLICY)} Madde {len(sentences)}-{i}.")
+    return " ".join(sentences)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def summarize(values: list) -> dict:
+    """Gecikme listesinin p50/p95/p99 özeti (ms)."""
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+    }
+
+
+# --- Sunucu process'i ---
+
+class FakeDDGS:
+    """duckduckgo_search.DDGS yerine sabit sonuç döndüren arama istemcisi."""
+
+    delay_s = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query, max_results=5, **kwargs):
+        time.sleep(self.delay_s)
+        return [{"title": f"Sonuç {i}", "href": f"https://example.com/{i}",
+                 "body": f"{query} hakkında örnek özet {i}."} for i in range(max_results)]
+
+
+class SimulatedEmbeddingModel:
+    """
+    SentenceTransformer yerine feature-hashing vektörleri üreten model.
+    Gerçek modelde olduğu gibi forward pass'ler seri çalışır ve her çağrı
+    sabit ek yük + metin başına maliyet öder.
+    """
+
+    class _Tokenizer:
+        def encode(self, text, add_special_tokens=False):
+            return text.split()
+
+    def __init__(self, overhead_ms: float = 8.0, per_item_ms: float = 0.4):
+        from benchmarks.bench_chunker import HashingEmbedder
+
+        self.embedder = HashingEmbedder()
+        self.tokenizer = self._Tokenizer()
+        self.overhead_ms = overhead_ms
+        self.per_item_ms = per_item_ms
+        self._cpu = threading.Lock()
+
+    def encode(self, texts, normalize_embeddings=True):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        with self._cpu:
+            time.sleep((self.overhead_ms + self.per_item_ms * len(batch)) / 1000)
+        vectors = self.embedder.embed_documents(batch) if batch else np.zeros((0, self.embedder.dim))
+        return vectors[0] if single else vectors
+
+
+class LoopLagMonitor:
+    """
+    Event loop gecikmesini ölçer: interval kadar uyuyan görevin fazladan
+    beklediği süre, loop'u bloklayan işlerin doğrudan göstergesidir.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = deque(maxlen=100_000)
+
+    async def run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (time.perf_counter() - started - self.interval) * 1000))
+
+    def snapshot(self, reset: bool = False) -> dict:
+        result = {"loop_lag_ms": summarize(list(self.samples)), **memory_usage()}
+        if reset:
+            self.samples.clear()
+            reset_peak_rss()
+        return result
+
+
+def memory_usage() -> dict:
+    """Process'in RSS ve tepe RSS değeri (MB)."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {"rss_mb": int(fields["VmRSS"].split()[0]) / 1024, "peak_rss_mb": int(fields["VmHWM"].split()[0]) / 1024}
+    except (OSError, KeyError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux KB, macOS byte döndürür
+        return {"rss_mb": None, "peak_rss_mb": peak / (1024 * 1024 if sys.platform == "darwin" else 1024)}
+
+
+def reset_peak_rss():
+    """Linux'ta tepe RSS sayacını (VmHWM) sıfırlar; senaryo bazında tepe ölçülür."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def serve(args):
+    """Uygulamayı mock arka uçlarla çalıştırır (bench_load tarafından alt process olarak başlatılır)."""
+    import duckduckgo_search
+    import uvicorn
+
+    FakeDDGS.delay_s = args.search_latency_ms / 1000
+    duckduckgo_search.DDGS = FakeDDGS
+
+    if args.simulate_embeddings:
+        from rag_app.services.embedding_service import embedding_service
+
+        embedding_service._model = SimulatedEmbeddingModel()
+        embedding_service._ready.set()
+
+    from rag_app.main import app
+    from rag_app.services.vector_store import vector_store
+
+    vector_store.index_path = os.path.join(args.data_dir, "faiss_index.bin")
+    vector_store.metadata_path = os.path.join(args.data_dir, "metadata.pkl")
+
+    monitor = LoopLagMonitor()
+    app.add_api_route("/_bench/stats", lambda reset=False: monitor.snapshot(reset), methods=["GET"])
+
+    async def main():
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+        lag_task = asyncio.create_task(monitor.run())
+        try:
+            await server.serve()
+        finally:
+            lag_task.cancel()
+
+    asyncio.run(main())
+
+
+# --- Yük üretici ---
+
+class LoadClient:
+    """Senaryoların istek fonksiyonları. Her biri (başarılı mı, ek ölçümler) döndürür."""
+
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+
+    def query(self, i: int) -> str:
+        query = QUERIES[i % len(QUERIES)]
+        return query if self.args.repeat_queries else f"{query} (#{i})"
+
+    async def agent(self, i: int):
+        response = await self.client.post("/api/agent", json={
+            "query": self.query(i), "mode": self.args.mode, "bypass_cache": not self.args.use_cache,
+        })
+        return response.status_code == 200, {}
+
+    async def stream(self, i: int):
+        started = time.perf_counter()
+        extra, ok = {}, False
+        params = {"query": self.query(i), "mode": self.args.mode, "bypass_cache": str(not self.args.use_cache).lower()}
+        async with self.client.stream("GET", "/api/agent/stream", params=params) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                event = json.loads(line[5:]).get("event")
+                extra.setdefault("ttfe_ms", elapsed)
+                if event != "system":
+                    extra.setdefault("first_update_ms", elapsed)
+                if event == "error":
+                    return False, extra
+                ok = ok or event == "done"
+        return ok and response.status_code == 200, extra
+
+    async def ask(self, i: int):
+        response = await self.client.post("/ask", json={"question": self.query(i)})
+        return response.status_code == 200, {}
+
+    async def upload(self, i: int):
+        started = time.perf_counter()
+        files = {"files": (f"bench_{i}.txt", make_document(i, self.args.doc_kb).encode("utf-8"), "text/plain")}
+        response = await self.client.post("/upload", files=files)
+        if response.status_code != 202:
+            return False, {}
+        job = await self.wait_job(response.json()["job_id"])
+        return job["status"] == "done", {"ingest_ms": (time.perf_counter() - started) * 1000}
+
+    async def wait_job(self, job_id: str, poll: float = 0.05) -> dict:
+        while True:
+            job = (await self.client.get(f"/upload/jobs/{job_id}")).json()
+            if job["status"] in ("done", "error", "cancelled"):
+                return job
+            await asyncio.sleep(poll)
+
+
+async def run_scenario(load: LoadClient, name: str, concurrency: int, requests: int) -> dict:
+    """Senaryoyu kapalı döngüde çalıştırır: her worker bir önceki isteği bitince yenisini gönderir."""
+    call = getattr(load, name)
+    latencies, errors, extras = [], [], {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                ok, extra = await call(i)
+            except Exception as e:
+                ok, extra = False, {"error": f"{type(e).__name__}: {e}"}
+            latencies.append((time.perf_counter() - started) * 1000)
+            if not ok:
+                errors.append(extra.pop("error", "başarısız yanıt"))
+            for key, value in extra.items():
+                extras.setdefault(key, []).append(value)
+
+    await load.client.get("/_bench/stats", params={"reset": "true"})
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+    server = (await load.client.get("/_bench/stats")).json()
+
+    result = {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "error_rate": len(errors) / requests,
+        "error_samples": sorted(set(errors))[:5],
+        "duration_s": duration,
+        "throughput_rps": requests / duration,
+        "latency_ms": summarize(latencies),
+        "server": server,
+    }
+    for key, values in extras.items():
+        result[key] = summarize(values)
+    return result
+
+
+def print_result(r: dict):
+    lat, lag = r["latency_ms"], r["server"]["loop_lag_ms"]
+    ttfe = r.get("ttfe_ms") or r.get("ingest_ms") or {}
+    peak = r["server"].get("peak_rss_mb")
+    print(f"{r['scenario']:>7} {r['concurrency']:>5} | {r['throughput_rps']:>7.2f} "
+          f"{lat['p50']:>9.1f} {lat['p95']:>9.1f} {lat['p99']:>9.1f} {ttfe.get('p95', 0):>9.1f} | "
+          f"{lag.get('p99', 0):>7.1f} {lag.get('max', 0):>7.1f} {peak or 0:>8.0f} | {r['error_rate']:>6.1%}")
+
+
+def compare(baseline: dict, current: dict):
+    """Aynı senaryo / eşzamanlılık için throughput ve p95 değişimini yazdırır."""
+    base = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nKarşılaştırma: {baseline['meta'].get('git_commit')} → {current['meta'].get('git_commit')}")
+    print(f"{'senaryo':>7} {'conc':>5} | {'rps':>16} {'Δ':>7} | {'p95 ms':>19} {'Δ':>7}")
+    for r in current["results"]:
+        b = base.get((r["scenario"], r["concurrency"]))
+        if b is None:
+            continue
+        rps_delta = r["throughput_rps"] / b["throughput_rps"] - 1 if b["throughput_rps"] else 0.0
+        p95, b_p95 = r["latency_ms"]["p95"], b["latency_ms"]["p95"]
+        p95_delta = p95 / b_p95 - 1 if b_p95 else 0.0
+        print(f"{r['scenario']:>7} {r['concurrency']:>5} | {b['throughput_rps']:>7.2f} → {r['throughput_rps']:>6.2f} "
+              f"{rps_delta:>+7.1%} | {b_p95:>8.1f} → {p95:>8.1f} {p95_delta:>+7.1%}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "bilinmiyor"
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float):
+    """Sunucu açılıp embedding modeli ve indeks hazır olana kadar bekler."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Uygulama process'i kapandı (çıkış kodu {process.returncode})")
+        try:
+            health = (await client.get("/health")).json()
+            if health["embedding_error"]:
+                raise SystemExit(f"Embedding modeli yüklenemedi: {health['embedding_error']} "
+                                 f"(--simulate-embeddings deneyin)")
+            if health["ready"]:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("Uygulama zamanında hazır olmadı (--startup-timeout)")
+
+
+async def drive(args, base_url: str, app_process: subprocess.Popen) -> list:
+    timeout = httpx.Timeout(args.request_timeout)
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        await wait_ready(client, app_process, args.startup_timeout)
+        load = LoadClient(client, args)
+
+        # Tohum dokümanlar: /ask ve rag_tool yerel indeksten cevap bulabilsin
+        if args.seed_docs:
+            await asyncio.gather(*(load.upload(-1 - i) for i in range(args.seed_docs)))
+        for name in args.scenarios:
+            for i in range(args.warmup):
+                await getattr(load, name)(-100 - i)
+
+        print(f"{'senaryo':>7} {'conc':>5} | {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'ttfe/ing':>9} | {'lag p99':>7} {'lag max':>7} {'rss MB':>8} | {'hata':>6}")
+        print("-" * 104)
+        results = []
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                result = await run_scenario(load, name, concurrency, args.requests)
+                print_result(result)
+                results.append(result)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI uçtan uca yük testi (mock LLM arka uçlarıyla)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=50, help="Her senaryo / eşzamanlılık için istek sayısı")
+    parser.add_argument("--warmup", type=int, default=2, help="Ölçüm öncesi senaryo başına ısınma isteği")
+    parser.add_argument("--mode", default="auto", help="Model yönlendirme modu (auto / fast / accurate)")
+    parser.add_argument("--use-cache", action="store_true", help="Anlamsal cevap önbelleğini atlama")
+    parser.add_argument("--repeat-queries", action="store_true", help="Soruları numaralandırmadan tekrarla")
+    parser.add_argument("--seed-docs", type=int, default=10, help="Ölçüm öncesi yüklenecek doküman sayısı")
+    parser.add_argument("--doc-kb", type=float, default=4.0, help="Yüklenen doküman boyutu (KB)")
+    parser.add_argument("--llm-latency", default="lognormal:200,0.4", help="Mock LLM ilk token gecikmesi")
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=80.0)
+    parser.add_argument("--llm-seed", type=int, default=0)
+    parser.add_argument("--search-latency-ms", type=float, default=150.0, help="Sahte web araması gecikmesi")
+    parser.add_argument("--simulate-embeddings", action="store_true", help="Gerçek model yerine maliyet modeli")
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Sonuç dosyası (varsayılan: benchmarks/results/load_<zaman>.json)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    # Alt process modu (bench_load tarafından kullanılır)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    script_path = os.path.join(workdir, "mock_script.json")
+    with open(script_path, "w", encoding="utf-8") as f:
+        json.dump(MOCK_SCRIPT, f, ensure_ascii=False)
+
+    llm_port, app_port = free_port(), free_port()
+    llm_url = f"http://127.0.0.1:{llm_port}"
+    env = dict(
+        os.environ,
+        OLLAMA_BASE_URL=llm_url,
+        GEMINI_BASE_URL=llm_url,
+        GEMINI_API_KEY="mock",
+        INGEST_SPOOL_DIR=os.path.join(workdir, "spool"),
+        RAG_SERVICE_ADDRESS="",
+        LLM_CACHE_PATH="",
+    )
+    log = open(os.path.join(workdir, "app.log"), "w")
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.mock_llm_server", "--port", str(llm_port),
+                          "--script", script_path, "--latency", args.llm_latency,
+                          "--tokens-per-sec", str(args.llm_tokens_per_sec), "--seed", str(args.llm_seed)],
+                         stdout=log, stderr=subprocess.STDOUT),
+    ]
+    serve_cmd = [sys.executable, "-m", "benchmarks.bench_load", "--serve", "--port", str(app_port),
+                 "--data-dir", workdir, "--search-latency-ms", str(args.search_latency_ms)]
+    if args.simulate_embeddings:
+        serve_cmd.append("--simulate-embeddings")
+    processes.append(subprocess.Popen(serve_cmd, env=env, stdout=log, stderr=subprocess.STDOUT))
+
+    print(f"Mock LLM: {llm_url} | Uygulama: http://127.0.0.1:{app_port} | Loglar: {log.name}\n")
+    try:
+        results = asyncio.run(drive(args, f"http://127.0.0.1:{app_port}", processes[1]))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        log.close()
+
+    report = {
+        "meta": {
+            "benchmark": "load",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "data_dir")},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join("benchmarks", "results", f"load_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nSonuçlar yazıldı: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
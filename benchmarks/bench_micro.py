@@ -0,0 +1,253 @@
+"""
+Ingestion ve tool sıcak yolları için mikro-benchmark'lar.
+
+İstek yolundaki fonksiyonlar temsili girdilerle ölçülür:
+- chunk_text / iter_chunks: küçük ve büyük (MB'lar) metin
+- extract_text_from_file: küçük / büyük PDF, DOCX, büyük TXT (UploadFile ile,
+  uygulamadaki gibi process pool üzerinden)
+- validate_code: kısa ve uzun (binlerce satır) kod
+- code_executor_tool: tek satırlık çalıştırmalar, uzun kod ve art arda
+  çok sayıda küçük çalıştırma (CODE_SANDBOX_WORKERS ile seçilen yöntemle;
+  yöntem karşılaştırması için bench_sandbox)
+
+Zamanlama yöntemi (timeit ile):
+- Isınma turu (import, process pool, dosya önbelleği) ölçüme katılmaz.
+- Çağrı sayısı, bir tur en az --min-time sürecek şekilde otomatik seçilir.
+- --repeat tur ölçülür; GC tur sırasında kapalıdır. Çağrı başına medyan
+  raporlanır (en iyi tur ve turlar arası sapma ile birlikte).
+
+Baseline:
+    Sonuçlar benchmarks/baselines/micro.json ile karşılaştırılır; medyanı
+    baseline'dan --threshold oranından fazla yavaşlayan (en iyi tur da
+    eşiği aşan) ölçüm "REGRESYON"
+    olarak işaretlenir ve komut 1 ile çıkar (CI'da kullanılabilir).
+    Baseline makineye özgüdür; farklı bir makinede önce --save-baseline
+    ile yeniden oluşturun.
+
+Kullanım:
+    python -m benchmarks.bench_micro
+    python -m benchmarks.bench_micro --filter code_executor --repeat 10
+    python -m benchmarks.bench_micro --save-baseline
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+from benchmarks.bench_extraction import FILLER, make_pdf
+from rag_app.utils.text_processing import chunk_text, estimate_tokens, extract_text_from_file, iter_chunks
+from src.tools.code_executor import code_executor_tool, validate_code
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+
+
+def make_text(size_kb: int) -> str:
+    """Paragraf ve cümle yapısı olan, yaklaşık size_kb büyüklüğünde metin."""
+    paragraphs, n = [], 0
+    while sum(len(p) for p in paragraphs) < size_kb * 1024:
+        paragraphs.append(" ".join(f"{n}.{k} {FILLER}" for k in range(4)))
+        n += 1
+    return "\n\n".join(paragraphs)
+
+
+def make_docx(paragraphs: int) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for n in range(paragraphs):
+        document.add_paragraph(f"{n}. {FILLER}")
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_code(functions: int) -> str:
+    """Çok sayıda fonksiyon tanımı ve çağrısı içeren uzun, güvenli kod."""
+    lines = []
+    for n in range(functions):
+        lines += [f"def f{n}(x):", "    total = 0", "    for i in range(x):",
+                  f"        total += i * {n}", "    return total", ""]
+    lines.append(f"print(f{functions - 1}(1000))")
+    return "\n".join(lines)
+
+
+def extraction_case(data: bytes, filename: str, loop: asyncio.AbstractEventLoop):
+    """extract_text_from_file'ı uygulamadaki gibi bir UploadFile ile çağırır."""
+    from fastapi import UploadFile
+
+    def run():
+        return loop.run_until_complete(extract_text_from_file(UploadFile(io.BytesIO(data), filename=filename)))
+
+    return run
+
+
+def build_cases(loop: asyncio.AbstractEventLoop) -> dict:
+    """Ölçüm adı → argümansız çağrı. Girdiler ölçümden önce bir kez üretilir."""
+    small_text, large_text = make_text(10), make_text(5 * 1024)
+    short_code, long_code = "print(sum(range(100)))", make_code(500)
+    small_pdf, large_pdf = make_pdf(5), make_pdf(300)
+    docx_bytes = make_docx(2000)
+    txt_bytes = make_text(10 * 1024).encode("utf-8")
+
+    def executor(code):
+        return lambda: code_executor_tool.invoke({"code": code})
+
+    def executor_batch(n: int):
+        codes = [f"print({i} * {i})" for i in range(n)]
+        return lambda: [code_executor_tool.invoke({"code": c}) for c in codes]
+
+    return {
+        "chunk_text/10kb": lambda: chunk_text(small_text),
+        "chunk_text/5mb": lambda: chunk_text(large_text),
+        "iter_chunks/10kb": lambda: list(iter_chunks(small_text, count_tokens=estimate_tokens)),
+        "iter_chunks/5mb": lambda: list(iter_chunks(large_text, count_tokens=estimate_tokens)),
+        "extract/pdf_5p": extraction_case(small_pdf, "kucuk.pdf", loop),
+        "extract/pdf_300p": extraction_case(large_pdf, "buyuk.pdf", loop),
+        "extract/docx_2000par": extraction_case(docx_bytes, "belge.docx", loop),
+        "extract/txt_10mb": extraction_case(txt_bytes, "metin.txt", loop),
+        "validate_code/short": lambda: validate_code(short_code),
+        "validate_code/3000_lines": lambda: validate_code(long_code),
+        "code_executor/print": executor(short_code),
+        "code_executor/3000_lines": executor(long_code),
+        "code_executor/20_small_runs": executor_batch(20),
+    }
+
+
+def measure(fn, repeat: int, min_time: float) -> dict:
+    """
+    Çağrı başına süreyi ölçer.
+
+    Returns:
+        dict: median / best / stdev (sn, çağrı başına), number, repeat
+    """
+    fn()  # Isınma
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    rounds = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median": statistics.median(rounds),
+        "best": min(rounds),
+        "stdev": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Baseline'a göre threshold'dan fazla yavaşlayan ölçümlerin adları.
+    Gürültüden kaynaklı yanlış alarmı azaltmak için hem medyan hem en iyi
+    tur eşiği aşmalıdır.
+    """
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get("results", {}).get(name)
+        r["baseline"] = base["median"] if base else None
+        r["change"] = r["median"] / base["median"] - 1 if base else None
+        if base and r["change"] > threshold and r["best"] > base["best"] * (1 + threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion ve tool sıcak yolları mikro-benchmark'ı")
+    parser.add_argument("--filter", nargs="*", default=[], help="Sadece adında bu ifadeler geçen ölçümler")
+    parser.add_argument("--repeat", type=int, default=5, help="Ölçülen tur sayısı")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Bir turun en az süresi (sn)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.15, help="Regresyon eşiği (0.15 = %%15 yavaşlama)")
+    parser.add_argument("--save-baseline", action="store_true", help="Sonuçları baseline olarak kaydet")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    # code_executor her çağrıda INFO logu yazar; tablo okunur kalsın
+    logging.getLogger("src.tools.code_executor").setLevel(logging.WARNING)
+    logging.getLogger("src.tools.sandbox_pool").setLevel(logging.WARNING)
+    loop = asyncio.new_event_loop()
+    cases = build_cases(loop)
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if any(f in name for f in args.filter)}
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"{'ölçüm':<28} {'medyan':>10} {'en iyi':>10} {'sapma':>7} {'n×tur':>7} | {'baseline':>10} {'Δ':>7}")
+    print("-" * 88)
+    results = {}
+    try:
+        for name, fn in cases.items():
+            r = measure(fn, args.repeat, args.min_time)
+            results[name] = r
+            regressions = compare({name: r}, baseline, args.threshold)
+            change = f"{r['change']:>+7.1%}" if r["change"] is not None else f"{'-':>7}"
+            base = format_time(r["baseline"]) if r["baseline"] else "-"
+            print(f"{name:<28} {format_time(r['median']):>10} {format_time(r['best']):>10} "
+                  f"{r['stdev'] / r['median']:>7.1%} {r['number']:>3}×{r['repeat']:<3} | {base:>10} {change}"
+                  f"{'  REGRESYON' if regressions else ''}")
+    finally:
+        from rag_app.services.extraction import parallel_extractor
+        from src.tools.sandbox_pool import sandbox_pool
+
+        parallel_extractor.shutdown()
+        sandbox_pool.shutdown()
+        loop.close()
+
+    report = {
+        "meta": {
+            "benchmark": "micro",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        # Filtreli çalıştırmada diğer ölçümlerin baseline'ı korunur
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                report["results"] = {**json.load(f).get("results", {}), **results}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        for r in report["results"].values():
+            r.pop("baseline", None)
+            r.pop("change", None)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nBaseline kaydedildi: {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} ölçümde %{args.threshold * 100:.0f}'ten fazla yavaşlama: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
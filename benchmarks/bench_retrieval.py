@@ -0,0 +1,337 @@
+"""
+Retrieval ölçeklenme ve recall benchmark'ı.
+
+Sentetik korpuslar (kümelenmiş, normalize 384 boyutlu vektörler + chunk
+metadatası) üzerinde VectorStore'u farklı FAISS indeks yapılandırmaları ve
+depolama arka uçlarıyla ölçer:
+
+- Ingest throughput: add_documents ile eklenen vektör/sn (batch'ler halinde)
+- İndeks kurma süresi: eğitim (IVF / PQ) + ekleme
+- Bellek: diskteki indeks + metadata boyutu ve process RSS artışı
+- Açılış yükleme süresi: diskteki indeksin yeni bir VectorStore'a yüklenmesi
+- k başına arama gecikmesi (search) ve rag_engine yolu (search_mmr)
+- recall@k: Tam (exact) arama sonucuna göre; referans sonuç korpus bellekte
+  tutulmadan, batch'ler üzerinde akış halinde hesaplanır.
+
+Arka uçlar:
+    local   : Process içi VectorStore (FAISS dosyası + pickle metadata)
+    sidecar : Aynı VectorStore, paylaşılan indeks servisi (index_server)
+              üzerinden RemoteVectorStore ile (RPC + serileştirme maliyeti dahil)
+
+Kullanım:
+    python -m benchmarks.bench_retrieval
+    python -m benchmarks.bench_retrieval --sizes 10000 100000 1000000 --indexes Flat HNSW32 "IVF{nlist},Flat"
+    python -m benchmarks.bench_retrieval --sizes 10000000 --indexes "IVF{nlist},PQ48" --backends local
+    (10M vektör Flat indekste ~15 GB bellek ister; büyük boyutlarda IVF / PQ kullanın)
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import faiss
+import numpy as np
+
+from rag_app.services.index_client import IndexServiceClient, RemoteVectorStore
+from rag_app.services.index_server import IndexServer
+from rag_app.services.vector_store import DIMENSION, VectorStore
+from src.config import INGEST_COMMIT_BATCH_SIZE, RAG_FETCH_K
+from src.monitoring.metrics import percentile
+
+DEFAULT_INDEXES = ["Flat", "HNSW32", "IVF{nlist},Flat"]
+_FILLER = ("Çalışanlar yılda 14 gün ücretli izin kullanır ve izin talepleri en az bir hafta önceden "
+           "yöneticiye iletilir. Uzaktan çalışma haftada iki gün ile sınırlıdır. ") * 8
+
+
+class SyntheticCorpus:
+    """
+    Tekrar üretilebilir, kümelenmiş vektör korpusu.
+
+    Vektörler batch'ler halinde üretilir; her batch kendi tohumundan
+    türetildiği için korpusun tamamı bellekte tutulmadan tekrar okunabilir.
+
+    Args:
+        size: Vektör sayısı.
+        clusters: Küme (konu) sayısı; gerçek embedding'ler gibi vektörler kümelenir.
+        noise: Küme merkezinden sapma (büyüdükçe kümeler dağılır).
+        text_chars: Metadata'daki chunk metninin uzunluğu.
+    """
+
+    def __init__(self, size: int, dim: int = DIMENSION, clusters: int = 1000, noise: float = 0.6,
+                 text_chars: int = 200, seed: int = 42, batch_size: int = 100_000):
+        self.size = size
+        self.dim = dim
+        self.noise = noise
+        self.text_chars = text_chars
+        self.seed = seed
+        self.batch_size = batch_size
+        self.centers = self._normalize(np.random.default_rng(seed).standard_normal((clusters, dim), dtype="float32"))
+
+    @staticmethod
+    def _normalize(x: np.ndarray) -> np.ndarray:
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    def _sample(self, rng, n: int) -> np.ndarray:
+        labels = rng.integers(len(self.centers), size=n)
+        noise = rng.standard_normal((n, self.dim), dtype="float32") * (self.noise / math.sqrt(self.dim))
+        return self._normalize(self.centers[labels] + noise)
+
+    def batches(self, batch_size: int = None):
+        """(başlangıç id, vektörler) çiftlerini üretir."""
+        batch_size = batch_size or self.batch_size
+        for start in range(0, self.size, self.batch_size):
+            vectors = self._sample(np.random.default_rng((self.seed, 0, start)), min(self.batch_size, self.size - start))
+            for offset in range(0, len(vectors), batch_size):
+                yield start + offset, vectors[offset:offset + batch_size]
+
+    def metas(self, start: int, n: int) -> list:
+        return [{"filename": f"doc_{i // 50}.txt", "text": f"Chunk {i}. {_FILLER[:self.text_chars]}"}
+                for i in range(start, start + n)]
+
+    def queries(self, n: int) -> np.ndarray:
+        return self._sample(np.random.default_rng((self.seed, 1)), n)
+
+    def training_sample(self, n: int) -> np.ndarray:
+        return self._sample(np.random.default_rng((self.seed, 2)), n)
+
+
+def exact_topk(corpus: SyntheticCorpus, queries: np.ndarray, k: int) -> np.ndarray:
+    """Tam arama referansı: her batch'in top-k'sı akış halinde birleştirilir."""
+    best_scores = np.full((len(queries), 0), -np.inf, dtype="float32")
+    best_ids = np.zeros((len(queries), 0), dtype="int64")
+    for start, vectors in corpus.batches():
+        scores = queries @ vectors.T
+        kk = min(k, scores.shape[1])
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        best_scores = np.hstack([best_scores, np.take_along_axis(scores, top, axis=1)])
+        best_ids = np.hstack([best_ids, top + start])
+        order = np.argsort(-best_scores, axis=1)[:, :k]
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+    return best_ids
+
+
+def index_spec(spec: str, size: int) -> str:
+    """"{nlist}" yer tutucusunu korpus boyutuna göre doldurur (~4·√N liste)."""
+    nlist = max(1, min(65536, int(4 * math.sqrt(size))))
+    return spec.replace("{nlist}", str(nlist))
+
+
+def build_index(spec: str, corpus: SyntheticCorpus, nprobe: int, ef_search: int):
+    """
+    FAISS factory ile (inner product) boş indeks oluşturur, gerekiyorsa eğitir.
+
+    Returns:
+        tuple: (indeks, eğitim süresi sn)
+    """
+    index = faiss.index_factory(corpus.dim, spec, faiss.METRIC_INNER_PRODUCT)
+    train_s = 0.0
+    if not index.is_trained:
+        ivf = faiss.extract_index_ivf(index)
+        # FAISS küme başına ~39 eğitim noktası ister (PQ: 256 merkez)
+        sample = corpus.training_sample(max(256 * 39, ivf.nlist * 39))
+        started = time.perf_counter()
+        index.train(sample)
+        train_s = time.perf_counter() - started
+    if "IVF" in spec:
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = nprobe
+        # search_mmr aday vektörlerini indeksten okur (reconstruct)
+        ivf.set_direct_map_type(faiss.DirectMap.Array)
+    if "HNSW" in spec:
+        faiss.downcast_index(index).hnsw.efSearch = ef_search
+    return index, train_s
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class SidecarBackend:
+    """VectorStore'u indeks servisi üzerinden sunar (servis arka plan thread'inde)."""
+
+    def __init__(self, store: VectorStore, socket_path: str):
+        self.server = IndexServer(vector_store=store)
+        self.address = f"unix:{socket_path}"
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start(self.address))
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="bench-index-server", daemon=True)
+        self.thread.start()
+        started.wait(10)
+        self.store = RemoteVectorStore(IndexServiceClient(self.address))
+
+    def close(self):
+        # Bağlantı kapanınca servis tarafındaki bağlantı görevi kendiliğinden biter
+        self.store.client._drop_connection()
+
+        async def shutdown():
+            self.server.close()
+            pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            if pending:
+                await asyncio.wait(pending, timeout=5)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout=10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+def measure_search(store, queries: np.ndarray, ks: list, truth: np.ndarray, mmr_min_score: float) -> dict:
+    """k başına gecikme ve recall@k; ardından search_mmr gecikmesi."""
+    result = {"search": {}}
+    for k in ks:
+        latencies, hits = [], 0
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            found = store.search(q.tolist(), k=k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            # Chunk metni "Chunk {id}." ile başlar; id'ler referansla karşılaştırılır
+            ids = {int(r["text"][6:r["text"].index(".")]) for r in found}
+            hits += len(ids.intersection(expected[:k].tolist()))
+        latencies.sort()
+        result["search"][k] = {
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "recall": hits / (len(queries) * k),
+        }
+    latencies = []
+    for q in queries:
+        started = time.perf_counter()
+        store.search_mmr(q.tolist(), min_score=mmr_min_score, fetch_k=RAG_FETCH_K)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    result["mmr"] = {"p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95)}
+    return result
+
+
+def run_config(corpus: SyntheticCorpus, spec: str, backend: str, queries, truth, args, workdir: str) -> dict:
+    """Tek bir (boyut, indeks, arka uç) yapılandırmasını kurar ve ölçer."""
+    index_path, metadata_path = os.path.join(workdir, "faiss_index.bin"), os.path.join(workdir, "metadata.pkl")
+    gc.collect()
+    rss_before = rss_mb()
+
+    store = VectorStore(index_path, metadata_path)
+    store.index, train_s = build_index(spec, corpus, args.nprobe, args.ef_search)
+    sidecar = SidecarBackend(store, os.path.join(workdir, "index.sock")) if backend == "sidecar" else None
+    target = sidecar.store if sidecar else store
+    try:
+        started = time.perf_counter()
+        for start, vectors in corpus.batches(args.batch_size):
+            target.add_documents(vectors, corpus.metas(start, len(vectors)), save=False)
+        add_s = time.perf_counter() - started
+        rss_after = rss_mb()
+
+        started = time.perf_counter()
+        target.save()
+        save_s = time.perf_counter() - started
+
+        search = measure_search(target, queries, args.k, truth, args.mmr_min_score)
+    finally:
+        if sidecar:
+            sidecar.close()
+    del store, target
+    gc.collect()
+
+    # Açılış: diskteki indeks yeni bir VectorStore'a yüklenir (iki arka uçta da aynı format)
+    started = time.perf_counter()
+    VectorStore(index_path, metadata_path).warm_up()
+    load_s = time.perf_counter() - started
+
+    return {
+        "size": corpus.size,
+        "index": spec,
+        "backend": backend,
+        "train_s": train_s,
+        "build_s": train_s + add_s,
+        "ingest_vps": corpus.size / add_s,
+        "save_s": save_s,
+        "load_s": load_s,
+        "index_mb": os.path.getsize(index_path) / 1e6,
+        "metadata_mb": os.path.getsize(metadata_path) / 1e6,
+        "rss_delta_mb": rss_after - rss_before,
+        **search,
+    }
+
+
+def print_header(ks: list):
+    cols = " ".join(f"{f'p50@{k}':>7} {f'r@{k}':>6}" for k in ks)
+    print(f"{'boyut':>9} {'indeks':<18} {'arka uç':<8} | {'kurma s':>8} {'vektör/s':>9} {'disk MB':>8} "
+          f"{'ΔRSS MB':>8} {'yükle s':>7} | {cols} {'mmr p50':>7}")
+    print("-" * (92 + 15 * len(ks)))
+
+
+def print_row(r: dict, ks: list):
+    cols = " ".join(f"{r['search'][k]['p50_ms']:>7.2f} {r['search'][k]['recall']:>6.3f}" for k in ks)
+    print(f"{r['size']:>9} {r['index']:<18} {r['backend']:<8} | {r['build_s']:>8.2f} {r['ingest_vps']:>9.0f} "
+          f"{r['index_mb'] + r['metadata_mb']:>8.1f} {r['rss_delta_mb']:>8.1f} {r['load_s']:>7.2f} | "
+          f"{cols} {r['mmr']['p50_ms']:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval ölçeklenme ve recall benchmark'ı")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--indexes", nargs="+", default=DEFAULT_INDEXES,
+                        help="FAISS factory dizgeleri; {nlist} korpus boyutuna göre doldurulur")
+    parser.add_argument("--backends", nargs="+", choices=["local", "sidecar"], default=["local", "sidecar"])
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10, 50])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=INGEST_COMMIT_BATCH_SIZE, help="add_documents batch'i")
+    parser.add_argument("--nprobe", type=int, default=16, help="IVF: taranan liste sayısı")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW: arama genişliği")
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--text-chars", type=int, default=200, help="Metadata'daki chunk metni uzunluğu")
+    parser.add_argument("--mmr-min-score", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+    args.k = sorted(set(args.k))
+
+    results = []
+    print_header(args.k)
+    for size in args.sizes:
+        corpus = SyntheticCorpus(size, clusters=args.clusters, text_chars=args.text_chars, seed=args.seed)
+        queries = corpus.queries(args.queries)
+        truth = exact_topk(corpus, queries, max(args.k))
+        for spec in args.indexes:
+            for backend in args.backends:
+                workdir = tempfile.mkdtemp(prefix="bench_retrieval_")
+                try:
+                    # VectorStore her batch için satır yazdırır; tablo okunur kalsın
+                    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                        result = run_config(corpus, index_spec(spec, size), backend, queries, truth, args, workdir)
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+                print_row(result, args.k)
+                results.append(result)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": {"benchmark": "retrieval", "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                                "args": vars(args)}, "results": results}, f, indent=2, ensure_ascii=False)
+        print(f"\nSonuçlar yazıldı: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Kod çalıştırma: her çağrıda yeni process ve önceden ısıtılmış worker havuzu.
+
+code_executor_tool'u uçtan uca (güvenlik kontrolü dahil) farklı çalıştırma
+yöntemleriyle çağırır ve çağrı başına gecikmeyi karşılaştırır:
+
+    spawn : Her çağrıda geçici dosya + yeni `python` process'i (havuz kapalı)
+    pool  : SandboxPool (CODE_SANDBOX_MAX_JOBS ile; fork olan sistemde her
+            iş worker'dan fork edilen çocukta çalışır)
+    pool1 : SandboxPool, max_jobs=1 (her işten sonra worker yenilenir;
+            fork olmayan platformlardaki varsayılan davranış)
+
+Yükler:
+    print  : Tek satırlık hesaplama
+    numpy  : numpy import + küçük matris çarpımı (havuz önceden import eder)
+    long   : ~3000 satırlık kod
+
+Desenler:
+    ardışık  : Çağrılar arka arkaya (havuzun yenileme hızı sınanır)
+    aralıklı : Çağrılar arasında --interval ms bekleme (ajanlar arasında LLM
+               düşünme süresi gibi; yenilenen worker arada ısınır)
+
+Kullanım:
+    python -m benchmarks.bench_sandbox
+    python -m benchmarks.bench_sandbox --calls 50 --workers 2 --interval 200
+    python -m benchmarks.bench_sandbox --modes spawn pool --workloads numpy
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import time
+
+from benchmarks.bench_micro import make_code
+from src.config import CODE_SANDBOX_MAX_JOBS, CODE_SANDBOX_PRELOAD, CODE_SANDBOX_WORKERS
+from src.monitoring.metrics import percentile
+from src.tools import code_executor
+from src.tools.sandbox_pool import SandboxPool
+
+WORKLOADS = {
+    "print": "print(sum(range(100)))",
+    "numpy": "import numpy as np\nm = np.arange(100.0).reshape(10, 10)\nprint(float((m @ m).sum()))",
+    "long": make_code(500),
+}
+
+
+def make_pool(mode: str, workers: int, max_jobs: int):
+    """Mod için havuz; spawn modunda kapalı (size=0) havuz."""
+    if mode == "spawn":
+        return SandboxPool(size=0)
+    pool = SandboxPool(size=workers, max_jobs=1 if mode == "pool1" else max_jobs, preload=CODE_SANDBOX_PRELOAD)
+    pool.start()
+    # Açılış ölçüme katılmaz (uygulamada lifespan'de başlatılır)
+    for _ in range(workers):
+        pool.run("pass", timeout=60)
+    return pool
+
+
+def run_case(mode: str, code: str, calls: int, interval_ms: float, workers: int, max_jobs: int) -> dict:
+    """
+    code_executor_tool'u calls kez çağırır.
+
+    Returns:
+        dict: p50 / p95 / ortalama gecikme (ms), toplam süre (sn)
+    """
+    pool = make_pool(mode, workers, max_jobs)
+    code_executor.sandbox_pool = pool
+    latencies = []
+    try:
+        started = time.perf_counter()
+        for _ in range(calls):
+            if interval_ms and latencies:
+                time.sleep(interval_ms / 1000)
+            t0 = time.perf_counter()
+            result = code_executor.code_executor_tool.invoke({"code": code})
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if not result.startswith("Çıktı"):
+                raise RuntimeError(f"Beklenmeyen sonuç ({mode}): {result[:200]}")
+        total = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+    latencies.sort()
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": statistics.fmean(latencies),
+        "total_s": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kod çalıştırma: yeni process / worker havuzu karşılaştırması")
+    parser.add_argument("--modes", nargs="+", choices=["spawn", "pool", "pool1"], default=["spawn", "pool", "pool1"])
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--calls", type=int, default=30, help="Durum başına çağrı sayısı")
+    parser.add_argument("--interval", type=float, default=300, help="Aralıklı desende çağrılar arası bekleme (ms)")
+    parser.add_argument("--workers", type=int, default=max(1, CODE_SANDBOX_WORKERS))
+    parser.add_argument("--max-jobs", type=int, default=CODE_SANDBOX_MAX_JOBS, help="pool modunda worker yenileme sıklığı")
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    logging.getLogger("src.tools.code_executor").setLevel(logging.WARNING)
+    logging.getLogger("src.tools.sandbox_pool").setLevel(logging.WARNING)
+    original_pool = code_executor.sandbox_pool
+
+    print(f"{'yük':<7} {'desen':<9} {'mod':<6} | {'p50 ms':>8} {'p95 ms':>8} {'ort ms':>8} {'toplam s':>9} {'hızlanma':>9}")
+    print("-" * 72)
+    results = []
+    try:
+        for workload in args.workloads:
+            for pattern, interval in (("ardışık", 0.0), ("aralıklı", args.interval)):
+                baseline = None
+                for mode in args.modes:
+                    r = run_case(mode, WORKLOADS[workload], args.calls, interval, args.workers, args.max_jobs)
+                    r.update(workload=workload, pattern=pattern, mode=mode)
+                    results.append(r)
+                    if mode == "spawn":
+                        baseline = r["p50_ms"]
+                    speedup = f"{baseline / r['p50_ms']:>8.1f}x" if baseline else f"{'-':>9}"
+                    print(f"{workload:<7} {pattern:<9} {mode:<6} | {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                          f"{r['mean_ms']:>8.1f} {r['total_s']:>9.2f} {speedup}")
+    finally:
+        code_executor.sandbox_pool = original_pool
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+"""
+Deterministik yerel LLM sunucusu (mock) ve kayıt/tekrar (record/replay) aracı.
+
+Canlı Gemini anahtarı ve Ollama kurulumu olmadan boru hattının benchmark ve
+yük testlerini yapabilmek için iki API'yi taklit eder:
+
+- Ollama: POST /api/chat (NDJSON akış dahil), /api/generate (warm-up),
+  GET /api/tags, /api/ps.
+- Gemini (ChatGoogleGenerativeAI'nin kullandığı REST alt kümesi):
+  POST /v1beta/models/{model}:generateContent ve
+  :streamGenerateContent?alt=sse.
+
+Uygulamayı sunucuya yönlendirmek için:
+    OLLAMA_BASE_URL=http://127.0.0.1:11500
+    GEMINI_BASE_URL=http://127.0.0.1:11500
+    GEMINI_API_KEY=mock
+
+Modlar:
+    mock   : Cevaplar senaryo kurallarından (--script) üretilir. İlk token
+             gecikmesi bir dağılımdan (--latency, --tail-prob/--tail-ms)
+             örneklenir, ardından cevap --tokens-per-sec hızıyla akıtılır.
+             Aynı tohum (--seed) ile aynı gecikme dizisi üretilir.
+    record : İstekler gerçek sağlayıcılara iletilir; cevaplar parça
+             zamanlamalarıyla birlikte kasete (--cassette, JSONL) yazılır.
+    replay : Kasetteki cevaplar kayıtlı zamanlamayla (--time-scale) tekrar
+             oynatılır; kasette olmayan istekler 404 döner
+             (--on-miss mock ile senaryoya düşer).
+
+Senaryo dosyası (JSON):
+    {
+      "seed": 0,
+      "providers": {"gemini": {"latency": "lognormal:800,0.5", "tail_prob": 0.02,
+                               "tail_ms": 4000, "tokens_per_sec": 80}},
+      "rules": [
+        {"match": "fibonacci|hesapla", "tool_calls": [{"name": "code_executor_tool",
+                                                       "args": {"code": "print(55)"}}]},
+        {"match": "gelir", "provider": "gemini", "text": "Gelir 12 milyon TL. Soru: {prompt}"}
+      ]
+    }
+Kurallar sırayla denenir (match: büyük/küçük harf duyarsız regex, son
+kullanıcı mesajına uygulanır). tool_calls içeren kural sadece istek o
+tool'ları sunuyorsa ve konuşmada henüz tool sonucu yoksa uygulanır; böylece
+ajan döngüsü tool sonucundan sonra metin cevabına geçer.
+
+Kullanım:
+    python -m benchmarks.mock_llm_server --port 11500 --latency lognormal:300,0.5 --tokens-per-sec 60
+    python -m benchmarks.mock_llm_server --mode record --cassette data/cassette.jsonl
+    python -m benchmarks.mock_llm_server --mode replay --cassette data/cassette.jsonl --time-scale 0
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+DEFAULT_MODELS = ["llama3.1:latest", "llama3.2:3b", "gemini-2.5-flash"]
+OLLAMA_UPSTREAM = "http://localhost:11434"
+GEMINI_UPSTREAM = "https://generativelanguage.googleapis.com"
+# Kaset anahtarına girmeyen, çağrıdan çağrıya değişebilen alanlar
+VOLATILE_FIELDS = ("keep_alive",)
+
+
+# --- Gecikme ve akış modeli ---
+
+@dataclass
+class LatencyModel:
+    """
+    İlk token gecikmesi dağılımı (ms).
+
+    spec: "fixed:MS", "uniform:MIN,MAX", "normal:ORT,STD" veya
+    "lognormal:MEDYAN,SIGMA". tail_prob olasılıkla tail_ms eklenir
+    (sağlayıcıların seyrek kuyruk gecikmelerini taklit eder).
+    """
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+    tail_prob: float = 0.0
+    tail_ms: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str, tail_prob: float = 0.0, tail_ms: float = 0.0) -> "LatencyModel":
+        kind, _, args = spec.partition(":")
+        values = [float(v) for v in args.split(",") if v.strip()] or [0.0]
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Bilinmeyen gecikme dağılımı: {spec}")
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0, tail_prob, tail_ms)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            value = rng.uniform(self.a, self.b)
+        elif self.kind == "normal":
+            value = rng.gauss(self.a, self.b)
+        elif self.kind == "lognormal":
+            value = self.a * math.exp(self.b * rng.gauss(0, 1))
+        else:
+            value = self.a
+        if self.tail_prob and rng.random() < self.tail_prob:
+            value += self.tail_ms
+        return max(0.0, value)
+
+
+@dataclass
+class ProviderProfile:
+    """Bir sağlayıcının gecikme dağılımı ve token üretim hızı."""
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    tokens_per_sec: float = 0.0   # 0 = beklemeden akıt
+
+
+@dataclass
+class Reply:
+    text: str = ""
+    tool_calls: List[dict] = field(default_factory=list)   # [{"name": ..., "args": {...}}]
+
+
+@dataclass
+class ScriptRule:
+    match: Optional[str] = None
+    provider: Optional[str] = None
+    model: Optional[str] = None
+    text: Optional[str] = None
+    tool_calls: List[dict] = field(default_factory=list)
+
+    def applies(self, provider: str, model: str, prompt: str, tool_names: set, has_tool_result: bool) -> bool:
+        if self.provider and self.provider != provider:
+            return False
+        if self.model and self.model != model:
+            return False
+        if self.match and not re.search(self.match, prompt, re.IGNORECASE):
+            return False
+        if self.tool_calls:
+            return not has_tool_result and all(c["name"] in tool_names for c in self.tool_calls)
+        return True
+
+
+def tokenize(text: str) -> List[str]:
+    """Akış için metni kelime + ardındaki boşluk parçalarına böler."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+class MockBackend:
+    """
+    Senaryo kurallarından deterministik cevap ve gecikme üretir.
+
+    Args:
+        rules: Sırayla denenen cevap kuralları.
+        profiles: Sağlayıcı bazında gecikme profili ("default" tümüne uygulanır).
+        seed: Gecikme örneklemesi için tohum.
+    """
+
+    def __init__(self, rules: List[ScriptRule], profiles: Dict[str, ProviderProfile], seed: int = 0):
+        self.rules = rules
+        self.profiles = profiles
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_script(cls, script: dict, default: ProviderProfile, seed: int = 0) -> "MockBackend":
+        profiles = {"default": default}
+        for name, cfg in script.get("providers", {}).items():
+            latency = LatencyModel.parse(cfg.get("latency", "fixed:0"), cfg.get("tail_prob", 0.0),
+                                         cfg.get("tail_ms", 0.0))
+            profiles[name] = ProviderProfile(latency, cfg.get("tokens_per_sec", default.tokens_per_sec))
+        rules = [ScriptRule(**rule) for rule in script.get("rules", [])]
+        return cls(rules, profiles, script.get("seed", seed))
+
+    def profile(self, provider: str) -> ProviderProfile:
+        return self.profiles.get(provider, self.profiles["default"])
+
+    def reply(self, provider: str, model: str, prompt: str, tool_names: set, has_tool_result: bool) -> Reply:
+        for rule in self.rules:
+            if rule.applies(provider, model, prompt, tool_names, has_tool_result):
+                if rule.tool_calls:
+                    return Reply(tool_calls=rule.tool_calls)
+                return Reply(text=(rule.text or "").replace("{prompt}", prompt))
+        return Reply(text=f"Mock yanıt ({model}): {prompt[:200]}")
+
+    def first_token_delay(self, provider: str) -> float:
+        """İlk token gecikmesi (sn)."""
+        with self._lock:
+            return self.profile(provider).latency.sample(self.rng) / 1000
+
+    def token_delay(self, provider: str) -> float:
+        tps = self.profile(provider).tokens_per_sec
+        return 1.0 / tps if tps > 0 else 0.0
+
+
+# --- Kaset (record / replay) ---
+
+def cassette_key(provider: str, path: str, body: dict) -> str:
+    """İstek için kaset anahtarı: sağlayıcı, yol ve değişken alanları atılmış gövde."""
+    stable = {k: v for k, v in body.items() if k not in VOLATILE_FIELDS}
+    payload = json.dumps([provider, path, stable], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    JSONL kaset dosyası. Her satır bir etkileşimdir:
+    {"key", "provider", "path", "request", "status", "media_type", "chunks": [[ms, metin], ...]}
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def add(self, entry: dict):
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+# --- Sağlayıcı formatları ---
+
+def _ollama_request(body: dict) -> Tuple[str, set, bool]:
+    messages = body.get("messages", [])
+    prompt = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    tools = {t.get("function", {}).get("name") for t in body.get("tools") or []}
+    return prompt, tools, any(m.get("role") == "tool" for m in messages)
+
+
+def _gemini_request(body: dict) -> Tuple[str, set, bool]:
+    prompt, has_tool_result = "", False
+    for content in body.get("contents", []):
+        texts = [p["text"] for p in content.get("parts", []) if "text" in p]
+        if content.get("role", "user") == "user" and texts:
+            prompt = "".join(texts)
+        has_tool_result = has_tool_result or any("functionResponse" in p for p in content.get("parts", []))
+    tools = {d.get("name") for t in body.get("tools") or [] for d in t.get("functionDeclarations", [])}
+    return prompt, tools, has_tool_result
+
+
+def _ollama_chunk(model: str, content: str = "", tool_calls: Optional[list] = None, done: bool = False,
+                  eval_count: int = 0, duration_ns: int = 0) -> dict:
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = [{"function": {"name": c["name"], "arguments": c.get("args", {})}}
+                                 for c in tool_calls]
+    chunk = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "message": message, "done": done}
+    if done:
+        chunk.update(done_reason="stop", total_duration=duration_ns, load_duration=0, prompt_eval_count=1,
+                     prompt_eval_duration=0, eval_count=eval_count, eval_duration=duration_ns)
+    return chunk
+
+
+def _gemini_chunk(model: str, text: str = "", tool_calls: Optional[list] = None, done: bool = False,
+                  eval_count: int = 0) -> dict:
+    parts = [{"functionCall": {"name": c["name"], "args": c.get("args", {})}} for c in tool_calls or []]
+    if text or not parts:
+        parts.insert(0, {"text": text})
+    candidate = {"content": {"role": "model", "parts": parts}, "index": 0}
+    chunk = {"candidates": [candidate], "modelVersion": model}
+    if done:
+        candidate["finishReason"] = "STOP"
+        chunk["usageMetadata"] = {"promptTokenCount": 1, "candidatesTokenCount": eval_count,
+                                  "totalTokenCount": eval_count + 1}
+    return chunk
+
+
+# --- Uygulama ---
+
+def create_app(backend: MockBackend, mode: str = "mock", cassette: Optional[Cassette] = None,
+               time_scale: float = 1.0, on_miss: str = "error", models: Optional[List[str]] = None,
+               ollama_upstream: str = OLLAMA_UPSTREAM, gemini_upstream: str = GEMINI_UPSTREAM) -> FastAPI:
+    """
+    Mock sunucu uygulamasını oluşturur.
+
+    Args:
+        backend: Senaryo ve gecikme modeli.
+        mode: "mock", "record" veya "replay".
+        cassette: record/replay için kaset.
+        time_scale: Replay'de kayıtlı zamanlamaların çarpanı (0 = beklemeden).
+        on_miss: Replay'de kasette olmayan istek: "error" (404) veya "mock".
+        models: /api/tags ve /api/ps'de listelenecek modeller.
+    """
+    if mode in ("record", "replay") and cassette is None:
+        raise ValueError(f"'{mode}' modu için kaset gerekli")
+    app = FastAPI(title="Mock LLM")
+    app.state.requests = 0
+    models = models or DEFAULT_MODELS
+
+    def generate(provider: str, model: str, body: dict, stream: bool) -> Tuple[AsyncIterator[str], str]:
+        parse = _ollama_request if provider == "ollama" else _gemini_request
+        prompt, tool_names, has_tool_result = parse(body)
+        reply = backend.reply(provider, model, prompt, tool_names, has_tool_result)
+        tokens = tokenize(reply.text)
+
+        def encode(chunk: dict) -> str:
+            return json.dumps(chunk) + "\n" if provider == "ollama" else f"data: {json.dumps(chunk)}\r\n\r\n"
+
+        async def streamed() -> AsyncIterator[str]:
+            started = time.perf_counter()
+            await asyncio.sleep(backend.first_token_delay(provider))
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(backend.token_delay(provider))
+                chunk = _ollama_chunk(model, token) if provider == "ollama" else _gemini_chunk(model, token)
+                yield encode(chunk)
+            duration_ns = int((time.perf_counter() - started) * 1e9)
+            if provider == "ollama":
+                if reply.tool_calls:
+                    yield encode(_ollama_chunk(model, tool_calls=reply.tool_calls))
+                yield encode(_ollama_chunk(model, done=True, eval_count=len(tokens), duration_ns=duration_ns))
+            else:
+                yield encode(_gemini_chunk(model, tool_calls=reply.tool_calls, done=True, eval_count=len(tokens)))
+
+        async def whole() -> AsyncIterator[str]:
+            # Akışsız cevap da aynı toplam süreyi bekler
+            started = time.perf_counter()
+            await asyncio.sleep(backend.first_token_delay(provider)
+                                + backend.token_delay(provider) * max(0, len(tokens) - 1))
+            duration_ns = int((time.perf_counter() - started) * 1e9)
+            yield json.dumps(_merge(provider, model, reply, len(tokens), duration_ns))
+
+        if not stream:
+            return whole(), "application/json"
+        return streamed(), "application/x-ndjson" if provider == "ollama" else "text/event-stream"
+
+    async def replay(entry: dict) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        for offset_ms, data in entry["chunks"]:
+            wait = offset_ms / 1000 * time_scale - (time.perf_counter() - started)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield data
+
+    async def record(provider: str, request: Request, path: str, body: dict, key: str) -> Response:
+        import httpx
+
+        upstream = ollama_upstream if provider == "ollama" else gemini_upstream
+        headers = {k: v for k, v in request.headers.items()
+                   if k.lower() in ("content-type", "x-goog-api-key", "authorization")}
+        url = upstream.rstrip("/") + request.url.path
+        if request.url.query:
+            url += "?" + request.url.query
+        client = httpx.AsyncClient(timeout=None)
+        upstream_response = await client.send(client.build_request("POST", url, json=body, headers=headers),
+                                              stream=True)
+        media_type = upstream_response.headers.get("content-type", "application/json")
+
+        async def forward() -> AsyncIterator[str]:
+            started = time.perf_counter()
+            chunks = []
+            try:
+                async for text in upstream_response.aiter_text():
+                    chunks.append([(time.perf_counter() - started) * 1000, text])
+                    yield text
+            finally:
+                await upstream_response.aclose()
+                await client.aclose()
+            # API anahtarı ve başlıklar kaydedilmez; sadece yol ve gövde
+            cassette.add({"key": key, "provider": provider, "path": path, "request": body,
+                          "status": upstream_response.status_code, "media_type": media_type, "chunks": chunks})
+
+        return StreamingResponse(forward(), status_code=upstream_response.status_code, media_type=media_type)
+
+    async def handle(provider: str, request: Request, model: str, stream: bool) -> Response:
+        app.state.requests += 1
+        body = await request.json()
+        path = request.url.path
+        key = cassette_key(provider, path + ("?stream" if stream else ""), body)
+        if mode == "record":
+            return await record(provider, request, path, body, key)
+        if mode == "replay":
+            entry = cassette.get(key)
+            if entry is not None:
+                return StreamingResponse(replay(entry), status_code=entry["status"], media_type=entry["media_type"])
+            if on_miss == "error":
+                return JSONResponse({"error": f"Kasette kayıt yok: {provider} {path}"}, status_code=404)
+        iterator, media_type = generate(provider, model, body, stream)
+        return StreamingResponse(iterator, media_type=media_type)
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        body = await request.json()
+        return await handle("ollama", request, body.get("model", ""), body.get("stream", True))
+
+    @app.post("/api/generate")
+    async def ollama_generate(request: Request):
+        # Warm-up çağrıları: model "yüklenir" ve hemen döner
+        body = await request.json()
+        return {"model": body.get("model", ""), "response": "", "done": True, "load_duration": 0}
+
+    @app.get("/api/tags")
+    async def ollama_tags():
+        return {"models": [{"model": m, "name": m} for m in models if not m.startswith("gemini")]}
+
+    @app.get("/api/ps")
+    async def ollama_ps():
+        return {"models": [{"model": m, "name": m} for m in models if not m.startswith("gemini")]}
+
+    @app.post("/v1beta/models/{model_action}")
+    async def gemini_generate(model_action: str, request: Request):
+        model, _, action = model_action.partition(":")
+        if action not in ("generateContent", "streamGenerateContent"):
+            return JSONResponse({"error": {"message": f"Desteklenmeyen işlem: {action}"}}, status_code=404)
+        return await handle("gemini", request, model, action == "streamGenerateContent")
+
+    return app
+
+
+def _merge(provider: str, model: str, reply: Reply, eval_count: int, duration_ns: int) -> dict:
+    """Akışsız (stream=false) cevap gövdesi."""
+    if provider == "ollama":
+        return _ollama_chunk(model, reply.text, reply.tool_calls, done=True, eval_count=eval_count,
+                             duration_ns=duration_ns)
+    return _gemini_chunk(model, reply.text, reply.tool_calls, done=True, eval_count=eval_count)
+
+
+class MockServerThread:
+    """
+    Mock sunucuyu arka plan thread'inde çalıştırır (testler ve benchmark'lar için).
+
+    Kullanım:
+        with MockServerThread(app) as server:
+            ... server.url ...
+    """
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", port: int = 0):
+        import uvicorn
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off"))
+        self.thread = threading.Thread(target=self.server.run, name="mock-llm-server", daemon=True)
+        self.host = host
+
+    @property
+    def url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://{self.host}:{port}"
+
+    def __enter__(self) -> "MockServerThread":
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("Mock LLM sunucusu başlatılamadı")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministik mock LLM sunucusu (Ollama + Gemini)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--mode", choices=["mock", "record", "replay"], default="mock")
+    parser.add_argument("--script", help="Senaryo dosyası (JSON)")
+    parser.add_argument("--latency", default="fixed:0", help="İlk token gecikmesi: fixed:MS, uniform:A,B, "
+                                                            "normal:ORT,STD, lognormal:MEDYAN,SIGMA")
+    parser.add_argument("--tail-prob", type=float, default=0.0, help="Kuyruk gecikmesi olasılığı")
+    parser.add_argument("--tail-ms", type=float, default=0.0, help="Kuyruk gecikmesinde eklenen süre (ms)")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Akış hızı (0 = beklemeden)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cassette", help="record/replay kaset dosyası (JSONL)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Replay zamanlama çarpanı (0 = beklemeden)")
+    parser.add_argument("--on-miss", choices=["error", "mock"], default="error")
+    parser.add_argument("--ollama-upstream", default=OLLAMA_UPSTREAM)
+    parser.add_argument("--gemini-upstream", default=GEMINI_UPSTREAM)
+    args = parser.parse_args()
+
+    script = {}
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    default = ProviderProfile(LatencyModel.parse(args.latency, args.tail_prob, args.tail_ms), args.tokens_per_sec)
+    backend = MockBackend.from_script(script, default, args.seed)
+    cassette = Cassette(args.cassette) if args.cassette else None
+    app = create_app(backend, args.mode, cassette, args.time_scale, args.on_miss,
+                     ollama_upstream=args.ollama_upstream, gemini_upstream=args.gemini_upstream)
+
+    import uvicorn
+
+    print(f"Mock LLM sunucusu: http://{args.host}:{args.port} (mod: {args.mode})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ Kullanım:
 import sys
 import argparse
 import asyncio
+from src.config import OLLAMA_WARMUP
+from src.models.ollama_warmup import ollama_warmer
 from src.orchestrator.graph import run_multi_agent
 from src.utils.logger import get_logger
 
@@ -66,15 +68,23 @@ def print_result(result: dict):
     
     print(f"   Kullanilan modeller: {', '.join(models)}")
     print(f"   Cagrilan tool'lar: {', '.join(tools)}")
+    for decision in result.get("routing", []):
+        print(f"   Yonlendirme ({decision['agent']}): {decision['model']} - {decision['reason']}")
+    cache = result.get("cache")
+    if cache and cache.get("hit"):
+        print(f"   Onbellek: isabet (benzerlik {cache['similarity']:.3f}, ~{cache['saved_ms'] / 1000:.1f} sn kazanildi)")
+    elif cache:
+        print(f"   Onbellek: {'atlandi' if cache.get('bypassed') else 'iska'} (isabet orani %{cache['hit_rate'] * 100:.0f})")
     print("=" * 60)
 
 
-async def interactive_mode(mode: str = "auto"):
+async def interactive_mode(mode: str = "auto", use_cache: bool = True):
     """
     İnteraktif mod: Kullanıcıdan sürekli sorgu alır (Chat döngüsü).
 
     Args:
         mode: Model seçim modu ("fast", "accurate", "auto").
+        use_cache: Anlamsal cevap önbelleği kullanılsın mı?
     """
     print_banner()
     print(f"📌 Aktif mod: {mode}\n")
@@ -109,7 +119,7 @@ async def interactive_mode(mode: str = "auto"):
             print(f"\n[*] Isleniyor... (mod: {mode})\n")
             
             # Sistemi çalıştır
-            result = await run_multi_agent(query, mode=mode)
+            result = await run_multi_agent(query, mode=mode, use_cache=use_cache)
             
             # Sonuçları göster
             print_result(result)
@@ -149,6 +159,11 @@ def main():
         default="auto",
         help="Model seçim modu (varsayılan: auto)",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Anlamsal cevap önbelleğini atla",
+    )
 
     args = parser.parse_args()
 
@@ -159,7 +174,7 @@ def main():
             extra={"query": args.query, "mode": args.mode},
         )
         try:
-            result = asyncio.run(run_multi_agent(args.query, mode=args.mode))
+            result = asyncio.run(run_multi_agent(args.query, mode=args.mode, use_cache=not args.no_cache))
             print_result(result)
         except Exception as e:
             logger.error(f"Kritik hata: {e}", exc_info=True)
@@ -167,7 +182,12 @@ def main():
             sys.exit(1)
     else:
         # İnteraktif mod (Sürekli çalışır)
-        asyncio.run(interactive_mode(mode=args.mode))
+        # Ollama modelleri arka planda yüklenmeye başlar ve bellekte tutulur.
+        # Tek sorgu modunda yapılmaz: sorgunun ihtiyaç duymadığı modelleri
+        # yüklemek gecikme ekler ve gereken modeli bellekten atabilir.
+        if OLLAMA_WARMUP:
+            ollama_warmer.start()
+        asyncio.run(interactive_mode(mode=args.mode, use_cache=not args.no_cache))
 
 
 if __name__ == "__main__":
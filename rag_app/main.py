@@ -8,18 +8,58 @@ from pydantic import BaseModel
 from typing import List
 import json
 import asyncio
+import threading
+from contextlib import asynccontextmanager
 
 # Servisler ve Yardımcılar
 from rag_app.services.rag_engine import process_query
 from rag_app.services.vector_store import vector_store
 from rag_app.services.embedding_service import embedding_service
-from rag_app.utils.text_processing import extract_text_from_file, chunk_text
+from rag_app.services.extraction import parallel_extractor
+from rag_app.services.ingestion import IngestSource
+from rag_app.services.ingestion_jobs import IngestionQueueFull, ingestion_jobs
+from rag_app.utils.text_processing import SUPPORTED_EXTENSIONS
+from rag_app.utils.uploads import UploadLimitMiddleware, UploadTooLarge, spool_upload
 
 # Multi-Agent Import
 from src.orchestrator.graph import run_multi_agent, stream_multi_agent
+from src.config import EMBEDDING_WARMUP, OLLAMA_WARMUP, UPLOAD_MAX_FILE_BYTES, UPLOAD_MAX_REQUEST_BYTES
+from src.models.ollama_warmup import ollama_warmer
+from src.monitoring.metrics import metrics
+from src.tools.sandbox_pool import sandbox_pool
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Uygulama yaşam döngüsü:
+    - Açılışta embedding modeli ve vektör indeksi arka planda ısıtılır,
+      böylece sunucu hemen istek kabul etmeye başlar.
+    - Ollama modelleri arka planda yüklenir ve bellekte tutulur
+      (bellekten düşen model tekrar yüklenir).
+    - Kod çalıştırma worker'ları başlatılır; ilk hesaplama yorumlayıcı
+      açılışını beklemez.
+    - Kapanışta çalışan ingestion işleri iptal edilir, metin çıkarma ve kod
+      çalıştırma worker process'leri sonlandırılır.
+    """
+    if EMBEDDING_WARMUP:
+        embedding_service.warm_up(background=True)
+        threading.Thread(target=vector_store.warm_up, name="vector-store-warmup", daemon=True).start()
+    if OLLAMA_WARMUP:
+        ollama_warmer.start()
+    sandbox_pool.start()
+    yield
+    ollama_warmer.stop()
+    ingestion_jobs.shutdown()
+    parallel_extractor.shutdown()
+    sandbox_pool.shutdown()
 
 # FastAPI Uygulaması
-app = FastAPI(title="Multi-Agent LLM Asistanı", description="RAG ve Çoklu Ajan Destekli Yapay Zeka Asistanı", version="2.0.0")
+app = FastAPI(title="Multi-Agent LLM Asistanı", description="RAG ve Çoklu Ajan Destekli Yapay Zeka Asistanı", version="2.0.0", lifespan=lifespan)
+
+# Yükleme boyutu sınırları gövde okunurken uygulanır (multipart ayrıştırması
+# endpoint'ten önce tüm gövdeyi okuduğu için spool sırasında kontrol geç kalır)
+app.add_middleware(UploadLimitMiddleware, path="/upload", max_file_bytes=UPLOAD_MAX_FILE_BYTES,
+                   max_request_bytes=UPLOAD_MAX_REQUEST_BYTES)
 
 # Statik Dosyalar (Frontend)
 app.mount("/static", StaticFiles(directory="rag_app/static"), name="static")
@@ -31,6 +71,7 @@ class QueryRequest(BaseModel):
 class AgentRequest(BaseModel):
     query: str
     mode: str = "auto"
+    bypass_cache: bool = False  # True ise anlamsal cevap önbelleği atlanır
 
 class FileListResponse(BaseModel):
     files: List[str]
@@ -41,7 +82,7 @@ async def run_agent(request: AgentRequest):
     Standart Endpoint (Eski - Tek Seferde Yanıt)
     """
     try:
-        result = await run_multi_agent(request.query, mode=request.mode)
+        result = await run_multi_agent(request.query, mode=request.mode, use_cache=not request.bypass_cache)
         answer = result.get("answer", "Yanıt yok.")
         
         if isinstance(answer, list) and len(answer) > 0 and isinstance(answer[0], dict):
@@ -52,14 +93,16 @@ async def run_agent(request: AgentRequest):
             "stats": {
                 "iterations": result.get("iterations", 0),
                 "models": result.get("models_used", []),
-                "tools": result.get("tools_called", [])
+                "tools": result.get("tools_called", []),
+                "cache": result.get("cache"),
+                "routing": result.get("routing", []),
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/agent/stream")
-async def stream_agent(query: str):
+async def stream_agent(query: str, mode: str = "auto", bypass_cache: bool = False):
     """
     SSE Endpoint (Server-Sent Events)
     Canlı log akışı sağlar.
@@ -69,7 +112,7 @@ async def stream_agent(query: str):
         try:
             yield f"data: {json.dumps({'event': 'system', 'content': 'İşlem başlatılıyor...'})}\n\n"
             
-            async for event in stream_multi_agent(query):
+            async for event in stream_multi_agent(query, mode=mode, use_cache=not bypass_cache):
                 # Event formatı: {"event": "...", "node": "...", "content": "..."}
                 yield f"data: {json.dumps(event)}\n\n"
                 
@@ -79,70 +122,113 @@ async def stream_agent(query: str):
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
+@app.get("/health")
+async def health():
+    """
+    Hazırlık (readiness) durumu:
+    - embedding_ready: Embedding modeli yüklendi mi?
+    - vector_store_loaded: Vektör indeksi belleğe alındı mı?
+    - ollama: Ollama modelleri bellekte mi, soğuk başlangıç (yükleme) süreleri
+    - code_sandbox: Kod çalıştırma havuzundaki worker sayıları
+
+    Sidecar modunda hazırlık bilgileri soket çağrısıdır; her biri bir kez ve
+    event loop dışında okunur.
+    """
+    def readiness():
+        embedding_ready = embedding_service.is_ready
+        return embedding_ready, embedding_service.load_error, vector_store.is_loaded
+
+    embedding_ready, embedding_error, vector_store_loaded = await asyncio.to_thread(readiness)
+    return {
+        "status": "ok",
+        "ready": embedding_ready and vector_store_loaded,
+        "embedding_ready": embedding_ready,
+        "embedding_error": str(embedding_error) if embedding_error else None,
+        "vector_store_loaded": vector_store_loaded,
+        "ollama": ollama_warmer.status(),
+        "code_sandbox": sandbox_pool.status(),
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Process içi metriklerin (sayaç, gauge, dağılım) JSON görüntüsü."""
+    return metrics.snapshot()
+
 @app.get("/")
 async def read_root():
     """Anasayfa: Frontend arayüzünü sunar."""
     return FileResponse("rag_app/static/index.html")
 
-@app.post("/upload")
+@app.post("/upload", status_code=202)
 async def upload_files(files: list[UploadFile]):
     """
     Dosya Yükleme Endpoint'i:
     - PDF, DOCX, TXT dosyalarını kabul eder.
-    - Metinleri çıkarır, parçalar (chunking) ve vektör veritabanına kaydeder.
+    - Dosyalar belleğe alınmadan dilim dilim diske (spool) yazılır ve arka plan
+      ingestion işi olarak kuyruğa alınır; yanıt işlemenin bitmesini beklemeden
+      iş kimliği ile döner.
+    - Dosya başına ve istek başına boyut sınırları aşılırsa 413 döner; sınır
+      gövde okunurken (UploadLimitMiddleware) uygulanır, aşan yükleme sonuna
+      kadar okunmaz.
+    - İlerleme: GET /upload/jobs/{job_id}
     """
-    processed_count = 0
     errors = []
-    
-    for file in files:
-        filename = file.filename.lower()
-        if filename.endswith((".pdf", ".docx", ".txt")):
-            try:
-                # Metin Çıkarımı
-                # File objesini okuyup bytes olarak gönderiyoruz, extract_file içinde BytesIO ile işlenecek
-                # Ancak UploadFile zaten stream benzeri davranır ama await read() ile content'i alıp işlemek daha güvenli burada.
-                # text_processing.py içinde extract_lines fonksiyonunu güncelledim.
-                content = await file.read()
-                
-                # Geçici bir UploadFile benzeri yapı veya direkt content göndermemiz gerekebilir.
-                # text_processing.py update edildi mi? Evet. extract_text_from_file(file) bekliyor.
-                # UploadFile'ı tekrar sarmalayalım veya seek(0) yapalım.
-                # await file.seek(0) # UploadFile seekable'dır.
-                
-                # UploadFile nesnesini olduğu gibi gönderelim, processing içinde read yapılıyor.
-                # Ancak az önce read() yaptık, cursor sonda. Başa alalım.
-                await file.seek(0) 
-                
-                text = await extract_text_from_file(file)
-                
-                if not text.strip():
-                    errors.append(f"{file.filename}: Boş veya okunamayan dosya.")
-                    continue
+    sources = []
+    job_dir = await asyncio.to_thread(ingestion_jobs.new_spool_dir)
+    remaining = UPLOAD_MAX_REQUEST_BYTES
+
+    try:
+        for file in files:
+            if file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                path = ingestion_jobs.spool_path(job_dir, len(sources), file.filename)
+                remaining -= await spool_upload(file, path, UPLOAD_MAX_FILE_BYTES, remaining)
+                sources.append(IngestSource(filename=file.filename, path=path))
+            else:
+                errors.append(f"{file.filename}: Desteklenmeyen format. (PDF, DOCX, TXT gönderin)")
+            await file.close()
+
+        if not sources:
+            raise HTTPException(status_code=400, detail={"message": "İşlenecek dosya yok.", "errors": errors})
+
+        job = await ingestion_jobs.submit(sources, spool_dir=job_dir)
+    except UploadTooLarge as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestionQueueFull as e:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise HTTPException(status_code=503, detail=str(e))
+    except BaseException:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
 
-                # Parçalama (Chunking)
-                chunks = chunk_text(text)
-                
-                # Embedding Oluşturma
-                embeddings = embedding_service.embed_documents(chunks)
-                
-                # Metadata Hazırlığı
-                metas = [{"filename": file.filename, "text": c} for c in chunks]
-                
-                # Vektör Veritabanına Ekleme
-                vector_store.add_documents(embeddings, metas)
-                processed_count += 1
-                
-            except Exception as e:
-                print(f"Hata ({file.filename}): {e}")
-                errors.append(f"{file.filename}: {str(e)}")
-        else:
-            errors.append(f"{file.filename}: Desteklenmeyen format. (PDF, DOCX, TXT gönderin)")
-            
     return {
-        "message": f"{processed_count} dosya başarıyla işlendi.",
-        "errors": errors
+        "message": f"{len(sources)} dosya işleme kuyruğuna alındı.",
+        "job_id": job.id,
+        "errors": errors,
+        "job": job.to_dict()
     }
 
+@app.get("/upload/jobs")
+async def list_upload_jobs():
+    """Bellekteki ingestion işlerini (en yeniler sonda) listeler."""
+    return [job.to_dict() for job in ingestion_jobs.list_jobs()]
+
+@app.get("/upload/jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    """Bir ingestion işinin dosya bazlı ilerlemesini döndürür."""
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı.")
+    return job.to_dict()
+
+@app.delete("/upload/jobs/{job_id}")
+async def cancel_upload_job(job_id: str):
+    """Kuyruktaki veya çalışan bir ingestion işini iptal eder."""
+    job = ingestion_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="İş bulunamadı.")
+    return job.to_dict()
+
 @app.post("/ask")
 async def ask_question(request: QueryRequest):
     """
@@ -165,12 +251,14 @@ async def ask_question(request: QueryRequest):
 @app.get("/files/list", response_model=List[str])
 async def list_files():
     """İndekslenmiş dosyaların listesini döndürür."""
-    return vector_store.list_files()
+    return await asyncio.to_thread(vector_store.list_files)
 
 @app.delete("/files/clear")
 async def clear_files():
     """
     Tüm veritabanını temizler.
+    - Kuyruktaki ve çalışan ingestion işleri iptal edilir; çalışanların
+      durması beklenir (sıfırlanan indekse eski işlerden vektör yazılmaz).
     - İndeks dosyasını siler/sıfırlar.
     """
     try:
@@ -182,7 +270,8 @@ async def clear_files():
         # (Bu mimaride singleton import edildiği için class üzerinde işlem yapmalıyız)
         # VectorStore'a reset metodu ekleyelim.
         if hasattr(vector_store, 'reset'):
-            vector_store.reset()
+            async with ingestion_jobs.paused() as cancelled_jobs:
+                await asyncio.to_thread(vector_store.reset)
         else:
             # Fallback: Dosyaları sil
             if os.path.exists("faiss_index.bin"): os.remove("faiss_index.bin")
@@ -190,7 +279,7 @@ async def clear_files():
             # Belleği de temizle (basitçe yeniden init ama singleton sorunu olabilir, restart en iyisi)
             return {"message": "İndeks dosyaları silindi. Lütfen servisi yeniden başlatın tam temizlik için."}
             
-        return {"message": "Veritabanı başarıyla temizlendi."}
+        return {"message": "Veritabanı başarıyla temizlendi.", "cancelled_jobs": cancelled_jobs}
     except Exception as e:
          raise HTTPException(status_code=500, detail=str(e))
 
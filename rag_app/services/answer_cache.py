@@ -0,0 +1,219 @@
+"""
+Çok ajanlı akış için anlamsal (semantic) cevap önbelleği.
+
+Tam bir `run_multi_agent` çalışması 2-4 LLM çağrısı yapar; kullanıcılar ise
+aynı soruları farklı kelimelerle tekrar sorar. Bu önbellek gelen sorguyu
+mevcut embedding servisiyle vektörleştirir ve geçmiş nihai cevapları küçük
+bir FAISS indeksinde arar. Bir kayıt şu durumda döner:
+
+- Sorgu benzerliği `threshold` değerini geçiyorsa,
+- Sorgudaki sayılar ve özel isimler kayıttakilerle birebir aynıysa
+  ("fibonacci(10)" ile "fibonacci(20)" embedding'de çok yakındır ama
+  cevapları farklıdır); hesaplama (LogicExpert) yolundan geçen cevaplarda
+  ise normalize edilmiş sorgunun tamamı aynıysa,
+- Kayıt `ttl` süresinden eski değilse,
+- Cevap üretildiğindeki doküman indeksi versiyonu hâlâ geçerliyse.
+
+Kayıt sayısı `maxsize` ile sınırlıdır; dolunca en uzun süredir
+kullanılmayan kayıt atılır.
+"""
+
+import copy
+import dataclasses
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import FrozenSet, Hashable, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from rag_app.services.vector_store import DIMENSION
+from src.config import SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL
+from src.monitoring.metrics import metrics
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_WORD = re.compile(r"[^\W\d_][\w'’]*")
+
+
+def normalize_query(query: str) -> str:
+    """Küçük harf, noktalamasız ve tek boşluklu sorgu (birebir eşleşme için)."""
+    return " ".join(re.findall(r"\w+", query.casefold()))
+
+
+def salient_tokens(query: str) -> Tuple[Tuple[str, ...], FrozenSet[str]]:
+    """
+    Cevabı değiştiren ama embedding benzerliğine az yansıyan sorgu parçaları.
+
+    Returns:
+        tuple: (sıralı sayılar, özel isimler). Özel isim: cümle başı dışında
+        büyük harfle başlayan kelime, kısaltma veya kesme işaretiyle ek almış
+        kelime ("Ankara'nın"); ekler atılır ve küçük harfe çevrilir.
+    """
+    numbers = tuple(_NUMBER.findall(query))
+    entities = set()
+    for n, match in enumerate(_WORD.finditer(query)):
+        word = match.group()
+        stem = re.split(r"['’]", word)[0]
+        if not stem[:1].isupper():
+            continue
+        if n == 0 and stem == word and not stem.isupper():
+            continue  # Cümle başındaki sıradan kelime
+        entities.add(stem.casefold())
+    return numbers, frozenset(entities)
+
+
+@dataclass
+class CachedAnswer:
+    """Önbellekteki tek bir cevap."""
+
+    query: str
+    mode: str
+    result: dict
+    version: Hashable  # Doküman indeksi versiyonu (sidecar'da (epoch, sayaç))
+    latency: float  # Cevabın ilk üretimi kaç saniye sürdü
+    exact: bool = False  # Sadece normalize edilmiş sorgu birebir aynıysa döner (hesaplama cevapları)
+    created_at: float = field(default_factory=time.monotonic)
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    """
+    FAISS tabanlı anlamsal cevap önbelleği.
+
+    Args:
+        threshold: Önbellekten dönmek için gereken en düşük kosinüs benzerliği.
+        ttl: Kaydın geçerlilik süresi (saniye, 0 = süresiz).
+        maxsize: En fazla kayıt sayısı (0 = önbellek kapalı).
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: float = SEMANTIC_CACHE_TTL,
+                 maxsize: int = SEMANTIC_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(DIMENSION))
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def _expired(self, entry: CachedAnswer, now: float) -> bool:
+        return bool(self.ttl) and now - entry.created_at > self.ttl
+
+    def _remove(self, ids):
+        if not ids:
+            return
+        self._index.remove_ids(np.asarray(ids, dtype="int64"))
+        for entry_id in ids:
+            self._entries.pop(entry_id, None)
+
+    def _matches(self, entry: CachedAnswer, query: Optional[str]) -> bool:
+        if query is None:
+            return True
+        if entry.exact:
+            return normalize_query(entry.query) == normalize_query(query)
+        return salient_tokens(entry.query) == salient_tokens(query)
+
+    def lookup(self, vector, version: Hashable, mode: str = "auto", query: Optional[str] = None) -> Optional[tuple]:
+        """
+        Benzer bir sorunun geçerli cevabını arar.
+
+        Eşiği geçen tüm kayıtlar benzerlik sırasıyla taranır; mod, sayı/özel
+        isim veya birebir eşleşme şartını sağlamayan kayıtlar geçerli bir
+        isabeti gizlemez.
+
+        Args:
+            vector: Normalize edilmiş sorgu vektörü.
+            version: Güncel doküman indeksi versiyonu.
+            mode: Çalışma modu (farklı modların cevapları karışmaz).
+            query: Sorgu metni (None = sadece vektör benzerliği).
+
+        Returns:
+            tuple: (CachedAnswer kopyası, benzerlik) veya bulunamazsa None.
+        """
+        if not self.enabled:
+            return None
+        vectors = np.asarray([vector], dtype="float32")
+        now = time.monotonic()
+        with self._lock:
+            found = None
+            if self._entries:
+                _, scores, ids = self._index.range_search(vectors, self.threshold)
+                stale = []
+                for score, entry_id in sorted(zip(scores, ids), key=lambda item: -item[0]):
+                    entry = self._entries.get(int(entry_id))
+                    if entry is None:
+                        continue
+                    if self._expired(entry, now) or entry.version != version:
+                        stale.append(int(entry_id))
+                    elif found is None and entry.mode == mode and self._matches(entry, query):
+                        found = (int(entry_id), entry, float(score))
+                self._remove(stale)
+
+            if found is None:
+                self.misses += 1
+                metrics.inc("answer_cache.misses")
+                return None
+            entry_id, entry, score = found
+            entry.hits += 1
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            self.saved_seconds += entry.latency
+            # Çağıranlar sonucu (örn. routing listesi) değiştirse de kayıt bozulmaz
+            entry = dataclasses.replace(entry, result=copy.deepcopy(entry.result))
+        metrics.inc("answer_cache.hits")
+        metrics.observe("answer_cache.saved_ms", entry.latency * 1000)
+        return entry, score
+
+    def store(self, vector, query: str, result: dict, version: Hashable, latency: float, mode: str = "auto",
+              exact: bool = False):
+        """
+        Yeni bir cevabı önbelleğe ekler; kapasite aşılırsa en eski kaydı atar.
+
+        exact=True olan kayıt (hesaplama / tool sonucu) sadece normalize
+        edilmiş sorgu birebir aynıysa döner.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._remove([i for i, e in self._entries.items() if self._expired(e, now)])
+            while len(self._entries) >= self.maxsize:
+                self._remove([next(iter(self._entries))])
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(np.asarray([vector], dtype="float32"), np.asarray([entry_id], dtype="int64"))
+            self._entries[entry_id] = CachedAnswer(query, mode, copy.deepcopy(result), version, latency, exact)
+        metrics.set_gauge("answer_cache.size", len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._index.reset()
+            self._entries.clear()
+        metrics.set_gauge("answer_cache.size", 0)
+
+    def stats(self) -> dict:
+        """İsabet oranı ve kazanılan süre dahil önbellek istatistikleri."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+# Singleton instance (Uygulama genelinde tek cevap önbelleği)
+answer_cache = SemanticAnswerCache()
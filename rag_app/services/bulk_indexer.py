@@ -0,0 +1,239 @@
+"""
+Çevrimdışı toplu dizin indeksleyici (CLI).
+
+Bir dizin ağacındaki PDF/DOCX/TXT dosyalarını HTTP katmanı olmadan
+IngestionPipeline'dan geçirerek VectorStore'un doğrudan yükleyebildiği
+`faiss_index.bin` + `metadata.pkl` çiftini üretir.
+
+- Metin çıkarımı tüm çekirdekleri kullanan process pool'da yapılır,
+  embedding'ler batch'ler halinde hesaplanır.
+- İndeks her `--checkpoint-files` dosyada bir diske yazılır ve yanında bir
+  manifest (dosya yolu, boyut, değiştirilme zamanı, vektör sayısı) tutulur.
+- Yarıda kesilen çalışma aynı komutla tekrar başlatıldığında manifestte
+  tamamlanmış görünen ve değişmemiş dosyaları atlar. Değişen dosyaların
+  (veya son checkpoint'ten sonra yazılmış olanların) eski vektörleri
+  yeniden işlenmeden önce indeksten çıkarılır.
+
+Kullanım:
+    python -m rag_app.services.bulk_indexer ./belgeler
+    python -m rag_app.services.bulk_indexer ./belgeler --checkpoint-files 500 --workers 8
+    python -m rag_app.services.bulk_indexer ./belgeler --rebuild
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Optional
+
+from rag_app.services.extraction import ParallelExtractor
+from rag_app.services.ingestion import IngestionPipeline, IngestSource
+from rag_app.services.vector_store import DIMENSION, INDEX_FILE, METADATA_FILE, VectorStore
+from rag_app.utils.dedup import NearDuplicateDetector
+from rag_app.utils.text_processing import SUPPORTED_EXTENSIONS
+from src.config import EXTRACT_PAGES_PER_TASK, INGEST_COMMIT_BATCH_SIZE, INGEST_EMBED_BATCH_SIZE
+
+MANIFEST_VERSION = 1
+
+
+class BulkIndexer:
+    """
+    Bir dizindeki dokümanları checkpoint'li ve kaldığı yerden devam
+    edebilen şekilde indeksler.
+
+    Args:
+        root: Taranacak dizin.
+        index_path: FAISS indeks dosyası.
+        metadata_path: Metadata (pickle) dosyası.
+        manifest_path: Manifest dosyası (varsayılan: <index_path>.manifest.json).
+        embedding_service: embed_documents(texts) sunan servis.
+        workers: Metin çıkarımı için process sayısı (varsayılan: tüm çekirdekler).
+        checkpoint_files: Kaç dosyada bir diske yazılacağı (0 = sadece sonda).
+        embed_batch_size: Tek embedding çağrısındaki chunk sayısı.
+    """
+
+    def __init__(self, root: str, index_path: str = INDEX_FILE, metadata_path: str = METADATA_FILE,
+                 manifest_path: Optional[str] = None, embedding_service=None,
+                 workers: Optional[int] = None, checkpoint_files: int = 200,
+                 embed_batch_size: int = INGEST_EMBED_BATCH_SIZE):
+        self.root = os.path.abspath(root)
+        self.manifest_path = manifest_path or index_path + ".manifest.json"
+        self.checkpoint_files = checkpoint_files
+        self.store = VectorStore(index_path=index_path, metadata_path=metadata_path)
+        self.extractor = ParallelExtractor(
+            max_workers=(os.cpu_count() or 1) if workers is None else workers,
+            pages_per_task=EXTRACT_PAGES_PER_TASK,
+        )
+        self.pipeline = IngestionPipeline(
+            embedding_service, self.store,
+            embed_batch_size=embed_batch_size,
+            commit_batch_size=max(INGEST_COMMIT_BATCH_SIZE, embed_batch_size),
+            extractor=self.extractor,
+        )
+        self.manifest = {"version": MANIFEST_VERSION, "root": self.root, "files": {}}
+
+    def discover(self) -> List[dict]:
+        """Dizin ağacındaki desteklenen dosyaları (sıralı) bulur."""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                found.append({
+                    "name": os.path.relpath(path, self.root).replace(os.sep, "/"),
+                    "path": path,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                })
+        return found
+
+    def load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def save_manifest(self):
+        """Manifesti atomik olarak yazar (önce geçici dosya, sonra yer değiştirme)."""
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def _is_up_to_date(self, entry: dict, retry_errors: bool) -> bool:
+        record = self.manifest["files"].get(entry["name"])
+        if record is None or record["size"] != entry["size"] or record["mtime_ns"] != entry["mtime_ns"]:
+            return False
+        return record["status"] == "done" or (record["status"] == "error" and not retry_errors)
+
+    async def run(self, rebuild: bool = False, retry_errors: bool = False, log=print) -> dict:
+        """
+        Dizini indeksler.
+
+        Args:
+            rebuild: Mevcut indeksi ve manifesti silip baştan oluşturur.
+            retry_errors: Daha önce hata alan dosyaları tekrar dener.
+            log: İlerleme mesajlarının yazılacağı fonksiyon.
+
+        Returns:
+            dict: Çalışma özeti.
+        """
+        started = time.perf_counter()
+        if rebuild:
+            self.store.reset()
+        else:
+            self.load_manifest()
+        self.store.warm_up()
+
+        files = self.discover()
+        pending = [e for e in files if not self._is_up_to_date(e, retry_errors)]
+        summary = {"files": len(files), "skipped": len(files) - len(pending),
+                   "indexed": 0, "failed": 0, "vectors_added": 0, "pages": 0, "deduplicated": 0}
+        # Checkpoint grupları arasında da kopyalar yakalansın diye tek dedektör
+        detector = NearDuplicateDetector() if self.pipeline.dedup else None
+        log(f"{len(files)} dosya bulundu, {len(pending)} tanesi işlenecek.")
+
+        # Değişmiş, silinmiş veya son checkpoint'ten sonra kısmen yazılmış dosyaların eski vektörleri
+        present = {e["name"] for e in files}
+        stale = [name for name in self.manifest["files"] if name not in present]
+        removed = self.store.remove_files([e["name"] for e in pending] + stale, save=False)
+        if removed:
+            log(f"{removed} eski vektör indeksten çıkarıldı.")
+        for name in [e["name"] for e in pending] + stale:
+            self.manifest["files"].pop(name, None)
+
+        step = self.checkpoint_files or len(pending) or 1
+        try:
+            for start in range(0, len(pending), step):
+                group = pending[start:start + step]
+                sources = [IngestSource(filename=e["name"], path=e["path"]) for e in group]
+                progress = await self.pipeline.run(sources, detector=detector)
+                if removed and not any(p.vectors_committed for p in progress):
+                    # Pipeline kaydetmediyse silme işlemini kalıcı yap
+                    await asyncio.to_thread(self.store.save)
+                removed = 0
+
+                for entry, p in zip(group, progress):
+                    self.manifest["files"][entry["name"]] = {
+                        "size": entry["size"],
+                        "mtime_ns": entry["mtime_ns"],
+                        "status": p.status,
+                        "vectors": p.vectors_committed,
+                        "error": p.error,
+                    }
+                    summary["pages"] += p.pages_parsed
+                    summary["vectors_added"] += p.vectors_committed
+                    summary["deduplicated"] += p.chunks_deduplicated
+                    if p.status == "done":
+                        summary["indexed"] += 1
+                    else:
+                        summary["failed"] += 1
+                        log(f"  Hata ({entry['name']}): {p.error}")
+                self.manifest["vectors"] = self.store.index.ntotal
+                self.save_manifest()
+
+                done = start + len(group)
+                elapsed = time.perf_counter() - started
+                log(f"[{done}/{len(pending)}] checkpoint: {self.store.index.ntotal} vektör, "
+                    f"{summary['pages'] / elapsed:.1f} sayfa/s")
+            if removed:
+                await asyncio.to_thread(self.store.save)
+                self.manifest["vectors"] = self.store.index.ntotal
+                self.save_manifest()
+        finally:
+            self.extractor.shutdown()
+
+        summary["total_vectors"] = self.store.index.ntotal
+        summary["dedup_saved_index_bytes"] = summary["deduplicated"] * DIMENSION * 4
+        summary["seconds"] = time.perf_counter() - started
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dizin ağacını çevrimdışı olarak FAISS indeksine yükler")
+    parser.add_argument("directory", help="Taranacak dizin (PDF, DOCX, TXT)")
+    parser.add_argument("--index", default=INDEX_FILE, help="FAISS indeks dosyası")
+    parser.add_argument("--metadata", default=METADATA_FILE, help="Metadata dosyası")
+    parser.add_argument("--manifest", default=None, help="Manifest dosyası (varsayılan: <index>.manifest.json)")
+    parser.add_argument("--workers", type=int, default=None, help="Metin çıkarımı process sayısı")
+    parser.add_argument("--checkpoint-files", type=int, default=200, help="Kaç dosyada bir diske yazılsın (0 = sonda)")
+    parser.add_argument("--embed-batch-size", type=int, default=INGEST_EMBED_BATCH_SIZE)
+    parser.add_argument("--rebuild", action="store_true", help="Mevcut indeksi silip baştan oluştur")
+    parser.add_argument("--retry-errors", action="store_true", help="Hata alan dosyaları tekrar dene")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        raise SystemExit(f"Dizin bulunamadı: {args.directory}")
+
+    # Toplu indekslemede model her zaman bu process'te yüklenir
+    from rag_app.services.embedding_service import EmbeddingService
+    embedding_service = EmbeddingService()
+    embedding_service.warm_up(background=False)
+    if embedding_service.load_error:
+        raise SystemExit(f"Embedding modeli yüklenemedi: {embedding_service.load_error}")
+
+    indexer = BulkIndexer(
+        args.directory, index_path=args.index, metadata_path=args.metadata,
+        manifest_path=args.manifest, embedding_service=embedding_service,
+        workers=args.workers, checkpoint_files=args.checkpoint_files,
+        embed_batch_size=args.embed_batch_size,
+    )
+    try:
+        summary = asyncio.run(indexer.run(rebuild=args.rebuild, retry_errors=args.retry_errors))
+    except KeyboardInterrupt:
+        print("\nYarıda kesildi. Aynı komutla tekrar çalıştırıldığında son checkpoint'ten devam eder.")
+        return
+
+    print(f"\nTamamlandı: {summary['indexed']} dosya indekslendi, {summary['failed']} hata, "
+          f"{summary['skipped']} atlandı. Toplam {summary['total_vectors']} vektör "
+          f"({summary['seconds']:.1f} s).")
+    if summary["deduplicated"]:
+        print(f"Yakın-kopya eleme: {summary['deduplicated']} chunk embed edilmedi "
+              f"(~{summary['dedup_saved_index_bytes'] / 1024 / 1024:.1f} MB indeks belleği tasarrufu).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from typing import List, Optional
+
+from rag_app.services.embedding_service import embedding_service
+from src.config import EMBEDDING_BATCH_WINDOW_MS, EMBEDDING_MAX_BATCH_SIZE
+from src.monitoring.metrics import metrics
+
+
+class EmbeddingBatcher:
+    """
+    Eşzamanlı sorgu embedding isteklerini mikro-batch'lere toplayan dağıtıcı.
+
+    Her istek bir Future ile kuyruğa girer. Kısa bir pencere (max_wait_ms)
+    dolduğunda veya kuyruk max_batch_size'a ulaştığında bekleyen sorgular tek
+    bir batch `encode` çağrısıyla worker thread'de vektörleştirilir ve her
+    vektör kendi bekleyen çağırıcısına geri döndürülür.
+
+    Aynı anda yalnızca bir batch çalışır; o sırada gelen istekler bir sonraki
+    batch'te toplanır. Böylece yük altında batch boyutu kendiliğinden büyür.
+
+    Servis embed_queries sunuyorsa (sidecar istemcisi) batch onunla gönderilir;
+    sidecar da batch'i kendi batcher'ında diğer worker'larınkiyle birleştirir.
+    """
+
+    def __init__(self, service=None, max_wait_ms: float = EMBEDDING_BATCH_WINDOW_MS,
+                 max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE):
+        """
+        Args:
+            service: embed_documents(texts) metodu olan embedding servisi.
+            max_wait_ms: İlk istekten sonra batch'in toplanacağı süre (ms).
+            max_batch_size: Tek batch'teki maksimum sorgu sayısı.
+        """
+        self.service = service or embedding_service
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max(1, max_batch_size)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = []  # (sorgu, future, kuyruğa giriş zamanı)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._busy = False
+
+    def _bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop değiştiyse (örn. CLI'de yeni asyncio.run) durumu sıfırlar."""
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._busy = False
+
+    async def embed_query(self, query: str) -> List[float]:
+        """
+        Sorguyu vektörleştirir; eşzamanlı diğer sorgularla aynı batch'e girer.
+        """
+        loop = asyncio.get_running_loop()
+        self._bind_loop(loop)
+
+        future = loop.create_future()
+        self._pending.append((query, future, time.perf_counter()))
+        metrics.set_gauge("embedding.queue_depth", len(self._pending))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None and not self._busy:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Bekleyen istekleri tek batch olarak worker thread'e gönderir."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._busy:
+            # Çalışan batch bitince kalanlar hemen gönderilir
+            return
+
+        # Bu arada iptal edilen çağırıcıları atla
+        batch = [item for item in self._pending[:self.max_batch_size] if not item[1].done()]
+        self._pending = self._pending[self.max_batch_size:]
+        metrics.set_gauge("embedding.queue_depth", len(self._pending))
+        if not batch:
+            if self._pending:
+                self._flush()
+            return
+
+        self._busy = True
+        self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: list):
+        """Batch'i encode eder ve sonuçları ilgili Future'lara dağıtır."""
+        dispatched_at = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            metrics.observe("embedding.queue_wait_ms", (dispatched_at - enqueued_at) * 1000)
+        metrics.observe("embedding.batch_size", len(batch))
+        metrics.inc("embedding.batches")
+        metrics.inc("embedding.requests", len(batch))
+
+        texts = [query for query, _, _ in batch]
+        try:
+            encode = getattr(self.service, "embed_queries", self.service.embed_documents)
+            vectors = await asyncio.to_thread(encode, texts)
+            metrics.observe("embedding.batch_latency_ms", (time.perf_counter() - dispatched_at) * 1000)
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            metrics.inc("embedding.errors")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._busy = False
+            if self._pending:
+                # Batch sürerken biriken istekler zaten bekledi; hemen gönder
+                self._flush()
+
+
+# Singleton instance (Uygulama genelinde tek dağıtıcı)
+embedding_batcher = EmbeddingBatcher()
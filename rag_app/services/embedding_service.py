@@ -1,44 +1,131 @@
-from sentence_transformers import SentenceTransformer
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 import logging
+import threading
+from src.config import RAG_SERVICE_ADDRESS
 
 # Transformer uyarılarını gizle
 logging.getLogger("transformers").setLevel(logging.ERROR)
 
-# Model İsmi (Sabit)
 # Model İsmi (Sabit)
 MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
+@lru_cache(maxsize=4)
+def load_tokenizer(model_name: str = MODEL_NAME):
+    """
+    Embedding modelinin tokenizer'ını yükler (modelin kendisini değil).
+    Chunk boyutlarını model token'ı cinsinden ölçmek için kullanılır.
+    """
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name)
+
 class EmbeddingService:
     """
     Metinleri vektörlere dönüştüren servis.
-    'intfloat/multilingual-e5-base' modelini kullanır.
+    'sentence-transformers/all-MiniLM-L6-v2' modelini kullanır.
+
+    Model import anında değil, ilk kullanımda (lazy) yüklenir.
+    İstenirse warm_up() ile arka planda önceden ısıtılabilir.
     """
-    def __init__(self):
+    def __init__(self, model_name: str = MODEL_NAME):
         """
-        Modeli başlatır. İlk çalıştırmada modeli indirir.
+        Servisi oluşturur. Model burada YÜKLENMEZ; ilk embed çağrısında
+        veya warm_up() ile yüklenir.
         """
-        print(f"Embedding modeli yükleniyor: {MODEL_NAME}...")
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.load_error: Optional[Exception] = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Model belleğe yüklenip kullanıma hazır mı?"""
+        return self._ready.is_set()
+
+    @property
+    def model(self):
+        """SentenceTransformer modelini döndürür, gerekirse yükler (thread-safe)."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        """Modeli yükler. İlk çalıştırmada modeli indirir."""
+        # Ağır import (torch) sadece gerçekten ihtiyaç olduğunda yapılır
+        from sentence_transformers import SentenceTransformer
+
+        print(f"Embedding modeli yükleniyor: {self.model_name}...")
         # VRAM tasarrufu için CPU'ya zorluyoruz
-        self.model = SentenceTransformer(MODEL_NAME, device="cpu")
+        model = SentenceTransformer(self.model_name, device="cpu")
+        self.load_error = None
+        self._ready.set()
         print("Model hazır.")
+        return model
+
+    def warm_up(self, background: bool = True):
+        """
+        Modeli önceden yükler.
+
+        Args:
+            background: True ise yükleme daemon bir thread'de yapılır ve
+                fonksiyon hemen döner. False ise yükleme bitene kadar bekler.
+        """
+        if self.is_ready:
+            return
+
+        def _run():
+            try:
+                self.model
+            except Exception as e:
+                self.load_error = e
+                print(f"Embedding modeli ısıtılamadı: {e}")
+
+        if not background:
+            _run()
+            return
+
+        with self._lock:
+            if self._warmup_thread is not None and self._warmup_thread.is_alive():
+                return
+            self._warmup_thread = threading.Thread(
+                target=_run, name="embedding-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Model hazır olana kadar bekler. Hazırsa True döner."""
+        return self._ready.wait(timeout)
+
+    @property
+    def tokenizer(self):
+        """Modelin tokenizer'ı; model yüklüyse onunkini, değilse sadece tokenizer'ı yükler."""
+        if self._model is not None:
+            return self._model.tokenizer
+        return load_tokenizer(self.model_name)
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
         Doküman parçalarını (chunk) vektörleştirir.
-        E5 modeli için dokümanlara 'passage: ' öneki eklenmesi önerilir.
         """
-        # E5 modeli için prefix ekleyelim
         embeddings = self.model.encode(texts, normalize_embeddings=True)
         return embeddings.tolist()
 
     def embed_query(self, query: str) -> List[float]:
         """
         Sorguyu vektörleştirir.
-        E5 modeli için sorgulara 'query: ' öneki eklenmesi gerekir.
         """
         embedding = self.model.encode(query, normalize_embeddings=True)
         return embedding.tolist()
 
 # Singleton instance (Uygulama genelinde tek bir model instance'ı kullanılır)
-embedding_service = EmbeddingService()
+# Oluşturmak ucuzdur; model ilk kullanımda veya warm_up() ile yüklenir.
+# RAG_SERVICE_ADDRESS ayarlıysa model paylaşılan sidecar serviste tutulur.
+if RAG_SERVICE_ADDRESS:
+    from rag_app.services.index_client import RemoteEmbeddingService, get_index_client
+    embedding_service = RemoteEmbeddingService(get_index_client(RAG_SERVICE_ADDRESS))
+else:
+    embedding_service = EmbeddingService()
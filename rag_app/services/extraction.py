@@ -0,0 +1,222 @@
+"""
+Process pool tabanlı paralel doküman metin çıkarımı.
+
+PyMuPDF ve python-docx ayrıştırması CPU yoğundur ve GIL'i bırakmaz;
+event loop thread'inde (veya tek bir thread'de) çalıştığında diğer
+istekleri dondurur. Bu modül ayrıştırmayı ayrı process'lere taşır:
+
+- Dosyalar arası paralellik: Sıradaki dosyaların işleri önceden kuyruğa alınır.
+- Dosya içi paralellik: Büyük PDF'ler sayfa aralıklarına bölünür
+  (EXTRACT_PAGES_PER_TASK) ve aralıklar farklı worker'larda çıkarılır.
+
+Sonuçlar sırayla (sayfa sırası korunarak) üretilir; aynı anda uçuşta olan
+iş sayısı sınırlı olduğu için bellek kullanımı da sınırlıdır.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from rag_app.utils.text_processing import (
+    extract_pdf_page_range,
+    extract_segments,
+    iter_text_segments,
+    pdf_page_count,
+)
+from src.config import EXTRACT_PAGES_PER_TASK, EXTRACT_WORKERS
+
+# Bir dosyanın tüm parçalarının üretildiğini işaretleyen nesne
+END_OF_FILE = object()
+
+
+class ParallelExtractor:
+    """
+    Dosyalardan metin parçalarını process pool ile çıkarır.
+
+    Args:
+        max_workers: Worker process sayısı. 0 ise pool kullanılmaz,
+            çıkarım çağıran thread'de yapılır (geliştirme/test).
+        pages_per_task: Bir PDF işinin kapsadığı sayfa sayısı.
+        max_in_flight: Aynı anda uçuşta olabilecek maksimum iş sayısı.
+    """
+
+    def __init__(self, max_workers: int = EXTRACT_WORKERS,
+                 pages_per_task: int = EXTRACT_PAGES_PER_TASK,
+                 max_in_flight: Optional[int] = None):
+        self.max_workers = max_workers
+        self.pages_per_task = max(1, pages_per_task)
+        self.max_in_flight = max_in_flight or max(2, max_workers * 2)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        """Process pool'u ilk kullanımda oluşturur."""
+        if self.max_workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # torch/FAISS thread'leri varken fork güvenli değil; spawn kullan
+                    context = multiprocessing.get_context("spawn")
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._executor
+
+    def shutdown(self):
+        """Worker process'lerini kapatır."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _plan(self, source, filename: str) -> Tuple[list, Optional[str]]:
+        """
+        Bir dosyanın işlerini planlar.
+
+        Returns:
+            tuple: ([(fonksiyon, argümanlar)], silinecek geçici dosya yolu veya None)
+        """
+        if not filename.lower().endswith(".pdf"):
+            return [(extract_segments, (source, filename))], None
+
+        pages = pdf_page_count(source)
+        if pages <= self.pages_per_task:
+            return [(extract_pdf_page_range, (source, 0, pages))], None
+
+        # Birden fazla aralık: PDF baytlarını her işe ayrı ayrı göndermek yerine
+        # bir kez diske yazıp worker'ların dosya yolundan açmasını sağla
+        temp_path = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            fd, temp_path = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(fd, "wb") as f:
+                f.write(source)
+            source = temp_path
+        tasks = [
+            (extract_pdf_page_range, (source, start, start + self.pages_per_task))
+            for start in range(0, pages, self.pages_per_task)
+        ]
+        return tasks, temp_path
+
+    def iter_file_segments(self, sources: List[Tuple[object, str]]) -> Iterator[Tuple[int, object]]:
+        """
+        Dosyaların metin parçalarını dosya ve sayfa sırasıyla üretir.
+
+        Args:
+            sources: [(içerik baytları veya dosya yolu, dosya adı)] listesi.
+
+        Yields:
+            (dosya_no, str)           - Metin parçası (sayfa/paragraf)
+            (dosya_no, Exception)     - Dosya çıkarılamadı
+            (dosya_no, END_OF_FILE)   - Dosyanın sonu
+        """
+        executor = self.executor
+        if executor is None:
+            yield from self._iter_inline(sources)
+            return
+
+        pending = deque()   # (dosya_no, future | Exception | END_OF_FILE)
+        temp_files = {}
+
+        def plan_all():
+            for i, (source, filename) in enumerate(sources):
+                try:
+                    tasks, temp_path = self._plan(source, filename)
+                except Exception as e:
+                    yield i, e
+                    yield i, END_OF_FILE
+                    continue
+                if temp_path:
+                    temp_files[i] = temp_path
+                for fn, args in tasks:
+                    yield i, (fn, args)
+                yield i, END_OF_FILE
+
+        planned = plan_all()
+        in_flight = 0
+        failed = set()
+        try:
+            while True:
+                # Pencere dolana kadar sıradaki işleri (sonraki dosyalar dahil) gönder
+                while in_flight < self.max_in_flight:
+                    item = next(planned, None)
+                    if item is None:
+                        break
+                    i, task = item
+                    if isinstance(task, tuple):
+                        fn, args = task
+                        pending.append((i, executor.submit(fn, *args)))
+                        in_flight += 1
+                    else:
+                        pending.append((i, task))
+                if not pending:
+                    break
+
+                i, entry = pending.popleft()
+                if entry is END_OF_FILE:
+                    self._cleanup(temp_files.pop(i, None))
+                    yield i, END_OF_FILE
+                elif isinstance(entry, Exception):
+                    failed.add(i)
+                    yield i, entry
+                else:
+                    in_flight -= 1
+                    try:
+                        segments = entry.result()
+                    except Exception as e:
+                        if i not in failed:
+                            failed.add(i)
+                            yield i, e
+                        continue
+                    if i in failed:
+                        continue
+                    for segment in segments:
+                        yield i, segment
+        finally:
+            for _, entry in pending:
+                if hasattr(entry, "cancel"):
+                    entry.cancel()
+            for path in temp_files.values():
+                self._cleanup(path)
+
+    def _iter_inline(self, sources) -> Iterator[Tuple[int, object]]:
+        """Pool olmadan, çağıran thread'de akış halinde çıkarım."""
+        for i, (source, filename) in enumerate(sources):
+            try:
+                for segment in iter_text_segments(source, filename):
+                    yield i, segment
+            except Exception as e:
+                yield i, e
+            yield i, END_OF_FILE
+
+    @staticmethod
+    def _cleanup(path: Optional[str]):
+        if path:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def extract_segments(self, source, filename: str) -> List[str]:
+        """Tek bir dosyanın tüm parçalarını liste olarak döndürür (hata fırlatır)."""
+        segments = []
+        for _, segment in self.iter_file_segments([(source, filename)]):
+            if isinstance(segment, Exception):
+                raise segment
+            if segment is not END_OF_FILE:
+                segments.append(segment)
+        return segments
+
+    async def extract_text(self, source, filename: str) -> str:
+        """Dosyanın tüm metnini event loop'u bloklamadan çıkarır."""
+        segments = await asyncio.to_thread(self.extract_segments, source, filename)
+        # Parçaları tek seferde birleştir (str += döngüsü yerine)
+        return "".join(segments)
+
+
+# Singleton instance (Worker process'leri ilk kullanımda başlatılır)
+parallel_extractor = ParallelExtractor()
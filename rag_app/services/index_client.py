@@ -0,0 +1,325 @@
+"""
+Paylaşılan embedding + indeks servisi (sidecar) için istemci.
+
+Çok worker'lı dağıtımlarda her uvicorn worker'ı kendi SentenceTransformer
+modelini ve FAISS indeksini yüklemek yerine, tek bir yerel servis
+(`python -m rag_app.services.index_server`) bu kaynaklara sahip olur.
+Worker'lar bu modüldeki ince istemcileri kullanır.
+
+Protokol: Satır başına bir JSON mesajı (JSON-lines).
+    İstek:  {"id": 1, "method": "search", "params": {...}}
+    Yanıt:  {"id": 1, "result": ..., "version": 7, "epoch": "9f2c..."}
+    Hata:   {"id": 1, "error": "mesaj", "version": 7, "epoch": "9f2c..."}
+    Yayın:  {"event": "version", "version": 8, "epoch": "9f2c..."}   (sadece "watch" bağlantısında)
+
+"epoch" sunucu sürecine özgüdür; sidecar yeniden başlayınca versiyon sayacı
+sıfırlansa da (epoch, versiyon) çifti eski değerlerle çakışmaz.
+
+Vektörler JSON'da float listesi yerine base64 kodlu float32 olarak taşınır.
+"""
+
+import base64
+import json
+import socket
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.config import RAG_SERVICE_TIMEOUT
+
+
+class IndexServiceError(RuntimeError):
+    """Sidecar servisi bir hata döndürdüğünde veya erişilemediğinde fırlatılır."""
+
+
+def parse_address(address: str) -> Tuple[str, object]:
+    """
+    Servis adresini çözümler.
+
+    Desteklenen biçimler:
+        unix:/tmp/rag_index.sock  veya  unix:///tmp/rag_index.sock
+        tcp://127.0.0.1:8765      veya  127.0.0.1:8765
+
+    Returns:
+        tuple: ("unix", yol) veya ("tcp", (host, port))
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        if path.startswith("//"):
+            path = path[2:]
+        return "unix", path
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Geçersiz servis adresi: {address!r}")
+    return "tcp", (host, int(port))
+
+
+def encode_vectors(vectors) -> dict:
+    """Vektör matrisini base64 float32 olarak kodlar."""
+    array = np.asarray(vectors, dtype="float32")
+    if array.ndim == 1:
+        array = array.reshape(1, -1)
+    return {"b64": base64.b64encode(array.tobytes()).decode("ascii"), "shape": list(array.shape)}
+
+
+def decode_vectors(payload: dict) -> np.ndarray:
+    """encode_vectors çıktısını numpy matrisine çevirir."""
+    data = base64.b64decode(payload["b64"])
+    return np.frombuffer(data, dtype="float32").reshape(payload["shape"])
+
+
+class IndexServiceClient:
+    """
+    Sidecar servisine senkron RPC istemcisi.
+
+    Her thread kendi soket bağlantısını kullanır (threading.local), böylece
+    asyncio.to_thread ile paralel çağrılar birbirini beklemez.
+    Bağlantı koparsa bir kez yeniden bağlanmayı dener.
+    """
+
+    def __init__(self, address: str, timeout: float = RAG_SERVICE_TIMEOUT):
+        self.address = address
+        self.timeout = timeout
+        self._kind, self._target = parse_address(address)
+        self._local = threading.local()
+        self._ids = 0
+        self._ids_lock = threading.Lock()
+        self.version = 0  # Son görülen indeks versiyonu
+        self.epoch: Optional[str] = None  # Son görülen sunucu süreci kimliği
+        self.token: Tuple[Optional[str], int] = (None, 0)  # (epoch, versiyon), tek atamada güncellenir
+        self._watcher: Optional[threading.Thread] = None
+
+    def _connect(self) -> socket.socket:
+        if self._kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        sock.connect(self._target)
+        return sock
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = self._connect()
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn[1].close()
+                conn[0].close()
+            except OSError:
+                pass
+
+    def _next_id(self) -> int:
+        with self._ids_lock:
+            self._ids += 1
+            return self._ids
+
+    def _update_version(self, version, epoch=None):
+        if version is not None and (epoch, version) != self.token:
+            self.token = (epoch, version)
+            self.epoch, self.version = epoch, version
+
+    def call(self, method: str, **params):
+        """
+        Uzak metodu çağırır ve sonucunu döndürür.
+
+        Raises:
+            IndexServiceError: Servis hata döndürürse veya erişilemezse.
+        """
+        request = json.dumps({"id": self._next_id(), "method": method, "params": params})
+        payload = request.encode("utf-8") + b"\n"
+
+        for attempt in range(2):
+            try:
+                sock, reader = self._connection()
+                sock.sendall(payload)
+                line = reader.readline()
+                if not line:
+                    raise ConnectionError("Servis bağlantıyı kapattı.")
+                break
+            except OSError as e:
+                self._drop_connection()
+                # Zaman aşımında istek sunucuda işleniyor olabilir; tekrar gönderme
+                if attempt == 1 or isinstance(e, TimeoutError):
+                    raise IndexServiceError(f"İndeks servisine erişilemedi ({self.address}): {e}") from e
+
+        response = json.loads(line)
+        self._update_version(response.get("version"), response.get("epoch"))
+        if "error" in response:
+            raise IndexServiceError(response["error"])
+        return response.get("result")
+
+    def start_watcher(self):
+        """
+        Versiyon yayınlarını dinleyen daemon thread'i başlatır.
+        Bağlantı koparsa artan bekleme ile yeniden bağlanır.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        def _watch():
+            backoff = 0.5
+            while True:
+                try:
+                    sock = self._connect()
+                    sock.settimeout(None)
+                    with sock, sock.makefile("rb") as reader:
+                        sock.sendall(json.dumps({"id": 0, "method": "watch", "params": {}}).encode() + b"\n")
+                        backoff = 0.5
+                        for line in reader:
+                            message = json.loads(line)
+                            self._update_version(message.get("version"), message.get("epoch"))
+                except OSError:
+                    pass
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 10)
+
+        self._watcher = threading.Thread(target=_watch, name="index-version-watcher", daemon=True)
+        self._watcher.start()
+
+
+class RemoteEmbeddingService:
+    """EmbeddingService ile aynı arayüzü sunan ince istemci."""
+
+    def __init__(self, client: IndexServiceClient):
+        self.client = client
+        self.load_error: Optional[Exception] = None
+
+    def _status(self) -> dict:
+        try:
+            status = self.client.call("status")
+            error = status.get("embedding_error")
+            self.load_error = IndexServiceError(error) if error else None
+            return status
+        except IndexServiceError as e:
+            self.load_error = e
+            return {}
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self._status().get("embedding_ready"))
+
+    def warm_up(self, background: bool = True):
+        """Sidecar'daki modelin ısıtılmasını tetikler."""
+        def _run():
+            try:
+                self.client.call("warm_up")
+            except IndexServiceError as e:
+                self.load_error = e
+                print(f"İndeks servisi ısıtılamadı: {e}")
+
+        if background:
+            threading.Thread(target=_run, name="remote-embedding-warmup", daemon=True).start()
+        else:
+            _run()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.is_ready:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.2)
+        return True
+
+    @property
+    def tokenizer(self):
+        """Tokenizer hafiftir; sidecar'a gitmeden yerelde yüklenir."""
+        from rag_app.services.embedding_service import MODEL_NAME, load_tokenizer
+        return load_tokenizer(MODEL_NAME)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return decode_vectors(self.client.call("embed_documents", texts=list(texts))).tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Sorgu batch'i; sunucuda diğer worker'ların sorgularıyla aynı batch'e girer."""
+        if not texts:
+            return []
+        return decode_vectors(self.client.call("embed_queries", texts=list(texts))).tolist()
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.client.call("embed_query", query=query)
+
+
+class RemoteVectorStore:
+    """VectorStore ile aynı arayüzü sunan ince istemci."""
+
+    def __init__(self, client: IndexServiceClient):
+        self.client = client
+
+    @property
+    def version(self) -> Tuple[Optional[str], int]:
+        """
+        Sidecar'ın yayınladığı güncel indeks versiyonu: (sunucu epoch'u, sayaç).
+        Sidecar yeniden başlayıp sayaç sıfırlansa da eski önbellek anahtarlarıyla
+        çakışmaz. Başka worker'ların değişiklikleri de görülsün diye dinleyici
+        başlatılır.
+        """
+        self.client.start_watcher()
+        return self.client.token
+
+    @property
+    def is_loaded(self) -> bool:
+        try:
+            return bool(self.client.call("status").get("vector_store_loaded"))
+        except IndexServiceError:
+            return False
+
+    def warm_up(self):
+        """Versiyon dinleyicisini başlatır ve sidecar'daki indeksi yükletir."""
+        self.client.start_watcher()
+        try:
+            self.client.call("warm_up")
+        except IndexServiceError as e:
+            print(f"İndeks servisi ısıtılamadı: {e}")
+
+    def add_documents(self, embeddings: list, metas: list, save: bool = True):
+        if not len(embeddings):
+            return
+        self.client.call("add_documents", embeddings=encode_vectors(embeddings), metas=metas, save=save)
+
+    def save(self):
+        self.client.call("save")
+
+    def search(self, query_embedding: list, k=3):
+        return self.client.call("search", query_embedding=list(map(float, query_embedding)), k=k)
+
+    def search_mmr(self, query_embedding: list, min_score: float, **kwargs):
+        return self.client.call(
+            "search_mmr", query_embedding=list(map(float, query_embedding)), min_score=min_score, **kwargs
+        )
+
+    def remove_files(self, filenames, save: bool = True) -> int:
+        return self.client.call("remove_files", filenames=list(filenames), save=save)
+
+    def list_files(self):
+        return self.client.call("list_files")
+
+    def reset(self):
+        self.client.call("reset")
+
+
+_client: Optional[IndexServiceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_index_client(address: str) -> IndexServiceClient:
+    """Process genelinde paylaşılan istemciyi döndürür."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.address != address:
+            _client = IndexServiceClient(address)
+        return _client
@@ -0,0 +1,223 @@
+"""
+Paylaşılan embedding + indeks servisi (sidecar).
+
+EmbeddingService ve VectorStore'a tek başına sahip olan yerel bir süreçtir.
+Uygulama worker'ları (uvicorn --workers N) `RAG_SERVICE_ADDRESS` ayarlandığında
+bu servise ince istemci olarak bağlanır; böylece model ve indeks bellekte bir
+kez tutulur ve bir worker'daki yükleme diğerlerinde anında görünür.
+
+- Eşzamanlı sorgu embedding'leri (farklı worker'lardan gelse bile)
+  EmbeddingBatcher ile tek batch'lerde işlenir: worker'ın batcher'ı
+  topladığı sorguları embed_queries ile gönderir, sunucu bunları kendi
+  batcher'ında diğer worker'ların sorgularıyla birleştirir. Doküman
+  embedding'i (embed_documents) zaten batch'tir ve doğrudan çalışır.
+- Her yanıt güncel indeks versiyonunu ve sunucu epoch'unu taşır; "watch"
+  bağlantıları her değişiklikte {"event": "version"} yayını alır.
+
+Kullanım:
+    python -m rag_app.services.index_server --address unix:/tmp/rag_index.sock
+    python -m rag_app.services.index_server --address tcp://127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import uuid
+
+from rag_app.services.embedding_batcher import EmbeddingBatcher
+from rag_app.services.embedding_service import EmbeddingService
+from rag_app.services.index_client import decode_vectors, encode_vectors, parse_address
+from rag_app.services.vector_store import VectorStore
+from src.config import RAG_SERVICE_ADDRESS
+
+# Büyük add_documents isteklerine izin vermek için satır sınırı
+MAX_MESSAGE_BYTES = 512 * 1024 * 1024
+DEFAULT_ADDRESS = "tcp://127.0.0.1:8765"
+
+
+class IndexServer:
+    """
+    Embedding ve vektör arama RPC'lerini sunan asyncio sunucusu.
+    """
+
+    def __init__(self, embedding_service=None, vector_store=None):
+        # Sidecar her zaman yerel (in-process) servisleri kullanır
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.vector_store = vector_store or VectorStore()
+        self.batcher = EmbeddingBatcher(self.embedding_service)
+        self._watchers = set()
+        # Süreç kimliği: yeniden başlayınca sıfırlanan versiyon sayacını istemciler ayırt eder
+        self.epoch = uuid.uuid4().hex
+        self._write_lock = asyncio.Lock()
+        self._server = None
+
+    async def start(self, address: str):
+        """Sunucuyu verilen adreste dinlemeye başlatır."""
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            self._server = await asyncio.start_unix_server(self._handle, path=target, limit=MAX_MESSAGE_BYTES)
+        else:
+            host, port = target
+            self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_MESSAGE_BYTES)
+        return self._server
+
+    async def serve_forever(self, address: str):
+        server = await self.start(address)
+        print(f"İndeks servisi dinleniyor: {address}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Tek bir istemci bağlantısındaki istekleri sırayla işler."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("İstek bir JSON nesnesi olmalı.")
+                except ValueError as e:
+                    # Bozuk satır bağlantıyı düşürmez; hata yanıtı döner
+                    await self._send(writer, {"id": None, "error": f"Geçersiz istek: {e}",
+                                              "version": self.vector_store.version})
+                    continue
+                request_id = request.get("id")
+                method = request.get("method")
+
+                if method == "watch":
+                    # Bu bağlantı artık sadece versiyon yayını alır
+                    self._watchers.add(writer)
+                    await self._send(writer, {"event": "version", "version": self.vector_store.version})
+                    continue
+
+                try:
+                    result = await self._dispatch(method, request.get("params") or {})
+                    response = {"id": request_id, "result": result}
+                except Exception as e:
+                    response = {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+                response["version"] = self.vector_store.version
+                await self._send(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._watchers.discard(writer)
+            writer.close()
+
+    async def _send(self, writer: asyncio.StreamWriter, message: dict):
+        if "version" in message:
+            message["epoch"] = self.epoch
+        writer.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    async def _broadcast_version(self):
+        """İndeks değiştiğinde tüm dinleyicilere yeni versiyonu yayınlar."""
+        message = {"event": "version", "version": self.vector_store.version}
+        for writer in list(self._watchers):
+            try:
+                await self._send(writer, message)
+            except (ConnectionError, RuntimeError):
+                self._watchers.discard(writer)
+
+    async def _dispatch(self, method: str, params: dict):
+        """RPC metodunu ilgili servis çağrısına yönlendirir."""
+        if method == "ping":
+            return "pong"
+
+        if method == "status":
+            error = self.embedding_service.load_error
+            return {
+                "embedding_ready": self.embedding_service.is_ready,
+                "embedding_error": str(error) if error else None,
+                "vector_store_loaded": self.vector_store.is_loaded,
+            }
+
+        if method == "warm_up":
+            self.embedding_service.warm_up(background=True)
+            threading.Thread(target=self.vector_store.warm_up, daemon=True).start()
+            return True
+
+        if method == "embed_query":
+            return await self.batcher.embed_query(params["query"])
+
+        if method == "embed_queries":
+            # Worker'ların sorgu batch'leri sunucunun batcher'ında birleşir
+            vectors = await asyncio.gather(*(self.batcher.embed_query(q) for q in params["texts"]))
+            return encode_vectors(vectors)
+
+        if method == "embed_documents":
+            vectors = await asyncio.to_thread(self.embedding_service.embed_documents, params["texts"])
+            return encode_vectors(vectors)
+
+        if method == "search":
+            return await asyncio.to_thread(self.vector_store.search, params["query_embedding"], params.get("k", 3))
+
+        if method == "search_mmr":
+            query_embedding = params.pop("query_embedding")
+            return await asyncio.to_thread(self.vector_store.search_mmr, query_embedding, **params)
+
+        if method == "list_files":
+            return await asyncio.to_thread(self.vector_store.list_files)
+
+        if method == "add_documents":
+            embeddings = decode_vectors(params["embeddings"])
+            async with self._write_lock:
+                await asyncio.to_thread(
+                    self.vector_store.add_documents, embeddings, params["metas"], params.get("save", True)
+                )
+            await self._broadcast_version()
+            return True
+
+        if method == "remove_files":
+            async with self._write_lock:
+                removed = await asyncio.to_thread(
+                    self.vector_store.remove_files, params["filenames"], params.get("save", True)
+                )
+            await self._broadcast_version()
+            return removed
+
+        if method == "save":
+            async with self._write_lock:
+                await asyncio.to_thread(self.vector_store.save)
+            return True
+
+        if method == "reset":
+            async with self._write_lock:
+                await asyncio.to_thread(self.vector_store.reset)
+            await self._broadcast_version()
+            return True
+
+        raise ValueError(f"Bilinmeyen metod: {method}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paylaşılan embedding + FAISS indeks servisi")
+    parser.add_argument(
+        "--address",
+        default=RAG_SERVICE_ADDRESS or DEFAULT_ADDRESS,
+        help="unix:/yol/rag.sock veya tcp://127.0.0.1:8765",
+    )
+    parser.add_argument("--no-warmup", action="store_true", help="Modeli açılışta yükleme")
+    args = parser.parse_args()
+
+    server = IndexServer()
+    if not args.no_warmup:
+        server.embedding_service.warm_up(background=True)
+        threading.Thread(target=server.vector_store.warm_up, daemon=True).start()
+    try:
+        asyncio.run(server.serve_forever(args.address))
+    except KeyboardInterrupt:
+        print("\nİndeks servisi durduruldu.")
+
+
+if __name__ == "__main__":
+    main()
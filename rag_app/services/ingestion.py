@@ -0,0 +1,429 @@
+"""
+Akış halinde (pipelined) doküman ingestion modülü.
+
+Dosyalar dört aşamalı bir boru hattından geçer:
+
+    extract  →  chunk  →  embed  →  commit
+    (process    (thread)   (batch)    (batch)
+     pool)
+
+Aşamalar sınırlı kuyruklarla birbirine bağlıdır; her aşama kendi işini
+yaparken diğerleri de çalışır (dosya 2 çıkarılırken dosya 1'in parçaları
+embed edilir). Kuyruklar sınırlı olduğu için bellek kullanımı doküman
+boyutundan bağımsız olarak sabit kalır: PDF sayfaları okundukça akar,
+parçalar sabit boyutlu batch'lerle embed edilir ve vektörler batch'ler
+halinde indekse eklenir. İndeks diske sadece en sonda bir kez yazılır.
+
+Chunk aşamasında yakın-kopya chunk'lar (başlık/altbilgi, yasal uyarı,
+tekrar eden bölümler) embed edilmeden elenir; asıl chunk'ın metadatasında
+metnin geçtiği tüm dosyalar "sources" listesinde tutulur. Asıl chunk'ın
+dosyası indekse yazılamadan başarısız olursa, ona karşı elenen başka
+dosyaların chunk'ları çalışmanın sonunda embed edilip indekse eklenir.
+
+Çalışma bir threading.Event ile iptal edilebilir; iptal anına kadar indekse
+yazılmış vektörler korunur, tamamlanmamış dosyalar "cancelled" olarak işaretlenir.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Executor
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from rag_app.services.embedding_service import embedding_service as default_embedding_service
+from rag_app.services.extraction import END_OF_FILE, parallel_extractor
+from rag_app.services.vector_store import DIMENSION, vector_store as default_vector_store
+from rag_app.utils.dedup import NearDuplicateDetector
+from rag_app.utils.text_processing import estimate_tokens, iter_chunks
+from src.config import INGEST_COMMIT_BATCH_SIZE, INGEST_DEDUP, INGEST_EMBED_BATCH_SIZE, INGEST_QUEUE_SIZE
+from src.monitoring.metrics import metrics
+
+# Kuyruklarda dosya sonunu işaretleyen nesne
+_END = object()
+
+
+@dataclass
+class IngestSource:
+    """
+    İşlenecek tek bir dosya.
+    İçerik bellekte (content) veya diskte (path, ör. spool dosyası) olabilir.
+    """
+    filename: str
+    content: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @property
+    def source(self):
+        """Çıkarıcıya verilecek kaynak: baytlar veya dosya yolu."""
+        return self.content if self.content is not None else self.path
+
+
+@dataclass
+class FileProgress:
+    """Bir dosyanın ingestion ilerlemesi."""
+    filename: str
+    status: str = "pending"  # pending | processing | done | error | cancelled
+    pages_parsed: int = 0
+    chunks_created: int = 0
+    chunks_deduplicated: int = 0  # Yakın-kopya olduğu için embed edilmeyen chunk'lar
+    chunks_embedded: int = 0
+    vectors_committed: int = 0
+    error: Optional[str] = None
+    _finished_chunking: bool = field(default=False, repr=False)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("_finished_chunking")
+        return data
+
+    def fail(self, message: str):
+        self.status = "error"
+        self.error = message
+
+    def _maybe_done(self):
+        """Tüm parçalar indekse yazıldıysa dosyayı tamamlanmış işaretler."""
+        if self.status == "processing" and self._finished_chunking and self.vectors_committed == self.chunks_created:
+            if self.chunks_created == 0 and self.chunks_deduplicated == 0:
+                self.fail("Boş veya okunamayan dosya.")
+            else:
+                self.status = "done"
+
+
+class IngestionPipeline:
+    """
+    Extract → chunk → embed → commit boru hattı.
+
+    Args:
+        embedding_service: embed_documents(texts) sunan servis.
+        vector_store: add_documents(..., save=False) ve save() sunan depo.
+        embed_batch_size: Tek embedding çağrısındaki parça sayısı.
+        commit_batch_size: İndekse tek seferde eklenen vektör sayısı.
+        queue_size: Aşamalar arası kuyruk kapasitesi (öğe / batch).
+        extractor: iter_file_segments(sources) sunan metin çıkarıcı.
+        executor: Aşama thread'leri ve bloklayan çağrılar için executor.
+            None ise event loop'un varsayılan executor'ı kullanılır.
+        dedup: Yakın-kopya chunk'ları elesin mi?
+    """
+
+    def __init__(self, embedding_service=None, vector_store=None,
+                 embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+                 commit_batch_size: int = INGEST_COMMIT_BATCH_SIZE,
+                 queue_size: int = INGEST_QUEUE_SIZE,
+                 extractor=None, executor: Optional[Executor] = None,
+                 dedup: bool = INGEST_DEDUP):
+        self.embedding_service = embedding_service or default_embedding_service
+        self.vector_store = vector_store or default_vector_store
+        self.extractor = extractor or parallel_extractor
+        self.embed_batch_size = embed_batch_size
+        self.commit_batch_size = commit_batch_size
+        self.queue_size = queue_size
+        self.executor = executor
+        self.dedup = dedup
+
+    def _run_blocking(self, fn, *args):
+        """Bloklayan çağrıyı pipeline'ın executor'ında çalıştırır."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, functools.partial(fn, *args))
+
+    async def run(self, sources: List[IngestSource],
+                  progress: Optional[List[FileProgress]] = None,
+                  cancel_event: Optional[threading.Event] = None,
+                  detector: Optional[NearDuplicateDetector] = None) -> List[FileProgress]:
+        """
+        Dosyaları boru hattından geçirir.
+
+        Args:
+            sources: İşlenecek dosyalar.
+            progress: Canlı izlenecek ilerleme nesneleri (verilmezse oluşturulur).
+            cancel_event: Set edildiğinde boru hattı yeni iş almayı bırakır.
+            detector: Yakın-kopya dedektörü. Birden fazla çalışma arasında
+                paylaşılabilir (ör. toplu indekslemede checkpoint grupları);
+                verilmezse dedup açıksa her çalışma için yenisi oluşturulur.
+
+        Returns:
+            list[FileProgress]: Her dosyanın son durumu (girdi sırasıyla).
+        """
+        if progress is None:
+            progress = [FileProgress(s.filename) for s in sources]
+        cancel_event = cancel_event or threading.Event()
+        if detector is None and self.dedup:
+            detector = NearDuplicateDetector()
+        if not sources:
+            return progress
+
+        loop = asyncio.get_running_loop()
+        page_queue = queue.Queue(maxsize=self.queue_size)          # extract → chunk (thread'ler arası)
+        chunk_queue = asyncio.Queue(maxsize=self.queue_size * self.embed_batch_size)  # chunk → embed
+        vector_queue = asyncio.Queue(maxsize=self.queue_size)       # embed → commit
+
+        # Event loop tarafındaki aşamalar iptal edildiyse (ör. Ctrl+C) thread'ler beklemeyi bırakır
+        abandoned = threading.Event()
+
+        def put_chunk(item):
+            """Chunk thread'inden event loop kuyruğuna (doluysa bekleyerek) yazar."""
+            future = asyncio.run_coroutine_threadsafe(chunk_queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=0.1)
+                except concurrent.futures.TimeoutError:
+                    if abandoned.is_set():
+                        future.cancel()
+                        return
+
+        def put_page(item):
+            """Sayfa kuyruğuna (doluysa bekleyerek) yazar; boru hattı bırakıldıysa vazgeçer."""
+            while not abandoned.is_set():
+                try:
+                    return page_queue.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+
+        def extract_stage():
+            # Çıkarıcı sonraki dosyaların işlerini de önceden worker'lara dağıtır
+            files = [(s.source, s.filename) for s in sources]
+            for p in progress:
+                p.status = "processing"
+            open_file = None
+            ended = set()
+            segments = self.extractor.iter_file_segments(files)
+            try:
+                for i, segment in segments:
+                    if cancel_event.is_set():
+                        break
+                    if segment is END_OF_FILE:
+                        put_page((i, _END))
+                        ended.add(i)
+                        open_file = None
+                    elif isinstance(segment, Exception):
+                        progress[i].fail(str(segment))
+                    else:
+                        put_page((i, segment))
+                        open_file = i
+                        progress[i].pages_parsed += 1
+                        metrics.inc("ingest.pages")
+            except Exception as e:
+                # Beklenmeyen çıkarıcı hatası: sonu gelmemiş dosyalar tamamlanmış sayılmaz
+                for i, p in enumerate(progress):
+                    if i not in ended and p.status == "processing":
+                        p.fail(f"Çıkarım hatası: {e}")
+            finally:
+                # Uçuştaki çıkarım işlerini iptal eder
+                segments.close()
+                # Chunk aşaması her durumda dosya sonunu ve akış sonunu görmeli
+                if open_file is not None:
+                    put_page((open_file, _END))
+                put_page(None)
+
+        def chunk_stage():
+            while True:
+                head = page_queue.get()
+                if head is None:
+                    break
+                i, first = head
+                finished = first is _END
+
+                def stream(first=first):
+                    """Dosyanın sayfalarını _END işaretine kadar akıtır."""
+                    nonlocal finished
+                    yield first
+                    while True:
+                        _, segment = page_queue.get()
+                        if segment is _END:
+                            finished = True
+                            return
+                        yield segment
+
+                if not finished:
+                    try:
+                        for chunk in iter_chunks(stream()):
+                            if cancel_event.is_set():
+                                break
+                            key = None
+                            if detector is not None:
+                                key, duplicate = detector.check(chunk, progress[i].filename, pending=True)
+                                if duplicate:
+                                    self._count_duplicate(progress[i], chunk)
+                                    continue
+                            progress[i].chunks_created += 1
+                            metrics.inc("ingest.chunks")
+                            put_chunk((i, chunk, key))
+                    except Exception as e:
+                        progress[i].fail(str(e))
+                    # Hata durumunda dosyanın kalan sayfalarını boşalt
+                    while not finished:
+                        finished = page_queue.get()[1] is _END
+                put_chunk((i, _END, None))
+            put_chunk(None)
+
+        async def embed_stage():
+            batch = []
+            while True:
+                item = await chunk_queue.get()
+                if item is None:
+                    break
+                i, chunk, key = item
+                if chunk is _END:
+                    # İptalde yarım kalan dosya "tamamlandı" sayılmamalı
+                    if not cancel_event.is_set():
+                        progress[i]._finished_chunking = True
+                        progress[i]._maybe_done()
+                    # Dosya sonu: batch'i beklemeden gönder ki tamamlanma gecikmesin
+                    if batch and chunk_queue.empty():
+                        await self._embed_batch(batch, progress, vector_queue)
+                        batch = []
+                    continue
+                if progress[i].status == "error" or cancel_event.is_set():
+                    continue
+                batch.append((i, chunk, key))
+                if len(batch) >= self.embed_batch_size:
+                    await self._embed_batch(batch, progress, vector_queue)
+                    batch = []
+            if batch and not cancel_event.is_set():
+                await self._embed_batch(batch, progress, vector_queue)
+            await vector_queue.put(None)
+
+        async def commit_stage():
+            vectors, owners = [], []
+            while True:
+                item = await vector_queue.get()
+                if item is not None:
+                    batch_vectors, batch_owners = item
+                    vectors.extend(batch_vectors)
+                    owners.extend(batch_owners)
+                if cancel_event.is_set():
+                    vectors, owners = [], []
+                if vectors and (item is None or len(vectors) >= self.commit_batch_size):
+                    await self._commit(vectors, owners, progress, detector)
+                    vectors, owners = [], []
+                if item is None:
+                    break
+
+        extract_thread = loop.run_in_executor(self.executor, extract_stage)
+        chunk_thread = loop.run_in_executor(self.executor, chunk_stage)
+        try:
+            await asyncio.gather(extract_thread, chunk_thread, embed_stage(), commit_stage())
+        except BaseException:
+            cancel_event.set()
+            abandoned.set()
+            if detector is not None:
+                for p in progress:
+                    if p.status != "done":
+                        detector.discard(p.filename)
+            raise
+
+        for p in progress:
+            if cancel_event.is_set() and p.status in ("pending", "processing"):
+                p.status = "cancelled"
+                continue
+            p._finished_chunking = True
+            p._maybe_done()
+        if detector is not None:
+            await self._release_unfinished(progress, detector)
+
+        # İndeksi diske bir kez yaz (iptal edilse de o ana kadar eklenenler kalıcı olur)
+        if any(p.vectors_committed for p in progress):
+            t0 = time.perf_counter()
+            await self._run_blocking(self.vector_store.save)
+            metrics.observe("ingest.save_ms", (time.perf_counter() - t0) * 1000)
+        return progress
+
+    async def _release_unfinished(self, progress: List[FileProgress], detector: NearDuplicateDetector):
+        """
+        Tamamlanmayan dosyaları dedektörden çıkarır.
+
+        Bu dosyaların bekleyen asıl chunk'larına karşı başka dosyalardan
+        düşürülen chunk'lar indekste yoksa kaybolmasın diye burada embed
+        edilip indekse yazılır. Bu sırada başarısız olan dosyalar da aynı
+        şekilde serbest bırakılır.
+        """
+        index = {p.filename: i for i, p in enumerate(progress)}
+        released = set()
+        while True:
+            orphans = []
+            for p in progress:
+                if p.status != "done" and p.filename not in released:
+                    released.add(p.filename)
+                    orphans.extend(detector.discard(p.filename))
+            if not orphans:
+                return
+            batch = []
+            for source, chunk in orphans:
+                i = index.get(source)
+                if i is None or progress[i].status != "done":
+                    continue
+                progress[i].chunks_deduplicated -= 1
+                key, duplicate = detector.check(chunk, source, pending=True)
+                if duplicate:
+                    progress[i].chunks_deduplicated += 1
+                    continue
+                progress[i].chunks_created += 1
+                batch.append((i, chunk, key))
+            metrics.inc("ingest.dedup_recovered", len(batch))
+            for start in range(0, len(batch), self.embed_batch_size):
+                vector_queue = asyncio.Queue()
+                await self._embed_batch(batch[start:start + self.embed_batch_size], progress, vector_queue)
+                if not vector_queue.empty():
+                    vectors, owners = vector_queue.get_nowait()
+                    await self._commit(vectors, owners, progress, detector)
+
+    async def _embed_batch(self, batch: list, progress: List[FileProgress], vector_queue: asyncio.Queue):
+        """Bir parça batch'ini worker thread'de vektörleştirir."""
+        texts = [chunk for _, chunk, _ in batch]
+        t0 = time.perf_counter()
+        try:
+            vectors = await self._run_blocking(self.embedding_service.embed_documents, texts)
+        except Exception as e:
+            for i in {i for i, _, _ in batch}:
+                progress[i].fail(f"Embedding hatası: {e}")
+            return
+        metrics.observe("ingest.embed_batch_ms", (time.perf_counter() - t0) * 1000)
+        metrics.observe("ingest.embed_batch_size", len(batch))
+        for i, _, _ in batch:
+            progress[i].chunks_embedded += 1
+        await vector_queue.put((vectors, batch))
+
+    async def _commit(self, vectors: list, owners: list, progress: List[FileProgress],
+                      detector: Optional[NearDuplicateDetector] = None):
+        """Vektör batch'ini (diske yazmadan) indekse ekler."""
+        keep = [n for n, (i, _, _) in enumerate(owners) if progress[i].status != "error"]
+        if not keep:
+            return
+        metas = []
+        for n in keep:
+            i, chunk, key = owners[n]
+            meta = {"filename": progress[i].filename, "text": chunk}
+            if key is not None:
+                # Dedektörün listesi değil kopyası; commit sonrası kopyalar bu listeye eklenir
+                meta["sources"] = detector.sources(key)
+            metas.append(meta)
+        t0 = time.perf_counter()
+        try:
+            await self._run_blocking(self.vector_store.add_documents, [vectors[n] for n in keep], metas, False)
+        except Exception as e:
+            for i in {owners[n][0] for n in keep}:
+                progress[i].fail(f"İndeks hatası: {e}")
+            return
+        metrics.observe("ingest.commit_ms", (time.perf_counter() - t0) * 1000)
+        metrics.inc("ingest.vectors_committed", len(keep))
+        for n, meta in zip(keep, metas):
+            i, _, key = owners[n]
+            if key is not None:
+                detector.commit(key, meta["sources"])
+            progress[i].vectors_committed += 1
+            progress[i]._maybe_done()
+
+    @staticmethod
+    def _count_duplicate(progress: FileProgress, chunk: str):
+        """Elenen chunk'ın tasarrufunu (embedding token'ı, indeks belleği) kaydeder."""
+        progress.chunks_deduplicated += 1
+        metrics.inc("ingest.dedup_dropped")
+        metrics.inc("ingest.dedup_saved_tokens", estimate_tokens(chunk))
+        metrics.inc("ingest.dedup_saved_index_bytes", DIMENSION * 4)
+
+
+# Singleton instance
+ingestion_pipeline = IngestionPipeline()
@@ -0,0 +1,293 @@
+"""
+Arka plan ingestion işleri (jobs).
+
+/upload isteği dosyaları diske (spool) yazar, bir iş oluşturup kuyruğa
+ekler ve iş kimliğini hemen döndürür. İşler sınırlı sayıda worker
+tarafından sırayla IngestionPipeline'dan geçirilir; ilerleme dosya bazında
+(sayfa, chunk, vektör) izlenebilir ve işler iptal edilebilir.
+
+Ingestion aşamaları kendi thread havuzunda çalışır; böylece uzun süren
+yüklemeler sorgu yolunun kullandığı varsayılan executor'ı doldurmaz.
+
+İndeks sıfırlanırken paused() yeni işlerin başlamasını durdurur, mevcut
+işleri iptal eder ve çalışanların bitmesini bekler; böylece sıfırlamadan
+önce başlamış bir iş temizlenen indekse vektör yazamaz.
+"""
+
+import asyncio
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from rag_app.services.ingestion import FileProgress, IngestionPipeline, IngestSource
+from src.config import INGEST_JOB_HISTORY, INGEST_JOB_QUEUE_SIZE, INGEST_JOB_WORKERS, INGEST_SPOOL_DIR
+from src.monitoring.metrics import metrics
+
+FINISHED_STATES = ("done", "error", "cancelled")
+
+
+class IngestionQueueFull(RuntimeError):
+    """İş kuyruğu dolu olduğunda fırlatılır."""
+
+
+@dataclass
+class IngestionJob:
+    """Bir yükleme isteğinin arka plan işi."""
+    id: str
+    files: List[FileProgress]
+    status: str = "queued"  # queued | running | done | error | cancelled
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    sources: List[IngestSource] = field(default_factory=list, repr=False)
+    spool_dir: Optional[str] = field(default=None, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> dict:
+        files = [p.to_dict() for p in self.files]
+        totals = {
+            key: sum(f[key] for f in files)
+            for key in ("pages_parsed", "chunks_created", "chunks_deduplicated", "chunks_embedded", "vectors_committed")
+        }
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "totals": totals,
+            "files": files,
+        }
+
+
+class IngestionJobManager:
+    """
+    Ingestion işlerini kuyruğa alan ve sınırlı sayıda worker ile çalıştıran yönetici.
+
+    Args:
+        pipeline: İşleri çalıştıracak boru hattı. Verilmezse kendi thread
+            havuzunu kullanan bir IngestionPipeline oluşturulur.
+        workers: Aynı anda çalışan maksimum iş sayısı.
+        spool_dir: Yüklenen dosyaların işlenene kadar tutulduğu dizin.
+        max_queued: Kuyrukta bekleyebilecek maksimum iş sayısı.
+        history: Bellekte tutulan tamamlanmış iş sayısı.
+    """
+
+    def __init__(self, pipeline: Optional[IngestionPipeline] = None,
+                 workers: int = INGEST_JOB_WORKERS,
+                 spool_dir: str = INGEST_SPOOL_DIR,
+                 max_queued: int = INGEST_JOB_QUEUE_SIZE,
+                 history: int = INGEST_JOB_HISTORY):
+        self.workers = max(1, workers)
+        self.spool_dir = spool_dir
+        self.max_queued = max_queued
+        self.history = history
+        self._owns_pipeline = pipeline is None
+        self.pipeline = pipeline or IngestionPipeline()
+        self.jobs: Dict[str, IngestionJob] = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running = 0
+        self._resume: Optional[asyncio.Event] = None  # Temizken worker'lar yeni iş başlatmaz
+        self._drained: Optional[asyncio.Event] = None  # Çalışan iş yokken set
+        self._pause_lock: Optional[asyncio.Lock] = None
+
+    def _bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Worker'ları çalışan event loop'ta (ilk işte) başlatır."""
+        if self._loop is not loop:
+            self._loop = loop
+            if self._owns_pipeline:
+                # İş başına 2 uzun ömürlü aşama thread'i + embed ve commit çağrıları
+                self._executor = ThreadPoolExecutor(max_workers=self.workers * 4, thread_name_prefix="ingest")
+                self.pipeline.executor = self._executor
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._resume = asyncio.Event()
+            self._resume.set()
+            self._drained = asyncio.Event()
+            self._drained.set()
+            self._pause_lock = asyncio.Lock()
+            self._tasks = [
+                loop.create_task(self._worker(), name=f"ingest-worker-{n}") for n in range(self.workers)
+            ]
+
+    @staticmethod
+    def spool_path(job_dir: str, index: int, filename: str) -> str:
+        """İş dizinindeki n. dosyanın spool yolu."""
+        return os.path.join(job_dir, f"{index:04d}_{os.path.basename(filename)}")
+
+    def _spool(self, job_dir: str, index: int, source: IngestSource) -> IngestSource:
+        """Bellekteki içeriği diske yazar; bellekteki kopyayı bırakır."""
+        if source.content is None:
+            return source
+        path = self.spool_path(job_dir, index, source.filename)
+        with open(path, "wb") as f:
+            f.write(source.content)
+        return IngestSource(filename=source.filename, path=path)
+
+    def new_spool_dir(self) -> str:
+        """Yeni bir iş için spool dizini oluşturur."""
+        job_dir = os.path.join(self.spool_dir, uuid.uuid4().hex[:12])
+        os.makedirs(job_dir, exist_ok=True)
+        return job_dir
+
+    async def submit(self, sources: List[IngestSource], spool_dir: Optional[str] = None) -> IngestionJob:
+        """
+        Dosyaları spool'a yazar ve yeni bir işi kuyruğa ekler.
+
+        Args:
+            sources: İşlenecek dosyalar (içerik bellekte veya diskte).
+            spool_dir: Dosyaların önceden yazıldığı iş dizini (varsa).
+
+        Raises:
+            IngestionQueueFull: Kuyrukta yer yoksa.
+        """
+        self._bind_loop(asyncio.get_running_loop())
+        if self._queue.full():
+            raise IngestionQueueFull("Ingestion kuyruğu dolu, lütfen daha sonra tekrar deneyin.")
+
+        job_dir = spool_dir or self.new_spool_dir()
+        job = IngestionJob(id=os.path.basename(job_dir), files=[FileProgress(s.filename) for s in sources])
+
+        def spool_all():
+            os.makedirs(job_dir, exist_ok=True)
+            return [self._spool(job_dir, n, s) for n, s in enumerate(sources)]
+
+        job.spool_dir = job_dir
+        job.sources = await asyncio.to_thread(spool_all)
+        try:
+            # Spool sırasında kuyruk başka isteklerle dolmuş olabilir
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise IngestionQueueFull("Ingestion kuyruğu dolu, lütfen daha sonra tekrar deneyin.")
+        self.jobs[job.id] = job
+        metrics.inc("ingest.jobs_submitted")
+        metrics.set_gauge("ingest.jobs_queued", self._queue.qsize())
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[IngestionJob]:
+        return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        İşi iptal eder. Kuyruktaki iş hiç başlamaz; çalışan iş bir sonraki
+        aşama sınırında durur (o ana kadar indekse yazılanlar kalır).
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+        return job
+
+    @asynccontextmanager
+    async def paused(self):
+        """
+        Blok süresince iş çalıştırmayı durdurur (örn. indeks sıfırlanırken).
+
+        Girişte kuyruktaki ve çalışan tüm işler iptal edilir ve çalışanların
+        durması beklenir; blok içinde gönderilen işler çıkışta başlar.
+
+        Yields:
+            int: İptal edilen iş sayısı.
+        """
+        self._bind_loop(asyncio.get_running_loop())
+        async with self._pause_lock:
+            self._resume.clear()
+            try:
+                cancelled = 0
+                for job in list(self.jobs.values()):
+                    if not job.finished:
+                        self.cancel(job.id)
+                        cancelled += 1
+                await self._drained.wait()
+                yield cancelled
+            finally:
+                self._resume.set()
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            metrics.set_gauge("ingest.jobs_queued", self._queue.qsize())
+            try:
+                await self._resume.wait()
+                if not job.finished:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        job.status = "running"
+        job.started_at = time.time()
+        self._running += 1
+        self._drained.clear()
+        metrics.set_gauge("ingest.jobs_running", self._running)
+        try:
+            await self.pipeline.run(job.sources, progress=job.files, cancel_event=job.cancel_event)
+            self._finish(job, "cancelled" if job.cancel_event.is_set() else "done")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "error")
+        finally:
+            self._running -= 1
+            if not self._running:
+                self._drained.set()
+            metrics.set_gauge("ingest.jobs_running", self._running)
+
+    def _finish(self, job: IngestionJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        if status == "cancelled":
+            for p in job.files:
+                if p.status in ("pending", "processing"):
+                    p.status = "cancelled"
+        job.sources = []
+        if job.spool_dir:
+            shutil.rmtree(job.spool_dir, ignore_errors=True)
+        metrics.inc(f"ingest.jobs_{status}")
+        if job.started_at:
+            metrics.observe("ingest.job_ms", (job.finished_at - job.started_at) * 1000)
+
+    def _prune(self):
+        """Geçmişte tutulan tamamlanmış iş sayısını sınırlar."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        """Çalışan işleri iptal eder, spool dosyalarını siler ve worker'ları durdurur."""
+        for job in self.jobs.values():
+            if not job.finished:
+                job.cancel_event.set()
+                self._finish(job, "cancelled")
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Singleton instance
+ingestion_jobs = IngestionJobManager()
@@ -1,30 +1,101 @@
+import asyncio
 import os
 import shutil
+import time
 from langchain_google_genai import ChatGoogleGenerativeAI
-from rag_app.services.embedding_service import embedding_service
+from rag_app.services.embedding_batcher import embedding_batcher
 from rag_app.services.vector_store import vector_store
+from rag_app.utils.context_packer import compress_text, pack_chunks
+from rag_app.utils.text_processing import get_token_counter
+from src.config import (
+    GEMINI_BASE_URL, RAG_CONTEXT_MAX_TOKENS, RAG_FETCH_K, RAG_MAX_K, RAG_MIN_K, RAG_MMR_LAMBDA,
+    RAG_SCORE_MARGIN, RETRIEVAL_CACHE_SIZE,
+)
+from src.models.llm_cache import cache_for
+from src.models.provider_limits import GatedChatModel, gated
+from src.monitoring.metrics import metrics
+from src.utils.cache import LRUCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=GEMINI_API_KEY,
-    temperature=0.3
-)
+_llm = None
+
+def get_llm() -> GatedChatModel:
+    """
+    Gemini istemcisini ilk kullanımda oluşturur (import anında değil).
+    Çağrılar ajanlarla ortak Gemini kapısından (eşzamanlılık / kota) geçer;
+    yanıt önbelleği (LLM_CACHE_NONDETERMINISTIC ile açıksa) akışta da kullanılır.
+    """
+    global _llm
+    if _llm is None:
+        _llm = gated(ChatGoogleGenerativeAI(
+            model="gemini-2.5-flash",
+            google_api_key=GEMINI_API_KEY,
+            base_url=GEMINI_BASE_URL or None,
+            temperature=0.3,
+            cache=cache_for(0.3)
+        ), "gemini")
+    return _llm
 
 SIMILARITY_THRESHOLD = 0.75  # E5 için benzerlik eşiği
 
+# Aynı soru için embedding + arama sonuçları; anahtar indeks versiyonunu içerir
+retrieval_cache = LRUCache(RETRIEVAL_CACHE_SIZE, name="retrieval")
+_cached_version = None
+
+
+def normalize_query(question: str) -> str:
+    """Önbellek anahtarı için soruyu normalize eder (büyük/küçük harf, boşluklar)."""
+    return " ".join(question.casefold().split())
+
+
+async def retrieve(question: str) -> list:
+    """
+    Soruya en uygun chunk'ları döndürür; sonuçlar önbelleklenir.
+
+    Anahtar: (normalize soru, arama parametreleri, indeks versiyonu).
+    VectorStore her ekleme/silme/sıfırlamada versiyonu artırdığı için eski
+    sonuçlar yeni versiyonda asla dönmez; versiyon değişince önbellek
+    ayrıca boşaltılır. Sidecar modunda versiyon sunucu epoch'unu da içerir
+    (yeniden başlayan sidecar'ın sıfırlanan sayacı eski kayıtlarla çakışmaz).
+
+    Returns:
+        list: vector_store.search_mmr sonuçları (her çağrıda yeni kopya).
+    """
+    global _cached_version
+    version = vector_store.version
+    if version != _cached_version:
+        retrieval_cache.clear()
+        _cached_version = version
+
+    params = (SIMILARITY_THRESHOLD, RAG_FETCH_K, RAG_MIN_K, RAG_MAX_K, RAG_SCORE_MARGIN, RAG_MMR_LAMBDA)
+    key = (normalize_query(question), params, version)
+    results = retrieval_cache.get(key, None)
+    if results is not None:
+        # Çağıran sonuçları değiştirse de önbellekteki kayıt bozulmasın
+        return [dict(r) for r in results]
+
+    # 1. Embedding oluştur
+    # Eşzamanlı sorgular tek batch'te vektörleştirilir (worker thread'de)
+    query_vec = await embedding_batcher.embed_query(question)
+
+    # 2. Vektör Araması (Retrieve)
+    # Geniş aday havuzundan eşiği geçenler arasında k adaptif seçilir,
+    # örtüşen chunk'lar yerine MMR ile çeşitli sonuçlar döner.
+    # Sidecar modunda bu bir soket çağrısıdır; event loop'u bloklamasın
+    results = await asyncio.to_thread(vector_store.search_mmr, query_vec, min_score=SIMILARITY_THRESHOLD)
+    metrics.observe("rag.top_k", len(results))
+    retrieval_cache.put(key, tuple(dict(r) for r in results))
+    return results
+
+
 async def process_query(question: str):
     try:
-        # 1. Embedding oluştur
         print(f"Sorgu işleniyor: {question}")
-        query_vec = embedding_service.embed_query(question)
-        
-        # 2. Vektör Araması (Retrieve)
-        results = vector_store.search(query_vec, k=3)
+        results = await retrieve(question)
         
         # Skor loglama
         print(f"Bulunan Doküman Sayısı: {len(results)}")
@@ -32,7 +103,7 @@ async def process_query(question: str):
             print(f" - {r['filename']} (Skor: {r['score']:.4f})")
         
         # 3. Sonuçları Değerlendir
-        relevant_docs = [r for r in results if r['score'] > SIMILARITY_THRESHOLD]
+        relevant_docs = [r for r in results if r['score'] >= SIMILARITY_THRESHOLD]
     except Exception as e:
         print(f"Retrieval/Embedding hatası: {e}")
         relevant_docs = []
@@ -42,9 +113,13 @@ async def process_query(question: str):
     
     if relevant_docs:
         print("Yeterli benzerlikte doküman bulundu.")
-        # Doküman bulundu -> context oluştur
-        context = "\n\n".join([f"Dosya: {d['filename']}\nİçerik: {d['text']}" for d in relevant_docs])
-        sources = [d['filename'] for d in relevant_docs]
+        # Doküman bulundu -> token bütçesine sığan, tekrarsız context oluştur
+        packed, stats = pack_chunks(relevant_docs, RAG_CONTEXT_MAX_TOKENS)
+        metrics.observe("rag.context_tokens_raw", stats["tokens_raw"])
+        metrics.observe("rag.context_tokens", stats["tokens"])
+        metrics.inc("rag.context_chunks_dropped", stats["dropped_duplicate"] + stats["dropped_budget"])
+        context = "\n\n".join([f"Dosya: {d['filename']}\nİçerik: {d['text']}" for d in packed])
+        sources = list(dict.fromkeys(d['filename'] for d in packed))
         
         prompt = f"""Aşağıdaki bağlamı kullanarak kullanıcı sorusunu cevapla. Sadece verilen bağlamdaki bilgileri kullan.
         
@@ -66,7 +141,9 @@ async def process_query(question: str):
                 results = list(ddgs.text(question, max_results=3, backend="html"))
                 if results:
                     search_context = "\n".join([f"{r['title']}: {r['body']}" for r in results])
-                    context = search_context
+                    context, raw_tokens, tokens = compress_text(search_context, RAG_CONTEXT_MAX_TOKENS, query=question)
+                    metrics.observe("rag.context_tokens_raw", raw_tokens)
+                    metrics.observe("rag.context_tokens", tokens)
                     sources = ["Web Search (DuckDuckGo)"]
                     print("Web arama sonuçları bulundu.")
                 else:
@@ -86,8 +163,20 @@ async def process_query(question: str):
             return {"answer": "Üzgünüm, dokümanlarda bilgi bulamadım ve web araması başarısız oldu.", "sources": []}
 
     # 4. Gemini'ye sor (Generate)
+    # Yanıt akış (stream) olarak alınır; ilk token süresi (TTFT) ölçülür
+    metrics.observe("rag.prompt_tokens", get_token_counter()(prompt))
     try:
-        response = await llm.ainvoke(prompt)
+        started = time.perf_counter()
+        response = None
+        async for chunk in get_llm().astream(prompt):
+            if response is None:
+                metrics.observe("rag.ttft_ms", (time.perf_counter() - started) * 1000)
+                response = chunk
+            else:
+                response += chunk
+        metrics.observe("rag.llm_ms", (time.perf_counter() - started) * 1000)
+        if response is None:
+            raise RuntimeError("Model boş yanıt döndürdü.")
         return {
             "answer": response.content,
             "sources": sources,
@@ -1,7 +1,12 @@
 import faiss
 import pickle
 import os
+import threading
 import numpy as np
+from rag_app.utils.retrieval import choose_k, mmr
+from src.config import (
+    RAG_FETCH_K, RAG_MAX_K, RAG_MIN_K, RAG_MMR_LAMBDA, RAG_SCORE_MARGIN, RAG_SERVICE_ADDRESS,
+)
 
 # Sabitler
 INDEX_FILE = "faiss_index.bin"
@@ -12,84 +17,211 @@ class VectorStore:
     """
     FAISS tabanlı vektör veritabanı yönetim sınıfı.
     Vektörleri ve ilgili metadataları (dosya adı, metin) saklar.
+
+    İndeks import anında değil, ilk kullanımda (lazy) diskten yüklenir.
     """
     def __init__(self, index_path=INDEX_FILE, metadata_path=METADATA_FILE):
         self.index_path = index_path
         self.metadata_path = metadata_path
         self.index = None
         self.metadata = []  # Metadata listesi
-        self._load_index()
+        self.version = 0  # Her ekleme/silme/sıfırlamada artar (önbellek anahtarlarında kullanılır)
+        self._lock = threading.RLock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """İndeks belleğe yüklendi mi?"""
+        return self.index is not None
+
+    def _ensure_loaded(self):
+        """İndeks henüz yüklenmediyse yükler (thread-safe)."""
+        if self.index is None:
+            with self._lock:
+                if self.index is None:
+                    self._load_index()
+
+    def warm_up(self):
+        """İndeksi önceden belleğe yükler (startup ısıtması için)."""
+        self._ensure_loaded()
 
     def _load_index(self):
-        """Diskteki indeksi yükler veya yeni oluşturur."""
+        """
+        Diskteki indeksi yükler veya yeni oluşturur.
+        Kilitsiz okuyan _ensure_loaded yarım yüklenmiş durumu görmesin diye
+        metadata önce, indeks en son atanır.
+        """
+        metadata = []
         if os.path.exists(self.index_path) and os.path.exists(self.metadata_path):
             print("Mevcut Vektör DB yükleniyor...")
-            self.index = faiss.read_index(self.index_path)
+            index = faiss.read_index(self.index_path)
             with open(self.metadata_path, 'rb') as f:
-                self.metadata = pickle.load(f)
+                metadata = pickle.load(f)
         else:
             print("Yeni Vektör DB oluşturuluyor...")
-            self.index = faiss.IndexFlatIP(DIMENSION)  # Cosine Similarity (inner product & normalized vectors)
+            index = faiss.IndexFlatIP(DIMENSION)  # Cosine Similarity (inner product & normalized vectors)
+        self.metadata = metadata
+        self.index = index
 
-    def add_documents(self, embeddings: list, metas: list):
+    def add_documents(self, embeddings: list, metas: list, save: bool = True):
         """
         Veritabanına yeni dokümanlar ekler.
         embeddings: Vektör listesi
         metas: Metadata listesi (dict)
+        save: False ise sadece bellekteki indekse eklenir; toplu yüklemelerde
+              diske yazma en sonda save() ile bir kez yapılır.
         """
-        if not embeddings:
+        if len(embeddings) == 0:
             return
         
         vectors = np.array(embeddings).astype('float32')
-        self.index.add(vectors)
-        self.metadata.extend(metas)
-        self._save_index()
+        with self._lock:
+            self._ensure_loaded()
+            self.index.add(vectors)
+            self.metadata.extend(metas)
+            if save:
+                self._save_index()
+            self.version += 1
         print(f"{len(embeddings)} chunk eklendi.")
 
+    def save(self):
+        """Bellekteki indeksi ve metadatayı diske yazar."""
+        with self._lock:
+            self._ensure_loaded()
+            self._save_index()
+
     def search(self, query_embedding: list, k=3):
         """
         Vektör araması yapar.
         query_embedding: Sorgu vektörü
         k: Döndürülecek en yakın sonuç sayısı
         """
-        if self.index.ntotal == 0:
-            return []
-            
+        self._ensure_loaded()
         query_vec = np.array([query_embedding]).astype('float32')
-        scores, indices = self.index.search(query_vec, k)
-        
+        # add_documents / remove_files ile aynı kilit: indeks ve metadata birlikte değişir
+        with self._lock:
+            if self.index.ntotal == 0:
+                return []
+            scores, indices = self.index.search(query_vec, k)
+            metas = [(float(score), self.metadata[idx]) for score, idx in zip(scores[0], indices[0]) if idx != -1]
+
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx != -1:
-                meta = self.metadata[idx]
-                results.append({
-                    "filename": meta['filename'],
-                    "text": meta['text'],
-                    "score": float(score)
-                })
+        for score, meta in metas:
+            results.append({
+                "filename": meta['filename'],
+                "text": meta['text'],
+                "score": score
+            })
         return results
 
+    def search_mmr(self, query_embedding: list, min_score: float, fetch_k: int = RAG_FETCH_K,
+                   min_k: int = RAG_MIN_K, max_k: int = RAG_MAX_K,
+                   margin: float = RAG_SCORE_MARGIN, lambda_mult: float = RAG_MMR_LAMBDA):
+        """
+        Adaptif k ve MMR çeşitliliği ile arama yapar.
+        fetch_k aday getirilir; k skor dağılımından seçilir ve sonuçlar eşiği
+        geçen adaylar arasından MMR ile belirlenir. Aday vektörleri yeniden
+        embed edilmez, indeksten (reconstruct) okunur.
+
+        Returns:
+            list: search() ile aynı biçimde, MMR seçim sırasıyla sonuçlar.
+        """
+        self._ensure_loaded()
+        query_vec = np.array([query_embedding]).astype('float32')
+        with self._lock:
+            if self.index.ntotal == 0:
+                return []
+            scores, indices = self.index.search(query_vec, min(fetch_k, self.index.ntotal))
+            valid = indices[0] != -1
+            scores, ids = scores[0][valid], indices[0][valid]
+            k = choose_k(scores, min_k, max_k, min_score, margin)
+            if k == 0:
+                return []
+            relevant = int(np.sum(scores >= min_score))
+            scores, ids = scores[:relevant], ids[:relevant]
+            vectors = self.index.reconstruct_batch(ids)
+            chosen = mmr(query_vec[0], vectors, k, lambda_mult)
+            metas = [self.metadata[ids[n]] for n in chosen]
+        return [
+            {"filename": meta['filename'], "text": meta['text'], "score": float(scores[n])}
+            for n, meta in zip(chosen, metas)
+        ]
+
     def _save_index(self):
-        """İndeksi ve metadatayı diske kaydeder."""
-        faiss.write_index(self.index, self.index_path)
-        with open(self.metadata_path, 'wb') as f:
+        """
+        İndeksi ve metadatayı diske kaydeder.
+        Önce geçici dosyalara yazılır, sonra yerine taşınır; yazma sırasında
+        kesilen bir işlem mevcut dosyaları bozmaz.
+        """
+        faiss.write_index(self.index, self.index_path + ".tmp")
+        with open(self.metadata_path + ".tmp", 'wb') as f:
             pickle.dump(self.metadata, f)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        os.replace(self.metadata_path + ".tmp", self.metadata_path)
+
+    def remove_files(self, filenames, save: bool = True) -> int:
+        """
+        Verilen dosyalara ait vektörleri indeksten çıkarır.
+        Yakın-kopya elemesiyle başka dosyalarca da paylaşılan chunk'lar
+        silinmez; sadece kaynak listesinden çıkarılır.
+
+        Returns:
+            int: Silinen vektör sayısı.
+        """
+        filenames = set(filenames)
+        with self._lock:
+            self._ensure_loaded()
+            ids = []
+            reassigned = False
+            for n, meta in enumerate(self.metadata):
+                sources = meta.get('sources')
+                if sources and filenames.intersection(sources):
+                    sources[:] = [s for s in sources if s not in filenames]
+                    if sources:
+                        meta['filename'] = sources[0]
+                        reassigned = True
+                        continue
+                if meta['filename'] in filenames:
+                    ids.append(n)
+            if not ids:
+                if reassigned:
+                    if save:
+                        self._save_index()
+                    # Sonuçlardaki dosya adları değişti; önbellekler geçersiz olmalı
+                    self.version += 1
+                return 0
+            self.index.remove_ids(np.array(ids, dtype='int64'))
+            removed = set(ids)
+            self.metadata = [m for n, m in enumerate(self.metadata) if n not in removed]
+            if save:
+                self._save_index()
+            self.version += 1
+        return len(ids)
 
     def list_files(self):
         """İndekslenmiş benzersiz dosya isimlerini döndürür"""
+        self._ensure_loaded()
         files = {m['filename'] for m in self.metadata}
+        for m in self.metadata:
+            files.update(m.get('sources', ()))
         return list(files)
 
     def reset(self):
         """Veritabanını sıfırlar ve diskteki dosyaları siler."""
         print("Vektör DB sıfırlanıyor...")
-        self.index = faiss.IndexFlatIP(DIMENSION)
-        self.metadata = []
-        if os.path.exists(self.index_path):
-            os.remove(self.index_path)
-        if os.path.exists(self.metadata_path):
-            os.remove(self.metadata_path)
+        with self._lock:
+            self.index = faiss.IndexFlatIP(DIMENSION)
+            self.metadata = []
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            if os.path.exists(self.metadata_path):
+                os.remove(self.metadata_path)
+            self.version += 1
         print("Vektör DB temizlendi.")
 
-# Singleton instance
-vector_store = VectorStore()
+# Singleton instance (İndeks ilk kullanımda yüklenir)
+# RAG_SERVICE_ADDRESS ayarlıysa indeks paylaşılan sidecar serviste tutulur.
+if RAG_SERVICE_ADDRESS:
+    from rag_app.services.index_client import RemoteVectorStore, get_index_client
+    vector_store = RemoteVectorStore(get_index_client(RAG_SERVICE_ADDRESS))
+else:
+    vector_store = VectorStore()
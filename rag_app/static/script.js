@@ -71,6 +71,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
                     // Eğer içerik varsa ve kullanıcıya göstermek istiyorsak:
                     // addMessage(`[${nodeName}]: ${data.content.substring(0, 100)}...`, 'bot');
+                } else if (data.event === "cache_hit") {
+                    addLog(`Önbellekten yanıtlandı (benzer soru: "${data.content}")`, 'system');
                 } else if (data.event === "system") {
                     addLog(data.content, 'system');
                 } else if (data.event === "final_result") {
@@ -152,11 +154,39 @@ document.addEventListener('DOMContentLoaded', () => {
             const data = await res.json();
 
             if (res.ok) {
-                addMessage(`✅ ${data.message}`, 'bot');
-                loadFiles(); // Refresh list
+                addMessage(`⏳ ${data.message}`, 'bot');
+                if (data.errors.length) {
+                    addMessage(`⚠️ ${data.errors.join(', ')}`, 'bot');
+                }
+                pollJob(data.job_id);
             } else {
-                addMessage(`❌ Yükleme Hatası: ${JSON.stringify(data.errors)}`, 'bot');
+                addMessage(`❌ Yükleme Hatası: ${JSON.stringify(data.detail)}`, 'bot');
+            }
+        } catch (err) {
+            addMessage(`❌ Bağlantı Hatası: ${err.message}`, 'bot');
+        }
+    }
+
+    // Arka plan ingestion işini bitene kadar izler
+    async function pollJob(jobId) {
+        try {
+            const res = await fetch(`/upload/jobs/${jobId}`);
+            const job = await res.json();
+
+            if (!['done', 'error', 'cancelled'].includes(job.status)) {
+                setTimeout(() => pollJob(jobId), 1000);
+                return;
+            }
+
+            const done = job.files.filter(f => f.status === 'done');
+            const failed = job.files.filter(f => f.status !== 'done');
+            if (done.length) {
+                addMessage(`✅ ${done.length} dosya başarıyla işlendi.`, 'bot');
+            }
+            if (failed.length) {
+                addMessage(`❌ ${failed.map(f => `${f.filename}: ${f.error || f.status}`).join(', ')}`, 'bot');
             }
+            loadFiles(); // Refresh list
         } catch (err) {
             addMessage(`❌ Bağlantı Hatası: ${err.message}`, 'bot');
         }
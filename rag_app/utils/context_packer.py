@@ -0,0 +1,203 @@
+"""
+Token bütçeli bağlam (context) paketleme.
+
+LLM'e giden prompt'un boyutu, dolayısıyla gecikme ve maliyet, bağlama
+eklenen metin miktarıyla büyür. Bu modül:
+
+- RAG chunk'larını skora göre sıralar, örtüşen chunk'ların (chunk overlap'i
+  veya aynı metnin tekrarı) daha önce eklenmiş cümlelerini atar ve
+  sonuçları verilen token bütçesini dolduracak kadar ekler.
+- Ajan raporları gibi tek parça metinleri bütçeye sığmıyorsa çıkarımsal
+  (extractive) olarak sıkıştırır: soruyla en çok kelime paylaşan cümleler
+  ve başlık satırları özgün sırasıyla korunur, atlanan kısımlar "[…]" ile
+  işaretlenir.
+
+Token'lar embedding modelinin tokenizer'ı ile sayılır (bkz.
+text_processing.get_token_counter); LLM tokenizer'ından farklı olsa da
+bütçe için yeterince yakın bir ölçüdür.
+"""
+
+import re
+from typing import Callable, List, Optional, Tuple
+
+from rag_app.utils.text_processing import get_token_counter, split_sentences
+
+ELLIPSIS = "[…]"
+# Bütçede bundan az token kaldıysa kesilmiş chunk eklenmez
+MIN_PARTIAL_TOKENS = 32
+
+_QUERY_WORD = re.compile(r"\w{3,}", re.UNICODE)
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+def truncate_tokens(text: str, max_tokens: int, count_tokens: Optional[Callable[[str], int]] = None) -> str:
+    """
+    Metni kelime sınırından, max_tokens'ı aşmayacak şekilde keser.
+
+    Args:
+        text: Kesilecek metin.
+        max_tokens: Token sınırı.
+        count_tokens: Token sayma fonksiyonu (varsayılan: get_token_counter()).
+
+    Returns:
+        str: Kesilmiş metin (sığıyorsa metnin kendisi).
+    """
+    count = count_tokens or get_token_counter()
+    if count(text) <= max_tokens:
+        return text
+    words = text.split()
+    # Sığan en uzun kelime önekini ikili arama ile bul
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count(" ".join(words[:mid])) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return " ".join(words[:low])
+
+
+def pack_chunks(docs: List[dict], max_tokens: int,
+                count_tokens: Optional[Callable[[str], int]] = None) -> Tuple[List[dict], dict]:
+    """
+    Arama sonuçlarını token bütçesine sığacak şekilde seçer.
+
+    Args:
+        docs: vector_store.search sonuçları ({"text", "filename", "score", ...}).
+        max_tokens: Chunk metinleri için toplam token bütçesi (başlıklar hariç).
+        count_tokens: Token sayma fonksiyonu (varsayılan: get_token_counter()).
+
+    Returns:
+        tuple: (seçilen dokümanlar, istatistikler). Seçilen dokümanlar skora göre
+        sıralı kopyalardır; "text" alanı tekrar eden cümlelerden arındırılmış ve
+        gerekirse kesilmiştir. İstatistikler: tokens_raw, tokens, packed,
+        dropped_duplicate, dropped_budget, truncated.
+    """
+    count = count_tokens or get_token_counter()
+    stats = {"tokens_raw": 0, "tokens": 0, "packed": 0,
+             "dropped_duplicate": 0, "dropped_budget": 0, "truncated": 0}
+    seen = set()
+    packed = []
+
+    for doc in sorted(docs, key=lambda d: d.get("score", 0.0), reverse=True):
+        stats["tokens_raw"] += count(doc["text"])
+        sentences, keys = [], set()
+        for sentence in split_sentences(doc["text"]):
+            key = _normalize(sentence)
+            if key not in seen and key not in keys:
+                sentences.append(sentence)
+                keys.add(key)
+        if not sentences:
+            stats["dropped_duplicate"] += 1
+            continue
+
+        remaining = max_tokens - stats["tokens"]
+        text = " ".join(sentences)
+        tokens = count(text)
+        if tokens > remaining:
+            if remaining < MIN_PARTIAL_TOKENS:
+                stats["dropped_budget"] += 1
+                continue
+            # Sığan cümleleri al; ilk cümle bile sığmıyorsa kelimeden kes
+            kept = []
+            for sentence in sentences:
+                if count(" ".join(kept + [sentence])) > remaining:
+                    break
+                kept.append(sentence)
+            text = " ".join(kept) if kept else truncate_tokens(sentences[0], remaining, count)
+            sentences = kept
+            tokens = count(text)
+            stats["truncated"] += 1
+
+        seen.update(_normalize(s) for s in sentences)
+        packed.append({**doc, "text": text})
+        stats["tokens"] += tokens
+        stats["packed"] += 1
+
+    return packed, stats
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip()
+    return stripped.startswith(("#", "**", "[")) or (len(stripped) <= 60 and stripped.endswith(":"))
+
+
+def compress_text(text: str, max_tokens: int, query: str = "",
+                  count_tokens: Optional[Callable[[str], int]] = None) -> Tuple[str, int, int]:
+    """
+    Metni çıkarımsal olarak token bütçesine sığdırır.
+
+    Satır yapısı (başlıklar, maddeler) korunur. Cümleler soruyla paylaştıkları
+    kelime sayısına, eşitlikte metindeki sırasına göre seçilir; başlık
+    satırları her zaman önceliklidir.
+
+    Args:
+        text: Sıkıştırılacak metin (örn. ajan raporu).
+        max_tokens: Token bütçesi.
+        query: Kullanıcı sorusu (cümle seçimi için).
+        count_tokens: Token sayma fonksiyonu (varsayılan: get_token_counter()).
+
+    Returns:
+        tuple: (metin, özgün token sayısı, sonuç token sayısı).
+    """
+    count = count_tokens or get_token_counter()
+    raw_tokens = count(text)
+    if raw_tokens <= max_tokens:
+        return text, raw_tokens, raw_tokens
+
+    # (satır no, cümle, token, öncelik) birimleri
+    query_words = {w.lower() for w in _QUERY_WORD.findall(query)}
+    units = []
+    for line_no, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
+        heading = _is_heading(line)
+        for sentence in ([line.strip()] if heading else split_sentences(line)):
+            overlap = len(query_words & {w.lower() for w in _QUERY_WORD.findall(sentence)})
+            units.append((line_no, sentence, count(sentence), (heading, overlap)))
+
+    order = sorted(range(len(units)), key=lambda n: (not units[n][3][0], -units[n][3][1], n))
+    selected, used = [], 0
+    for n in order:
+        # Satır sonları için cümle başına bir token pay
+        tokens = units[n][2] + 1
+        if used + tokens <= max_tokens:
+            selected.append(n)
+            used += tokens
+
+    result = _assemble(units, set(selected))
+    # "[…]" işaretleri bütçeyi aştırdıysa en düşük öncelikli cümleleri çıkar
+    while selected and count(result) > max_tokens:
+        selected.pop()
+        result = _assemble(units, set(selected))
+    if not selected:
+        suffix = " " + ELLIPSIS
+        result = truncate_tokens(text, max(0, max_tokens - count(suffix)), count) + suffix
+    return result, raw_tokens, count(result)
+
+
+def _assemble(units: list, selected: set) -> str:
+    """Seçilen cümleleri özgün satır yapısıyla birleştirir, atlananları işaretler."""
+    lines: List[str] = []
+    previous_line, skipped = None, False
+    for n, (line_no, sentence, _, _) in enumerate(units):
+        if n not in selected:
+            skipped = True
+            continue
+        if line_no == previous_line:
+            lines[-1] += (f" {ELLIPSIS} " if skipped else " ") + sentence
+        else:
+            if skipped:
+                # Atlanan kısım önceki satırın sonunda (veya en başta) işaretlenir
+                if lines:
+                    lines[-1] += " " + ELLIPSIS
+                else:
+                    lines.append(ELLIPSIS)
+            lines.append(sentence)
+        previous_line, skipped = line_no, False
+    if skipped and lines:
+        lines.append(ELLIPSIS)
+    return "\n".join(lines)
@@ -0,0 +1,204 @@
+"""
+Yakın-kopya (near-duplicate) chunk tespiti.
+
+Kurumsal doküman arşivlerinde başlık/altbilgi, yasal uyarı ve tekrar eden
+bölümler aynı metni defalarca indekse taşır. Bu modül chunk'ları embed
+edilmeden önce MinHash + LSH ile karşılaştırır:
+
+1. Metin normalize edilir (küçük harf, tek boşluk); birebir aynı metinler
+   hash ile anında yakalanır.
+2. Kelime 3'lü shingle'larından NUM_PERM elemanlı MinHash imzası çıkarılır.
+3. İmza BANDS banda bölünür; herhangi bir bandı aynı olan chunk'lar aday olur.
+4. Adaylar arasında tahmini Jaccard benzerliği eşik değerini geçen ilk chunk
+   "asıl" kabul edilir; yeni chunk düşürülür ve kaynağı asıl chunk'ın
+   referans listesine eklenir.
+
+Boru hattında asıl chunk indekse yazılana kadar "bekleyen" (pending)
+kalır: ona karşı düşürülen başka dosyaların chunk'ları saklanır. Asıl
+chunk'ın dosyası başarısız olursa discard() anahtarı unutur ve bu
+chunk'ları geri verir; içerik kaybolmaz.
+"""
+
+import hashlib
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import DEDUP_BANDS, DEDUP_NUM_PERM, DEDUP_THRESHOLD
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# 32 bitlik shingle hash'leri için evrensel hash ailesi (a*x + b) mod p
+_PRIME = np.uint64(4294967291)
+SHINGLE_SIZE = 3
+
+
+class NearDuplicateDetector:
+    """
+    MinHash LSH tabanlı yakın-kopya dedektörü.
+
+    Args:
+        threshold: Kopya sayılması için tahmini Jaccard benzerliği eşiği.
+        num_perm: MinHash imza uzunluğu.
+        bands: LSH bant sayısı (num_perm'e tam bölünmeli).
+        seed: Hash ailesi için tohum (çalışmalar arası tutarlılık için sabit).
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, num_perm: int = DEDUP_NUM_PERM,
+                 bands: int = DEDUP_BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm, bands değerine tam bölünmelidir.")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+
+        self._exact: Dict[bytes, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self._signatures: List[np.ndarray] = []
+        # Asıl chunk anahtarı -> metnin geçtiği kaynaklar (dosya adları)
+        self.references: Dict[int, List[str]] = {}
+        # Henüz indekse yazılmamış asıl chunk'lar: anahtar -> (kaynak, digest, bant anahtarları)
+        self._pending: Dict[int, Tuple[str, bytes, List[bytes]]] = {}
+        # Bekleyen asıl chunk'a karşı düşürülen başka kaynakların chunk'ları: anahtar -> [(kaynak, metin)]
+        self._dependents: Dict[int, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"checked": 0, "exact": 0, "near": 0}
+
+    def _signature(self, words: List[str]) -> np.ndarray:
+        """Kelime shingle'larından MinHash imzası üretir."""
+        if len(words) <= SHINGLE_SIZE:
+            shingles = {" ".join(words)}
+        else:
+            shingles = {" ".join(words[n:n + SHINGLE_SIZE]) for n in range(len(words) - SHINGLE_SIZE + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (num_perm x shingle) matris; her permütasyon için minimum değer
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def check(self, text: str, source: str, pending: bool = False) -> Tuple[int, bool]:
+        """
+        Metni daha önce görülenlerle karşılaştırır.
+
+        Args:
+            text: Chunk metni.
+            source: Metnin geldiği kaynak (dosya adı).
+            pending: True ise yeni asıl chunk commit() çağrılana kadar
+                bekleyen sayılır (bkz. discard).
+
+        Returns:
+            tuple: (anahtar, kopya_mı). Kopyaysa anahtar asıl chunk'ınkidir ve
+            kaynak onun referans listesine eklenir; değilse metin yeni bir
+            anahtarla kaydedilir.
+        """
+        words = _TOKEN.findall(text.lower())
+        digest = hashlib.blake2b(" ".join(words).encode("utf-8"), digest_size=16).digest()
+        signature = self._signature(words) if words else np.zeros(self.num_perm, dtype=np.uint32)
+        band_keys = [
+            signature[n * self.rows:(n + 1) * self.rows].tobytes() for n in range(self.bands)
+        ]
+
+        with self._lock:
+            self.stats["checked"] += 1
+            key = self._exact.get(digest)
+            if key is not None:
+                self.stats["exact"] += 1
+                self._add_reference(key, source, text)
+                return key, True
+
+            match = self._find_match(signature, band_keys)
+            if match is not None:
+                self.stats["near"] += 1
+                self._add_reference(match, source, text)
+                return match, True
+
+            key = len(self._signatures)
+            self._signatures.append(signature)
+            self._exact[digest] = key
+            for bucket, band_key in zip(self._buckets, band_keys):
+                bucket.setdefault(band_key, []).append(key)
+            self.references[key] = [source]
+            if pending:
+                self._pending[key] = (source, digest, band_keys)
+            return key, False
+
+    def sources(self, key: int) -> List[str]:
+        """Asıl chunk'ın kaynak listesinin kopyası (indekse yazılacak metadata için)."""
+        with self._lock:
+            return list(self.references[key])
+
+    def commit(self, key: int, sources: List[str]):
+        """
+        Bekleyen asıl chunk indekse yazıldı.
+
+        Args:
+            key: check() ile alınan anahtar.
+            sources: İndekse yazılan metadata'nın kaynak listesi. Sonraki
+                kopyaların kaynakları bu listeye eklenir.
+        """
+        with self._lock:
+            self._pending.pop(key, None)
+            self._dependents.pop(key, None)
+            # sources() ile commit arasında eklenen referanslar da kaybolmasın
+            for source in self.references.get(key, ()):
+                if source not in sources:
+                    sources.append(source)
+            self.references[key] = sources
+
+    def discard(self, source: str) -> List[Tuple[str, str]]:
+        """
+        Başarısız veya yarım kalan kaynağı unutur.
+
+        Kaynağın bekleyen asıl chunk'ları silinir (sonraki metinler onlarla
+        eşleşmez) ve kaynak diğer chunk'ların referanslarından çıkarılır.
+
+        Returns:
+            list: Silinen asıl chunk'lara karşı düşürülmüş, başka kaynaklara
+            ait (kaynak, metin) çiftleri; tekrar işlenmeleri gerekir.
+        """
+        orphans = []
+        with self._lock:
+            for key, (owner, digest, band_keys) in list(self._pending.items()):
+                if owner != source:
+                    continue
+                del self._pending[key]
+                del self.references[key]
+                if self._exact.get(digest) == key:
+                    del self._exact[digest]
+                for bucket, band_key in zip(self._buckets, band_keys):
+                    bucket[band_key].remove(key)
+                    if not bucket[band_key]:
+                        del bucket[band_key]
+                orphans.extend(self._dependents.pop(key, ()))
+            for dependents in self._dependents.values():
+                dependents[:] = [d for d in dependents if d[0] != source]
+            for refs in self.references.values():
+                # İlk kaynak asıl chunk'ın sahibidir; o zaten indekste
+                if source in refs[1:]:
+                    refs.remove(source)
+        return [o for o in orphans if o[0] != source]
+
+    def _find_match(self, signature: np.ndarray, band_keys: List[bytes]) -> Optional[int]:
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(band_key, ()))
+        for key in sorted(candidates):
+            if np.mean(self._signatures[key] == signature) >= self.threshold:
+                return key
+        return None
+
+    def _add_reference(self, key: int, source: str, text: str):
+        refs = self.references[key]
+        if source not in refs:
+            refs.append(source)
+        pending = self._pending.get(key)
+        if pending is not None and pending[0] != source:
+            self._dependents.setdefault(key, []).append((source, text))
+
+    @property
+    def dropped(self) -> int:
+        return self.stats["exact"] + self.stats["near"]
@@ -0,0 +1,78 @@
+"""
+Adaptif top-k ve MMR (Maximal Marginal Relevance) seçimi.
+
+Chunk'lar birbiriyle örtüştüğü için en yakın k sonuç çoğu zaman neredeyse
+aynı metni içerir. Arama bu yüzden geniş bir aday havuzu (fetch_k) getirir;
+ardından:
+
+1. Skor dağılımına göre kaç sonuç döneceği (k) seçilir: eşiği geçen ve en
+   iyi skora `margin` kadar yakın adaylar sayılır, [min_k, max_k] aralığına
+   sıkıştırılır.
+2. MMR, seçilmiş sonuçlara benzerliği cezalandırarak bu k sonucu ilgili
+   adaylar arasından çeşitlilik gözeterek seçer.
+
+Vektörler normalize olduğundan iç çarpım kosinüs benzerliğidir.
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def choose_k(scores: np.ndarray, min_k: int, max_k: int, min_score: float, margin: float) -> int:
+    """
+    Azalan sıralı aday skorlarından döndürülecek sonuç sayısını seçer.
+
+    Args:
+        scores: Adayların sorguya benzerlikleri (büyükten küçüğe).
+        min_k: İlgili aday varsa en az bu kadar sonuç.
+        max_k: En fazla sonuç sayısı.
+        min_score: İlgili sayılma eşiği.
+        margin: En iyi skora bu kadar yakın adaylar k'ya dahil edilir.
+
+    Returns:
+        int: Sonuç sayısı (ilgili aday yoksa 0).
+    """
+    relevant = int(np.sum(scores >= min_score))
+    if relevant == 0:
+        return 0
+    close = int(np.sum(scores[:relevant] >= scores[0] - margin))
+    return max(min(min_k, relevant), min(close, max_k))
+
+
+def mmr(query: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    MMR ile k aday seçer.
+
+    Her adımda `lambda * sorguya_benzerlik - (1 - lambda) * seçilenlere_max_benzerlik`
+    değeri en yüksek aday eklenir. Seçilenlere olan maksimum benzerlik her
+    adımda tek bir matris-vektör çarpımıyla güncellenir.
+
+    Args:
+        query: Sorgu vektörü (d,).
+        vectors: Aday vektörleri (n, d).
+        k: Seçilecek aday sayısı.
+        lambda_mult: 1 = sadece ilgililik, 0 = sadece çeşitlilik.
+
+    Returns:
+        list: Seçilen adayların indeksleri (seçilme sırasıyla).
+    """
+    n = len(vectors)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    relevance = vectors @ query
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = []
+    for _ in range(k):
+        if selected:
+            marginal = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            marginal = relevance.copy()
+        marginal[~available] = -np.inf
+        best = int(np.argmax(marginal))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, vectors @ vectors[best], out=max_similarity)
+    return selected
@@ -2,52 +2,160 @@ import fitz  # PyMuPDF
 from fastapi import UploadFile
 import docx
 import io
+import math
+import re
+from typing import Callable, Iterable, Iterator, Optional, Union
+from src.config import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
 
-async def extract_text_from_file(file: UploadFile) -> str:
+# Paragraf ve cümle sınırları
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…:;])\s+(?=[\"'“‘(\[]?[A-ZÇĞİÖŞÜ0-9•\-])")
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+# Paragraf sonu gelmeden tamponda tutulacak maksimum karakter
+MAX_PARAGRAPH_CHARS = 20_000
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+# TXT dosyaları bu boyutta dilimlerle çözülür
+TEXT_DECODE_CHUNK_BYTES = 64 * 1024
+
+
+def _iter_byte_slices(content: Union[bytes, str]) -> Iterator[bytes]:
+    """Bellekteki baytları veya diskteki dosyayı TEXT_DECODE_CHUNK_BYTES'lık dilimlerle okur."""
+    if isinstance(content, str):
+        with open(content, "rb") as f:
+            while piece := f.read(TEXT_DECODE_CHUNK_BYTES):
+                yield piece
+        return
+    view = memoryview(content)
+    for start in range(0, len(content), TEXT_DECODE_CHUNK_BYTES):
+        yield view[start:start + TEXT_DECODE_CHUNK_BYTES]
+
+
+def _iter_decoded_text(content: Union[bytes, str]) -> Iterator[str]:
     """
-    Yüklenen dosyalardan metin içeriğini çıkarır.
-    Desteklenen formatlar: .pdf, .docx, .txt
-    
+    TXT içeriğini (bayt veya dosya yolu) dilim dilim (incremental) çözer;
+    dosyanın tamamı hiçbir zaman belleğe alınmaz.
+    UTF-8 geçersiz bir baytla karşılaşırsa kalan kısmı latin-1 ile çözer.
+    """
+    import codecs
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    empty = True
+    for piece in _iter_byte_slices(content):
+        empty = False
+        try:
+            yield decoder.decode(piece)
+        except UnicodeDecodeError:
+            # Tampondaki yarım karakterlerle birlikte geri kalanı latin-1'e devret
+            pending, _ = decoder.getstate()
+            decoder = codecs.getincrementaldecoder("latin-1")()
+            yield decoder.decode(pending + bytes(piece))
+    try:
+        tail = decoder.decode(b"", True)
+    except UnicodeDecodeError:
+        # Dosya yarım bir UTF-8 karakteriyle bitiyor
+        pending, _ = decoder.getstate()
+        tail = pending.decode("latin-1")
+    if tail or empty:
+        yield tail
+
+
+def iter_text_segments(content: bytes, filename: str) -> Iterator[str]:
+    """
+    Dosya içeriğinden metni parça parça (akış halinde) üretir.
+
+    - PDF: Her sayfa ayrı bir parça olarak, sayfa okundukça üretilir.
+      Dosya yolu verilirse PyMuPDF dosyayı diskten açar (belleğe kopyalamaz).
+    - DOCX: Her paragraf bir parça (paragraflar arasında boş satır).
+    - TXT: 64 KB'lık dilimler halinde (diskten okunarak) çözülür.
+
     Args:
-        file (UploadFile): FastAPI dosya nesnesi
-        
-    Returns:
-        str: Dosyanın metin içeriği
+        content: Dosyanın ham baytları veya diskteki dosyanın yolu.
+        filename: Format tespiti için dosya adı.
+
+    Yields:
+        str: Metin parçası.
     """
-    filename = file.filename.lower()
-    content = await file.read()
-    
-    text = ""
-    
+    name = filename.lower()
+    from_path = isinstance(content, str)
+
     # PDF İşleme
-    if filename.endswith(".pdf"):
+    if name.endswith(".pdf"):
         # PyMuPDF (fitz) kullanarak stream'den okuma
-        with fitz.open(stream=content, filetype="pdf") as doc:
+        with _open_pdf(content) as doc:
             for page in doc:
-                text += page.get_text()
-            
+                yield page.get_text()
+
     # DOCX İşleme
-    elif filename.endswith(".docx"):
+    elif name.endswith(".docx"):
         # python-docx kütüphanesi BytesIO kullanır
-        doc = docx.Document(io.BytesIO(content))
+        doc = docx.Document(content if from_path else io.BytesIO(content))
         for para in doc.paragraphs:
-            text += para.text + "\n"
-            
-    # TXT İşleme 
-    elif filename.endswith(".txt"):
-        # Farklı encoding denemeleri
-        try:
-            text = content.decode("utf-8")
-        except UnicodeDecodeError:
-            try:
-                text = content.decode("latin-1")
-            except:
-                text = str(content) # Fallback
-                
-    elif filename.endswith(".doc"):
+            yield para.text + "\n\n"
+
+    # TXT İşleme
+    elif name.endswith(".txt"):
+        yield from _iter_decoded_text(content)
+
+    elif name.endswith(".doc"):
         raise ValueError(f".doc formatı desteklenmiyor, lütfen .docx'e çevirin: {filename}")
+
+
+def pdf_page_count(source) -> int:
+    """PDF'in sayfa sayısını döndürür (source: dosya yolu veya bayt)."""
+    with _open_pdf(source) as doc:
+        return doc.page_count
+
+
+def _open_pdf(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def extract_pdf_page_range(source, start: int, stop: int) -> list[str]:
+    """
+    PDF'in [start, stop) aralığındaki sayfalarının metnini döndürür.
+    Process pool worker'larında çalışır; bu yüzden modül seviyesinde tanımlıdır.
+    """
+    with _open_pdf(source) as doc:
+        return [doc[n].get_text() for n in range(start, min(stop, doc.page_count))]
+
+
+def extract_segments(content: bytes, filename: str) -> list[str]:
+    """iter_text_segments'in liste döndüren hali (process pool worker'ları için)."""
+    return list(iter_text_segments(content, filename))
+
+
+async def extract_text_from_file(file: UploadFile) -> str:
+    """
+    Yüklenen dosyalardan metin içeriğini çıkarır.
+    Desteklenen formatlar: .pdf, .docx, .txt
+    
+    Args:
+        file (UploadFile): FastAPI dosya nesnesi
         
-    return text
+    Returns:
+        str: Dosyanın metin içeriği
+    """
+    import os
+    import tempfile
+    from rag_app.services.extraction import parallel_extractor
+    from rag_app.utils.uploads import spool_upload
+    from src.config import UPLOAD_MAX_FILE_BYTES
+
+    # Dosya belleğe alınmadan geçici dosyaya aktarılır, ayrıştırıcı yoldan açar
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(file.filename)[1])
+    os.close(fd)
+    try:
+        await spool_upload(file, path, UPLOAD_MAX_FILE_BYTES, UPLOAD_MAX_FILE_BYTES)
+        # Ayrıştırma process pool'da yapılır; event loop bloklanmaz
+        return await parallel_extractor.extract_text(path, file.filename)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
 
 def chunk_text(text: str, chunk_size=500, overlap=50) -> list[str]:
     """
@@ -77,3 +185,207 @@ def chunk_text(text: str, chunk_size=500, overlap=50) -> list[str]:
         start += chunk_size - overlap
         
     return chunks
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Tokenizer yüklenemediğinde kullanılan kaba (yukarı yönlü) token tahmini.
+    WordPiece her ~4 karakteri ve her noktalama işaretini bir token sayar.
+    """
+    return sum(max(1, math.ceil(len(p) / 4)) if p[0].isalnum() else 1 for p in _WORD.findall(text))
+
+
+def split_sentences(paragraph: str) -> list[str]:
+    """
+    Paragrafı cümlelere böler ve satır içi boşlukları normalize eder.
+    Chunk üretimi ve bağlam paketleme aynı cümle sınırlarını kullanır.
+
+    Args:
+        paragraph: Bölünecek metin.
+
+    Returns:
+        list: Boş olmayan cümleler.
+    """
+    sentences = (" ".join(s.split()) for s in _SENTENCE_BREAK.split(paragraph))
+    return [s for s in sentences if s]
+
+
+_token_counter: Optional[Callable[[str], int]] = None
+
+
+def get_token_counter() -> Callable[[str], int]:
+    """
+    Embedding modelinin tokenizer'ı ile token sayan fonksiyonu döndürür.
+    Tokenizer yüklenemezse (örn. çevrimdışı) estimate_tokens'a düşer.
+    Sonuç process boyunca önbelleklenir.
+    """
+    global _token_counter
+    if _token_counter is None:
+        from rag_app.services.embedding_service import embedding_service
+        try:
+            tokenizer = embedding_service.tokenizer
+
+            def count(text: str) -> int:
+                return len(tokenizer.encode(text, add_special_tokens=False))
+
+            _token_counter = count
+        except Exception as e:
+            print(f"Tokenizer yüklenemedi, tahmini token sayımı kullanılacak: {e}")
+            _token_counter = estimate_tokens
+    return _token_counter
+
+
+def _iter_paragraphs(segments: Iterable[str]) -> Iterator[str]:
+    """
+    Metin parçalarını (örn. PDF sayfaları) akış halinde paragraflara böler.
+    Sayfa sınırını aşan paragraflar birleştirilir; bellekte sadece son
+    (henüz bitmemiş) paragraf tutulur.
+    """
+    buffer = ""
+    for segment in segments:
+        if not segment:
+            continue
+        buffer += segment
+        parts = _PARAGRAPH_BREAK.split(buffer)
+        buffer = parts.pop()
+        for paragraph in parts:
+            if paragraph.strip():
+                yield paragraph
+
+        # Hiç boş satır içermeyen dev metinlerde tamponu son cümle sınırından boşalt
+        if len(buffer) > MAX_PARAGRAPH_CHARS:
+            boundaries = [m.end() for m in _SENTENCE_BREAK.finditer(buffer)]
+            cut = boundaries[-1] if boundaries else len(buffer)
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+
+    if buffer.strip():
+        yield buffer
+
+
+def _split_long_word(word: str, max_tokens: int, count: Callable[[str], int]) -> list[tuple[str, int]]:
+    """
+    Boşluk içermeyen ve tek başına max_tokens'ı aşan metni (URL, base64,
+    tablo dökümü) token sınırına göre böler. Son çare olduğu için parçalar
+    kelime ortasından kesilebilir.
+    """
+    pieces = []
+    while word:
+        n = count(word)
+        if n <= max_tokens:
+            pieces.append((word, n))
+            break
+        # Sınırı aşan en kısa önek üstel aramayla, sığan en uzun önek ikili aramayla bulunur
+        fits, over = 1, min(len(word), max(2, max_tokens * 4))
+        while over < len(word) and count(word[:over]) <= max_tokens:
+            fits, over = over, min(len(word), over * 2)
+        while over - fits > 1:
+            mid = (fits + over) // 2
+            if count(word[:mid]) <= max_tokens:
+                fits = mid
+            else:
+                over = mid
+        pieces.append((word[:fits], count(word[:fits])))
+        word = word[fits:]
+    return pieces
+
+
+def _split_long_sentence(sentence: str, max_tokens: int, count: Callable[[str], int]) -> list[tuple[str, int]]:
+    """Tek başına max_tokens'ı aşan cümleyi kelime sınırlarından, gerekirse kelime içinden böler."""
+    pieces = []
+    words, tokens = [], 0
+    for word in sentence.split():
+        n = count(word)
+        if words and tokens + n > max_tokens:
+            pieces.append((" ".join(words), tokens))
+            words, tokens = [], 0
+        if n > max_tokens:
+            pieces.extend(_split_long_word(word, max_tokens, count))
+            continue
+        words.append(word)
+        tokens += n
+    if words:
+        pieces.append((" ".join(words), tokens))
+    return pieces
+
+
+def _join_units(units: list) -> str:
+    """Cümleleri birleştirir: aynı paragraf içinde boşluk, paragraflar arasında boş satır."""
+    text = ""
+    previous = None
+    for sentence, _, paragraph in units:
+        if previous is not None:
+            text += " " if paragraph == previous else "\n\n"
+        text += sentence
+        previous = paragraph
+    return text
+
+
+def iter_chunks(
+    source: Union[str, Iterable[str]],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> Iterator[str]:
+    """
+    Metni paragraf ve cümle sınırlarına saygı göstererek parçalara böler.
+
+    Boyut embedding modelinin token'ı cinsinden ölçülür; böylece hiçbir parça
+    modelin giriş sınırını aşıp sessizce kesilmez. Parçalar generator olarak
+    üretilir: kaynak bir sayfa/parça akışı olabilir ve tüm doküman belleğe
+    alınmaz.
+
+    Args:
+        source: Ham metin veya metin parçaları akışı (örn. PDF sayfaları).
+        max_tokens: Bir parçadaki maksimum token sayısı.
+        overlap_tokens: Ardışık parçalar arasında tekrarlanan (tam cümle) token bütçesi.
+        count_tokens: Token sayma fonksiyonu (varsayılan: embedding tokenizer'ı).
+
+    Yields:
+        str: Metin parçası.
+    """
+    if isinstance(source, str):
+        source = [source]
+    count = count_tokens or get_token_counter()
+
+    current = []  # (cümle, token sayısı, paragraf no)
+    current_tokens = 0
+    fresh = 0  # Son üretimden bu yana eklenen (overlap olmayan) cümle sayısı
+
+    def flush(next_tokens: int):
+        """Mevcut parçayı üretir ve overlap için son cümleleri taşır."""
+        nonlocal current, current_tokens, fresh
+        chunk = _join_units(current)
+        budget = min(overlap_tokens, max_tokens - next_tokens)
+        tail, tail_tokens = [], 0
+        for unit in reversed(current):
+            if tail_tokens + unit[1] > budget:
+                break
+            tail.insert(0, unit)
+            tail_tokens += unit[1]
+        current, current_tokens, fresh = tail, tail_tokens, 0
+        return chunk
+
+    for paragraph_no, paragraph in enumerate(_iter_paragraphs(source)):
+        units = []
+        for sentence in split_sentences(paragraph):
+            n = count(sentence)
+            if n > max_tokens:
+                units.extend(_split_long_sentence(sentence, max_tokens, count))
+            else:
+                units.append((sentence, n))
+
+        # Paragraf sığmıyorsa ve parça yeterince doluysa paragraf sınırında kes
+        paragraph_tokens = sum(n for _, n in units)
+        if fresh and current_tokens + paragraph_tokens > max_tokens and current_tokens >= max_tokens // 2:
+            yield flush(units[0][1] if units else 0)
+
+        for sentence, n in units:
+            if fresh and current_tokens + n > max_tokens:
+                yield flush(n)
+            current.append((sentence, n, paragraph_no))
+            current_tokens += n
+            fresh += 1
+
+    if fresh:
+        yield _join_units(current)
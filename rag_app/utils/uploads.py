@@ -0,0 +1,177 @@
+"""
+Yüklenen dosyaları belleğe almadan diske (spool) aktarma yardımcıları.
+
+Dosyalar sabit boyutlu dilimlerle okunup hedef dosyaya yazılır; böylece
+bir yüklemenin bellekteki izi dosya boyutundan bağımsızdır. Dosya başına ve
+istek başına boyut sınırları aşıldığında yarım yazılan dosya silinir.
+
+Starlette multipart gövdeyi endpoint çalışmadan önce tamamen okur (ve
+diske yazar). UploadLimitMiddleware bu yüzden sınırları gövde okunurken
+uygular: Content-Length sınırı aşan istek hiç okunmaz; Content-Length
+göndermeyen (chunked) istekte gövde baytları sayılır ve multipart
+parçalarından biri dosya sınırını aşar aşmaz okuma 413 ile kesilir.
+spool_upload kesin (bayt bayt) kontrolü yapmaya devam eder.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+# Yüklemeler bu boyutta dilimlerle kopyalanır
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
+
+
+# Multipart parça başlıkları (Content-Disposition vb.) için dosya sınırına eklenen pay
+PART_HEADER_SLACK_BYTES = 16 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Dosya veya istek boyut sınırı aşıldığında fırlatılır."""
+
+
+def format_bytes(size: int) -> str:
+    """Bayt sayısını okunabilir hale getirir (ör. 100 MB)."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}"
+        size /= 1024
+
+
+async def spool_upload(file: UploadFile, path: str, max_file_bytes: int, max_total_bytes: int) -> int:
+    """
+    Yüklenen dosyayı dilim dilim diske yazar.
+
+    Args:
+        file: FastAPI dosya nesnesi.
+        path: Hedef dosya yolu.
+        max_file_bytes: Bu dosya için izin verilen maksimum boyut.
+        max_total_bytes: İstekte kalan toplam boyut bütçesi.
+
+    Returns:
+        int: Yazılan bayt sayısı.
+
+    Raises:
+        UploadTooLarge: Sınırlardan biri aşılırsa (hedef dosya silinir).
+    """
+    written = 0
+    try:
+        with open(path, "wb") as out:
+            while True:
+                piece = await file.read(UPLOAD_READ_CHUNK_BYTES)
+                if not piece:
+                    break
+                written += len(piece)
+                if written > max_file_bytes:
+                    raise UploadTooLarge(
+                        f"{file.filename}: Dosya boyutu sınırı aşıldı ({format_bytes(max_file_bytes)})."
+                    )
+                if written > max_total_bytes:
+                    raise UploadTooLarge("İstek boyutu sınırı aşıldı.")
+                await asyncio.to_thread(out.write, piece)
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+class _PartSizeCounter:
+    """
+    Akan multipart gövdede sınırlayıcılar (boundary) arasındaki bayt sayısını
+    izler. Dilim sınırına denk gelen sınırlayıcıyı kaçırmamak için son
+    len(sınırlayıcı) - 1 bayt bir sonraki dilime taşınır.
+    """
+
+    def __init__(self, boundary: bytes):
+        self.delimiter = b"\r\n--" + boundary
+        self.largest = 0
+        self._current = 0
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> int:
+        """Dilimi işler; o ana kadar görülen en büyük parça boyutunu döndürür."""
+        data = self._tail + chunk
+        pos = 0
+        while True:
+            found = data.find(self.delimiter, pos)
+            if found < 0:
+                break
+            self.largest = max(self.largest, self._current + found - pos)
+            self._current = 0
+            pos = found + len(self.delimiter)
+        keep = min(len(data) - pos, len(self.delimiter) - 1)
+        self._current += len(data) - pos - keep
+        self._tail = data[len(data) - keep:]
+        self.largest = max(self.largest, self._current)
+        return self.largest
+
+
+def _multipart_boundary(headers: Headers) -> Optional[bytes]:
+    content_type = headers.get("content-type", "")
+    if not content_type.lower().startswith("multipart/"):
+        return None
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+class UploadLimitMiddleware:
+    """
+    Yükleme yolundaki istek ve dosya boyutu sınırlarını gövde okunurken uygulayan ASGI middleware.
+
+    Args:
+        app: Sarılan ASGI uygulaması.
+        path: Sınırların uygulanacağı yol (örn. "/upload").
+        max_file_bytes: Multipart parça (dosya) başına sınır.
+        max_request_bytes: İstek gövdesi sınırı.
+    """
+
+    def __init__(self, app, path: str, max_file_bytes: int, max_request_bytes: int):
+        self.app = app
+        self.path = path
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+
+    def _request_error(self) -> str:
+        return f"İstek boyutu sınırı aşıldı ({format_bytes(self.max_request_bytes)})."
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        length = headers.get("content-length")
+        if length and length.isdigit() and int(length) > self.max_request_bytes:
+            # Gövde hiç okunmadan reddedilir
+            await JSONResponse(status_code=413, content={"detail": self._request_error()})(scope, receive, send)
+            return
+
+        boundary = _multipart_boundary(headers)
+        parts = _PartSizeCounter(boundary) if boundary else None
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received > self.max_request_bytes:
+                    raise HTTPException(status_code=413, detail=self._request_error())
+                if parts is not None and parts.feed(body) > self.max_file_bytes + PART_HEADER_SLACK_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Dosya boyutu sınırı aşıldı ({format_bytes(self.max_file_bytes)}).",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
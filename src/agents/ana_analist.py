@@ -1,9 +1,9 @@
+import asyncio
 from langchain_core.messages import HumanMessage
-from src.models.ollama_model import OllamaModel
+from src.models.model_selector import model_selector
 from src.tools.rag_tool import rag_tool
 from src.utils.logger import get_logger
 from langgraph.prebuilt import create_react_agent
-from src.config import MODEL_LLAMA_ANALYZER
 
 logger = get_logger(__name__)
 
@@ -19,15 +19,18 @@ async def analyst_node(state, config):
         config (dict): Çalıştırma konfigürasyonu.
         
     Returns:
-        dict: Güncellenmiş graph durumu ('messages' anahtarı ile).
+        dict: Güncellenmiş graph durumu ('messages' ve 'routing' anahtarları ile).
     """
     logger.info("Llama Analist (Analyst) çalıştırılıyor")
     
     messages = state["messages"]
     
-    # Llama 3.1 Modelini Yükle
-    model_client = OllamaModel(model_name=MODEL_LLAMA_ANALYZER, temperature=0.1)
-    model = model_client.llm
+    # Analiz seviyesini karşılayan en hızlı sağlıklı model (varsayılan: yerel Llama 3.1)
+    routing_mode = config.get("configurable", {}).get("mode", "auto")
+    decision = await asyncio.to_thread(
+        model_selector.select, "analysis", mode=routing_mode, temperature=0.1, agent="analyst"
+    )
+    model = decision.model.llm
     
     tools = [rag_tool]
     
@@ -57,4 +60,7 @@ async def analyst_node(state, config):
     final_message = response["messages"][-1]
     
     # HumanMessage olarak sarmalayıp döndürüyoruz ki Graph akışında 'analyst' olarak görünsün
-    return {"messages": [HumanMessage(content=final_message.content, name="analyst")]}
+    return {
+        "messages": [HumanMessage(content=final_message.content, name="analyst")],
+        "routing": [decision.to_dict()],
+    }
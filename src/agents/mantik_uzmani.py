@@ -1,13 +1,13 @@
+import asyncio
 from langchain_core.messages import HumanMessage
-from src.models.ollama_model import OllamaModel
-from src.config import MODEL_DEEPSEEK_CODER
+from src.models.model_selector import model_selector
 from src.utils.logger import get_logger
 from src.tools.code_executor import code_executor_tool
 from langgraph.prebuilt import create_react_agent
 
 logger = get_logger(__name__)
 
-def logic_expert_node(state, config):
+async def logic_expert_node(state, config):
     """
     3️⃣ 🧮 DeepSeek Coder - Mantık ve Kod Uzmanı Ajanı.
     
@@ -25,9 +25,12 @@ def logic_expert_node(state, config):
     
     messages = state["messages"]
     
-    # DeepSeek Coder Modeli (Sıcaklık 0)
-    model_client = OllamaModel(model_name=MODEL_DEEPSEEK_CODER, temperature=0.0)
-    model = model_client.llm
+    # Hesaplama seviyesini karşılayan en hızlı sağlıklı model (Sıcaklık 0)
+    routing_mode = config.get("configurable", {}).get("mode", "auto")
+    decision = await asyncio.to_thread(
+        model_selector.select, "calculation", mode=routing_mode, temperature=0.0, agent="logic_expert"
+    )
+    model = decision.model.llm
     
     tools = [code_executor_tool]
     
@@ -39,11 +42,14 @@ def logic_expert_node(state, config):
     4. Yorum yapma, sadece sonucu ver.
     """
     
-    # create_react_agent (Senkron invoke için)
     agent = create_react_agent(model, tools, prompt=system_prompt)
     
-    response = agent.invoke({"messages": messages})
+    # Async çalıştırılır: sağlayıcı kapısında beklerken event loop'u bloklamaz
+    response = await agent.ainvoke({"messages": messages})
     
     final_message = response["messages"][-1]
     
-    return {"messages": [HumanMessage(content=final_message.content, name="logic_expert")]}
+    return {
+        "messages": [HumanMessage(content=final_message.content, name="logic_expert")],
+        "routing": [decision.to_dict()],
+    }
@@ -1,7 +1,12 @@
+import asyncio
+import time
 from langchain_core.messages import HumanMessage
-from src.models.gemini_model import GeminiModel
-from src.config import MODEL_GEMINI_MASTER
+from src.models.model_selector import model_selector
+from src.config import MASTER_REPORT_MAX_TOKENS
+from src.monitoring.metrics import metrics
 from src.utils.logger import get_logger
+from rag_app.utils.context_packer import compress_text
+from rag_app.utils.text_processing import get_token_counter
 from src.tools.web_search import web_search_tool
 from langgraph.prebuilt import create_react_agent
 
@@ -33,17 +38,24 @@ async def master_agent_node(state, config):
     original_user_msg = messages[0]
     user_input = original_user_msg.content
     
+    # Raporlar token bütçesini aşıyorsa soruyla ilgili cümleler korunarak sıkıştırılır
     context_str = ""
-    if analyst_msg:
-        context_str += f"\n[ANALİST RAPORU]:\n{analyst_msg.content}\n"
-    if logic_msg:
-        context_str += f"\n[MANTIK UZMANI SONUCU]:\n{logic_msg.content}\n"
+    for title, msg in (("ANALİST RAPORU", analyst_msg), ("MANTIK UZMANI SONUCU", logic_msg)):
+        if msg:
+            report, raw_tokens, tokens = compress_text(msg.content, MASTER_REPORT_MAX_TOKENS, query=user_input)
+            metrics.observe("master.report_tokens_raw", raw_tokens)
+            metrics.observe("master.report_tokens", tokens)
+            context_str += f"\n[{title}]:\n{report}\n"
         
     final_query = f"Kullanıcı Sorusu: {user_input}\n\nEldeki Bağlam:{context_str}\n\nGörevin: Bu bilgileri kullanarak nihai cevabı üret."
+    metrics.observe("master.prompt_tokens", get_token_counter()(final_query))
 
-    # Gemini Modeli
-    model_client = GeminiModel(model_name=MODEL_GEMINI_MASTER, temperature=0.7)
-    model = model_client.llm
+    # Sentez en üst seviye görev: varsayılan Gemini, erişilemezse en güçlü sağlıklı model
+    routing_mode = config.get("configurable", {}).get("mode", "auto")
+    decision = await asyncio.to_thread(
+        model_selector.select, "reasoning", mode=routing_mode, temperature=0.7, agent="master"
+    )
+    model = decision.model.llm
     
     tools = [web_search_tool]
     
@@ -63,8 +75,23 @@ async def master_agent_node(state, config):
     # (Chat history'yi olduğu gibi verirsek model kafası karışabilir, summary yeterli)
     master_messages = [HumanMessage(content=final_query)]
     
-    response = await agent.ainvoke({"messages": master_messages})
+    # Ajan akış halinde çalıştırılır: "messages" modu ilk token süresini (TTFT),
+    # "values" modu son durumu verir
+    started = time.perf_counter()
+    first_token_at = None
+    response = None
+    async for mode, payload in agent.astream({"messages": master_messages}, stream_mode=["messages", "values"]):
+        if mode == "messages":
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                metrics.observe("master.ttft_ms", (first_token_at - started) * 1000)
+        else:
+            response = payload
+    metrics.observe("master.llm_ms", (time.perf_counter() - started) * 1000)
     
     final_message = response["messages"][-1]
     
-    return {"messages": [HumanMessage(content=final_message.content, name="master")]}
+    return {
+        "messages": [HumanMessage(content=final_message.content, name="master")],
+        "routing": [decision.to_dict()],
+    }
@@ -8,11 +8,126 @@ BLOCKED_MODULES = [
     "requests", "ctypes", "__import__", 
     "eval", "exec", "compile", "open"
 ]
+# Önceden başlatılmış kod çalıştırma worker havuzu (0 = havuz yok, her çağrıda yeni process)
+CODE_SANDBOX_WORKERS = int(os.getenv("CODE_SANDBOX_WORKERS", "2"))
+# Worker bu kadar işten sonra yenilenir. fork olan platformlarda her iş zaten temiz bir çocuk
+# process'te çalışır; fork olmayanlarda (Windows) kod worker içinde çalıştığı için 1 (her işten sonra)
+CODE_SANDBOX_MAX_JOBS = int(os.getenv("CODE_SANDBOX_MAX_JOBS", "100" if hasattr(os, "fork") else "1"))
+CODE_SANDBOX_START_TIMEOUT = float(os.getenv("CODE_SANDBOX_START_TIMEOUT", "30"))  # Worker'ın hazır olma süresi (sn)
+# Worker açılışında import edilen modüller (kurulu olmayanlar atlanır)
+_sandbox_preload = "math,statistics,random,itertools,functools,collections,datetime,decimal,fractions,json,re,numpy"
+CODE_SANDBOX_PRELOAD = [
+    m.strip() for m in os.getenv("CODE_SANDBOX_PRELOAD", _sandbox_preload).split(",")
+    if m.strip()
+]
 
 # Model İsimleri (Sabitler)
 MODEL_LLAMA_ANALYZER = "llama3.1:latest"        # RAG & Analiz
 MODEL_DEEPSEEK_CODER = "llama3.1:latest"    # Mantık & Kod
 MODEL_GEMINI_MASTER = "gemini-2.5-flash"        # Master & Web
+MODEL_LLAMA_FAST = "llama3.2:3b"                # Basit / hızlı görevler
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")              # Boş = Google API; mock sunucu için http://127.0.0.1:11500
+
+# Ollama model ön yükleme (warm-up) ve bellekte tutma süresi
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "1") == "1"                   # Açılışta modelleri yükle ve izle
+# Süre ("30m", "2h") veya saniye; -1 = süresiz bellekte tut
+_keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_KEEP_ALIVE = int(_keep_alive) if _keep_alive.lstrip("-").isdigit() else _keep_alive
+OLLAMA_PRELOAD_MODELS = [
+    m.strip() for m in os.getenv(
+        "OLLAMA_PRELOAD_MODELS", f"{MODEL_LLAMA_FAST},{MODEL_LLAMA_ANALYZER},{MODEL_DEEPSEEK_CODER}"
+    ).split(",")
+    if m.strip()
+]
+OLLAMA_WARMUP_INTERVAL = float(os.getenv("OLLAMA_WARMUP_INTERVAL", "60"))  # Bellekte mi kontrolü aralığı (sn)
+OLLAMA_WARMUP_TIMEOUT = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "300"))   # Tek model yükleme zaman aşımı (sn)
+# Bellekte tutulamayan modelin yeniden denenmesi için en uzun bekleme (sn)
+OLLAMA_WARMUP_MAX_BACKOFF = float(os.getenv("OLLAMA_WARMUP_MAX_BACKOFF", "1800"))
+
+# Model yönlendirici (router): sağlık kontrolü ve gecikme istatistikleri
+ROUTER_HEALTH_TTL = float(os.getenv("ROUTER_HEALTH_TTL", "15"))          # Ollama sağlık yoklaması geçerlilik süresi (sn)
+ROUTER_PROBE_TIMEOUT = float(os.getenv("ROUTER_PROBE_TIMEOUT", "1.0"))   # Yoklama zaman aşımı (sn)
+ROUTER_LATENCY_WINDOW = int(os.getenv("ROUTER_LATENCY_WINDOW", "50"))    # p50/p95 için son çağrı sayısı
+ROUTER_ERROR_WINDOW = float(os.getenv("ROUTER_ERROR_WINDOW", "60"))      # Hata oranının hesaplandığı süre (sn)
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5")) # Bu oranı aşan model atlanır
+ROUTER_SLOW_P95_MS = float(os.getenv("ROUTER_SLOW_P95_MS", "30000"))     # p95'i bunu aşan model sona bırakılır
+ROUTER_COLD_START_MS = float(os.getenv("ROUTER_COLD_START_MS", "5000"))  # Belleğe yüklü olmayan Ollama modeline ceza
+# Hedge (yedek istek): birincil model eşiği aşınca alternatif modelde ikinci istek
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))            # Eşik: birincil modelin bu yüzdelik gecikmesi
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "5"))             # Yüzdelik için gereken en az ölçüm
+HEDGE_DEFAULT_DELAY_MS = float(os.getenv("HEDGE_DEFAULT_DELAY_MS", "10000"))  # Ölçüm yetersizken eşik
+HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", "500"))       # Eşiğin alt sınırı
+HEDGE_MAX_EXTRA = float(os.getenv("HEDGE_MAX_EXTRA", "0.1"))             # En fazla ek yük oranı (0.1 = %10)
+# Sağlayıcı kapıları: eşzamanlı çağrı sınırı, bekleme kuyruğu, dakikalık kota (0 = sınırsız)
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))   # Tek yerel sunucu; OLLAMA_NUM_PARALLEL ile eşleştirin
+OLLAMA_MAX_QUEUE = int(os.getenv("OLLAMA_MAX_QUEUE", "32"))
+OLLAMA_RATE_PER_MIN = float(os.getenv("OLLAMA_RATE_PER_MIN", "0"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "64"))
+GEMINI_RATE_PER_MIN = float(os.getenv("GEMINI_RATE_PER_MIN", "60"))      # API anahtarınızın RPM kotası ile eşleştirin
+PROVIDER_QUEUE_TIMEOUT = float(os.getenv("PROVIDER_QUEUE_TIMEOUT", "60"))  # Slot için en fazla bekleme (sn)
+# Devre kesici: art arda bu kadar hatada sağlayıcı RESET_TIMEOUT saniye atlanır
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# LLM yanıt önbelleği (birebir eşleşme; varsayılan olarak sadece temperature=0 çağrılar)
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))           # Bellekteki yanıt sayısı
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")                    # SQLite disk katmanı (boş = kapalı)
+LLM_CACHE_NONDETERMINISTIC = os.getenv("LLM_CACHE_NONDETERMINISTIC", "0") == "1"  # temperature>0 da önbelleklensin
 
 # RAG Ayarları
 SIMILARITY_THRESHOLD = 0.5
+# Chunk boyutu embedding modelinin token'ı cinsindendir.
+# all-MiniLM-L6-v2 256 token'dan (özel token'lar dahil) sonrasını keser.
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "30"))
+# Retrieval: geniş aday havuzu + adaptif k + MMR çeşitliliği
+RAG_FETCH_K = int(os.getenv("RAG_FETCH_K", "20"))                 # İndeksten getirilen aday sayısı
+RAG_MIN_K = int(os.getenv("RAG_MIN_K", "1"))                      # İlgili aday varsa en az sonuç
+RAG_MAX_K = int(os.getenv("RAG_MAX_K", "6"))                      # En fazla sonuç
+RAG_SCORE_MARGIN = float(os.getenv("RAG_SCORE_MARGIN", "0.1"))    # En iyi skora bu kadar yakınlar k'ya dahil
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))        # 1 = sadece ilgililik, 0 = sadece çeşitlilik
+# Aynı soru için retrieval sonuçlarını tutan LRU önbellek (kayıt sayısı, 0 = kapalı)
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "256"))
+# Çok ajanlı akışın nihai cevapları için anlamsal önbellek
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "500"))               # Kayıt sayısı (0 = kapalı)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # Kosinüs benzerliği eşiği
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))              # Saniye (0 = süresiz)
+# Prompt'a eklenen bağlamın token bütçeleri (embedding tokenizer'ı ile sayılır)
+RAG_CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "1500"))        # RAG chunk'ları / web sonuçları
+MASTER_REPORT_MAX_TOKENS = int(os.getenv("MASTER_REPORT_MAX_TOKENS", "1000"))    # Master'a giden her ajan raporu
+
+# Ingestion boru hattı (extract → chunk → embed → commit)
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))     # Tek embedding çağrısındaki chunk sayısı
+INGEST_COMMIT_BATCH_SIZE = int(os.getenv("INGEST_COMMIT_BATCH_SIZE", "512"))  # İndekse tek seferde eklenen vektör
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))                  # Aşamalar arası kuyruk kapasitesi
+# Yakın-kopya chunk eleme (MinHash LSH); embed edilmeden önce uygulanır
+INGEST_DEDUP = os.getenv("INGEST_DEDUP", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))   # Tahmini Jaccard benzerliği eşiği
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))          # MinHash imza uzunluğu
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "8"))                 # LSH bant sayısı
+# Metin çıkarımı için process pool (0 = pool yok, çağıran thread'de çıkar)
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", "25"))         # Bir worker işindeki PDF sayfa sayısı
+# Arka plan ingestion işleri
+INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))                # Aynı anda çalışan iş sayısı
+INGEST_JOB_QUEUE_SIZE = int(os.getenv("INGEST_JOB_QUEUE_SIZE", "32"))         # Kuyrukta bekleyebilecek iş sayısı
+INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "100"))              # Bellekte tutulan tamamlanmış iş
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", os.path.join("data", "upload_spool"))
+# Yükleme boyut sınırları (MB)
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_MB", "100")) * 1024 * 1024       # Dosya başına
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_MB", "500")) * 1024 * 1024  # İstek başına
+
+# Embedding Ayarları
+# FastAPI açılışında embedding modeli ve vektör indeksi arka planda ısıtılsın mı?
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "1") == "1"
+# Eşzamanlı sorgu embedding'lerini toplama penceresi (ms) ve maksimum batch boyutu
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "3"))
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "32"))
+
+# Paylaşılan embedding + indeks servisi (sidecar)
+# Boşsa tek-process modu (geliştirme). Örn: "unix:/tmp/rag_index.sock" veya "tcp://127.0.0.1:8765"
+RAG_SERVICE_ADDRESS = os.getenv("RAG_SERVICE_ADDRESS", "")
+RAG_SERVICE_TIMEOUT = float(os.getenv("RAG_SERVICE_TIMEOUT", "30"))
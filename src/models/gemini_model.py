@@ -1,12 +1,22 @@
 import os
+from typing import Optional
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from src.config import GEMINI_BASE_URL
+from src.models.llm_cache import build_messages, cache_for
 
 class GeminiModel:
-    def __init__(self, model_name="gemini-2.5-flash", api_key=None, temperature=0.7):
+    def __init__(self, model_name="gemini-2.5-flash", api_key=None, temperature=0.7,
+                 cache: Optional[bool] = None, callbacks: Optional[list] = None):
         """
         Google Gemini model istemcisi.
+
+        cache: None = sadece deterministik (temperature=0) çağrılar önbelleklenir,
+               True = her zaman, False = hiçbir zaman.
+        callbacks: LLM çağrılarına bağlanacak LangChain callback'leri
+               (örn. model yönlendiricisinin gecikme ölçümü).
         """
+        self.model_name = model_name
+        self.temperature = temperature
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY bulunamadı!")
@@ -14,17 +24,14 @@ class GeminiModel:
         self.llm = ChatGoogleGenerativeAI(
             model=model_name,
             google_api_key=self.api_key,
-            temperature=temperature
+            base_url=GEMINI_BASE_URL or None,
+            temperature=temperature,
+            cache=cache_for(temperature, cache),
+            callbacks=callbacks
         )
 
     def generate(self, prompt: str, system_prompt: str = None) -> str:
         """
         Tek seferlik üretim yapar.
         """
-        messages = []
-        if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
-        messages.append(HumanMessage(content=prompt))
-        
-        response = self.llm.invoke(messages)
-        return response.content
+        return self.llm.invoke(build_messages(prompt, system_prompt)).content
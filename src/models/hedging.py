@@ -0,0 +1,214 @@
+"""
+Hedge edilmiş (yedekli) LLM çağrıları.
+
+Gemini zaman zaman saniyeler süren kuyruk gecikmeleri yaşar; yük altındaki
+yerel Ollama ise istekleri sıraya alır. HedgedChatModel birincil modeli
+çağırır ve cevap bir gecikme eşiğine kadar (birincil modelin son
+çağrılarındaki p95'i, bkz. HEDGE_PERCENTILE) gelmezse alternatif model
+veya sağlayıcıda yedek bir istek başlatır. İlk başarılı cevap kazanır,
+diğer istek iptal edilir.
+
+- Birincil çağrı eşikten önce hata verirse yedek hemen denenir (failover).
+- Yedek istekler HedgeBudget ile sınırlıdır: her birincil istek bütçeye
+  HEDGE_MAX_EXTRA kadar kredi ekler, her yedek istek bir kredi harcar.
+  Böylece ek yük uzun vadede istek sayısının %HEDGE_MAX_EXTRA'sını aşmaz.
+- Sadece async yollar hedge edilir; senkron çağrılar birincil modele
+  gider. Akışta (astream) ilk parça yarıştırılır, akış kazanan modelden
+  devam eder; böylece ilk token süresi (TTFT) de hedge'den yararlanır.
+- İptal edilmiş (cancelled) birincil veya yedek çağrı da başarısızlık
+  sayılır ve diğerine geçilir.
+
+Metrikler: hedge.requests, hedge.sent, hedge.won (yedek kazandı),
+hedge.denied (bütçe yetmedi), hedge.failover ve hedge.budget_tokens.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.config import HEDGE_MAX_EXTRA
+from src.monitoring.metrics import metrics
+
+
+class HedgeBudget:
+    """
+    Yedek istekler için token-bucket bütçesi.
+
+    Args:
+        ratio: Birincil istek başına eklenen kredi (örn. 0.1 = en fazla %10 ek yük).
+        burst: Biriktirilebilecek en fazla kredi.
+    """
+
+    def __init__(self, ratio: float = HEDGE_MAX_EXTRA, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst if ratio > 0 else 0.0
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self.requests += 1
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+            metrics.set_gauge("hedge.budget_tokens", self.tokens)
+
+    def try_acquire(self) -> bool:
+        """Yedek istek için kredi harcar; bütçe yetmiyorsa False."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.hedges += 1
+            metrics.set_gauge("hedge.budget_tokens", self.tokens)
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "extra_load": self.hedges / self.requests if self.requests else 0.0,
+                "max_extra_load": self.ratio,
+                "tokens": self.tokens,
+            }
+
+
+# Singleton instance (Bütçe tüm hedge edilmiş modeller arasında paylaşılır)
+hedge_budget = HedgeBudget()
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Birincil modeli yavaşsa yedek modelle yarıştıran chat model sarmalayıcısı.
+
+    create_react_agent ile kullanılabilmesi için bind_tools her iki modele
+    de uygulanır.
+
+    Args:
+        primary: Birincil model (chat model veya bind_tools sonrası runnable).
+        backup: Yedek model.
+        delay_ms: Yedek isteğin başlatılacağı gecikmeyi (ms) döndüren fonksiyon.
+        budget: Yedek istek bütçesi.
+    """
+
+    primary: Any
+    backup: Any
+    primary_name: str = "primary"
+    backup_name: str = "backup"
+    delay_ms: Callable[[], float]
+    budget: Any = None
+    cache: Any = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={
+            "primary": self.primary.bind_tools(tools, **kwargs),
+            "backup": self.backup.bind_tools(tools, **kwargs),
+        })
+
+    @staticmethod
+    def _result(message: BaseMessage, winner: str) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output={"hedge_winner": winner})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        # Senkron yolda yarıştırma yapılmaz (iptal edilemeyen thread'ler ek yük olur)
+        return self._result(self.primary.invoke(messages, stop=stop, **kwargs), self.primary_name)
+
+    async def _race(self, call: Callable[[Any], Awaitable], discard: Optional[Callable[[Any], Awaitable]] = None):
+        """
+        call(model) ile birincil modeli çağırır, gerekirse yedekle yarıştırır.
+
+        Args:
+            call: Modeli alıp sonucunu döndüren coroutine fonksiyonu.
+            discard: Kazanamayan ama başarıyla biten çağrının sonucunu
+                serbest bırakan coroutine fonksiyonu (örn. açık akış).
+
+        Returns:
+            tuple: (sonuç, kazanan modelin adı)
+        """
+        budget = self.budget or hedge_budget
+        budget.on_request()
+        metrics.inc("hedge.requests")
+
+        primary = asyncio.ensure_future(call(self.primary))
+        tasks = {primary: self.primary_name}
+        winner = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.delay_ms() / 1000)
+            if done and _succeeded(primary):
+                winner = primary
+                return primary.result(), self.primary_name
+            if done:
+                metrics.inc("hedge.failover")
+            elif budget.try_acquire():
+                metrics.inc("hedge.sent")
+            else:
+                metrics.inc("hedge.denied")
+                winner = primary
+                return await primary, self.primary_name
+
+            backup = asyncio.ensure_future(call(self.backup))
+            tasks[backup] = self.backup_name
+            pending = {t for t in tasks if not t.done()}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if _succeeded(task):
+                        if task is backup:
+                            metrics.inc("hedge.won")
+                        winner = task
+                        return task.result(), tasks[task]
+            # İkisi de başarısız: önce birincil modelin hatası iletilir
+            for task in tasks:
+                if not task.cancelled():
+                    raise task.exception()
+            raise RuntimeError("Birincil ve yedek model çağrıları iptal edildi.")
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif discard is not None and task is not winner and _succeeded(task):
+                    await discard(task.result())
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs) -> ChatResult:
+        message, winner = await self._race(lambda model: model.ainvoke(messages, stop=stop, **kwargs))
+        return self._result(message, winner)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs):
+        # İlk parça yarıştırılır; akış kazanan modelden devam eder
+        async def first_chunk(model):
+            stream = model.astream(messages, stop=stop, **kwargs)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        async def close(result):
+            await result[0].aclose()
+
+        (stream, chunk), _ = await self._race(first_chunk, discard=close)
+        try:
+            while chunk is not None:
+                yield ChatGenerationChunk(message=chunk)
+                chunk = await anext(stream, None)
+        finally:
+            await stream.aclose()
+
+
+def _succeeded(task: asyncio.Future) -> bool:
+    """Görev iptal edilmeden ve hatasız bitti mi? (İptal edilmiş görevde exception() fırlatır.)"""
+    return not task.cancelled() and task.exception() is None
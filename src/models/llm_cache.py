@@ -0,0 +1,201 @@
+"""
+LLM yanıt önbelleği (birebir eşleşme).
+
+LangChain'in BaseCache arayüzünü uygular; böylece ChatOllama ve
+ChatGoogleGenerativeAI'ye `cache=` olarak verildiğinde invoke/ainvoke ve
+create_react_agent içindeki tool'lu çağrılar otomatik olarak önbelleklenir.
+
+- Anahtar: LangChain'in ürettiği prompt (sistem promptu dahil tüm mesajlar)
+  ve llm_string (sağlayıcı, model, sıcaklık, bağlı tool şemaları) çiftinin
+  SHA-256 özeti.
+- Katmanlar: bellekte LRU + isteğe bağlı SQLite disk katmanı
+  (LLM_CACHE_PATH). Diskten okunan kayıt belleğe de alınır.
+- Sadece deterministik çağrılarda (temperature == 0) veya açıkça izin
+  verildiğinde uygulanır (bkz. cache_for).
+
+LangChain'in stream() / astream() yolu önbelleğe bakmadığı için model
+istemcileri provider_limits.gated ile sarıldığında önbellek sarmalayıcıya
+taşınır: invoke ve akış çağrıları kapıdan önce önbelleğe bakar, akıştaki
+isabet replay_chunks ile parça parça tekrar oynatılır.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Union
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import (
+    AIMessageChunk, BaseMessage, HumanMessage, SystemMessage, message_to_dict, messages_from_dict,
+)
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGeneration, Generation
+
+from src.config import LLM_CACHE_NONDETERMINISTIC, LLM_CACHE_PATH, LLM_CACHE_SIZE
+from src.monitoring.metrics import metrics
+from src.utils.cache import LRUCache
+
+# Önbellekten tekrar oynatılan yanıtın parça boyutu (karakter)
+REPLAY_CHUNK_CHARS = 64
+
+
+def _encode(generations: Sequence[Generation]) -> str:
+    return json.dumps([
+        {"message": message_to_dict(g.message)} if isinstance(g, ChatGeneration) else {"text": g.text}
+        for g in generations
+    ])
+
+
+def _decode(payload: str) -> List[Generation]:
+    generations = []
+    for item in json.loads(payload):
+        if "message" in item:
+            generations.append(ChatGeneration(message=messages_from_dict([item["message"]])[0]))
+        else:
+            generations.append(Generation(text=item["text"]))
+    return generations
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Bellek (LRU) + isteğe bağlı SQLite katmanlı LLM yanıt önbelleği.
+
+    Args:
+        maxsize: Bellekte tutulacak yanıt sayısı.
+        path: SQLite dosyası ("" = disk katmanı yok).
+    """
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, path: str = LLM_CACHE_PATH):
+        self.memory = LRUCache(maxsize, name="llm")
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.key(prompt, llm_string)
+        generations = self.memory.get(key, None)
+        if generations is None and self.path:
+            with self._db_lock:
+                row = self._connection().execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                generations = _decode(row[0])
+                self.memory.put(key, generations)
+                metrics.inc("cache.llm.disk_hits")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        key = self.key(prompt, llm_string)
+        self.memory.put(key, list(return_val))
+        if self.path:
+            with self._db_lock:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, _encode(return_val), time.time()),
+                )
+                db.commit()
+
+    def clear(self, **kwargs):
+        self.memory.clear()
+        if self.path:
+            with self._db_lock:
+                db = self._connection()
+                db.execute("DELETE FROM llm_cache")
+                db.commit()
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# Singleton instance (Tüm model istemcileri aynı önbelleği paylaşır)
+llm_cache = LLMResponseCache()
+
+
+def cache_for(temperature: float, allow: Optional[bool] = None) -> Union[LLMResponseCache, bool]:
+    """
+    Model istemcisine verilecek `cache` değerini belirler.
+
+    Args:
+        temperature: Modelin sıcaklığı.
+        allow: True = her durumda önbellekle, False = hiç önbellekleme,
+            None = sadece deterministikse (temperature == 0) veya
+            LLM_CACHE_NONDETERMINISTIC açıksa.
+
+    Returns:
+        LLMResponseCache veya False (LangChain global önbelleği de devre dışı).
+    """
+    if allow is None:
+        allow = temperature == 0 or LLM_CACHE_NONDETERMINISTIC
+    if not allow or (LLM_CACHE_SIZE <= 0 and not LLM_CACHE_PATH):
+        return False
+    return llm_cache
+
+
+def cache_prompt(messages: Sequence[BaseMessage]) -> str:
+    """
+    LangChain'in önbellek anahtarında kullandığı prompt dizgesi.
+
+    Mesaj id'leri anahtara girmez (_agenerate_with_cache ile aynı); böylece
+    sarmalayıcıların yazdığı kayıtlar istemcinin kendi önbellek yoluyla da
+    bulunur.
+    """
+    return dumps([
+        m.model_copy(update={"id": None}) if getattr(m, "id", None) is not None else m
+        for m in messages
+    ])
+
+
+def replay_chunks(message: BaseMessage) -> List[AIMessageChunk]:
+    """
+    Önbellekteki yanıtı akış parçalarına böler.
+
+    Metin REPLAY_CHUNK_CHARS'lık parçalara ayrılır; tool çağrıları ve yanıt
+    metadatası son parçadadır, böylece parçalar birleştirildiğinde özgün
+    mesaj elde edilir.
+    """
+    content = message.content
+    if isinstance(content, str) and content:
+        pieces = [content[i:i + REPLAY_CHUNK_CHARS] for i in range(0, len(content), REPLAY_CHUNK_CHARS)]
+    else:
+        pieces = [content]
+    chunks = [AIMessageChunk(content=piece) for piece in pieces[:-1]]
+    tool_calls = getattr(message, "tool_calls", None) or []
+    chunks.append(AIMessageChunk(
+        content=pieces[-1],
+        tool_call_chunks=[
+            tool_call_chunk(name=c["name"], args=json.dumps(c["args"]), id=c.get("id"), index=i)
+            for i, c in enumerate(tool_calls)
+        ],
+        response_metadata=getattr(message, "response_metadata", {}) or {},
+        usage_metadata=getattr(message, "usage_metadata", None),
+    ))
+    return chunks
+
+
+def build_messages(prompt: str, system_prompt: Optional[str] = None) -> List[BaseMessage]:
+    """Tek seferlik üretim için mesaj listesi oluşturur."""
+    messages = []
+    if system_prompt:
+        messages.append(SystemMessage(content=system_prompt))
+    messages.append(HumanMessage(content=prompt))
+    return messages
+
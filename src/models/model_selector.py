@@ -1,31 +1,521 @@
+"""
+Gecikme farkındalıklı, sağlık kontrollü model yönlendirici (router).
+
+Her görev türü bir kalite seviyesine (tier) eşlenir; yönlendirici o seviyeyi
+karşılayan modeller arasından o an en hızlı olanı seçer:
+
+- Yerel Ollama sunucusu periyodik olarak yoklanır (kurulu modeller ve
+  belleğe yüklü modeller). Sunucu kapalıysa veya model kurulu değilse Ollama
+  adayları elenir; belleğe yüklü olmayan modele soğuk başlangıç cezası eklenir.
+- Her model ve sağlayıcı için son çağrılardan p50/p95 gecikme ve hata oranı
+  tutulur. Ölçüm, model istemcisine bağlanan bir LangChain callback'i ile
+  her LLM çağrısında yapılır.
+- Hata oranı eşiği aşan model, hatalar ROUTER_ERROR_WINDOW'dan düşene kadar
+  atlanır; p95'i ROUTER_SLOW_P95_MS'yi aşan model sona bırakılır.
+- Seviyeyi karşılayan sağlıklı model yoksa alt seviyeye düşülür (fallback);
+  model istemcisi oluşturulamazsa sıradaki adaya geçilir.
+- Devre kesicisi açık sağlayıcı atlanır; seçilen istemci sağlayıcı kapısından
+  (eşzamanlılık / kota sınırı, bkz. provider_limits.py) geçecek şekilde sarılır.
+- HEDGE_ENABLED açıksa sıradaki aday (tercihen başka sağlayıcı) yedek olarak
+  bağlanır ve birincil model p95'ini aşınca yarıştırılır (bkz. hedging.py).
+
+Seçim kararı ve nedeni RoutingDecision olarak döner; çok ajanlı akışta
+çalışma istatistiklerine (`routing`) eklenir.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config import (
+    MODEL_DEEPSEEK_CODER, MODEL_GEMINI_MASTER, MODEL_LLAMA_ANALYZER, MODEL_LLAMA_FAST, OLLAMA_BASE_URL,
+    ROUTER_COLD_START_MS, ROUTER_ERROR_WINDOW, ROUTER_HEALTH_TTL, ROUTER_LATENCY_WINDOW,
+    ROUTER_MAX_ERROR_RATE, ROUTER_PROBE_TIMEOUT, ROUTER_SLOW_P95_MS,
+    HEDGE_DEFAULT_DELAY_MS, HEDGE_ENABLED, HEDGE_MIN_DELAY_MS, HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE,
+)
 from src.models.gemini_model import GeminiModel
+from src.models.hedging import HedgedChatModel, hedge_budget
+from src.models.provider_limits import gated, provider_gates
 from src.models.ollama_model import OllamaModel
+from src.monitoring.metrics import metrics, percentile
+from src.utils.logger import get_logger
 
-class ModelSelector:
+logger = get_logger(__name__)
+
+VALID_MODES = ("fast", "accurate", "auto")
+
+# Görev türü -> gereken en düşük kalite seviyesi (1 = basit, 3 = en güçlü model)
+TASK_TIERS = {
+    "greeting": 1,
+    "simple_qa": 1,
+    "formatting": 1,
+    "summary": 1,
+    "research": 2,
+    "analysis": 2,
+    "calculation": 2,   # Mantık uzmanı: kod yazıp çalıştırarak hesaplama
+    "coding": 3,
+    "reasoning": 3,
+}
+MAX_TIER = 3
+
+# Kelime kökleri (Türkçe ekleri yakalamak için önek eşleşmesi yapılır)
+_TASK_KEYWORDS = (
+    ("coding", ("kod", "python", "fonksiyon", "algoritma", "hesapla", "fibonacci", "script", "program",
+                "code", "function")),
+    ("research", ("nedir", "kimdir", "araştır", "karşılaştır", "açıkla", "what", "compare", "research")),
+    ("formatting", ("formatla", "biçimlendir", "tablo", "listele", "markdown")),
+)
+_GREETINGS = {"merhaba", "selam", "selamlar", "günaydın", "hello", "hi", "hey"}
+LONG_QUERY_CHARS = 500
+
+
+def classify_task(query: str) -> str:
+    """
+    Sorguyu görev türüne sınıflandırır.
+
+    Args:
+        query: Kullanıcı sorgusu.
+
+    Returns:
+        str: "analysis", "coding", "research", "formatting", "greeting" veya "simple_qa".
+    """
+    if len(query) > LONG_QUERY_CHARS:
+        return "analysis"
+    words = re.findall(r"\w+", query.casefold())
+    for task_type, stems in _TASK_KEYWORDS:
+        if any(word.startswith(stem) for word in words for stem in stems):
+            return task_type
+    if _GREETINGS.intersection(words):
+        return "greeting"
+    return "simple_qa"
+
+
+@dataclass
+class ModelCandidate:
+    """Yönlendiricinin seçebileceği bir model."""
+    name: str
+    provider: str        # "ollama" veya "gemini"
+    tier: int
+    prior_ms: float      # Henüz ölçüm yokken varsayılan gecikme tahmini
+
+
+@dataclass
+class OllamaHealth:
+    """Ollama sunucusunun son yoklama sonucu."""
+    up: bool
+    models: Optional[Set[str]] = None    # Kurulu modeller (bilinmiyorsa None)
+    loaded: Optional[Set[str]] = None    # Belleğe yüklü modeller (bilinmiyorsa None)
+    probe_ms: float = 0.0
+    error: Optional[str] = None
+    checked_at: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "up": self.up,
+            "models": sorted(self.models) if self.models is not None else None,
+            "loaded": sorted(self.loaded) if self.loaded is not None else None,
+            "probe_ms": self.probe_ms,
+            "error": self.error,
+        }
+
+
+def tagged_model_name(name: str) -> str:
+    """Ollama model isimlerini etiketli hale getirir ("llama3.1" -> "llama3.1:latest")."""
+    return name if ":" in name else f"{name}:latest"
+
+
+def probe_ollama(base_url: str = OLLAMA_BASE_URL, timeout: float = ROUTER_PROBE_TIMEOUT) -> OllamaHealth:
     """
-    Görev türüne ve karmaşıklığına göre model seçen router sınıfı.
+    Ollama sunucusunu yoklar: kurulu (/api/tags) ve yüklü (/api/ps) modeller.
+
+    Returns:
+        OllamaHealth: Sunucuya ulaşılamazsa up=False.
     """
+    import ollama
+
+    started = time.perf_counter()
+    try:
+        client = ollama.Client(host=base_url, timeout=timeout)
+        models = {tagged_model_name(m.model) for m in client.list().models if m.model}
+        loaded = {tagged_model_name(m.model) for m in client.ps().models if m.model}
+        return OllamaHealth(True, models, loaded, (time.perf_counter() - started) * 1000, checked_at=time.monotonic())
+    except Exception as e:
+        return OllamaHealth(False, probe_ms=(time.perf_counter() - started) * 1000, error=str(e),
+                            checked_at=time.monotonic())
+
+
+class _ModelStats:
+    """Bir model / sağlayıcı için kayan pencerede gecikme ve hata oranı."""
+
     def __init__(self):
-        self.fast_model = OllamaModel(temperature=0.3) # Llama 3.2
-        self.smart_model = GeminiModel(temperature=0.7) # Gemini 2.5 Flash
+        self.latencies = deque(maxlen=ROUTER_LATENCY_WINDOW)   # Başarılı çağrılar (ms)
+        self.outcomes = deque()                                # (zaman, başarılı mı)
+
+    def record(self, latency_ms: float, ok: bool):
+        now = time.monotonic()
+        if ok:
+            self.latencies.append(latency_ms)
+        self.outcomes.append((now, ok))
+        self._expire(now)
+
+    def _expire(self, now: float):
+        while self.outcomes and now - self.outcomes[0][0] > ROUTER_ERROR_WINDOW:
+            self.outcomes.popleft()
+
+    def error_rate(self) -> float:
+        self._expire(time.monotonic())
+        if not self.outcomes:
+            return 0.0
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
+
+    def to_dict(self) -> dict:
+        values = sorted(self.latencies)
+        return {
+            "samples": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "error_rate": self.error_rate(),
+        }
+
+
+class _LatencyTracker(BaseCallbackHandler):
+    """
+    Model istemcisinin her LLM çağrısının süresini yönlendiriciye bildirir.
+
+    Önbellekten dönen yanıtlar ölçülmez: arka uca gitmedikleri için p50'yi
+    ve hedge eşiği olarak kullanılan p95'i yapay olarak düşürürler.
+    """
+
+    run_inline = True
+
+    def __init__(self, selector: "ModelSelector", candidate: ModelCandidate):
+        self.selector = selector
+        self.candidate = candidate
+        self._started: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id, ok: bool):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.selector.record(self.candidate, (time.perf_counter() - started) * 1000, ok)
+
+    @staticmethod
+    def _from_cache(response) -> bool:
+        """LangChain önbellek isabetinde usage_metadata'ya total_cost=0 ekler."""
+        if (response.llm_output or {}).get("cached"):
+            return True
+        return any(
+            "total_cost" in (getattr(getattr(g, "message", None), "usage_metadata", None) or {})
+            for gens in response.generations for g in gens
+        )
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        if self._from_cache(response):
+            self._started.pop(run_id, None)
+            return
+        self._finish(run_id, True)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        if isinstance(error, asyncio.CancelledError):
+            # Hedge yarışını kaybedip iptal edilen çağrı hata sayılmaz
+            self._started.pop(run_id, None)
+            return
+        self._finish(run_id, False)
+
 
-    def select_model(self, task_type: str, complexity: str = "medium"):
+@dataclass
+class RoutingDecision:
+    """Yönlendiricinin seçimi ve gerekçesi."""
+    model: Any
+    candidate: ModelCandidate
+    task_type: str
+    mode: str
+    required_tier: int
+    reason: str
+    estimate_ms: float
+    skipped: Dict[str, str] = field(default_factory=dict)
+    agent: Optional[str] = None
+    backup: Optional[ModelCandidate] = None
+
+    @property
+    def name(self) -> str:
+        return self.candidate.name
+
+    def to_dict(self) -> dict:
+        """Çalışma istatistiklerine eklenen, JSON'a çevrilebilir özet."""
+        return {
+            "agent": self.agent,
+            "model": self.candidate.name,
+            "provider": self.candidate.provider,
+            "tier": self.candidate.tier,
+            "required_tier": self.required_tier,
+            "task_type": self.task_type,
+            "mode": self.mode,
+            "reason": self.reason,
+            "estimate_ms": self.estimate_ms,
+            "skipped": self.skipped,
+            "hedge_backup": self.backup.name if self.backup else None,
+        }
+
+
+def get_ollama_model(model_name: str = MODEL_LLAMA_FAST, temperature: float = 0.7,
+                     callbacks: Optional[list] = None) -> OllamaModel:
+    """Ollama model istemcisi oluşturur."""
+    return OllamaModel(model_name=model_name, temperature=temperature, callbacks=callbacks)
+
+
+def get_gemini_model(model_name: str = MODEL_GEMINI_MASTER, temperature: float = 0.7,
+                     callbacks: Optional[list] = None) -> GeminiModel:
+    """Gemini model istemcisi oluşturur (GEMINI_API_KEY yoksa ValueError)."""
+    return GeminiModel(model_name=model_name, temperature=temperature, callbacks=callbacks)
+
+
+class ModelSelector:
+    """
+    Görev seviyesini karşılayan en hızlı sağlıklı modeli seçen router.
+
+    Args:
+        candidates: Seçilebilecek modeller (varsayılan: config'deki modeller).
+    """
+
+    def __init__(self, candidates: Optional[List[ModelCandidate]] = None):
+        if candidates is None:
+            candidates = [
+                ModelCandidate(MODEL_LLAMA_FAST, "ollama", tier=1, prior_ms=1500),
+                ModelCandidate(MODEL_LLAMA_ANALYZER, "ollama", tier=2, prior_ms=3000),
+                ModelCandidate(MODEL_DEEPSEEK_CODER, "ollama", tier=2, prior_ms=3000),
+                ModelCandidate(MODEL_GEMINI_MASTER, "gemini", tier=3, prior_ms=5000),
+            ]
+        # Aynı model birden fazla rolde tanımlıysa tek aday olarak tutulur
+        self.candidates: List[ModelCandidate] = list({c.name: c for c in candidates}.values())
+        self._lock = threading.Lock()
+        self._health_lock = threading.Lock()
+        self._ollama: Optional[OllamaHealth] = None
+        self._stats: Dict[str, _ModelStats] = {}
+
+    # --- Sağlık ---
+
+    def ollama_health(self, force: bool = False) -> OllamaHealth:
+        """Ollama yoklama sonucunu döndürür (ROUTER_HEALTH_TTL boyunca önbellekli)."""
+        with self._health_lock:
+            health = self._ollama
+            if force or health is None or time.monotonic() - health.checked_at > ROUTER_HEALTH_TTL:
+                health = self._ollama = probe_ollama()
+                if not health.up:
+                    logger.warning(f"Ollama erişilemiyor: {health.error}")
+            return health
+
+    # --- İstatistikler ---
+
+    def record(self, candidate: ModelCandidate, latency_ms: float, ok: bool = True):
+        """Bir LLM çağrısının sonucunu model ve sağlayıcı istatistiklerine ekler."""
+        with self._lock:
+            for key in (candidate.name, f"provider:{candidate.provider}"):
+                self._stats.setdefault(key, _ModelStats()).record(latency_ms, ok)
+        if ok:
+            metrics.observe(f"router.{candidate.provider}.latency_ms", latency_ms)
+        else:
+            metrics.inc(f"router.{candidate.provider}.errors")
+
+    def stats(self) -> dict:
+        """Model ve sağlayıcı bazında p50/p95 gecikme ve hata oranı."""
+        with self._lock:
+            snapshot = {key: s.to_dict() for key, s in self._stats.items()}
+        return {
+            "ollama": self._ollama.to_dict() if self._ollama else None,
+            "models": {k: v for k, v in snapshot.items() if not k.startswith("provider:")},
+            "providers": {k.split(":", 1)[1]: v for k, v in snapshot.items() if k.startswith("provider:")},
+            "hedging": hedge_budget.stats(),
+            "limits": {name: gate.stats() for name, gate in provider_gates.items()},
+        }
+
+    def hedge_delay_ms(self, candidate: ModelCandidate) -> float:
+        """Yedek isteğin başlatılacağı gecikme: birincil modelin HEDGE_PERCENTILE gecikmesi."""
+        with self._lock:
+            stats = self._stats.get(candidate.name)
+            values = sorted(stats.latencies) if stats else []
+        if len(values) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY_MS
+        return max(HEDGE_MIN_DELAY_MS, percentile(values, HEDGE_PERCENTILE))
+
+    # --- Seçim ---
+
+    def _unavailable(self, candidate: ModelCandidate, ollama_up: bool) -> Optional[str]:
+        """Aday kullanılamıyorsa nedenini, kullanılabiliyorsa None döndürür."""
+        gate = provider_gates.get(candidate.provider)
+        if gate is not None and gate.circuit_open:
+            return "devre kesici açık"
+        if candidate.provider == "ollama":
+            if not ollama_up:
+                return "Ollama erişilemiyor"
+            health = self._ollama
+            if health is not None and health.models is not None and candidate.name not in health.models:
+                return "Ollama'da kurulu değil"
+        with self._lock:
+            stats = self._stats.get(candidate.name)
+            error_rate = stats.error_rate() if stats else 0.0
+        if error_rate > 0 and error_rate >= ROUTER_MAX_ERROR_RATE:
+            return f"hata oranı yüksek (%{error_rate * 100:.0f})"
+        return None
+
+    def _estimate(self, candidate: ModelCandidate) -> Tuple[bool, float]:
+        """(yavaş mı, tahmini gecikme ms) - sıralama anahtarı."""
+        with self._lock:
+            stats = self._stats.get(candidate.name)
+            values = sorted(stats.latencies) if stats else []
+        estimate = percentile(values, 50) if values else candidate.prior_ms
+        health = self._ollama
+        if (candidate.provider == "ollama" and health is not None and health.loaded is not None
+                and candidate.name not in health.loaded):
+            estimate += ROUTER_COLD_START_MS
+        return bool(values) and percentile(values, 95) > ROUTER_SLOW_P95_MS, estimate
+
+    def select(self, task_type: str, mode: str = "auto", temperature: float = 0.7,
+               agent: Optional[str] = None, hedge: Optional[bool] = None) -> RoutingDecision:
+        """
+        Görev için model seçer ve istemcisini oluşturur.
+
+        Args:
+            task_type: Görev türü (bkz. TASK_TIERS).
+            mode: "fast" (en hızlı), "accurate" (en üst seviye) veya "auto" (görev seviyesi).
+            temperature: Model sıcaklığı.
+            agent: Kararı isteyen ajanın adı (istatistikler için).
+            hedge: Yedek modelle yarıştırma (None = HEDGE_ENABLED).
+
+        Returns:
+            RoutingDecision: Seçilen model istemcisi ve gerekçesi.
+
+        Raises:
+            ValueError: Geçersiz mod.
+        """
+        if mode not in VALID_MODES:
+            raise ValueError(f"Geçersiz model seçim modu: '{mode}'. Geçerli modlar: {', '.join(VALID_MODES)}")
+        required = {"fast": 1, "accurate": MAX_TIER}.get(mode, TASK_TIERS.get(task_type, 2))
+
+        ollama_up = any(c.provider == "ollama" for c in self.candidates) and check_ollama_connection()
+        skipped: Dict[str, str] = {}
+        available = []
+        for candidate in self.candidates:
+            why = self._unavailable(candidate, ollama_up)
+            if why:
+                skipped[candidate.name] = why
+            else:
+                available.append(candidate)
+
+        # Önce seviyeyi karşılayanlar (en hızlıdan), sonra yedek olarak alt seviyeler (en güçlüden)
+        eligible = sorted((c for c in available if c.tier >= required), key=self._estimate)
+        lower = sorted((c for c in available if c.tier < required), key=lambda c: (-c.tier, self._estimate(c)))
+        ranked = eligible + lower
+        if eligible:
+            reason = f"seviye >= {required} olan sağlıklı modeller arasında en hızlı"
+        elif lower:
+            reason = f"fallback: seviye >= {required} olan sağlıklı model yok"
+        else:
+            ranked = sorted(self.candidates, key=lambda c: -c.tier)
+            reason = "fallback: sağlıklı model yok, en güçlü model deneniyor"
+
+        error = None
+        for index, candidate in enumerate(ranked):
+            try:
+                model = self._create(candidate, temperature)
+            except Exception as e:
+                error = e
+                skipped[candidate.name] = f"istemci oluşturulamadı: {e}"
+                reason = f"fallback: {candidate.name} kullanılamadı"
+                continue
+
+            if reason.startswith("fallback"):
+                metrics.inc("router.fallbacks")
+            metrics.inc(f"router.selected.{candidate.provider}")
+            backup = None
+            if HEDGE_ENABLED if hedge is None else hedge:
+                backup = self._attach_backup(model, candidate, ranked[index + 1:], temperature)
+            decision = RoutingDecision(model, candidate, task_type, mode, required, reason,
+                                       self._estimate(candidate)[1], skipped, agent, backup)
+            logger.info(
+                "Model seçildi",
+                extra={"agent": agent, "model": candidate.name, "task_type": task_type, "reason": reason},
+            )
+            return decision
+        raise error
+
+    def _create(self, candidate: ModelCandidate, temperature: float):
+        """
+        Aday için gecikme ölçümlü model istemcisi oluşturur (hata istatistiğe yazılır).
+        İstemcinin LLM'i sağlayıcı kapısından geçecek şekilde sarılır.
+        """
+        callbacks = [_LatencyTracker(self, candidate)]
+        try:
+            if candidate.provider == "ollama":
+                model = get_ollama_model(candidate.name, temperature, callbacks=callbacks)
+            else:
+                model = get_gemini_model(candidate.name, temperature, callbacks=callbacks)
+        except Exception:
+            self.record(candidate, 0.0, ok=False)
+            raise
+        if candidate.provider in provider_gates:
+            model.llm = gated(model.llm, candidate.provider)
+        return model
+
+    def _attach_backup(self, model, primary: ModelCandidate, rest: List[ModelCandidate],
+                       temperature: float) -> Optional[ModelCandidate]:
         """
-        Modele karar verir.
-        task_type: 'coding', 'reasoning', 'chat', 'summary'
-        complexity: 'low', 'medium', 'high'
+        Sıradaki adaylardan birini (tercihen başka sağlayıcı) yedek olarak bağlar;
+        model.llm HedgedChatModel ile sarılır.
         """
-        # Kodlama veya yüksek karmaşıklık -> Gemini
-        if task_type in ["coding", "reasoning"] or complexity == "high":
-            return self.smart_model
-            
-        # Basit sohbet veya özetleme -> Llama (Hız ve Maliyet)
-        if task_type in ["chat", "summary"] and complexity == "low":
+        for candidate in sorted(rest, key=lambda c: c.provider == primary.provider):
             try:
-                # Ollama'nın çalışıp çalışmadığını kontrol etmek iyi olurdu ama şimdilik varsayıyoruz.
-                return self.fast_model
-            except:
-                return self.smart_model # Fallback
-        
-        # Varsayılan
-        return self.smart_model
+                backup_model = self._create(candidate, temperature)
+            except Exception:
+                continue
+            model.llm = HedgedChatModel(
+                primary=model.llm,
+                backup=backup_model.llm,
+                primary_name=primary.name,
+                backup_name=candidate.name,
+                delay_ms=lambda: self.hedge_delay_ms(primary),
+            )
+            return candidate
+        return None
+
+
+# Singleton instance (Sağlık ve gecikme istatistikleri tüm ajanlarca paylaşılır)
+model_selector = ModelSelector()
+
+
+def check_ollama_connection() -> bool:
+    """Ollama sunucusu erişilebilir mi? (Sonuç ROUTER_HEALTH_TTL boyunca önbellekli.)"""
+    return model_selector.ollama_health().up
+
+
+def select_model(query: str, mode: str = "auto", task_type: Optional[str] = None,
+                 temperature: float = 0.7) -> Tuple[Any, str, str]:
+    """
+    Sorgu için model seçer.
+
+    Args:
+        query: Kullanıcı sorgusu (task_type verilmezse sınıflandırılır).
+        mode: "fast", "accurate" veya "auto".
+        task_type: Görev türü (opsiyonel).
+        temperature: Model sıcaklığı.
+
+    Returns:
+        tuple: (model istemcisi, model adı, görev türü).
+
+    Raises:
+        ValueError: Geçersiz mod.
+    """
+    task_type = task_type or classify_task(query)
+    decision = model_selector.select(task_type, mode=mode, temperature=temperature)
+    return decision.model, decision.name, task_type
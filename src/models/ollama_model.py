@@ -1,28 +1,34 @@
 import os
+from typing import Optional
 from langchain_ollama import ChatOllama
-from langchain_core.messages import HumanMessage, SystemMessage
+from src.config import OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE
+from src.models.llm_cache import build_messages, cache_for
 
 class OllamaModel:
-    def __init__(self, model_name="llama3.2:3b", base_url="http://localhost:11434", temperature=0.7):
+    def __init__(self, model_name="llama3.2:3b", base_url=OLLAMA_BASE_URL, temperature=0.7,
+                 cache: Optional[bool] = None, callbacks: Optional[list] = None):
         """
         Ollama yerel model istemcisi.
+
+        cache: None = sadece deterministik (temperature=0) çağrılar önbelleklenir,
+               True = her zaman, False = hiçbir zaman.
+        callbacks: LLM çağrılarına bağlanacak LangChain callback'leri
+               (örn. model yönlendiricisinin gecikme ölçümü).
         """
         self.model_name = model_name
         self.base_url = base_url
+        self.temperature = temperature
         self.llm = ChatOllama(
             model=model_name,
             base_url=base_url,
-            temperature=temperature
+            temperature=temperature,
+            keep_alive=OLLAMA_KEEP_ALIVE,  # Isıtılan model istekler arasında bellekten düşmesin
+            cache=cache_for(temperature, cache),
+            callbacks=callbacks
         )
 
     def generate(self, prompt: str, system_prompt: str = None) -> str:
         """
         Tek seferlik üretim yapar.
         """
-        messages = []
-        if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
-        messages.append(HumanMessage(content=prompt))
-        
-        response = self.llm.invoke(messages)
-        return response.content
+        return self.llm.invoke(build_messages(prompt, system_prompt)).content
@@ -0,0 +1,187 @@
+"""
+Ollama model ön yükleme (warm-up) ve bellekte tutma.
+
+Ollama modelleri ilk istekte yüklenir ve keep-alive süresi dolunca bellekten
+atılır; boşta kalan sistemde ilk istek model yükleme süresini öder.
+OllamaWarmer:
+
+- Uzun ömürlü süreçlerin açılışında (FastAPI lifespan / interaktif CLI;
+  tek sorguluk CLI çalışmasında değil) yapılandırılan modelleri boş bir
+  prompt ile yükler ve OLLAMA_KEEP_ALIVE süresince bellekte tutulmasını ister.
+- Yüklemenin ardından /api/ps ile modellerin gerçekten bellekte olduğunu
+  doğrular.
+- Arka planda OLLAMA_WARMUP_INTERVAL aralıkla kontrol eder; bellekten
+  düşen (unload) modeli tekrar yükler. Yüklendikten hemen sonra bellekte
+  kalmayan model (örn. OLLAMA_MAX_LOADED_MODELS sınırı) diğerlerini sürekli
+  atmasın diye katlanarak artan bekleme (en fazla OLLAMA_WARMUP_MAX_BACKOFF)
+  sonrasında tekrar denenir; bellekte kaldığında bekleme sıfırlanır.
+
+Her yüklemenin süresi soğuk başlangıç gecikmesi olarak ölçülür
+(ollama.cold_start_ms) ve GET /health altında model bazında gösterilir.
+Sağlık yoklaması model yönlendiricisi ile paylaşılır; böylece yönlendirici
+soğuk başlangıç cezasını güncel bilgiyle uygular.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.config import (
+    OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, OLLAMA_PRELOAD_MODELS, OLLAMA_WARMUP_INTERVAL, OLLAMA_WARMUP_MAX_BACKOFF,
+    OLLAMA_WARMUP_TIMEOUT,
+)
+from src.models.model_selector import model_selector, tagged_model_name
+from src.monitoring.metrics import metrics
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class OllamaWarmer:
+    """
+    Yapılandırılan Ollama modellerini bellekte tutan arka plan görevi.
+
+    Args:
+        models: Ön yüklenecek modeller (varsayılan: OLLAMA_PRELOAD_MODELS).
+        keep_alive: Modelin bellekte kalma süresi ("30m", saniye veya -1).
+        interval: Bellekte mi kontrolü aralığı (sn).
+        max_backoff: Bellekte tutulamayan modelin yeniden denenmesi için en uzun bekleme (sn).
+    """
+
+    def __init__(self, models: Optional[List[str]] = None, keep_alive=OLLAMA_KEEP_ALIVE,
+                 interval: float = OLLAMA_WARMUP_INTERVAL, max_backoff: float = OLLAMA_WARMUP_MAX_BACKOFF):
+        self.models = list(dict.fromkeys(tagged_model_name(m) for m in (models or OLLAMA_PRELOAD_MODELS)))
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.server_up: Optional[bool] = None
+        self._status: Dict[str, dict] = {
+            m: {"resident": False, "cold_start_ms": None, "load_ms": None, "warmups": 0,
+                "warmed_at": None, "evictions": 0, "retry_at": None, "error": None}
+            for m in self.models
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _client(self):
+        import ollama
+        return ollama.Client(host=OLLAMA_BASE_URL, timeout=OLLAMA_WARMUP_TIMEOUT)
+
+    def _update(self, model: str, **fields):
+        with self._lock:
+            self._status[model].update(fields)
+
+    def warm_model(self, model: str) -> bool:
+        """
+        Modeli boş bir prompt ile yükler ve yükleme süresini ölçer.
+
+        Returns:
+            bool: Yükleme isteği başarılı mı?
+        """
+        started = time.perf_counter()
+        try:
+            response = self._client().generate(model=model, prompt="", keep_alive=self.keep_alive)
+        except Exception as e:
+            self._update(model, resident=False, error=str(e))
+            logger.warning(f"Ollama modeli ısıtılamadı ({model}): {e}")
+            return False
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            status = self._status[model]
+            status.update(
+                cold_start_ms=elapsed_ms,
+                load_ms=(response.load_duration or 0) / 1e6,
+                warmups=status["warmups"] + 1,
+                warmed_at=time.time(),
+                error=None,
+            )
+        metrics.observe("ollama.cold_start_ms", elapsed_ms)
+        metrics.inc("ollama.warmups")
+        logger.info("Ollama modeli ısıtıldı", extra={"model": model, "cold_start_ms": round(elapsed_ms)})
+        return True
+
+    def _loaded(self) -> Optional[set]:
+        """Bellekteki modeller (sunucuya ulaşılamazsa None)."""
+        health = model_selector.ollama_health(force=True)
+        self.server_up = health.up
+        return health.loaded if health.up else None
+
+    def run_once(self):
+        """Bellekte olmayan modelleri yükler ve bellekte olduklarını doğrular."""
+        loaded = self._loaded()
+        if loaded is None:
+            for model in self.models:
+                self._update(model, resident=False)
+            return
+
+        warmed = []
+        for model in self.models:
+            with self._lock:
+                status = dict(self._status[model])
+            if model in loaded:
+                self._update(model, resident=True, evictions=0, retry_at=None)
+                continue
+            if status["resident"]:
+                metrics.inc("ollama.unloads_detected")
+                logger.info(f"Ollama modeli bellekten düşmüş, tekrar yükleniyor: {model}")
+            due = status["retry_at"] is None or time.time() >= status["retry_at"]
+            if due and self.warm_model(model):
+                warmed.append(model)
+            else:
+                self._update(model, resident=False)
+
+        if warmed:
+            loaded = self._loaded() or set()
+            for model in warmed:
+                resident = model in loaded
+                if resident:
+                    self._update(model, resident=True, evictions=0, retry_at=None)
+                    continue
+                # Başka bir model yüklenirken atıldı: sürekli birbirini atmasınlar,
+                # bellek boşalınca (örn. diğer model keep-alive ile düşünce) tekrar denensin
+                with self._lock:
+                    status = self._status[model]
+                    status["evictions"] += 1
+                    delay = min(self.max_backoff, self.interval * 2 ** status["evictions"])
+                    status.update(resident=False, retry_at=time.time() + delay,
+                                  error="Yüklendikten sonra bellekte kalmadı (OLLAMA_MAX_LOADED_MODELS?)")
+                metrics.inc("ollama.evictions")
+                logger.warning(f"Ollama modeli bellekte tutulamadı, {delay:.0f} sn sonra tekrar denenecek: {model}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning(f"Ollama warm-up kontrolü başarısız: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Isıtma ve bellekte tutma döngüsünü daemon thread'de başlatır."""
+        if not self.models:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ollama-warmup", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> dict:
+        """Health endpoint'i için model bazında bellekte olma ve soğuk başlangıç süreleri."""
+        with self._lock:
+            models = {m: dict(s) for m, s in self._status.items()}
+        return {
+            "server_up": self.server_up,
+            "keep_alive": self.keep_alive,
+            "models": models,
+        }
+
+
+# Singleton instance
+ollama_warmer = OllamaWarmer()
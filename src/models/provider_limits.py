@@ -0,0 +1,522 @@
+"""
+Sağlayıcı (Ollama / Gemini) bazında eşzamanlılık sınırı, kuyruk, hız sınırı
+ve devre kesici (circuit breaker).
+
+Graph'ın aynı anda kaç LLM çağrısı yapacağını sınırlamazsak yük altında
+Gemini 429 döndürür, tek yerel Ollama ise aşırı yüklenip her isteği
+yavaşlatır. Her sağlayıcı için bir ProviderGate:
+
+1. Devre açıksa çağrıyı beklemeden reddeder (CircuitOpen). Yönlendirici
+   açık devreli sağlayıcıyı seçmez; hedge açıksa yedek model hemen devreye
+   girer (fail over).
+2. Eşzamanlı çağrıları MAX_CONCURRENCY ile sınırlar; fazlası sınırlı bir
+   kuyrukta bekler. Kuyruk doluysa veya bekleme PROVIDER_QUEUE_TIMEOUT'u
+   aşarsa ProviderOverloaded fırlatılır.
+3. Token bucket ile dakikalık istek kotasına (RATE_PER_MIN) uyar.
+4. Art arda BREAKER_FAILURE_THRESHOLD hata olursa devreyi
+   BREAKER_RESET_TIMEOUT saniyeliğine açar; süre dolunca tek bir deneme
+   çağrısına izin verir (half-open), başarılıysa devre kapanır.
+
+Kilitler thread tabanlıdır; böylece aynı kapı farklı event loop'lardan
+(CLI, testler) ve senkron çağrılardan güvenle kullanılabilir.
+
+Metrikler: provider.<isim>.queue_depth, .in_flight, .circuit_open (gauge),
+.wait_ms (dağılım), .rejected ve .failures (sayaç).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.caches import BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableBinding
+
+from src.config import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, GEMINI_MAX_CONCURRENCY, GEMINI_MAX_QUEUE,
+    GEMINI_RATE_PER_MIN, OLLAMA_MAX_CONCURRENCY, OLLAMA_MAX_QUEUE, OLLAMA_RATE_PER_MIN, PROVIDER_QUEUE_TIMEOUT,
+)
+from src.models.llm_cache import cache_prompt, replay_chunks
+from src.monitoring.metrics import metrics
+from src.utils.singleflight import SingleFlight
+
+
+class ProviderUnavailable(RuntimeError):
+    """Sağlayıcı çağrıyı şu an kabul edemiyor."""
+
+
+class ProviderOverloaded(ProviderUnavailable):
+    """Bekleme kuyruğu dolu veya bekleme süresi aşıldı."""
+
+
+class CircuitOpen(ProviderUnavailable):
+    """Devre kesici açık; çağrı beklemeden reddedildi."""
+
+
+class TokenBucket:
+    """
+    Dakikalık istek kotası için token bucket.
+
+    Args:
+        rate_per_min: Dakikada izin verilen istek sayısı.
+        burst: Biriktirilebilecek en fazla token (varsayılan: 1 saniyelik kota, en az 1).
+    """
+
+    def __init__(self, rate_per_min: float, burst: Optional[float] = None):
+        self.rate = rate_per_min / 60.0
+        self.burst = burst if burst is not None else max(1.0, self.rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Bir token ayırır; token gelene kadar beklenmesi gereken süreyi (sn) döndürür."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Art arda hatalarda açılan devre kesici (closed -> open -> half_open -> closed).
+
+    Args:
+        failure_threshold: Devreyi açan art arda hata sayısı.
+        reset_timeout: Devrenin açık kalacağı süre (sn).
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return "open"
+            return "half_open"
+
+    def allow(self) -> bool:
+        """Çağrıya izin var mı? Half-open durumda aynı anda tek deneme çağrısı geçer."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> bool:
+        """Hatayı kaydeder; devre bu hatayla açıldıysa True."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                opened = self.opened_at is None
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+    def record_cancel(self):
+        """Sonuçlanmadan iptal edilen çağrı; deneme hakkı geri verilir."""
+        with self._lock:
+            self._probing = False
+
+
+class _AsyncWaiter:
+    def __init__(self, limiter: "ConcurrencyLimiter", loop: asyncio.AbstractEventLoop):
+        self.limiter = limiter
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def grant(self):
+        self.loop.call_soon_threadsafe(self._set)
+
+    def _set(self):
+        if self.future.done():
+            # Bekleyen bu arada vazgeçti: slotu sıradakine devret
+            self.limiter.release()
+        else:
+            self.future.set_result(None)
+
+
+class _SyncWaiter:
+    def __init__(self, limiter: "ConcurrencyLimiter"):
+        self.limiter = limiter
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.abandoned = False
+
+    def grant(self):
+        with self.lock:
+            if not self.abandoned:
+                self.event.set()
+                return
+        self.limiter.release()
+
+
+class ConcurrencyLimiter:
+    """
+    Sınırlı kuyruklu, FIFO semafor (async ve senkron çağıranlar için).
+
+    Args:
+        limit: Aynı anda çalışabilecek çağrı sayısı (<= 0 = sınırsız).
+        max_queue: Slot bekleyebilecek en fazla çağrı.
+    """
+
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _try_enter(self, waiter_factory):
+        """Slot boşsa alır (None döner); değilse kuyruğa bir bekleyen ekler."""
+        with self._lock:
+            if self.limit <= 0 or (self.active < self.limit and not self._waiters):
+                self.active += 1
+                return None
+            if len(self._waiters) >= self.max_queue:
+                raise ProviderOverloaded(f"Bekleme kuyruğu dolu ({self.max_queue})")
+            waiter = waiter_factory()
+            self._waiters.append(waiter)
+            return waiter
+
+    def _dequeue(self, waiter) -> bool:
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return True
+            return False
+
+    async def acquire(self, timeout: Optional[float] = None):
+        loop = asyncio.get_running_loop()
+        waiter = self._try_enter(lambda: _AsyncWaiter(self, loop))
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except BaseException as e:
+            if not self._dequeue(waiter) and waiter.future.done() and not waiter.future.cancelled():
+                # Slot verilmişti ama kullanılmayacak
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                raise ProviderOverloaded(f"Slot için {timeout} sn beklendi") from None
+            raise
+
+    def acquire_sync(self, timeout: Optional[float] = None):
+        waiter = self._try_enter(lambda: _SyncWaiter(self))
+        if waiter is None or waiter.event.wait(timeout):
+            return
+        with waiter.lock:
+            if waiter.event.is_set():
+                return
+            waiter.abandoned = True
+        self._dequeue(waiter)
+        raise ProviderOverloaded(f"Slot için {timeout} sn beklendi")
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Slot doğrudan sıradaki bekleyene devredilir (active değişmez)
+                waiter = self._waiters.popleft()
+            else:
+                self.active -= 1
+                return
+        waiter.grant()
+
+
+class ProviderGate:
+    """
+    Bir sağlayıcıya giden tüm LLM çağrılarının geçtiği kapı.
+
+    Args:
+        name: Sağlayıcı adı (metriklerde kullanılır).
+        max_concurrency: Eşzamanlı çağrı sınırı (<= 0 = sınırsız).
+        max_queue: Slot bekleyebilecek en fazla çağrı.
+        rate_per_min: Dakikalık istek kotası (<= 0 = sınırsız).
+        queue_timeout: Slot için en fazla bekleme (sn).
+        breaker: Devre kesici.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, rate_per_min: float = 0,
+                 queue_timeout: float = PROVIDER_QUEUE_TIMEOUT, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.limiter = ConcurrencyLimiter(max_concurrency, max_queue)
+        self.bucket = TokenBucket(rate_per_min) if rate_per_min > 0 else None
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+
+    @property
+    def circuit_open(self) -> bool:
+        return self.breaker.state == "open"
+
+    def _metric(self, suffix: str) -> str:
+        return f"provider.{self.name}.{suffix}"
+
+    def _publish(self):
+        metrics.set_gauge(self._metric("queue_depth"), self.limiter.queue_depth)
+        metrics.set_gauge(self._metric("in_flight"), self.limiter.active)
+        metrics.set_gauge(self._metric("circuit_open"), 1 if self.circuit_open else 0)
+
+    def _check_circuit(self):
+        if not self.breaker.allow():
+            metrics.inc(self._metric("rejected"))
+            raise CircuitOpen(f"{self.name} devre kesici açık; {self.breaker.reset_timeout} sn sonra tekrar denenecek")
+
+    def _rejected(self):
+        metrics.inc(self._metric("rejected"))
+        # Kuyruk reddi sağlayıcı hatası değildir; half-open deneme hakkı geri verilir
+        self.breaker.record_cancel()
+
+    def _finish(self, error: Optional[BaseException]):
+        if error is None:
+            self.breaker.record_success()
+        elif isinstance(error, (asyncio.CancelledError, ProviderUnavailable)):
+            self.breaker.record_cancel()
+        else:
+            metrics.inc(self._metric("failures"))
+            self.breaker.record_failure()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Async çağrı için slot + kota bekler; çağrının sonucunu devre kesiciye yazar."""
+        self._check_circuit()
+        started = time.perf_counter()
+        try:
+            self._publish()
+            await self.limiter.acquire(self.queue_timeout)
+        except BaseException:
+            self._rejected()
+            self._publish()
+            raise
+        error = None
+        try:
+            delay = self.bucket.reserve() if self.bucket else 0.0
+            if delay:
+                await asyncio.sleep(delay)
+            metrics.observe(self._metric("wait_ms"), (time.perf_counter() - started) * 1000)
+            self._publish()
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(error)
+            self.limiter.release()
+            self._publish()
+
+    @contextmanager
+    def sync_slot(self):
+        """slot()'un senkron karşılığı."""
+        self._check_circuit()
+        started = time.perf_counter()
+        try:
+            self._publish()
+            self.limiter.acquire_sync(self.queue_timeout)
+        except BaseException:
+            self._rejected()
+            self._publish()
+            raise
+        error = None
+        try:
+            delay = self.bucket.reserve() if self.bucket else 0.0
+            if delay:
+                time.sleep(delay)
+            metrics.observe(self._metric("wait_ms"), (time.perf_counter() - started) * 1000)
+            self._publish()
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._finish(error)
+            self.limiter.release()
+            self._publish()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.limiter.active,
+            "queue_depth": self.limiter.queue_depth,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+
+# Singleton instances (Sağlayıcı başına tek kapı; tüm ajanlar ve /ask paylaşır)
+provider_gates: Dict[str, ProviderGate] = {
+    "ollama": ProviderGate("ollama", OLLAMA_MAX_CONCURRENCY, OLLAMA_MAX_QUEUE, OLLAMA_RATE_PER_MIN),
+    "gemini": ProviderGate("gemini", GEMINI_MAX_CONCURRENCY, GEMINI_MAX_QUEUE, GEMINI_RATE_PER_MIN),
+}
+
+
+# Özdeş eşzamanlı LLM çağrıları tek arka uç çağrısına bağlanır (bkz. GatedChatModel)
+_llm_flight = SingleFlight("llm")
+
+
+class GatedChatModel(BaseChatModel):
+    """
+    Her arka uç çağrısını sağlayıcı kapısından geçiren chat model sarmalayıcısı.
+
+    İçteki modelin yanıt önbelleği sarmalayıcıya taşınır (bkz. gated) ve
+    kapıdan önce sorgulanır: önbellekten dönen yanıt slot, kota ve devre
+    kesici gerektirmez. Akış (stream) yolu da önbelleğe bakar (isabet parça
+    parça tekrar oynatılır) ve tamamlanan akışı önbelleğe yazar; LangChain'in
+    astream yolu önbelleği kullanmadığı için bu, akışla çalışan ajanların
+    (create_react_agent + stream_mode="messages") önbellekten yararlanmasını
+    sağlar. Anahtar LangChain'inkiyle aynıdır (prompt + llm_string, bağlı
+    tool şemaları dahil).
+
+    Önbellekte olmayan özdeş çağrılar (aynı sağlayıcı, llm_string ve
+    mesajlar) aynı anda gelirse tek arka uç çağrısında birleştirilir
+    (single-flight); akışta sonradan katılan çağıran parçaları baştan alır.
+    Senkron stream() birleştirilmez.
+
+    Akışta slot akış bitene kadar tutulur. bind_tools içteki modele uygulanır.
+
+    Args:
+        inner: Asıl model (chat model veya bind_tools sonrası runnable).
+        gate: Sağlayıcı kapısı.
+        response_cache: Yanıt önbelleği (BaseCache) veya None.
+    """
+
+    inner: Any
+    gate: Any
+    response_cache: Any = None
+    cache: Any = False
+
+    @property
+    def _llm_type(self) -> str:
+        return f"gated-{self.gate.name}"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"inner": self.inner.bind_tools(tools, **kwargs)})
+
+    def _call_key(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: dict) -> Tuple[str, str]:
+        """(prompt, llm_string): içteki modelin kendi önbellek anahtarı."""
+        model, bound = self.inner, {}
+        if isinstance(model, RunnableBinding):
+            model, bound = model.bound, dict(model.kwargs)
+        return cache_prompt(messages), model._get_llm_string(stop=stop, **bound, **kwargs)
+
+    @staticmethod
+    def _cached_result(generations) -> ChatResult:
+        return ChatResult(generations=list(generations), llm_output={"cached": True})
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        prompt, llm_string = self._call_key(messages, stop, kwargs)
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(prompt, llm_string)
+            if cached:
+                return self._cached_result(cached)
+
+        def call():
+            with self.gate.sync_slot():
+                message = self.inner.invoke(messages, stop=stop, **kwargs)
+            if self.response_cache is not None:
+                self.response_cache.update(prompt, llm_string, [ChatGeneration(message=message)])
+            return message
+
+        message = _llm_flight.do_sync((self.gate.name, llm_string, prompt), call)
+        # Paylaşılan yanıt her çağırana ayrı kopya (LangGraph mesaj id'sini yerinde değiştirir)
+        return ChatResult(generations=[ChatGeneration(message=message.model_copy(deep=True))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs) -> ChatResult:
+        prompt, llm_string = self._call_key(messages, stop, kwargs)
+        if self.response_cache is not None:
+            cached = await self.response_cache.alookup(prompt, llm_string)
+            if cached:
+                return self._cached_result(cached)
+
+        async def call():
+            async with self.gate.slot():
+                message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+            if self.response_cache is not None:
+                await self.response_cache.aupdate(prompt, llm_string, [ChatGeneration(message=message)])
+            return message
+
+        message = await _llm_flight.do((self.gate.name, llm_string, prompt), call)
+        return ChatResult(generations=[ChatGeneration(message=message.model_copy(deep=True))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        prompt, llm_string = self._call_key(messages, stop, kwargs)
+        if self.response_cache is not None:
+            cached = self.response_cache.lookup(prompt, llm_string)
+            if cached:
+                for chunk in replay_chunks(cached[0].message):
+                    yield ChatGenerationChunk(message=chunk)
+                return
+        response = None
+        with self.gate.sync_slot():
+            for chunk in self.inner.stream(messages, stop=stop, **kwargs):
+                response = chunk if response is None else response + chunk
+                yield ChatGenerationChunk(message=chunk)
+        if self.response_cache is not None and response is not None:
+            self.response_cache.update(prompt, llm_string, [ChatGeneration(message=message_chunk_to_message(response))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs):
+        prompt, llm_string = self._call_key(messages, stop, kwargs)
+        if self.response_cache is not None:
+            cached = await self.response_cache.alookup(prompt, llm_string)
+            if cached:
+                for chunk in replay_chunks(cached[0].message):
+                    yield ChatGenerationChunk(message=chunk)
+                return
+
+        async def produce():
+            response = None
+            async with self.gate.slot():
+                async for chunk in self.inner.astream(messages, stop=stop, **kwargs):
+                    response = chunk if response is None else response + chunk
+                    yield chunk
+            if self.response_cache is not None and response is not None:
+                await self.response_cache.aupdate(
+                    prompt, llm_string, [ChatGeneration(message=message_chunk_to_message(response))]
+                )
+
+        async for chunk in _llm_flight.stream((self.gate.name, llm_string, prompt), produce):
+            yield ChatGenerationChunk(message=chunk.model_copy())
+
+def gated(llm, provider: str) -> GatedChatModel:
+    """
+    Modeli sağlayıcının kapısından geçecek şekilde sarar.
+
+    Modelin yanıt önbelleği sarmalayıcıya taşınır ve içteki modelde
+    kapatılır; önbellek isabeti kapıya hiç uğramaz, içteki model (ve ona
+    bağlı gecikme ölçümü) sadece gerçek arka uç çağrılarında çalışır.
+    """
+    response_cache = getattr(llm, "cache", None)
+    if isinstance(response_cache, BaseCache):
+        llm = llm.model_copy(update={"cache": False})
+    else:
+        response_cache = None
+    return GatedChatModel(inner=llm, gate=provider_gates[provider], response_cache=response_cache)
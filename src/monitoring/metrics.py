@@ -0,0 +1,127 @@
+"""
+Basit, process içi metrik kayıt modülü.
+
+Sayaç (counter), anlık değer (gauge) ve dağılım (summary) tutar.
+Summary'ler son N gözlemi saklayan kayan bir pencere üzerinden
+p50/p95/p99 hesaplar; böylece bellek kullanımı sınırlı kalır.
+
+Kayıtlar FastAPI'de `GET /metrics` üzerinden JSON olarak sunulur.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Dict
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """
+    Sıralı bir listeden yüzdelik değer hesaplar (nearest-rank).
+
+    Args:
+        sorted_values: Küçükten büyüğe sıralı değerler.
+        q: 0-100 arası yüzdelik.
+
+    Returns:
+        float: Yüzdelik değer (liste boşsa 0.0).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return float(sorted_values[min(rank, len(sorted_values)) - 1])
+
+
+class _Summary:
+    """Bir metriğin toplam istatistikleri + kayan penceredeki son gözlemler."""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.window = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.window.append(value)
+
+    def to_dict(self) -> dict:
+        values = sorted(self.window)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe metrik deposu.
+
+    Metrik isimleri nokta ile ayrılmış düz string'lerdir
+    (örn. "embedding.batch_size").
+    """
+
+    def __init__(self, window: int = 1024):
+        self._window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, _Summary] = {}
+
+    def inc(self, name: str, value: float = 1):
+        """Sayacı artırır."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Anlık değeri günceller."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Dağılım metriğine bir gözlem ekler."""
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = self._summaries[name] = _Summary(self._window)
+            summary.observe(value)
+
+    def counter(self, name: str) -> float:
+        """Sayacın güncel değerini döndürür."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def summary(self, name: str) -> dict:
+        """Tek bir dağılım metriğinin istatistiklerini döndürür."""
+        with self._lock:
+            summary = self._summaries.get(name)
+            return summary.to_dict() if summary else _Summary(1).to_dict()
+
+    def snapshot(self) -> dict:
+        """Tüm metriklerin JSON'a çevrilebilir anlık görüntüsü."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {k: v.to_dict() for k, v in self._summaries.items()},
+            }
+
+    def reset(self):
+        """Tüm metrikleri sıfırlar (test ve benchmark için)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+
+# Singleton instance (Uygulama genelinde tek metrik deposu)
+metrics = MetricsRegistry()
@@ -1,12 +1,18 @@
 import operator
+import time
 from typing import Annotated, Sequence, TypedDict, Union, Literal
 from langchain_core.messages import BaseMessage
 from langgraph.graph import StateGraph, END
 
+from rag_app.services.answer_cache import answer_cache
+from rag_app.services.embedding_batcher import embedding_batcher
+from rag_app.services.vector_store import vector_store
+
 # Yeni Ajanlar
 from src.agents.ana_analist import analyst_node
 from src.agents.mantik_uzmani import logic_expert_node
 from src.agents.master_agent import master_agent_node
+from src.monitoring.metrics import metrics
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,6 +21,8 @@ logger = get_logger(__name__)
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     next: str
+    # Her ajanın model seçim kararı (RoutingDecision.to_dict)
+    routing: Annotated[list, operator.add]
 
 # Router Mantığı (Conditional Edge)
 def router_logic(state: AgentState) -> Literal["LogicExpert", "MasterAgent"]:
@@ -67,58 +75,135 @@ workflow.add_edge("MasterAgent", END)
 # Compile
 graph = workflow.compile()
 
-async def run_multi_agent(query: str, mode: str = "auto") -> dict:
+async def _lookup_cache(query: str, mode: str):
+    """
+    Sorguyu vektörleştirip anlamsal cevap önbelleğinde arar.
+
+    Returns:
+        tuple: (vektör, indeks versiyonu, (CachedAnswer, benzerlik) veya None).
+        Embedding alınamazsa önbellek atlanır ve vektör None döner.
+    """
+    if not answer_cache.enabled:
+        return None, None, None
+    try:
+        vector = await embedding_batcher.embed_query(query)
+    except Exception as e:
+        logger.warning(f"Cevap önbelleği atlandı (embedding hatası): {e}")
+        return None, None, None
+    version = vector_store.version
+    return vector, version, answer_cache.lookup(vector, version, mode, query=query)
+
+
+def _is_calculation(routing: list) -> bool:
+    """Cevap hesaplama (LogicExpert) yolundan geçti mi? Bu cevaplar önbellekten sadece birebir aynı soruya döner."""
+    return any(r.get("task_type") == "calculation" for r in routing)
+
+
+def _cache_stats(hit=None, bypassed: bool = False) -> dict:
+    """Çalışma istatistiklerine eklenen önbellek bilgisi."""
+    stats = {"hit": hit is not None, "bypassed": bypassed, **answer_cache.stats()}
+    if hit is not None:
+        entry, similarity = hit
+        stats.update(similarity=similarity, cached_query=entry.query, saved_ms=entry.latency * 1000)
+    return stats
+
+
+async def run_multi_agent(query: str, mode: str = "auto", use_cache: bool = True) -> dict:
     """
     Sistemi Çalıştıran Ana Fonksiyon.
+
+    Benzer bir soru daha önce cevaplandıysa ve doküman indeksi o zamandan beri
+    değişmediyse cevap anlamsal önbellekten döner (use_cache=False ile atlanır).
     """
     from langchain_core.messages import HumanMessage
+
+    started = time.perf_counter()
+    vector = version = None
+    if use_cache:
+        vector, version, hit = await _lookup_cache(query, mode)
+        if hit is not None:
+            logger.info(f"Cevap önbellekten döndü (benzerlik: {hit[1]:.3f})")
+            return {**hit[0].result, "cache": _cache_stats(hit)}
     
     inputs = {"messages": [HumanMessage(content=query)]}
+    # Ajanlar model seçim modunu config üzerinden okur
+    run_config = {"configurable": {"mode": mode}}
     
     try:
-        result = await graph.ainvoke(inputs)
+        result = await graph.ainvoke(inputs, config=run_config)
+        routing = result.get("routing", [])
         
         # Son mesaj MasterAgent'tan gelir
         final_message = result["messages"][-1]
         
         # İstatistikler (Basitçe mesaj sayısı üzerinden iterasyon tahmini)
-        return {
+        output = {
             "answer": final_message.content,
             "iterations": len(result["messages"]),
-            "models_used": ["Llama 3.1", "DeepSeek Coder", "Gemini 2.5"],
-            "tools_called": ["RAG", "Code Executor", "Web Search"]
+            "models_used": list(dict.fromkeys(r["model"] for r in routing)),
+            "tools_called": ["RAG", "Code Executor", "Web Search"],
+            "routing": routing,
         }
     except Exception as e:
         logger.error(f"Graph hatası: {e}")
         return {"answer": f"Sistem hatası: {str(e)}", "iterations": 0}
 
-async def stream_multi_agent(query: str, mode: str = "auto"):
+    # Uçtan uca süre dağılımı (p95/p99; hedge ve yönlendirme etkisini izlemek için)
+    metrics.observe("agent.run_ms", (time.perf_counter() - started) * 1000)
+
+    # Hatalı çalışmalar önbelleğe alınmaz
+    if vector is not None:
+        answer_cache.store(vector, query, output, version, time.perf_counter() - started, mode,
+                           exact=_is_calculation(routing))
+    return {**output, "cache": _cache_stats(bypassed=not use_cache)}
+
+async def stream_multi_agent(query: str, mode: str = "auto", use_cache: bool = True):
     """
     Sistemi Streaming (Akış) Modunda Çalıştırır.
-    Her adımda (node) olay fırlatır.
+    Her adımda (node) olay fırlatır. Önbellek isabetinde ajanlar çalışmaz,
+    "cache_hit" olayının ardından doğrudan nihai sonuç gönderilir.
     """
     from langchain_core.messages import HumanMessage
+
+    started = time.perf_counter()
+    vector = version = None
+    if use_cache:
+        vector, version, hit = await _lookup_cache(query, mode)
+        if hit is not None:
+            yield {"event": "cache_hit", "content": hit[0].query, "cache": _cache_stats(hit)}
+            yield {"event": "final_result", "content": hit[0].result["answer"]}
+            return
     
     inputs = {"messages": [HumanMessage(content=query)]}
+    run_config = {"configurable": {"mode": mode}}
+    iterations = 1
+    routing = []
     
     try:
         # astream, her node çalıştıktan sonra çıktı verir
-        async for event in graph.astream(inputs, stream_mode="updates"):
+        async for event in graph.astream(inputs, config=run_config, stream_mode="updates"):
             for node_name, node_output in event.items():
                 # node_name: "Analyst", "LogicExpert", "MasterAgent"
                 # node_output: {"messages": [...]}
                 
                 last_message = node_output["messages"][-1]
                 content = last_message.content
+                iterations += len(node_output["messages"])
+                routing.extend(node_output.get("routing", []))
                 
                 yield {
                     "event": "node_update",
                     "node": node_name,
-                    "content": content
+                    "content": content,
+                    "routing": node_output.get("routing", []),
                 }
                 
                 # Eğer son node MasterAgent ise, işlemi bitmiş sayabiliriz (veya graph yapısına göre END)
                 if node_name == "MasterAgent":
+                    if vector is not None:
+                        answer_cache.store(vector, query, {"answer": content, "iterations": iterations},
+                                           version, time.perf_counter() - started, mode,
+                                           exact=_is_calculation(routing))
                     yield {
                         "event": "final_result",
                         "content": content
@@ -9,9 +9,12 @@ Hesaplama, veri işleme ve doğrulama görevlerinde kullanılır.
 import re
 import subprocess
 import tempfile
+import time
 import os
 from langchain_core.tools import tool
 from src.config import CODE_EXECUTION_TIMEOUT, BLOCKED_MODULES
+from src.monitoring.metrics import metrics
+from src.tools.sandbox_pool import SandboxUnavailable, sandbox_pool
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -62,6 +65,47 @@ def validate_code(code: str) -> tuple[bool, str]:
     return True, ""
 
 
+def run_in_subprocess(code: str) -> subprocess.CompletedProcess:
+    """
+    Kodu yeni bir Python process'inde çalıştırır (havuz kullanılmadığında).
+
+    Args:
+        code: Çalıştırılacak Python kodu.
+
+    Returns:
+        subprocess.CompletedProcess: returncode, stdout, stderr
+
+    Raises:
+        subprocess.TimeoutExpired: Kod CODE_EXECUTION_TIMEOUT içinde bitmedi.
+    """
+    # Kodu çalıştırmak için diskte geçici bir .py dosyası oluşturuyoruz.
+    # delete=False çünkü dosyayı kapatıp subprocess ile açacağız.
+    with tempfile.NamedTemporaryFile(
+        mode="w",
+        suffix=".py",
+        delete=False,
+        encoding="utf-8",
+    ) as tmp_file:
+        tmp_file.write(code)
+        tmp_path = tmp_file.name
+
+    try:
+        # Yeni bir Python process'i başlatıyoruz. Ana process'ten izole.
+        return subprocess.run(
+            ["python", tmp_path],
+            capture_output=True,            # Çıktıları yakala
+            text=True,                      # String olarak döndür (byte değil)
+            timeout=CODE_EXECUTION_TIMEOUT, # Sonsuz döngü koruması
+            encoding="utf-8",
+        )
+    finally:
+        # İşimiz bitince veya hata olsa bile geçici dosyayı sil
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
 @tool
 def code_executor_tool(code: str) -> str:
     """
@@ -93,57 +137,44 @@ def code_executor_tool(code: str) -> str:
         return f"Güvenlik Hatası: {error_msg}"
 
     try:
-        # 2. Geçici Dosya Oluşturma
-        # Kodu çalıştırmak için diskte geçici bir .py dosyası oluşturuyoruz.
-        # delete=False çünkü dosyayı kapatıp subprocess ile açacağız.
-        with tempfile.NamedTemporaryFile(
-            mode="w",
-            suffix=".py",
-            delete=False,
-            encoding="utf-8",
-        ) as tmp_file:
-            tmp_file.write(code)
-            tmp_path = tmp_file.name
-
-        try:
-            # 3. Subprocess ile Çalıştırma
-            # Yeni bir Python process'i başlatıyoruz. Ana process'ten izole.
-            result = subprocess.run(
-                ["python", tmp_path],
-                capture_output=True,            # Çıktıları yakala
-                text=True,                      # String olarak döndür (byte değil)
-                timeout=CODE_EXECUTION_TIMEOUT, # Sonsuz döngü koruması
-                encoding="utf-8",
-            )
-
-            output = result.stdout.strip()
-            error = result.stderr.strip()
-
-            # 4. Hata Kontrolü (Return Code)
-            if result.returncode != 0:
+        # 2. Çalıştırma
+        # Önceden ısıtılmış worker havuzu açıksa kod orada çalışır; havuz
+        # kapalıysa veya worker alınamazsa yeni bir Python process'i başlatılır.
+        started = time.perf_counter()
+        result = None
+        if sandbox_pool.enabled:
+            try:
+                result = sandbox_pool.run(code, CODE_EXECUTION_TIMEOUT)
+            except SandboxUnavailable as e:
                 logger.warning(
-                    "Kod çalıştırma hatası",
-                    extra={"returncode": result.returncode, "stderr": error},
+                    "Kod çalıştırma havuzu kullanılamadı, yeni process ile çalıştırılıyor",
+                    extra={"error": str(e)},
                 )
-                return f"Çalıştırma Hatası:\n{error}"
-
-            # 5. Boş Çıktı Kontrolü
-            if not output and not error:
-                return "Kod başarıyla çalıştı ancak çıktı üretmedi (print kullandınız mı?)."
-
-            logger.info(
-                "Kod başarıyla çalıştırıldı",
-                extra={"output_length": len(output)},
+                metrics.inc("sandbox.fallbacks")
+        if result is None:
+            result = run_in_subprocess(code)
+        metrics.observe("code_executor.run_ms", (time.perf_counter() - started) * 1000)
+
+        output = result.stdout.strip()
+        error = result.stderr.strip()
+
+        # 3. Hata Kontrolü (Return Code)
+        if result.returncode != 0:
+            logger.warning(
+                "Kod çalıştırma hatası",
+                extra={"returncode": result.returncode, "stderr": error},
             )
-            return f"Çıktı:\n{output}"
+            return f"Çalıştırma Hatası:\n{error}"
 
-        finally:
-            # 6. Temizlik
-            # İşimiz bitince veya hata olsa bile geçici dosyayı sil
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
+        # 4. Boş Çıktı Kontrolü
+        if not output and not error:
+            return "Kod başarıyla çalıştı ancak çıktı üretmedi (print kullandınız mı?)."
+
+        logger.info(
+            "Kod başarıyla çalıştırıldı",
+            extra={"output_length": len(output)},
+        )
+        return f"Çıktı:\n{output}"
 
     except subprocess.TimeoutExpired:
         # Zaman aşımı hatasını özel olarak işle
@@ -1,9 +1,13 @@
 from langchain_core.tools import tool
 from src.utils.logger import get_logger
-from rag_app.services.rag_engine import process_query
+from src.utils.singleflight import SingleFlight
+from rag_app.services.rag_engine import normalize_query, process_query
 
 logger = get_logger(__name__)
 
+# Aynı anda gelen özdeş sorgular tek RAG çalışmasına bağlanır
+_rag_flight = SingleFlight("rag_tool")
+
 @tool
 async def rag_tool(query: str) -> str:
     """
@@ -21,7 +25,7 @@ async def rag_tool(query: str) -> str:
     logger.info("RAG tool çağrıldı", extra={"query": query})
     try:
         # rag_engine.process_query bir dict döner: {"answer": ..., "sources": ...}
-        result = await process_query(query)
+        result = await _rag_flight.do(normalize_query(query), lambda: process_query(query))
         
         answer = result.get("answer", "Cevap üretilemedi.")
         sources = result.get("sources", [])
@@ -0,0 +1,284 @@
+"""
+Önceden ısıtılmış kod çalıştırma worker havuzu.
+
+code_executor_tool her çağrıda geçici bir dosya yazıp yeni bir Python
+yorumlayıcısı başlatırsa yorumlayıcı açılışını (onlarca ms, numpy gibi
+importlarla çok daha fazlası) her hesaplamada öder. SandboxPool bu maliyeti
+istek yolundan çıkarır:
+
+- CODE_SANDBOX_WORKERS kadar worker process'i (sandbox_worker.py) önceden
+  başlatılır; CODE_SANDBOX_PRELOAD modülleri açılışta import edilir.
+- Kod worker'a pipe üzerinden gönderilir; çıktı, hata ve dönüş kodu
+  subprocess.run ile aynı biçimde (CompletedProcess) döner. Güvenlik
+  kontrolü (validate_code) ve zaman aşımı aynen uygulanır.
+- fork destekleniyorsa (POSIX) her iş, worker'dan fork edilen temiz bir
+  çocuk process'te çalışır (~1-2 ms); işler arasında durum taşınmaz.
+- Worker CODE_SANDBOX_MAX_JOBS işten sonra kapatılır ve yerine hemen yenisi
+  başlatılır; yeni worker sonraki çağrıya kadar arka planda ısınır. fork
+  olmayan platformlarda varsayılan 1'dir (her iş temiz bir process'te).
+- Ölen veya cevap vermeyen worker da yenilenir.
+
+Worker hazır olmazsa SandboxUnavailable fırlatılır; çağıran eski yönteme
+(her çağrıda yeni process) düşer.
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Optional
+
+from src.config import (
+    CODE_SANDBOX_MAX_JOBS, CODE_SANDBOX_PRELOAD, CODE_SANDBOX_START_TIMEOUT, CODE_SANDBOX_WORKERS,
+)
+from src.monitoring.metrics import metrics
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+
+class SandboxUnavailable(Exception):
+    """Havuzdan çalışır durumda bir worker alınamadı."""
+
+
+class _Worker:
+    """Tek bir worker process'i ve JSON satır protokolü."""
+
+    def __init__(self, preload: List[str], generation: int = 0):
+        self.generation = generation
+        self.jobs = 0
+        self.ready = False
+        self.forks = False
+        self.error: Optional[str] = None
+        self.started_at = time.perf_counter()
+        # fork edilen çocuklarda BLAS thread havuzları sorun çıkarmasın; tek thread yeterli
+        env = dict(os.environ)
+        for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+            env.setdefault(name, "1")
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, WORKER_SCRIPT, ",".join(preload)],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                env=env,
+            )
+        except OSError as e:
+            self.process = None
+            self.error = str(e)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _read(self, timeout: float) -> Optional[dict]:
+        """
+        Bir cevap satırı okur; süre dolarsa process öldürülür.
+
+        Returns:
+            dict veya None (process kapandı)
+
+        Raises:
+            subprocess.TimeoutExpired: Süre doldu.
+        """
+        timed_out = threading.Event()
+
+        def expire():
+            timed_out.set()
+            self.kill()
+
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+        try:
+            line = self.process.stdout.readline()
+        finally:
+            timer.cancel()
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(self.process.args, timeout)
+        return json.loads(line) if line else None
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Worker'ın ön yüklemeyi bitirmesini bekler."""
+        if self.ready:
+            return True
+        if not self.alive:
+            return False
+        try:
+            message = self._read(timeout)
+        except subprocess.TimeoutExpired:
+            message = None
+        self.ready = bool(message and message.get("ready"))
+        self.forks = bool(message and message.get("fork"))
+        if self.ready:
+            metrics.observe("sandbox.worker_start_ms", (time.perf_counter() - self.started_at) * 1000)
+        return self.ready
+
+    def run(self, code: str, timeout: float) -> subprocess.CompletedProcess:
+        """
+        Kodu worker'da çalıştırır.
+
+        Raises:
+            subprocess.TimeoutExpired: Kod süresinde bitmedi. fork modunda
+                sadece işin çocuk process'i, aksi halde worker öldürülür.
+            SandboxUnavailable: Worker iş sırasında beklenmedik şekilde kapandı.
+        """
+        self.jobs += 1
+        try:
+            self.process.stdin.write(json.dumps({"code": code, "timeout": timeout}) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise SandboxUnavailable(f"Worker'a yazılamadı: {e}") from e
+        # fork modunda süreyi worker uygular; buradaki bekçi sadece yedektir
+        message = self._read(timeout + 1 if self.forks else timeout)
+        if message is None:
+            raise SandboxUnavailable("Worker cevap vermeden kapandı.")
+        if message.get("timeout"):
+            raise subprocess.TimeoutExpired(self.process.args, timeout)
+        return subprocess.CompletedProcess(
+            self.process.args, message["returncode"], message["stdout"], message["stderr"]
+        )
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+
+    def close(self):
+        """
+        Worker'ı sonlandırır. Saklanacak durumu olmadığından beklemeden
+        öldürülür; yorumlayıcının kapanışı (~100 ms) istek yolunda beklenmez.
+        """
+        if self.process is None:
+            return
+        self.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+
+class SandboxPool:
+    """
+    Kod çalıştırma için önceden başlatılmış worker process havuzu.
+
+    Args:
+        size: Worker sayısı (aynı anda çalışabilecek kod sayısı). 0 ise
+            havuz kapalıdır.
+        max_jobs: Bir worker'ın yenilenmeden önce çalıştırdığı iş sayısı.
+            fork olmayan platformlarda kod worker içinde çalışır; 1'den büyük
+            değerlerde her iş yeni bir __main__ ile başlar ancak import
+            edilmiş modüllerdeki değişiklikler sonraki işlere taşınabilir.
+        preload: Worker açılışında import edilecek modüller.
+        start_timeout: Worker'ın hazır olması için beklenecek en uzun süre (sn).
+    """
+
+    def __init__(self, size: int = CODE_SANDBOX_WORKERS, max_jobs: int = CODE_SANDBOX_MAX_JOBS,
+                 preload: Optional[List[str]] = None, start_timeout: float = CODE_SANDBOX_START_TIMEOUT):
+        self.size = size
+        self.max_jobs = max(1, max_jobs)
+        self.preload = list(CODE_SANDBOX_PRELOAD if preload is None else preload)
+        self.start_timeout = start_timeout
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._started = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _spawn(self) -> _Worker:
+        metrics.inc("sandbox.worker_spawns")
+        return _Worker(self.preload, self._generation)
+
+    def start(self):
+        """Worker'ları başlatır (ilk kullanımda otomatik çağrılır)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.size):
+                self._idle.put(self._spawn())
+            self._started = True
+        logger.info("Kod çalıştırma havuzu başlatıldı", extra={"workers": self.size, "max_jobs": self.max_jobs})
+
+    def shutdown(self):
+        """Boştaki worker'ları kapatır; o an çalışanlar işleri bitince kapanır."""
+        with self._lock:
+            self._generation += 1
+            self._started = False
+            workers = []
+            while True:
+                try:
+                    workers.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for worker in workers:
+            worker.close()
+
+    def _release(self, worker: _Worker, reusable: bool):
+        """Worker'ı havuza geri koyar veya kapatıp yerine yenisini başlatır."""
+        with self._lock:
+            # shutdown() sonrası dönen eski worker'lar havuza alınmaz
+            current = worker.generation == self._generation
+            if current and reusable and worker.alive and worker.jobs < self.max_jobs:
+                self._idle.put(worker)
+                return
+            if current:
+                # Yenisi hemen başlar; sonraki çağrıya kadar arka planda ısınır
+                self._idle.put(self._spawn())
+        worker.close()
+
+    def run(self, code: str, timeout: float) -> subprocess.CompletedProcess:
+        """
+        Kodu havuzdaki bir worker'da çalıştırır.
+
+        Args:
+            code: Çalıştırılacak (validate_code'dan geçmiş) Python kodu.
+            timeout: Zaman aşımı (sn).
+
+        Returns:
+            subprocess.CompletedProcess: returncode, stdout, stderr
+
+        Raises:
+            subprocess.TimeoutExpired: Kod süresinde bitmedi.
+            SandboxUnavailable: Hazır worker alınamadı.
+        """
+        self.start()
+        try:
+            worker = self._idle.get(timeout=self.start_timeout)
+        except queue.Empty:
+            raise SandboxUnavailable("Boşta worker alınamadı (havuz kapalı veya tüm worker'lar meşgul).")
+        reusable = False
+        try:
+            if not worker.wait_ready(self.start_timeout):
+                raise SandboxUnavailable(worker.error or "Worker süresinde hazır olmadı.")
+            try:
+                result = worker.run(code, timeout)
+            except subprocess.TimeoutExpired:
+                reusable = worker.alive
+                raise
+            reusable = True
+            return result
+        finally:
+            self._release(worker, reusable)
+
+    def status(self) -> dict:
+        """Health endpoint'i için havuz durumu."""
+        return {
+            "enabled": self.enabled,
+            "workers": self.size,
+            "idle": self._idle.qsize() if self._started else 0,
+            "max_jobs": self.max_jobs,
+        }
+
+
+# Singleton instance (Worker'lar ilk kullanımda veya uygulama açılışında başlatılır)
+sandbox_pool = SandboxPool()
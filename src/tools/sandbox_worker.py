@@ -0,0 +1,156 @@
+"""
+Kod çalıştırma havuzunun worker process'i.
+
+SandboxPool tarafından `python sandbox_worker.py <modül,modül,...>` olarak
+başlatılır; bu yüzden sadece standart kütüphaneyi kullanır (src paketini
+import etmez, açılışı hızlı kalır).
+
+Protokol (satır başına bir JSON):
+- Worker açılışta modülleri ön yükler ve {"ready": true, "fork": bool} yazar.
+- stdin'den {"code": "...", "timeout": sn} okur, kodu çalıştırır ve
+  {"returncode": int, "stdout": str, "stderr": str} veya {"timeout": true}
+  yazar.
+- stdin kapanınca çıkar.
+
+fork destekleniyorsa (POSIX) worker kullanıcı kodunu kendisi çalıştırmaz:
+her iş için kendini fork eder, kod önceden import edilmiş modüllerle temiz
+bir çocuk process'te çalışır ve çocuk işten sonra kapanır. Böylece işler
+arasında durum taşınmaz ve zaman aşımında sadece çocuk öldürülür. fork
+yoksa (Windows) kod worker içinde çalışır; izolasyon için havuz worker'ı
+her işten sonra yeniler.
+
+Cevaplar, açılışta 1 numaralı dosya tanımlayıcısının kopyasına yazılır;
+kullanıcı kodunun C seviyesinde stdout'a yazdıkları protokolü bozmasın
+diye 1 ve 2 numaralı tanımlayıcılar /dev/null'a yönlendirilir. print
+çıktıları ve traceback'ler iş başına ayrı tamponlarda toplanır.
+"""
+
+import builtins
+import contextlib
+import importlib
+import io
+import json
+import os
+import select
+import signal
+import sys
+import time
+import traceback
+
+CAN_FORK = hasattr(os, "fork")
+
+
+def preload(modules: list):
+    """Modülleri önceden import eder; kurulu olmayanlar atlanır."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+def run_job(code: str) -> dict:
+    """
+    Kodu `python dosya.py` ile çalıştırılmış gibi yürütür.
+
+    Args:
+        code: Çalıştırılacak Python kodu.
+
+    Returns:
+        dict: returncode, stdout, stderr
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    # Her iş boş bir __main__ modülü ile başlar
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        sys.stdin = io.StringIO("")
+        try:
+            exec(compile(code, "<kod>", "exec"), namespace)
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                returncode = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except BaseException as e:
+            # İlk çerçeve bu fonksiyondur; traceback kullanıcı kodundan başlasın
+            tb = e.__traceback__.tb_next if not isinstance(e, SyntaxError) else None
+            sys.stderr.write("".join(traceback.format_exception(type(e), e, tb)))
+            returncode = 1
+        finally:
+            sys.stdin = sys.__stdin__
+    return {"returncode": returncode, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def run_forked(code: str, timeout: float) -> dict:
+    """
+    Kodu fork edilmiş bir çocuk process'te çalıştırır.
+
+    Returns:
+        dict: run_job sonucu veya süre dolduysa {"timeout": True}
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            # random fork sonrası kendini yeniden tohumlar; numpy'nin global üreteci tohumlamaz
+            if "numpy" in sys.modules:
+                sys.modules["numpy"].random.seed()
+            with os.fdopen(write_fd, "wb") as f:
+                f.write(json.dumps(run_job(code)).encode("ascii"))
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    chunks = []
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                return {"timeout": True}
+            chunk = os.read(read_fd, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+
+    _, status = os.waitpid(pid, 0)
+    if chunks:
+        return json.loads(b"".join(chunks))
+    # Çocuk sonuç yazamadan öldü (örn. sinyal)
+    return {"returncode": os.waitstatus_to_exitcode(status) or 1, "stdout": "", "stderr": ""}
+
+
+def main():
+    # `python tmp.py` gibi: betik dizini (src/tools) import yolunda olmasın
+    sys.path.pop(0)
+    channel = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.dup2(devnull, 2)
+
+    preload([m for m in (sys.argv[1] if len(sys.argv) > 1 else "").split(",") if m])
+    if CAN_FORK and "numpy" in sys.modules:
+        # İlk seed() çağrısı global üreteci kurar (~10 ms); her çocukta tekrarlanmasın
+        sys.modules["numpy"].random.seed()
+
+    def send(message: dict):
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+    send({"ready": True, "fork": CAN_FORK})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        send(run_forked(job["code"], job["timeout"]) if CAN_FORK else run_job(job["code"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,13 @@ API key gerektirmez. LangChain tool olarak entegre edilir.
 
 from langchain_core.tools import tool
 from src.utils.logger import get_logger
+from src.utils.singleflight import SingleFlight
 
 logger = get_logger(__name__)
 
+# Aynı anda yapılan özdeş aramalar tek DuckDuckGo isteğine bağlanır
+_search_flight = SingleFlight("web_search")
+
 
 # duckduckgo-search kütüphanesinin yüklü olup olmadığını kontrol et
 try:
@@ -33,6 +37,12 @@ def web_search_tool(query: str, max_results: int = 5) -> str:
     Returns:
         str: Arama sonuçlarının formatlanmış metni.
     """
+    key = (" ".join(query.casefold().split()), max_results)
+    return _search_flight.do_sync(key, lambda: _search(query, max_results))
+
+
+def _search(query: str, max_results: int) -> str:
+    """DuckDuckGo araması yapar ve sonuçları formatlar."""
     # 1. Başlangıç Logu
     logger.info(
         "Web araması başlatılıyor",
@@ -0,0 +1,87 @@
+"""
+Boyutu sınırlı, thread-safe LRU önbellek.
+
+En son kullanılan `maxsize` kaydı tutar; dolduğunda en uzun süredir
+erişilmeyen kayıt atılır. İsim verilen önbellekler isabet/ıska sayılarını
+metrik deposuna da yazar:
+
+    cache.<isim>.hits / cache.<isim>.misses   (sayaç)
+    cache.<isim>.hit_ratio / cache.<isim>.size (gauge)
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from src.monitoring.metrics import metrics
+
+# get() için "kayıt yok" işareti (None geçerli bir değer olabilir)
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU önbellek.
+
+    Args:
+        maxsize: Tutulacak en fazla kayıt (0 = önbellek kapalı).
+        name: Metriklerde kullanılacak isim (None = metrik yazılmaz).
+    """
+
+    def __init__(self, maxsize: int, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=MISSING):
+        """Kaydı döndürür ve en son kullanılan olarak işaretler; yoksa default."""
+        with self._lock:
+            value = self._data.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+            hit_ratio = self.hits / (self.hits + self.misses)
+        if self.name:
+            metrics.inc(f"cache.{self.name}.{'misses' if value is MISSING else 'hits'}")
+            metrics.set_gauge(f"cache.{self.name}.hit_ratio", hit_ratio)
+        return default if value is MISSING else value
+
+    def put(self, key: Hashable, value: Any):
+        """Kaydı ekler; kapasite aşılırsa en eski kaydı atar."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            size = len(self._data)
+        if self.name:
+            metrics.set_gauge(f"cache.{self.name}.size", size)
+
+    def clear(self):
+        """Tüm kayıtları siler (isabet istatistikleri korunur)."""
+        with self._lock:
+            self._data.clear()
+        if self.name:
+            metrics.set_gauge(f"cache.{self.name}.size", 0)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Önbellek istatistikleri."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,205 @@
+"""
+Aynı anda yapılan özdeş çağrıları tekilleştirme (single-flight).
+
+Bir soru aniden popüler olduğunda veya frontend isteği tekrar denediğinde
+aynı LLM / web araması / RAG çağrısı N kez başlatılır. SingleFlight aynı
+anahtarla gelen eşzamanlı çağrıları tek bir arka uç çağrısına bağlar:
+
+- İlk çağıran (lider) işi başlatır; diğerleri aynı sonucu bekler.
+- İş hata verirse hata tüm bekleyenlere iletilir.
+- Async çağrılarda bekleyenlerin hepsi iptal edilirse iş de iptal edilir;
+  tek bir bekleyenin ayrılması diğerlerini etkilemez.
+- İş bitince anahtar unutulur; sonuç önbelleklenmez.
+- Akışlar (stream) da paylaşılabilir: tek üretici akışı okur, sonradan
+  katılan bekleyenler o ana kadarki parçaları baştan alıp canlı akışa
+  devam eder.
+
+Metrikler: singleflight.<isim>.calls (arka uç çağrısı) ve
+singleflight.<isim>.shared (paylaşılan sonuçla dönen çağrı).
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from src.monitoring.metrics import metrics
+
+
+class _AsyncCall:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class _AsyncStream:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.items: List[Any] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+        self.waiters = 0
+
+    def notify(self):
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class _SyncCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Anahtar bazlı çağrı tekilleştirici.
+
+    Args:
+        name: Metriklerde kullanılacak isim.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _AsyncCall] = {}
+        self._streams: Dict[Hashable, _AsyncStream] = {}
+        self._sync_calls: Dict[Hashable, _SyncCall] = {}
+
+    def _count(self, leader: bool):
+        metrics.inc(f"singleflight.{self.name}.{'calls' if leader else 'shared'}")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        fn() coroutine'ini aynı anahtar için tek sefer çalıştırır.
+
+        Args:
+            key: Çağrıyı tanımlayan anahtar (hashable).
+            fn: Coroutine döndüren fonksiyon (sadece lider çağırır).
+
+        Returns:
+            fn() sonucu (tüm eşzamanlı çağıranlar aynı nesneyi alır).
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            call = self._calls.get(key)
+            # İptal edilmekte olan işe yeni bekleyen bağlanmaz
+            leader = (call is None or call.task.done() or call.task.cancelling()
+                      or call.task.get_loop() is not loop)
+            if leader:
+                call = _AsyncCall(loop.create_task(fn()))
+                self._calls[key] = call
+                call.task.add_done_callback(lambda _, k=key, c=call: self._forget(k, c))
+            call.waiters += 1
+        self._count(leader)
+
+        try:
+            # shield: bir bekleyenin iptali ortak işi iptal etmez
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        fn() akışını aynı anahtar için tek sefer okur; parçaları tüm
+        eşzamanlı çağıranlara dağıtır.
+
+        Args:
+            key: Çağrıyı tanımlayan anahtar (hashable).
+            fn: Async iterator döndüren fonksiyon (sadece lider çağırır).
+
+        Yields:
+            Akışın parçaları (tüm çağıranlar aynı nesneleri alır, baştan itibaren).
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            call = self._streams.get(key)
+            leader = (call is None or call.task.done() or call.task.cancelling()
+                      or call.task.get_loop() is not loop)
+            if leader:
+                call = _AsyncStream()
+                call.task = loop.create_task(self._produce(call, fn))
+                self._streams[key] = call
+                call.task.add_done_callback(lambda _, k=key, c=call: self._forget_stream(k, c))
+            call.waiters += 1
+        self._count(leader)
+
+        index = 0
+        try:
+            while True:
+                changed = call.changed
+                while index < len(call.items):
+                    index += 1
+                    yield call.items[index - 1]
+                if call.finished:
+                    if call.error is not None:
+                        raise call.error
+                    return
+                await changed.wait()
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    @staticmethod
+    async def _produce(call: _AsyncStream, fn: Callable[[], AsyncIterator[Any]]):
+        try:
+            async for item in fn():
+                call.items.append(item)
+                call.notify()
+        except asyncio.CancelledError as e:
+            call.error = e
+            raise
+        except Exception as e:
+            call.error = e
+        finally:
+            call.finished = True
+            call.notify()
+
+    def _forget_stream(self, key: Hashable, call: _AsyncStream):
+        with self._lock:
+            if self._streams.get(key) is call:
+                del self._streams[key]
+
+    def _forget(self, key: Hashable, call: _AsyncCall):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def do_sync(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        fn()'i aynı anahtar için tek sefer çalıştırır (thread'ler arası).
+
+        Args:
+            key: Çağrıyı tanımlayan anahtar (hashable).
+            fn: Senkron fonksiyon (sadece lider thread çağırır).
+
+        Returns:
+            fn() sonucu.
+        """
+        with self._lock:
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._sync_calls[key] = _SyncCall()
+        self._count(leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._sync_calls[key]
+            call.done.set()
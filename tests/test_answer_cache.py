@@ -0,0 +1,120 @@
+"""
+Anlamsal cevap önbelleği birim testleri.
+
+Benzerlik eşiğini, indeks versiyonu / TTL ile geçersizleşmeyi, boyut
+sınırını ve run_multi_agent'ın önbellek isabetinde graph'ı çalıştırmamasını
+test eder.
+"""
+
+import asyncio
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from langchain_core.messages import HumanMessage
+
+from rag_app.services.answer_cache import SemanticAnswerCache
+from rag_app.services.vector_store import DIMENSION
+
+
+def unit(*components) -> np.ndarray:
+    vec = np.zeros(DIMENSION, dtype="float32")
+    vec[:len(components)] = components
+    return vec / np.linalg.norm(vec)
+
+
+class TestSemanticAnswerCache:
+    """SemanticAnswerCache testleri."""
+
+    def test_similar_query_hits(self):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=0, maxsize=10)
+        cache.store(unit(1, 0.1), "Gelir nedir?", {"answer": "12 milyon"}, version=3, latency=2.0)
+
+        entry, similarity = cache.lookup(unit(1, 0.15), version=3)
+        assert entry.result["answer"] == "12 milyon" and similarity > 0.9
+        assert cache.lookup(unit(0.5, 1), version=3) is None
+        assert cache.lookup(unit(1, 0.1), version=3, mode="baska") is None
+        assert cache.stats()["hits"] == 1 and cache.stats()["saved_seconds"] == 2.0
+
+    def test_version_change_and_ttl_invalidate(self):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=60, maxsize=10)
+        cache.store(unit(1), "a", {"answer": "eski"}, version=1, latency=1.0)
+        assert cache.lookup(unit(1), version=2) is None
+        assert cache.stats()["size"] == 0
+
+        cache.store(unit(1), "a", {"answer": "yeni"}, version=2, latency=1.0)
+        with patch("rag_app.services.answer_cache.time.monotonic", return_value=10 ** 9):
+            assert cache.lookup(unit(1), version=2) is None
+
+    def test_size_bound_evicts_least_recently_used(self):
+        cache = SemanticAnswerCache(threshold=0.99, ttl=0, maxsize=2)
+        cache.store(unit(1), "a", {"answer": "a"}, version=0, latency=1.0)
+        cache.store(unit(0, 1), "b", {"answer": "b"}, version=0, latency=1.0)
+        assert cache.lookup(unit(1), version=0) is not None
+        cache.store(unit(0, 0, 1), "c", {"answer": "c"}, version=0, latency=1.0)
+
+        assert cache.stats()["size"] == 2
+        assert cache.lookup(unit(0, 1), version=0) is None
+        assert cache.lookup(unit(1), version=0)[0].query == "a"
+
+    @pytest.mark.parametrize("cached, query", [
+        ("fibonacci(10) kaçtır?", "fibonacci(20) kaçtır?"),
+        ("Ankara'nın nüfusu nedir?", "İzmir'in nüfusu nedir?"),
+        ("What is the population of France?", "What is the population of Spain?"),
+        ("2023 geliri ne kadar?", "2024 geliri ne kadar?"),
+    ])
+    def test_near_miss_with_different_numbers_or_entities(self, cached, query):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=0, maxsize=10)
+        cache.store(unit(1, 0.1), cached, {"answer": "eski"}, version=0, latency=1.0)
+        # Embedding'ler eşiğin üstünde olsa da sayı / özel isim farklı
+        assert cache.lookup(unit(1, 0.11), version=0, query=query) is None
+        assert cache.lookup(unit(1, 0.11), version=0, query=cached.replace("?", " ?")) is not None
+
+    def test_calculation_answers_need_exact_query(self):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=0, maxsize=10)
+        cache.store(unit(1), "10 ile 3 farkı kaç?", {"answer": "7"}, version=0, latency=1.0, exact=True)
+        assert cache.lookup(unit(1), version=0, query="10 ile 3 farkı nedir?") is None
+        assert cache.lookup(unit(1), version=0, query="10 ile 3  farkı kaç") is not None
+
+    def test_other_mode_entries_do_not_hide_hit(self):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=0, maxsize=10)
+        for n in range(6):
+            cache.store(unit(1, 0.01 * n), f"soru {n}", {"answer": "baska"}, version=0, latency=1.0, mode="baska")
+        cache.store(unit(1, 0.2), "soru", {"answer": "auto"}, version=0, latency=1.0)
+        entry, _ = cache.lookup(unit(1), version=0, mode="auto")
+        assert entry.result["answer"] == "auto"
+
+    def test_hit_returns_independent_copy(self):
+        cache = SemanticAnswerCache(threshold=0.9, ttl=0, maxsize=10)
+        result = {"answer": "a", "routing": [{"agent": "analyst"}]}
+        cache.store(unit(1), "a", result, version=0, latency=1.0)
+        result["routing"].append({"agent": "sonradan"})
+
+        cache.lookup(unit(1), version=0)[0].result["routing"].append({"agent": "cagiran"})
+        assert cache.lookup(unit(1), version=0)[0].result["routing"] == [{"agent": "analyst"}]
+
+
+class TestRunMultiAgentCache:
+    """run_multi_agent önbellek entegrasyonu."""
+
+    def test_paraphrase_is_served_from_cache(self):
+        from src.orchestrator import graph as graph_module
+
+        cache = SemanticAnswerCache(threshold=0.9, ttl=0, maxsize=10)
+        vectors = {"Gelir ne kadar?": unit(1, 0.1), "Gelir ne kadardı?": unit(1, 0.12)}
+        embed = AsyncMock(side_effect=lambda q: vectors[q])
+        ainvoke = AsyncMock(return_value={"messages": [HumanMessage(content="12 milyon TL")]})
+
+        with patch.object(graph_module, "answer_cache", cache), \
+                patch.object(graph_module.embedding_batcher, "embed_query", embed), \
+                patch.object(graph_module.graph, "ainvoke", ainvoke):
+            first = asyncio.run(graph_module.run_multi_agent("Gelir ne kadar?"))
+            second = asyncio.run(graph_module.run_multi_agent("Gelir ne kadardı?"))
+            bypassed = asyncio.run(graph_module.run_multi_agent("Gelir ne kadardı?", use_cache=False))
+
+        assert first["cache"]["hit"] is False
+        assert second["answer"] == "12 milyon TL"
+        assert second["cache"]["hit"] is True and second["cache"]["cached_query"] == "Gelir ne kadar?"
+        assert second["cache"]["hit_rate"] == 0.5
+        assert bypassed["cache"]["bypassed"] is True
+        assert ainvoke.await_count == 2
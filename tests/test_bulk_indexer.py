@@ -0,0 +1,109 @@
+"""
+Çevrimdışı toplu indeksleyici birim testleri.
+
+Dizin taramasını, checkpoint'leri, manifest ile kaldığı yerden devam
+etmeyi ve çıktının VectorStore ile yüklenebilmesini test eder.
+"""
+
+import asyncio
+import json
+import os
+import pytest
+from unittest.mock import patch
+
+from rag_app.services.bulk_indexer import BulkIndexer
+from rag_app.services.vector_store import VectorStore, DIMENSION
+
+
+class CountingEmbedder:
+    """Vektörleştirilen metin sayısını sayan sahte embedding servisi."""
+
+    def __init__(self, fail_on: str = None):
+        self.texts = 0
+        self.fail_on = fail_on
+
+    def embed_documents(self, texts):
+        if self.fail_on and any(self.fail_on in t for t in texts):
+            raise KeyboardInterrupt
+        self.texts += len(texts)
+        return [[1.0] + [0.0] * (DIMENSION - 1) for _ in texts]
+
+
+@pytest.fixture(autouse=True)
+def fast_token_counter():
+    with patch("rag_app.utils.text_processing._token_counter", lambda text: len(text.split())):
+        yield
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "belgeler"
+    (root / "alt").mkdir(parents=True)
+    for n in range(5):
+        (root / f"dosya{n}.txt").write_text(f"Dosya {n} icerigi. Ikinci cumle.", encoding="utf-8")
+    (root / "alt" / "ic.txt").write_text("Alt dizindeki metin.", encoding="utf-8")
+    (root / "resim.png").write_bytes(b"yok sayilir")
+    return root
+
+
+def make_indexer(corpus, tmp_path, embedder, **kwargs):
+    return BulkIndexer(
+        str(corpus),
+        index_path=str(tmp_path / "index.bin"),
+        metadata_path=str(tmp_path / "meta.pkl"),
+        embedding_service=embedder,
+        workers=0,
+        **kwargs,
+    )
+
+
+def run(indexer, **kwargs):
+    return asyncio.run(indexer.run(log=lambda message: None, **kwargs))
+
+
+class TestBulkIndexer:
+    """BulkIndexer testleri."""
+
+    def test_output_loads_in_vector_store(self, corpus, tmp_path):
+        summary = run(make_indexer(corpus, tmp_path, CountingEmbedder(), checkpoint_files=2))
+
+        assert summary["indexed"] == 6 and summary["failed"] == 0
+        store = VectorStore(index_path=str(tmp_path / "index.bin"), metadata_path=str(tmp_path / "meta.pkl"))
+        assert store.index is None  # Lazy
+        assert sorted(store.list_files())[0] == "alt/ic.txt"
+        assert store.index.ntotal == summary["total_vectors"] > 0
+
+        manifest = json.loads((tmp_path / "index.bin.manifest.json").read_text(encoding="utf-8"))
+        assert manifest["vectors"] == store.index.ntotal
+        assert all(record["status"] == "done" for record in manifest["files"].values())
+
+    def test_resume_after_interrupt(self, corpus, tmp_path):
+        """Kesilen çalışma son checkpoint'ten devam eder, vektörler çoğalmaz."""
+        with pytest.raises(KeyboardInterrupt):
+            run(make_indexer(corpus, tmp_path, CountingEmbedder(fail_on="Dosya 3"), checkpoint_files=2))
+        manifest = json.loads((tmp_path / "index.bin.manifest.json").read_text(encoding="utf-8"))
+        assert len(manifest["files"]) == 2
+
+        embedder = CountingEmbedder()
+        summary = run(make_indexer(corpus, tmp_path, embedder, checkpoint_files=2))
+        assert summary["skipped"] == 2
+        assert summary["indexed"] == 4
+
+        (tmp_path / "tam").mkdir()
+        full = run(make_indexer(corpus, tmp_path / "tam", CountingEmbedder(), checkpoint_files=0))
+        assert summary["total_vectors"] == full["total_vectors"]
+
+    def test_changed_and_deleted_files_are_replaced(self, corpus, tmp_path):
+        run(make_indexer(corpus, tmp_path, CountingEmbedder()))
+
+        (corpus / "dosya0.txt").write_text("Yeni icerik. Daha uzun metin burada. Ucuncu cumle.", encoding="utf-8")
+        os.remove(corpus / "dosya1.txt")
+        embedder = CountingEmbedder()
+        summary = run(make_indexer(corpus, tmp_path, embedder))
+
+        assert summary["skipped"] == 4 and summary["indexed"] == 1
+        store = VectorStore(index_path=str(tmp_path / "index.bin"), metadata_path=str(tmp_path / "meta.pkl"))
+        texts = [m["text"] for m in store.metadata if m["filename"] == "dosya0.txt"]
+        assert all("Yeni" in t for t in texts)
+        assert "dosya1.txt" not in store.list_files()
+        assert store.index.ntotal == len(store.metadata)
@@ -0,0 +1,35 @@
+"""
+LRU önbellek birim testleri.
+"""
+
+from src.monitoring.metrics import metrics
+from src.utils.cache import LRUCache
+
+
+class TestLRUCache:
+    """LRUCache testleri."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b", None) is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_stats_and_metrics(self):
+        metrics.reset()
+        cache = LRUCache(maxsize=4, name="deneme")
+        cache.put("a", None)
+        assert cache.get("a", "yok") is None
+        assert cache.get("b", "yok") == "yok"
+        assert cache.stats() == {"size": 1, "maxsize": 4, "hits": 1, "misses": 1, "hit_ratio": 0.5}
+        assert metrics.counter("cache.deneme.hits") == 1
+        assert metrics.snapshot()["gauges"]["cache.deneme.hit_ratio"] == 0.5
+
+    def test_zero_size_disables(self):
+        cache = LRUCache(maxsize=0)
+        cache.put("a", 1)
+        assert cache.get("a", None) is None
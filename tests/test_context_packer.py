@@ -0,0 +1,119 @@
+"""
+Token bütçeli bağlam paketleme birim testleri.
+
+RAG chunk'larının tekrarsız ve bütçeye sığacak şekilde seçilmesini,
+ajan raporlarının çıkarımsal sıkıştırılmasını ve rag_engine'in prompt
+token / TTFT metriklerini test eder.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from langchain_core.messages import AIMessageChunk
+
+from rag_app.services import rag_engine
+from rag_app.utils.context_packer import ELLIPSIS, compress_text, pack_chunks, truncate_tokens
+from src.monitoring.metrics import metrics
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def doc(text: str, score: float, filename: str = "a.txt") -> dict:
+    return {"text": text, "score": score, "filename": filename}
+
+
+class TestPackChunks:
+    """pack_chunks testleri."""
+
+    def test_orders_by_score_and_removes_overlap(self):
+        """Chunk overlap'inden gelen tekrar cümleler ikinci kez eklenmez."""
+        docs = [
+            doc("Ikinci cumle burada. Ucuncu cumle burada.", 0.80),
+            doc("Birinci cumle burada. Ikinci cumle burada.", 0.90),
+            doc("Birinci cumle burada.", 0.85),
+        ]
+        packed, stats = pack_chunks(docs, max_tokens=100, count_tokens=count_words)
+
+        assert [d["score"] for d in packed] == [0.90, 0.80]
+        assert packed[1]["text"] == "Ucuncu cumle burada."
+        assert stats["dropped_duplicate"] == 1
+        assert stats["tokens"] == 9 < stats["tokens_raw"] == 15
+
+    def test_respects_budget(self):
+        sentences = " ".join(f"Cumle numara {n} burada." for n in range(20))
+        docs = [doc(sentences, 0.9), doc("Baska " * 50, 0.8), doc("Kisa bir metin.", 0.7)]
+        packed, stats = pack_chunks(docs, max_tokens=40, count_tokens=count_words)
+
+        assert stats["tokens"] <= 40
+        assert stats["truncated"] == 1 and stats["dropped_budget"] == 2
+        assert packed[0]["text"].endswith("burada.")
+
+    def test_truncate_tokens(self):
+        assert truncate_tokens("bir iki uc dort", 2, count_words) == "bir iki"
+        assert truncate_tokens("bir iki", 5, count_words) == "bir iki"
+
+
+class TestCompressText:
+    """compress_text testleri."""
+
+    REPORT = (
+        "**BULGULAR:**\n"
+        "Sirketin 2023 geliri 12 milyon TL oldu. Calisan sayisi 40 kisiydi. Ofis Ankara'da.\n"
+        "**ANALIZ:**\n"
+        "Gelir artisi yuzde 20 civarinda. Hava bugun gunesliydi. Toplanti uzun surdu."
+    )
+
+    def test_short_text_is_unchanged(self):
+        assert compress_text("Kisa rapor.", 10, count_tokens=count_words) == ("Kisa rapor.", 2, 2)
+
+    def test_keeps_headings_and_relevant_sentences(self):
+        text, raw, tokens = compress_text(self.REPORT, 22, query="2023 geliri ne kadar?", count_tokens=count_words)
+
+        assert tokens <= 22 < raw
+        lines = text.splitlines()
+        assert lines[0] == "**BULGULAR:**"
+        assert "**ANALIZ:**" in lines
+        assert "2023 geliri 12 milyon" in text
+        assert "Hava" not in text
+        assert ELLIPSIS in text
+
+    def test_single_long_sentence_is_truncated(self):
+        text, _, tokens = compress_text("kelime " * 500, 50, count_tokens=count_words)
+        assert tokens <= 50
+        assert text.endswith(ELLIPSIS)
+
+
+class TestRagEnginePacking:
+    """process_query'nin bağlamı paketlemesi ve metrikleri."""
+
+    @pytest.fixture(autouse=True)
+    def fast_token_counter(self):
+        with patch("rag_app.utils.text_processing._token_counter", count_words):
+            yield
+
+    def test_prompt_is_packed_and_ttft_recorded(self):
+        metrics.reset()
+        rag_engine.retrieval_cache.clear()
+        results = [doc("Ayni cumle tekrar ediyor. " * 3, 0.9, "a.txt"), doc("Ayni cumle tekrar ediyor.", 0.8, "b.txt")]
+        llm = MagicMock()
+
+        async def astream(prompt):
+            llm.prompt = prompt
+            for part in ("Cevap ", "burada."):
+                yield AIMessageChunk(content=part)
+
+        llm.astream = astream
+        with patch.object(rag_engine.embedding_batcher, "embed_query", AsyncMock(return_value=[0.0])), \
+                patch.object(rag_engine.vector_store, "search_mmr", return_value=results), \
+                patch.object(rag_engine, "get_llm", return_value=llm):
+            result = asyncio.run(rag_engine.process_query("Soru?"))
+
+        assert result["answer"] == "Cevap burada."
+        assert result["sources"] == ["a.txt"]
+        assert llm.prompt.count("Ayni cumle tekrar ediyor.") == 1
+        assert metrics.summary("rag.context_tokens")["sum"] < metrics.summary("rag.context_tokens_raw")["sum"]
+        assert metrics.summary("rag.ttft_ms")["count"] == 1
+        assert metrics.summary("rag.prompt_tokens")["count"] == 1
@@ -0,0 +1,167 @@
+"""
+Yakın-kopya chunk eleme birim testleri.
+
+MinHash LSH dedektörünü ve ingestion boru hattında kopyaların
+embed edilmeden elenip kaynak referanslarının korunmasını test eder.
+"""
+
+import asyncio
+import random
+import pytest
+from unittest.mock import patch
+
+from rag_app.services.extraction import ParallelExtractor
+from rag_app.services.ingestion import IngestionPipeline, IngestSource
+from rag_app.services.vector_store import VectorStore, DIMENSION
+from rag_app.utils.dedup import NearDuplicateDetector
+
+
+def random_text(seed: int, words: int = 100) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"kelime{rng.randint(0, 5000)}" for _ in range(words)) + "."
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.texts += len(texts)
+        return [[1.0] + [0.0] * (DIMENSION - 1) for _ in texts]
+
+
+class TestNearDuplicateDetector:
+    """NearDuplicateDetector testleri."""
+
+    def test_exact_duplicate_ignores_case_and_spacing(self):
+        detector = NearDuplicateDetector()
+        key, duplicate = detector.check("Gizlilik Uyarısı: Bu belge şirkete aittir.", "a.pdf")
+        assert not duplicate
+        assert detector.check("gizlilik  uyarısı bu belge\nşirkete aittir", "b.pdf") == (key, True)
+        assert detector.references[key] == ["a.pdf", "b.pdf"]
+        assert detector.stats["exact"] == 1
+
+    def test_near_duplicate_is_detected(self):
+        """Tek kelimesi farklı uzun metin kopya sayılır."""
+        detector = NearDuplicateDetector()
+        text = random_text(1)
+        words = text.split()
+        words[50] = "degisti"
+        key, _ = detector.check(text, "a.txt")
+        assert detector.check(" ".join(words), "b.txt") == (key, True)
+        assert detector.stats["near"] == 1
+
+    def test_distinct_texts_are_kept(self):
+        detector = NearDuplicateDetector()
+        results = [detector.check(random_text(seed), "a.txt") for seed in range(200)]
+        assert not any(duplicate for _, duplicate in results)
+        assert detector.dropped == 0
+
+    def test_discard_returns_chunks_dropped_against_pending_original(self):
+        """Bekleyen asıl chunk'ın kaynağı unutulunca ona karşı elenen metinler geri verilir."""
+        detector = NearDuplicateDetector()
+        text = random_text(2)
+        key, _ = detector.check(text, "a.txt", pending=True)
+        assert detector.check(text, "b.txt") == (key, True)
+        assert detector.check(text, "a.txt") == (key, True)
+
+        assert detector.discard("a.txt") == [("b.txt", text)]
+        assert key not in detector.references
+        # Unutulan chunk artık eşleşmez
+        assert detector.check(text, "b.txt")[1] is False
+
+    def test_committed_sources_are_a_copy(self):
+        """İndekse yazılan kaynak listesi dedektörün iç listesi değildir; başarısız kaynak çıkarılır."""
+        detector = NearDuplicateDetector()
+        text = random_text(3)
+        key, _ = detector.check(text, "a.txt", pending=True)
+        sources = detector.sources(key)
+        assert sources is not detector.references[key]
+        detector.commit(key, sources)
+        detector.check(text, "b.txt")
+        detector.check(text, "c.txt")
+        assert sources == ["a.txt", "b.txt", "c.txt"]
+        assert detector.discard("c.txt") == []
+        assert sources == ["a.txt", "b.txt"]
+
+    def test_invalid_bands(self):
+        with pytest.raises(ValueError):
+            NearDuplicateDetector(num_perm=64, bands=7)
+
+
+@pytest.fixture(autouse=True)
+def fast_token_counter():
+    with patch("rag_app.utils.text_processing._token_counter", lambda text: len(text.split())):
+        yield
+
+
+class TestPipelineDedup:
+    """Boru hattında kopya eleme testleri."""
+
+    def test_duplicates_are_not_embedded(self, tmp_path):
+        """Aynı doküman ve küçük farklı sürümü tekrar embed edilmez; kaynaklar korunur."""
+        store = VectorStore(index_path=str(tmp_path / "i.bin"), metadata_path=str(tmp_path / "m.pkl"))
+        embedder = FakeEmbedder()
+        pipeline = IngestionPipeline(embedder, store, extractor=ParallelExtractor(max_workers=0))
+        document = "\n\n".join(random_text(seed, words=150) for seed in range(3))
+        revised = document.replace(document.split()[10], "revize", 1)
+        sources = [
+            IngestSource("rapor.txt", document.encode("utf-8")),
+            IngestSource("rapor_kopya.txt", document.encode("utf-8")),
+            IngestSource("rapor_v2.txt", revised.encode("utf-8")),
+            IngestSource("baska.txt", random_text(99).encode("utf-8")),
+        ]
+
+        progress = asyncio.run(pipeline.run(sources))
+
+        assert [p.status for p in progress] == ["done"] * 4
+        original = progress[0].chunks_created
+        assert original > 1
+        assert progress[1].chunks_created == 0 and progress[1].chunks_deduplicated == original
+        assert progress[2].chunks_created == 0 and progress[2].chunks_deduplicated == original
+        assert embedder.texts == store.index.ntotal == original + 1
+        meta = store.metadata[0]
+        assert meta["filename"] == "rapor.txt"
+        assert meta["sources"] == ["rapor.txt", "rapor_kopya.txt", "rapor_v2.txt"]
+
+    def test_dedup_can_be_disabled(self, tmp_path):
+        store = VectorStore(index_path=str(tmp_path / "i.bin"), metadata_path=str(tmp_path / "m.pkl"))
+        pipeline = IngestionPipeline(FakeEmbedder(), store, extractor=ParallelExtractor(max_workers=0), dedup=False)
+        progress = asyncio.run(pipeline.run([IngestSource("a.txt", b"Ayni."), IngestSource("b.txt", b"Ayni.")]))
+        assert store.index.ntotal == 2
+        assert "sources" not in store.metadata[0]
+        assert progress[1].chunks_deduplicated == 0
+
+    def test_shared_chunk_survives_owner_removal(self, tmp_path):
+        """Asıl dosya silinince paylaşılan chunk diğer kaynağa devredilir."""
+        store = VectorStore(index_path=str(tmp_path / "i.bin"), metadata_path=str(tmp_path / "m.pkl"))
+        pipeline = IngestionPipeline(FakeEmbedder(), store, extractor=ParallelExtractor(max_workers=0))
+        text = random_text(5).encode("utf-8")
+        asyncio.run(pipeline.run([IngestSource("a.txt", text), IngestSource("b.txt", text)]))
+        assert sorted(store.list_files()) == ["a.txt", "b.txt"]
+
+        assert store.remove_files(["a.txt"]) == 0
+        assert store.list_files() == ["b.txt"]
+        assert store.remove_files(["b.txt"]) == 1
+        assert store.index.ntotal == 0
+
+    def test_chunk_survives_failed_original(self, tmp_path):
+        """Asıl chunk'ın dosyası başarısız olursa elenen kopyası kendi dosyasıyla indekse yazılır."""
+        class FailFirst(FakeEmbedder):
+            def embed_documents(self, texts):
+                if not self.texts:
+                    self.texts = -1
+                    raise RuntimeError("model yok")
+                return super().embed_documents(texts)
+
+        store = VectorStore(index_path=str(tmp_path / "i.bin"), metadata_path=str(tmp_path / "m.pkl"))
+        pipeline = IngestionPipeline(FailFirst(), store, extractor=ParallelExtractor(max_workers=0))
+        text = random_text(7).encode("utf-8")
+        progress = asyncio.run(pipeline.run([IngestSource("a.txt", text), IngestSource("b.txt", text)]))
+
+        assert progress[0].status == "error"
+        assert progress[1].status == "done"
+        assert progress[1].chunks_created == progress[1].vectors_committed == 1
+        assert progress[1].chunks_deduplicated == 0
+        assert store.list_files() == ["b.txt"]
+        assert store.metadata[0]["sources"] == ["b.txt"]
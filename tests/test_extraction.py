@@ -0,0 +1,64 @@
+"""
+Paralel metin çıkarımı birim testleri.
+
+Process pool ile sayfa aralıklarına bölünmüş PDF çıkarımının sırayı
+koruduğunu, hatalı dosyaların diğerlerini etkilemediğini ve pool'suz
+(inline) modun aynı sonucu verdiğini test eder.
+"""
+
+import asyncio
+import pytest
+
+import fitz
+from rag_app.services.extraction import END_OF_FILE, ParallelExtractor
+
+
+def make_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for n in range(pages):
+        doc.new_page().insert_text((72, 72), f"Sayfa {n}")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def collect(extractor, sources):
+    """iter_file_segments çıktısını dosya bazında gruplar."""
+    result = {i: [] for i in range(len(sources))}
+    for i, segment in extractor.iter_file_segments(sources):
+        if segment is not END_OF_FILE:
+            result[i].append(segment if isinstance(segment, str) else "HATA")
+    return result
+
+
+@pytest.fixture(scope="module")
+def pool():
+    extractor = ParallelExtractor(max_workers=2, pages_per_task=3)
+    yield extractor
+    extractor.shutdown()
+
+
+class TestParallelExtractor:
+    """ParallelExtractor testleri."""
+
+    def test_page_ranges_keep_order(self, pool):
+        """Sayfa aralıkları farklı worker'larda çıkarılsa da sıra korunmalı."""
+        segments = pool.extract_segments(make_pdf(10), "buyuk.pdf")
+        assert [s.strip() for s in segments] == [f"Sayfa {n}" for n in range(10)]
+
+    def test_failed_file_is_isolated(self, pool):
+        """Bozuk dosya hata üretmeli, sonraki dosya yine çıkarılmalı."""
+        sources = [(b"bozuk", "a.pdf"), (make_pdf(4), "b.pdf"), (b"Merhaba", "c.txt")]
+        result = collect(pool, sources)
+        assert result[0] == ["HATA"]
+        assert len(result[1]) == 4
+        assert result[2] == ["Merhaba"]
+
+    def test_inline_mode_matches_pool(self, pool):
+        """max_workers=0 (pool yok) aynı parçaları üretmeli."""
+        sources = [(make_pdf(7), "a.pdf"), (b"Metin", "b.txt")]
+        assert collect(ParallelExtractor(max_workers=0), sources) == collect(pool, sources)
+
+    def test_extract_text_joins_segments(self, pool):
+        text = asyncio.run(pool.extract_text(make_pdf(5), "a.pdf"))
+        assert "Sayfa 0" in text and "Sayfa 4" in text
@@ -0,0 +1,155 @@
+"""
+Hedge edilmiş LLM çağrıları birim testleri.
+
+Yedek isteğin eşikten sonra başlatılmasını, ilk başarılı cevabın kazanıp
+diğerinin iptal edilmesini, ek yük bütçesini ve model yönlendirici
+entegrasyonunu test eder.
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from src.models.hedging import HedgeBudget, HedgedChatModel
+from src.monitoring.metrics import metrics
+
+
+class FakeBackend:
+    """Belirli gecikmeyle cevap veren (veya hata fırlatan) sahte model."""
+
+    def __init__(self, delay: float, answer: str = "", error: Exception = None):
+        self.delay = delay
+        self.answer = answer
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return AIMessage(content=self.answer)
+
+    async def astream(self, messages, **kwargs):
+        """Cevabı kelime kelime akıtır; ilk parça `delay` sonra gelir."""
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            for word in self.answer.split():
+                yield AIMessageChunk(content=word + " ")
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+def hedged(primary, backup, delay_ms=50, budget=None):
+    return HedgedChatModel(primary=primary, backup=backup, delay_ms=lambda: delay_ms,
+                           budget=budget or HedgeBudget(ratio=1.0, burst=1.0))
+
+
+class TestHedgedChatModel:
+    """HedgedChatModel testleri."""
+
+    def test_fast_primary_sends_no_hedge(self):
+        primary, backup = FakeBackend(0.01, "birincil"), FakeBackend(0.01, "yedek")
+        assert asyncio.run(hedged(primary, backup).ainvoke("soru")).content == "birincil"
+        assert backup.calls == 0
+
+    def test_slow_primary_loses_and_is_cancelled(self):
+        metrics.reset()
+        primary, backup = FakeBackend(2.0, "birincil"), FakeBackend(0.01, "yedek")
+
+        started = time.perf_counter()
+        assert asyncio.run(hedged(primary, backup).ainvoke("soru")).content == "yedek"
+        assert time.perf_counter() - started < 1.0
+        assert primary.cancelled
+        assert metrics.counter("hedge.sent") == 1 and metrics.counter("hedge.won") == 1
+
+    def test_budget_limits_extra_load(self):
+        metrics.reset()
+        budget = HedgeBudget(ratio=0.1, burst=1.0)
+        budget.tokens = 0
+        primary, backup = FakeBackend(0.1, "birincil"), FakeBackend(0.01, "yedek")
+
+        assert asyncio.run(hedged(primary, backup, delay_ms=10, budget=budget).ainvoke("soru")).content == "birincil"
+        assert backup.calls == 0
+        assert metrics.counter("hedge.denied") == 1
+        assert budget.stats()["extra_load"] == 0.0
+
+    def test_primary_error_fails_over_immediately(self):
+        primary = FakeBackend(0.01, error=RuntimeError("429"))
+        backup = FakeBackend(0.01, "yedek")
+        budget = HedgeBudget(ratio=0.1)
+        budget.tokens = 0
+
+        # Failover bütçe harcamaz ve eşiği beklemez
+        assert asyncio.run(hedged(primary, backup, delay_ms=5000, budget=budget).ainvoke("soru")).content == "yedek"
+
+    def test_cancelled_primary_fails_over(self):
+        primary = FakeBackend(0.01, error=asyncio.CancelledError())
+        backup = FakeBackend(0.01, "yedek")
+        assert asyncio.run(hedged(primary, backup, delay_ms=5000).ainvoke("soru")).content == "yedek"
+
+    def test_stream_races_first_chunk_and_continues_from_winner(self):
+        metrics.reset()
+        primary, backup = FakeBackend(2.0, "birincil"), FakeBackend(0.01, "yedek model cevabı")
+
+        async def collect():
+            return [chunk.content async for chunk in hedged(primary, backup).astream("soru")]
+
+        started = time.perf_counter()
+        chunks = asyncio.run(collect())
+        assert time.perf_counter() - started < 1.0
+        # Akış tek bir son parçaya dönüşmez
+        assert len([c for c in chunks if c]) == 3
+        assert "".join(chunks).strip() == "yedek model cevabı"
+        assert primary.cancelled
+        assert metrics.counter("hedge.won") == 1
+
+    def test_fast_primary_stream_sends_no_hedge(self):
+        primary, backup = FakeBackend(0.01, "bir iki"), FakeBackend(0.01, "yedek")
+
+        async def collect():
+            return [chunk.content async for chunk in hedged(primary, backup).astream("soru")]
+
+        assert "".join(asyncio.run(collect())).strip() == "bir iki"
+        assert backup.calls == 0
+
+    def test_bind_tools_applies_to_both_models(self):
+        primary, backup = MagicMock(), MagicMock()
+        bound = hedged(primary, backup).bind_tools(["tool"])
+        assert bound.primary is primary.bind_tools.return_value
+        assert bound.backup is backup.bind_tools.return_value
+
+
+class TestSelectorHedging:
+    """ModelSelector yedek bağlama entegrasyonu."""
+
+    def test_backup_prefers_other_provider(self):
+        from src.models.model_selector import ModelCandidate, ModelSelector, OllamaHealth
+
+        selector = ModelSelector([
+            ModelCandidate("llama3.2:3b", "ollama", tier=1, prior_ms=1500),
+            ModelCandidate("llama3.1:latest", "ollama", tier=2, prior_ms=3000),
+            ModelCandidate("gemini-2.5-flash", "gemini", tier=3, prior_ms=5000),
+        ])
+        selector._ollama = OllamaHealth(True, checked_at=time.monotonic())
+        with patch("src.models.model_selector.check_ollama_connection", return_value=True), \
+                patch("src.models.model_selector.get_ollama_model", side_effect=lambda *a, **k: MagicMock()), \
+                patch("src.models.model_selector.get_gemini_model", side_effect=lambda *a, **k: MagicMock()):
+            decision = selector.select("greeting", hedge=True)
+
+        assert decision.name == "llama3.2:3b"
+        assert decision.to_dict()["hedge_backup"] == "gemini-2.5-flash"
+        assert isinstance(decision.model.llm, HedgedChatModel)
+        assert decision.model.llm.delay_ms() > 0
@@ -0,0 +1,253 @@
+"""
+Ingestion boru hattı birim testleri.
+
+Extract → chunk → embed → commit aşamalarını, dosya bazlı
+ilerleme takibini ve hata izolasyonunu test eder.
+"""
+
+import asyncio
+import os
+import threading
+import pytest
+from unittest.mock import patch
+
+import fitz
+from rag_app.services.extraction import ParallelExtractor
+from rag_app.services.ingestion import IngestionPipeline, IngestSource
+from rag_app.services.ingestion_jobs import IngestionJobManager, IngestionQueueFull
+from rag_app.services.vector_store import VectorStore, DIMENSION
+
+
+class FakeEmbedder:
+    """Batch boyutlarını kaydeden sahte embedding servisi."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def embed_documents(self, texts):
+        self.batch_sizes.append(len(texts))
+        return [[1.0] + [0.0] * (DIMENSION - 1) for _ in texts]
+
+
+def make_pdf(pages: int) -> bytes:
+    """Her sayfasında bir paragraf olan PDF üretir."""
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Sayfa {n} icerigi burada. Ikinci cumle de var.\n\n")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def word_count(text):
+    return len(text.split())
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VectorStore(
+        index_path=str(tmp_path / "index.bin"),
+        metadata_path=str(tmp_path / "meta.pkl"),
+    )
+
+
+@pytest.fixture(autouse=True)
+def fast_token_counter():
+    """Testlerde tokenizer indirmemek için kelime sayacı kullanılır."""
+    with patch("rag_app.utils.text_processing._token_counter", word_count):
+        yield
+
+
+class TestIngestionPipeline:
+    """Akış halinde ingestion testleri."""
+
+    def test_files_are_indexed_with_progress(self, store):
+        """PDF ve TXT dosyaları indekse eklenir, ilerleme sayaçları tutarlıdır."""
+        embedder = FakeEmbedder()
+        pipeline = IngestionPipeline(embedder, store, embed_batch_size=4, commit_batch_size=8, queue_size=2)
+        sources = [
+            IngestSource("rapor.pdf", make_pdf(30)),
+            IngestSource("not.txt", ("Bir cümle. " * 500).encode("utf-8")),
+        ]
+
+        progress = asyncio.run(pipeline.run(sources))
+
+        assert [p.status for p in progress] == ["done", "done"]
+        assert progress[0].pages_parsed == 30
+        for p in progress:
+            assert p.chunks_created == p.chunks_embedded == p.vectors_committed > 0
+        assert store.index.ntotal == sum(p.vectors_committed for p in progress)
+        assert {m["filename"] for m in store.metadata} == {"rapor.pdf", "not.txt"}
+        assert max(embedder.batch_sizes) <= 4
+
+    def test_index_saved_once(self, store):
+        """İndeks diske her batch'te değil, sonda bir kez yazılır."""
+        pipeline = IngestionPipeline(FakeEmbedder(), store, embed_batch_size=2, commit_batch_size=2)
+        with patch.object(VectorStore, "_save_index") as save:
+            asyncio.run(pipeline.run([IngestSource("a.txt", ("Cümle burada. " * 300).encode())]))
+        save.assert_called_once()
+
+    def test_bad_file_does_not_stop_others(self, store):
+        """Bozuk dosya hata alır, diğer dosyalar işlenmeye devam eder."""
+        pipeline = IngestionPipeline(FakeEmbedder(), store)
+        progress = asyncio.run(pipeline.run([
+            IngestSource("bozuk.pdf", b"bu bir pdf degil"),
+            IngestSource("bos.txt", b"   "),
+            IngestSource("iyi.txt", "Sağlam içerik burada.".encode("utf-8")),
+        ]))
+
+        assert progress[0].status == "error"
+        assert progress[1].status == "error"
+        assert "Boş" in progress[1].error
+        assert progress[2].status == "done"
+        assert store.list_files() == ["iyi.txt"]
+
+    def test_embedding_error_marks_file(self, store):
+        """Embedding hatası dosyayı hatalı işaretler ve indekse yazılmaz."""
+        class Broken:
+            def embed_documents(self, texts):
+                raise RuntimeError("model yok")
+
+        progress = asyncio.run(IngestionPipeline(Broken(), store).run([IngestSource("a.txt", b"Metin.")]))
+        assert progress[0].status == "error"
+        assert "model yok" in progress[0].error
+        assert store.index is None or store.index.ntotal == 0
+
+    def test_extractor_crash_fails_unfinished_files(self, store):
+        """Çıkarıcı beklenmedik hata verirse boru hattı kilitlenmez; yarım kalan dosyalar hatalı olur."""
+        from rag_app.services.extraction import END_OF_FILE
+
+        class CrashingExtractor:
+            def iter_file_segments(self, files):
+                yield 0, "Tamamlanan dosya. İkinci cümle."
+                yield 0, END_OF_FILE
+                yield 1, "Yarım kalan dosyanın ilk sayfası."
+                raise RuntimeError("worker çöktü")
+
+        pipeline = IngestionPipeline(FakeEmbedder(), store, extractor=CrashingExtractor())
+
+        async def run():
+            return await asyncio.wait_for(pipeline.run([
+                IngestSource("a.txt", b"a"), IngestSource("b.txt", b"b"), IngestSource("c.txt", b"c"),
+            ]), timeout=10)
+
+        progress = asyncio.run(run())
+        assert progress[0].status == "done"
+        assert [p.status for p in progress[1:]] == ["error", "error"]
+        assert "worker çöktü" in progress[1].error
+        assert store.list_files() == ["a.txt"]
+
+
+class GatedEmbedder(FakeEmbedder):
+    """Testin izin vermesini bekleyen embedding servisi."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def embed_documents(self, texts):
+        self.started.set()
+        self.release.wait(5)
+        return super().embed_documents(texts)
+
+
+async def wait_finished(job, timeout=10):
+    for _ in range(int(timeout / 0.01)):
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"İş bitmedi: {job.status}")
+
+
+class TestIngestionJobs:
+    """Arka plan ingestion işleri testleri."""
+
+    def make_manager(self, store, tmp_path, embedder=None, **kwargs):
+        pipeline = IngestionPipeline(embedder or FakeEmbedder(), store, embed_batch_size=2,
+                                     commit_batch_size=2, extractor=ParallelExtractor(max_workers=0))
+        return IngestionJobManager(pipeline, spool_dir=str(tmp_path / "spool"), **kwargs)
+
+    def test_job_runs_in_background(self, store, tmp_path):
+        """submit hemen döner; iş bitince dosyalar indekslenir ve spool temizlenir."""
+        manager = self.make_manager(store, tmp_path)
+
+        async def scenario():
+            job = await manager.submit([IngestSource("a.txt", b"Birinci. Ikinci."), IngestSource("b.pdf", make_pdf(3))])
+            assert job.status == "queued"
+            assert all(os.path.exists(s.path) for s in job.sources)
+            spool = job.spool_dir
+            await wait_finished(job)
+            manager.shutdown()
+            return job, spool
+
+        job, spool = asyncio.run(scenario())
+        data = job.to_dict()
+        assert data["status"] == "done"
+        assert [f["status"] for f in data["files"]] == ["done", "done"]
+        assert data["totals"]["vectors_committed"] == store.index.ntotal
+        assert not os.path.exists(spool)
+
+    def test_cancel_running_and_queued_jobs(self, store, tmp_path):
+        """Çalışan iş durur, kuyruktaki iş hiç başlamaz."""
+        embedder = GatedEmbedder()
+        manager = self.make_manager(store, tmp_path, embedder=embedder)
+
+        async def scenario():
+            running = await manager.submit([IngestSource("a.txt", ("Cümle burada. " * 500).encode())])
+            queued = await manager.submit([IngestSource("b.txt", b"Baska metin.")])
+            await asyncio.to_thread(embedder.started.wait, 5)
+            manager.cancel(queued.id)
+            manager.cancel(running.id)
+            embedder.release.set()
+            await wait_finished(running)
+            manager.shutdown()
+            return running, queued
+
+        running, queued = asyncio.run(scenario())
+        assert running.status == "cancelled"
+        assert running.files[0].status == "cancelled"
+        assert queued.status == "cancelled"
+        assert queued.files[0].pages_parsed == 0
+        assert "b.txt" not in store.list_files()
+
+    def test_paused_drains_running_job_before_reset(self, store, tmp_path):
+        """Sıfırlama sırasında çalışan iş durdurulur; temizlenen indekse vektör yazmaz."""
+        embedder = GatedEmbedder()
+        manager = self.make_manager(store, tmp_path, embedder=embedder)
+
+        async def scenario():
+            running = await manager.submit([IngestSource("a.txt", ("Cümle burada. " * 500).encode())])
+            queued = await manager.submit([IngestSource("b.txt", b"Baska metin.")])
+            await asyncio.to_thread(embedder.started.wait, 5)
+            asyncio.get_running_loop().call_later(0.1, embedder.release.set)
+            async with manager.paused() as cancelled:
+                assert running.finished and not manager._running
+                store.reset()
+                later = await manager.submit([IngestSource("c.txt", b"Yeni metin.")])
+            await wait_finished(later)
+            manager.shutdown()
+            return cancelled, running, queued, later
+
+        cancelled, running, queued, later = asyncio.run(scenario())
+        assert cancelled == 2
+        assert running.status == queued.status == "cancelled"
+        assert later.status == "done"
+        assert store.list_files() == ["c.txt"]
+
+    def test_queue_full(self, store, tmp_path):
+        """Worker meşgul ve kuyruk doluyken yeni iş reddedilir."""
+        embedder = GatedEmbedder()
+        manager = self.make_manager(store, tmp_path, embedder=embedder, max_queued=1)
+
+        async def scenario():
+            await manager.submit([IngestSource("a.txt", b"Bir.")])
+            await asyncio.to_thread(embedder.started.wait, 5)
+            await manager.submit([IngestSource("b.txt", b"Iki.")])
+            with pytest.raises(IngestionQueueFull):
+                await manager.submit([IngestSource("c.txt", b"Uc.")])
+            embedder.release.set()
+            manager.shutdown()
+
+        asyncio.run(scenario())
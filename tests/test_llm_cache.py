@@ -0,0 +1,80 @@
+"""
+LLM yanıt önbelleği birim testleri.
+
+Bellek ve SQLite katmanlarını, sadece deterministik çağrılarda
+uygulanmasını ve akış (stream) yanıtlarının tekrar oynatılmasını test eder.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.models.llm_cache import LLMResponseCache, build_messages, cache_for, llm_cache
+from src.models.ollama_model import OllamaModel
+from src.models.provider_limits import gated
+
+
+def fake_model(cache, *answers):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=a) for a in answers]), cache=cache)
+
+
+async def collect(stream):
+    return [chunk.content async for chunk in stream]
+
+
+class TestLLMResponseCache:
+    """LLMResponseCache testleri."""
+
+    def test_repeat_call_served_from_memory(self):
+        cache = LLMResponseCache(maxsize=8)
+        model = fake_model(cache, "ilk", "ikinci")
+        messages = build_messages("2+2?", "Sadece sonucu ver.")
+
+        assert model.invoke(messages).content == "ilk"
+        assert model.invoke(messages).content == "ilk"
+        assert model.invoke(build_messages("2+2?", "Başka sistem promptu")).content == "ikinci"
+        assert cache.memory.stats()["hits"] == 1
+
+    def test_disk_tier_survives_new_process(self, tmp_path):
+        path = str(tmp_path / "llm.sqlite")
+        first = LLMResponseCache(maxsize=8, path=path)
+        asyncio.run(fake_model(first, "diskten").ainvoke(build_messages("soru")))
+        first.close()
+
+        second = LLMResponseCache(maxsize=8, path=path)
+        assert asyncio.run(fake_model(second, "yeni").ainvoke(build_messages("soru"))).content == "diskten"
+        second.close()
+
+    def test_stream_is_cached_and_replayed(self):
+        cache = LLMResponseCache(maxsize=8)
+        long_answer = "uzun bir cevap " * 20
+        model = gated(fake_model(cache, long_answer, "farkli"), "ollama")
+        messages = build_messages("anlat")
+
+        streamed = asyncio.run(collect(model.astream(messages)))
+        replayed = asyncio.run(collect(model.astream(messages)))
+
+        assert "".join(streamed) == "".join(replayed) == long_answer
+        assert len(replayed) > 1
+        # Akışla yazılan kayıt invoke ile ve istemcinin kendi önbellek yoluyla da bulunur
+        assert model.invoke(messages).content == long_answer
+        assert fake_model(cache, "yeni").invoke(messages).content == long_answer
+
+
+class TestCachePolicy:
+    """Önbelleğin hangi çağrılara uygulanacağı."""
+
+    @pytest.mark.parametrize("temperature, allow, expected", [
+        (0.0, None, True), (0.7, None, False), (0.7, True, True), (0.0, False, False),
+    ])
+    def test_cache_for(self, temperature, allow, expected):
+        assert (cache_for(temperature, allow) is llm_cache) is expected
+
+    def test_model_clients_use_policy(self):
+        assert OllamaModel(temperature=0.0).llm.cache is llm_cache
+        assert OllamaModel(temperature=0.7).llm.cache is False
+        with patch("src.models.llm_cache.LLM_CACHE_NONDETERMINISTIC", True):
+            assert OllamaModel(temperature=0.7).llm.cache is llm_cache
@@ -0,0 +1,143 @@
+"""
+Mock LLM sunucusu birim testleri.
+
+Gerçek ChatOllama / ChatGoogleGenerativeAI istemcilerinin mock sunucu ile
+metin, akış ve tool çağrısı cevaplarını alabildiğini, gecikme modelinin
+deterministik olduğunu ve kaset kayıt / tekrar akışını test eder.
+"""
+
+import random
+import time
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_ollama import ChatOllama
+
+from benchmarks.mock_llm_server import (
+    Cassette, LatencyModel, MockBackend, MockServerThread, ProviderProfile, create_app,
+)
+
+SCRIPT = {
+    "rules": [
+        {"match": "fibonacci", "tool_calls": [{"name": "code_executor_tool", "args": {"code": "print(55)"}}]},
+        {"match": "fibonacci", "text": "Sonuç 55."},
+        {"match": "gelir", "provider": "gemini", "text": "Gelir 12 milyon TL."},
+    ]
+}
+
+
+@tool
+def code_executor_tool(code: str) -> str:
+    """Python kodunu çalıştırır."""
+    return "55"
+
+
+def make_backend(latency="fixed:0", tokens_per_sec=0.0, seed=0):
+    return MockBackend.from_script(SCRIPT, ProviderProfile(LatencyModel.parse(latency), tokens_per_sec), seed)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with MockServerThread(create_app(make_backend(tokens_per_sec=500))) as srv:
+        yield srv
+
+
+class TestLatencyModel:
+    """Gecikme dağılımları."""
+
+    def test_same_seed_same_samples(self):
+        model = LatencyModel.parse("lognormal:300,0.5", tail_prob=0.1, tail_ms=2000)
+        rng1, rng2 = random.Random(7), random.Random(7)
+        assert [model.sample(rng1) for _ in range(20)] == [model.sample(rng2) for _ in range(20)]
+
+    def test_tail_and_parse(self):
+        rng = random.Random(0)
+        samples = [LatencyModel.parse("fixed:100", tail_prob=0.5, tail_ms=1000).sample(rng) for _ in range(200)]
+        assert set(samples) == {100.0, 1100.0}
+        assert LatencyModel.parse("uniform:10,20").sample(rng) <= 20
+        with pytest.raises(ValueError):
+            LatencyModel.parse("pareto:1")
+
+
+class TestOllamaApi:
+    """Ollama /api/chat uyumluluğu."""
+
+    def test_text_stream_and_tags(self, server):
+        llm = ChatOllama(model="llama3.1:latest", base_url=server.url)
+        assert llm.invoke("merhaba").content == "Mock yanıt (llama3.1:latest): merhaba"
+        chunks = [c.content for c in llm.stream("bir iki üç")]
+        assert len([c for c in chunks if c]) > 1
+        tags = httpx.get(f"{server.url}/api/tags").json()
+        assert "llama3.1:latest" in [m["name"] for m in tags["models"]]
+
+    def test_scripted_tool_call_then_answer(self, server):
+        llm = ChatOllama(model="llama3.1:latest", base_url=server.url).bind_tools([code_executor_tool])
+        first = llm.invoke("fibonacci 10 hesapla")
+        assert first.tool_calls[0]["name"] == "code_executor_tool"
+        assert first.tool_calls[0]["args"] == {"code": "print(55)"}
+
+        history = [HumanMessage("fibonacci 10 hesapla"), first,
+                   ToolMessage("55", tool_call_id=first.tool_calls[0]["id"])]
+        assert llm.invoke(history).content == "Sonuç 55."
+
+
+class TestGeminiApi:
+    """Gemini generateContent / streamGenerateContent uyumluluğu."""
+
+    def test_text_stream_and_provider_rule(self, server):
+        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key="test", base_url=server.url)
+        assert llm.invoke("gelir ne kadar?").content == "Gelir 12 milyon TL."
+        chunks = [c.content for c in llm.stream("akış testi")]
+        assert "".join(chunks) == "Mock yanıt (gemini-2.5-flash): akış testi"
+
+    def test_scripted_tool_call(self, server):
+        llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key="test", base_url=server.url)
+        response = llm.bind_tools([code_executor_tool]).invoke("fibonacci 10")
+        assert isinstance(response, AIMessage)
+        assert response.tool_calls[0]["args"] == {"code": "print(55)"}
+
+
+class TestTiming:
+    """İlk token gecikmesi ve token hızı."""
+
+    def test_first_token_delay_and_tokens_per_sec(self):
+        with MockServerThread(create_app(make_backend("fixed:100", tokens_per_sec=50))) as srv:
+            llm = ChatOllama(model="llama3.1:latest", base_url=srv.url)
+            started = time.perf_counter()
+            arrivals = []
+            for chunk in llm.stream("bir iki üç dört beş"):
+                if chunk.content:
+                    arrivals.append(time.perf_counter() - started)
+        # 100 ms ilk token + 6 token arasında 20 ms
+        assert arrivals[0] >= 0.1
+        assert arrivals[-1] - arrivals[0] >= 0.09
+
+
+class TestCassette:
+    """Kayıt ve tekrar oynatma."""
+
+    def test_record_then_replay(self, tmp_path):
+        path = str(tmp_path / "cassette.jsonl")
+        upstream_backend = make_backend(tokens_per_sec=500)
+        with MockServerThread(create_app(upstream_backend)) as upstream:
+            recorder = create_app(make_backend(), mode="record", cassette=Cassette(path),
+                                  ollama_upstream=upstream.url, gemini_upstream=upstream.url)
+            with MockServerThread(recorder) as srv:
+                ollama = ChatOllama(model="llama3.1:latest", base_url=srv.url)
+                gemini = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key="gizli", base_url=srv.url)
+                recorded = (ollama.invoke("kayıt").content, gemini.invoke("gelir?").content)
+
+        with open(path, encoding="utf-8") as f:
+            assert "gizli" not in f.read()
+
+        # Upstream kapalı: cevaplar sadece kasetten gelebilir
+        player = create_app(make_backend(), mode="replay", cassette=Cassette(path), time_scale=0)
+        with MockServerThread(player) as srv:
+            ollama = ChatOllama(model="llama3.1:latest", base_url=srv.url)
+            gemini = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key="baska", base_url=srv.url)
+            assert (ollama.invoke("kayıt").content, gemini.invoke("gelir?").content) == recorded
+            miss = httpx.post(f"{srv.url}/api/chat", json={"model": "x", "messages": []})
+            assert miss.status_code == 404
@@ -6,7 +6,8 @@ hata senaryolarını test eder.
 """
 
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.messages import AIMessage
 from src.models.model_selector import classify_task, select_model
 
 
@@ -134,3 +135,122 @@ class TestSelectModel:
             model, name, task_type = result
             assert isinstance(name, str)
             assert isinstance(task_type, str)
+
+
+class TestModelSelectorRouting:
+    """Gecikme ve sağlık farkındalıklı yönlendirme testleri."""
+
+    @staticmethod
+    def make_selector(ollama_up=True, loaded=None):
+        from src.models.model_selector import ModelCandidate, ModelSelector, OllamaHealth
+        import time
+
+        selector = ModelSelector([
+            ModelCandidate("llama3.2:3b", "ollama", tier=1, prior_ms=1500),
+            ModelCandidate("llama3.1:latest", "ollama", tier=2, prior_ms=3000),
+            ModelCandidate("gemini-2.5-flash", "gemini", tier=3, prior_ms=5000),
+        ])
+        installed = {"llama3.2:3b", "llama3.1:latest"} if ollama_up else None
+        selector._ollama = OllamaHealth(ollama_up, installed, loaded, checked_at=time.monotonic())
+        return selector
+
+    @staticmethod
+    def route(selector, task_type, mode="auto", ollama_up=True):
+        with patch("src.models.model_selector.check_ollama_connection", return_value=ollama_up), \
+                patch("src.models.model_selector.get_ollama_model", return_value=MagicMock()), \
+                patch("src.models.model_selector.get_gemini_model", return_value=MagicMock()):
+            return selector.select(task_type, mode=mode)
+
+    def test_picks_fastest_measured_model_meeting_tier(self):
+        selector = self.make_selector()
+        assert self.route(selector, "analysis").name == "llama3.1:latest"
+
+        for _ in range(5):
+            selector.record(selector.candidates[1], 6000)
+            selector.record(selector.candidates[2], 1200)
+        decision = self.route(selector, "analysis")
+        assert decision.name == "gemini-2.5-flash"
+        assert decision.estimate_ms == 1200
+        # Seviye 1 görevinde daha hızlı ölçülen hafif yerel model seçilir
+        selector.record(selector.candidates[0], 400)
+        assert self.route(selector, "greeting").name == "llama3.2:3b"
+
+    def test_ollama_down_falls_back_and_reports_reason(self):
+        selector = self.make_selector(ollama_up=False)
+        decision = self.route(selector, "greeting", ollama_up=False)
+        assert decision.name == "gemini-2.5-flash"
+        assert decision.to_dict()["skipped"]["llama3.2:3b"] == "Ollama erişilemiyor"
+
+    def test_cold_model_penalised(self):
+        selector = self.make_selector(loaded={"llama3.2:3b"})
+        assert self.route(selector, "analysis").name == "gemini-2.5-flash"
+
+    def test_failing_backend_is_skipped_until_errors_expire(self):
+        selector = self.make_selector()
+        selector.record(selector.candidates[2], 0, ok=False)
+        decision = self.route(selector, "reasoning")
+        assert decision.name == "llama3.1:latest"
+        assert decision.reason.startswith("fallback")
+
+        with patch("src.models.model_selector.ROUTER_ERROR_WINDOW", 0):
+            assert self.route(selector, "reasoning").name == "gemini-2.5-flash"
+
+    def test_client_creation_failure_tries_next_candidate(self):
+        selector = self.make_selector()
+        with patch("src.models.model_selector.check_ollama_connection", return_value=True), \
+                patch("src.models.model_selector.get_ollama_model", return_value=MagicMock()), \
+                patch("src.models.model_selector.get_gemini_model", side_effect=ValueError("GEMINI_API_KEY bulunamadı!")):
+            decision = selector.select("coding", mode="accurate")
+        assert decision.name == "llama3.1:latest"
+        assert "GEMINI_API_KEY" in decision.skipped["gemini-2.5-flash"]
+        assert selector.stats()["providers"]["gemini"]["error_rate"] == 1.0
+
+    def test_latency_tracked_from_llm_calls(self):
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from src.models.model_selector import _LatencyTracker
+
+        selector = self.make_selector()
+        candidate = selector.candidates[0]
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content="a"), AIMessage(content="b")]),
+                                   callbacks=[_LatencyTracker(selector, candidate)])
+        llm.invoke("soru")
+        llm.invoke("soru 2")
+
+        stats = selector.stats()
+        assert stats["models"]["llama3.2:3b"]["samples"] == 2
+        assert stats["providers"]["ollama"]["error_rate"] == 0.0
+
+    def test_cache_hits_not_tracked(self):
+        from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+        from src.models.llm_cache import LLMResponseCache
+        from src.models.model_selector import _LatencyTracker
+        from src.models.provider_limits import gated
+
+        selector = self.make_selector()
+        candidate = selector.candidates[0]
+        llm = GenericFakeChatModel(messages=iter([AIMessage(content="a"), AIMessage(content="b")]),
+                                   cache=LLMResponseCache(path=""),
+                                   callbacks=[_LatencyTracker(selector, candidate)])
+        llm.invoke("soru")
+        llm.invoke("soru")
+        # Sarmalayıcıdaki önbellek isabeti içteki modele (ve ölçüme) hiç ulaşmaz
+        gated(llm, "ollama").invoke("soru")
+
+        assert selector.stats()["models"]["llama3.2:3b"]["samples"] == 1
+
+    def test_routing_exposed_in_run_stats(self):
+        import asyncio
+        from langchain_core.messages import HumanMessage
+        from src.orchestrator import graph as graph_module
+
+        routing = [
+            {"agent": "analyst", "model": "llama3.1:latest", "reason": "en hızlı"},
+            {"agent": "master", "model": "gemini-2.5-flash", "reason": "en hızlı"},
+        ]
+        ainvoke = AsyncMock(return_value={"messages": [HumanMessage(content="cevap")], "routing": routing})
+        with patch.object(graph_module.graph, "ainvoke", ainvoke):
+            result = asyncio.run(graph_module.run_multi_agent("soru", mode="fast", use_cache=False))
+
+        assert result["routing"] == routing
+        assert result["models_used"] == ["llama3.1:latest", "gemini-2.5-flash"]
+        assert ainvoke.call_args.kwargs["config"] == {"configurable": {"mode": "fast"}}
@@ -0,0 +1,70 @@
+"""
+Monitoring katmanı birim testleri.
+
+Metrik deposunun sayaç, gauge ve dağılım
+hesaplamalarını test eder.
+"""
+
+import pytest
+from src.monitoring.metrics import MetricsRegistry, percentile
+
+
+class TestPercentile:
+    """Yüzdelik hesaplama testleri."""
+
+    def test_empty_list(self):
+        """Boş liste 0 döner."""
+        assert percentile([], 95) == 0.0
+
+    def test_nearest_rank(self):
+        """Nearest-rank yüzdelikleri doğru hesaplanır."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 100) == 100
+
+
+class TestMetricsRegistry:
+    """Metrik deposu testleri."""
+
+    def test_counters_and_gauges(self):
+        """Sayaç artar, gauge son değeri tutar."""
+        registry = MetricsRegistry()
+        registry.inc("istek")
+        registry.inc("istek", 2)
+        registry.set_gauge("kuyruk", 5)
+        registry.set_gauge("kuyruk", 3)
+
+        snap = registry.snapshot()
+        assert snap["counters"]["istek"] == 3
+        assert snap["gauges"]["kuyruk"] == 3
+
+    def test_summary_statistics(self):
+        """Dağılım metriği count/mean/min/max üretir."""
+        registry = MetricsRegistry()
+        for v in (1, 2, 3, 4):
+            registry.observe("gecikme", v)
+
+        summary = registry.summary("gecikme")
+        assert summary["count"] == 4
+        assert summary["mean"] == pytest.approx(2.5)
+        assert summary["min"] == 1
+        assert summary["max"] == 4
+
+    def test_window_is_bounded(self):
+        """Kayan pencere sınırlıdır, toplam sayaç ise tüm gözlemleri sayar."""
+        registry = MetricsRegistry(window=10)
+        for v in range(100):
+            registry.observe("x", v)
+
+        summary = registry.summary("x")
+        assert summary["count"] == 100
+        assert summary["p50"] >= 90  # Sadece son 10 gözlem
+        assert len(registry._summaries["x"].window) == 10
+
+    def test_reset(self):
+        """reset tüm metrikleri temizler."""
+        registry = MetricsRegistry()
+        registry.inc("a")
+        registry.reset()
+        assert registry.snapshot() == {"counters": {}, "gauges": {}, "summaries": {}}
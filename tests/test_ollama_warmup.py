@@ -0,0 +1,116 @@
+"""
+Ollama warm-up birim testleri.
+
+Modellerin açılışta yüklenmesini, bellekten düşen modelin tekrar
+yüklenmesini, birbirini atan modellerin artan beklemeyle tekrar denenmesini
+ve soğuk başlangıç süresinin raporlanmasını test eder.
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from src.models.model_selector import OllamaHealth
+from src.models.ollama_warmup import OllamaWarmer
+from src.monitoring.metrics import metrics
+
+
+def run_cycle(warmer, *loaded_sets, up=True):
+    """run_once'ı verilen sırayla bellekteki model kümeleriyle çalıştırır."""
+    client = MagicMock()
+    client.generate.return_value = SimpleNamespace(load_duration=1_500_000_000)
+    health = [OllamaHealth(up, loaded=set(s)) for s in loaded_sets]
+    with patch.object(warmer, "_client", return_value=client), \
+            patch("src.models.ollama_warmup.model_selector.ollama_health", side_effect=health):
+        warmer.run_once()
+    return client
+
+
+class TestOllamaWarmer:
+    """OllamaWarmer testleri."""
+
+    def test_preloads_missing_models_with_keep_alive(self):
+        metrics.reset()
+        warmer = OllamaWarmer(models=["llama3.1", "llama3.1:latest", "llama3.2:3b"], keep_alive="1h")
+        assert warmer.models == ["llama3.1:latest", "llama3.2:3b"]
+
+        client = run_cycle(warmer, {"llama3.2:3b"}, {"llama3.1:latest", "llama3.2:3b"})
+
+        client.generate.assert_called_once_with(model="llama3.1:latest", prompt="", keep_alive="1h")
+        status = warmer.status()
+        assert status["server_up"] is True
+        assert status["models"]["llama3.1:latest"]["resident"] is True
+        assert status["models"]["llama3.1:latest"]["load_ms"] == 1500
+        assert status["models"]["llama3.1:latest"]["cold_start_ms"] is not None
+        assert status["models"]["llama3.2:3b"]["warmups"] == 0
+        assert metrics.summary("ollama.cold_start_ms")["count"] == 1
+
+    def test_rewarms_after_unload(self):
+        metrics.reset()
+        warmer = OllamaWarmer(models=["a:1"])
+        run_cycle(warmer, {"a:1"})
+        client = run_cycle(warmer, set(), {"a:1"})
+
+        assert client.generate.call_count == 1
+        assert metrics.counter("ollama.unloads_detected") == 1
+        assert warmer.status()["models"]["a:1"]["resident"] is True
+
+    def test_evicted_model_backs_off(self):
+        warmer = OllamaWarmer(models=["a:1", "b:1"], interval=10, max_backoff=30)
+        run_cycle(warmer, set(), {"b:1"})
+        status = warmer.status()["models"]["a:1"]
+        assert status["evictions"] == 1
+        assert status["retry_at"] is not None
+
+        # Bekleme dolmadan tekrar denenmez
+        client = run_cycle(warmer, {"b:1"})
+        client.generate.assert_not_called()
+
+        # Bekleme dolunca tekrar denenir; yine atılırsa bekleme katlanır (üst sınırla)
+        warmer._status["a:1"]["retry_at"] = 0
+        before = time.time()
+        client = run_cycle(warmer, {"b:1"}, {"b:1"})
+        client.generate.assert_called_once()
+        status = warmer.status()["models"]["a:1"]
+        assert status["evictions"] == 2
+        assert before + 30 <= status["retry_at"] <= time.time() + 30
+
+    def test_backoff_resets_once_model_stays_loaded(self):
+        warmer = OllamaWarmer(models=["a:1", "b:1"], interval=10)
+        run_cycle(warmer, set(), {"b:1"})
+        warmer._status["a:1"]["retry_at"] = 0
+
+        run_cycle(warmer, set(), {"a:1", "b:1"})
+        status = warmer.status()["models"]["a:1"]
+        assert status["resident"] is True
+        assert status["evictions"] == 0
+        assert status["retry_at"] is None
+
+    def test_server_down_marks_models_not_resident(self):
+        warmer = OllamaWarmer(models=["a:1"])
+        client = run_cycle(warmer, set(), up=False)
+        client.generate.assert_not_called()
+        assert warmer.status()["server_up"] is False
+        assert warmer.status()["models"]["a:1"]["resident"] is False
+
+
+class TestCliWarmup:
+    """CLI'da ön yüklemenin sadece uzun ömürlü (interaktif) modda başlaması."""
+
+    def run_cli(self, *argv):
+        import main as cli
+
+        with patch.object(cli, "OLLAMA_WARMUP", True), \
+                patch.object(cli.ollama_warmer, "start") as start, \
+                patch.object(cli, "run_multi_agent", new=MagicMock(return_value=None)), \
+                patch.object(cli, "interactive_mode", new=MagicMock(return_value=None)), \
+                patch.object(cli.asyncio, "run"), patch.object(cli, "print_result"), \
+                patch("sys.argv", ["main.py", *argv]):
+            cli.main()
+        return start
+
+    def test_one_shot_query_does_not_preload(self):
+        self.run_cli("2+2 kaç?").assert_not_called()
+
+    def test_interactive_mode_preloads(self):
+        self.run_cli().assert_called_once()
@@ -0,0 +1,226 @@
+"""
+Sağlayıcı kapıları birim testleri.
+
+Eşzamanlılık sınırını, sınırlı bekleme kuyruğunu, token bucket kotasını,
+devre kesiciyi ve chat model sarmalayıcısını test eder.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.models.llm_cache import LLMResponseCache
+from src.models.provider_limits import (
+    CircuitBreaker, CircuitOpen, GatedChatModel, ProviderGate, ProviderOverloaded, TokenBucket, gated,
+)
+from src.monitoring.metrics import metrics
+
+
+def make_gate(concurrency=2, queue=10, rate=0, timeout=5.0, threshold=5, reset=30.0):
+    return ProviderGate("test", concurrency, queue, rate, queue_timeout=timeout,
+                        breaker=CircuitBreaker(threshold, reset))
+
+
+class TestConcurrency:
+    """Eşzamanlılık sınırı ve kuyruk."""
+
+    def test_limits_in_flight_calls(self):
+        metrics.reset()
+        gate = make_gate(concurrency=2)
+        state = {"active": 0, "peak": 0}
+
+        async def call():
+            async with gate.slot():
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+                await asyncio.sleep(0.02)
+                state["active"] -= 1
+
+        async def main():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(main())
+        assert state["peak"] == 2
+        assert metrics.summary("provider.test.wait_ms")["count"] == 6
+        assert gate.stats()["in_flight"] == 0 and gate.stats()["queue_depth"] == 0
+
+    def test_full_queue_and_timeout_reject(self):
+        metrics.reset()
+        gate = make_gate(concurrency=1, queue=1, timeout=0.05)
+
+        async def hold():
+            async with gate.slot():
+                await asyncio.sleep(0.2)
+
+        async def wait_slot():
+            async with gate.slot():
+                pass
+
+        async def main():
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            queued = asyncio.create_task(wait_slot())
+            await asyncio.sleep(0)
+            with pytest.raises(ProviderOverloaded):
+                await wait_slot()
+            with pytest.raises(ProviderOverloaded):
+                await queued
+            await holder
+            # Zaman aşımına uğrayan bekleyen slot sızdırmaz
+            await wait_slot()
+
+        asyncio.run(main())
+        assert metrics.counter("provider.test.rejected") == 2
+        assert gate.stats()["in_flight"] == 0
+
+    def test_sync_and_async_callers_share_limit(self):
+        gate = make_gate(concurrency=1)
+        state = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+
+        def sync_call():
+            with gate.sync_slot():
+                work()
+
+        async def async_call():
+            async with gate.slot():
+                await asyncio.to_thread(work)
+
+        threads = [threading.Thread(target=sync_call) for _ in range(3)]
+        threads.append(threading.Thread(target=lambda: asyncio.run(async_call())))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert state["peak"] == 1
+
+
+class TestRateAndBreaker:
+    """Token bucket ve devre kesici."""
+
+    def test_token_bucket_spaces_requests(self):
+        bucket = TokenBucket(rate_per_min=600, burst=1)  # 10 istek/sn
+        delays = [bucket.reserve() for _ in range(3)]
+        assert delays[0] == 0
+        assert delays[2] == pytest.approx(0.2, abs=0.02)
+
+    def test_breaker_opens_fails_fast_and_recovers(self):
+        gate = make_gate(threshold=2, reset=0.1)
+
+        async def call(fail):
+            async with gate.slot():
+                if fail:
+                    raise RuntimeError("429")
+
+        async def main():
+            for _ in range(2):
+                with pytest.raises(RuntimeError):
+                    await call(True)
+            assert gate.circuit_open
+            with pytest.raises(CircuitOpen):
+                await call(False)
+            await asyncio.sleep(0.12)
+            # Half-open: tek deneme başarılı olunca devre kapanır
+            await call(False)
+
+        asyncio.run(main())
+        assert gate.stats()["circuit"] == "closed"
+
+    def test_selector_skips_open_circuit(self):
+        from src.models import model_selector as selector_module
+        from src.models.model_selector import ModelCandidate, ModelSelector
+
+        selector = ModelSelector([
+            ModelCandidate("gemini-2.5-flash", "gemini", tier=3, prior_ms=5000),
+            ModelCandidate("llama3.1:latest", "ollama", tier=2, prior_ms=3000),
+        ])
+        gates = {"gemini": make_gate(threshold=1), "ollama": make_gate()}
+        gates["gemini"].breaker.record_failure()
+        with patch.dict(selector_module.provider_gates, gates), \
+                patch.object(selector_module, "check_ollama_connection", return_value=True), \
+                patch.object(selector_module, "get_ollama_model", return_value=MagicMock()):
+            decision = selector.select("reasoning")
+
+        assert decision.name == "llama3.1:latest"
+        assert decision.skipped["gemini-2.5-flash"] == "devre kesici açık"
+        assert isinstance(decision.model.llm, GatedChatModel)
+
+
+class TestGatedChatModel:
+    """GatedChatModel sarmalayıcısı."""
+
+    def test_invoke_and_stream_pass_through_gate(self):
+        metrics.reset()
+        inner = GenericFakeChatModel(messages=iter([AIMessage(content="tek"), AIMessage(content="akan cevap")]))
+        model = GatedChatModel(inner=inner, gate=make_gate())
+
+        async def main():
+            first = await model.ainvoke("soru")
+            chunks = [chunk.content async for chunk in model.astream("soru")]
+            return first, chunks
+
+        first, chunks = asyncio.run(main())
+        assert first.content == "tek"
+        assert "".join(chunks) == "akan cevap" and len(chunks) > 1
+        assert metrics.summary("provider.test.wait_ms")["count"] == 2
+
+    def test_bind_tools_wraps_inner(self):
+        inner = MagicMock()
+        bound = GatedChatModel(inner=inner, gate=make_gate()).bind_tools(["tool"])
+        assert bound.inner is inner.bind_tools.return_value
+        assert isinstance(bound, GatedChatModel)
+
+    def test_cache_hit_skips_gate(self):
+        metrics.reset()
+        inner = GenericFakeChatModel(messages=iter([AIMessage(content="cevap")]))
+        gate = make_gate(threshold=1)
+        model = GatedChatModel(inner=inner, gate=gate, response_cache=LLMResponseCache(path=""))
+
+        async def main():
+            first = await model.ainvoke("soru")
+            # Devre açık olsa da önbellekteki yanıt döner
+            gate.breaker.record_failure()
+            second = await model.ainvoke("soru")
+            return first, second
+
+        first, second = asyncio.run(main())
+        assert first.content == second.content == "cevap"
+        assert metrics.summary("provider.test.wait_ms")["count"] == 1
+        with pytest.raises(CircuitOpen):
+            model.invoke("başka soru")
+
+    def test_stream_fills_and_replays_cache(self):
+        metrics.reset()
+        inner = GenericFakeChatModel(messages=iter([AIMessage(content="akan uzun bir cevap " * 8)]))
+        cache = LLMResponseCache(path="")
+        model = GatedChatModel(inner=inner, gate=make_gate(), response_cache=cache)
+
+        async def main():
+            streamed = [chunk.content async for chunk in model.astream("soru")]
+            replayed = [chunk.content async for chunk in model.astream("soru")]
+            invoked = await model.ainvoke("soru")
+            return streamed, replayed, invoked
+
+        streamed, replayed, invoked = asyncio.run(main())
+        assert "".join(replayed) == "".join(streamed) == invoked.content
+        assert len(replayed) > 1
+        assert metrics.summary("provider.test.wait_ms")["count"] == 1
+
+    def test_gated_moves_cache_to_wrapper(self):
+        cache = LLMResponseCache(path="")
+        model = gated(GenericFakeChatModel(messages=iter([]), cache=cache), "ollama")
+        assert model.response_cache is cache
+        assert model.inner.cache is False
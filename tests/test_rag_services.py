@@ -0,0 +1,397 @@
+"""
+RAG servis katmanı birim testleri.
+
+Embedding servisinin ve vektör veritabanının tembel (lazy)
+yüklenmesini ve hazırlık (readiness) durumunu test eder.
+"""
+
+import asyncio
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+
+from rag_app.services.embedding_service import EmbeddingService
+from rag_app.services.vector_store import VectorStore, DIMENSION
+
+
+class TestEmbeddingServiceLazyLoad:
+    """Embedding servisi lazy yükleme testleri."""
+
+    def test_import_does_not_load_model(self):
+        """Modül import'u sentence-transformers'ı yüklemez."""
+        code = (
+            "import sys\n"
+            "import rag_app.services.embedding_service as m\n"
+            "assert 'sentence_transformers' not in sys.modules\n"
+            "assert not m.embedding_service.is_ready\n"
+        )
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert proc.returncode == 0, proc.stderr
+
+    def test_model_loaded_once_on_first_use(self):
+        """Model ilk erişimde bir kez yüklenir."""
+        service = EmbeddingService()
+        fake_model = MagicMock()
+        with patch.object(EmbeddingService, "_load_model", return_value=fake_model) as loader:
+            assert service.model is fake_model
+            assert service.model is fake_model
+        loader.assert_called_once()
+
+    def test_background_warm_up_sets_ready(self):
+        """Arka plan ısıtması bitince hazır bayrağı set edilir."""
+        service = EmbeddingService()
+
+        def fake_load(self):
+            self._ready.set()
+            return MagicMock()
+
+        with patch.object(EmbeddingService, "_load_model", fake_load):
+            assert service.is_ready is False
+            service.warm_up(background=True)
+            assert service.wait_until_ready(timeout=5) is True
+        assert service.is_ready is True
+
+    def test_warm_up_failure_is_recorded(self):
+        """Isıtma hatası yutulmaz, load_error alanına yazılır."""
+        service = EmbeddingService()
+        with patch.object(EmbeddingService, "_load_model", side_effect=OSError("indirme yok")):
+            service.warm_up(background=False)
+        assert service.is_ready is False
+        assert isinstance(service.load_error, OSError)
+
+
+class TestVectorStoreLazyLoad:
+    """Vektör veritabanı lazy yükleme testleri."""
+
+    def test_constructor_does_not_touch_disk(self, tmp_path):
+        """Constructor indeksi yüklemez."""
+        store = VectorStore(
+            index_path=str(tmp_path / "index.bin"),
+            metadata_path=str(tmp_path / "meta.pkl"),
+        )
+        assert store.is_loaded is False
+
+    def test_add_and_search_roundtrip(self, tmp_path):
+        """Eklenen doküman aramada bulunur ve diskten geri yüklenir."""
+        index_path = str(tmp_path / "index.bin")
+        meta_path = str(tmp_path / "meta.pkl")
+        store = VectorStore(index_path=index_path, metadata_path=meta_path)
+
+        vec = [0.0] * DIMENSION
+        vec[0] = 1.0
+        store.add_documents([vec], [{"filename": "a.txt", "text": "merhaba"}])
+        assert store.is_loaded is True
+
+        reloaded = VectorStore(index_path=index_path, metadata_path=meta_path)
+        results = reloaded.search(vec, k=1)
+        assert results[0]["filename"] == "a.txt"
+        assert results[0]["score"] == pytest.approx(1.0)
+
+    def test_search_during_warm_up_sees_complete_index(self, tmp_path):
+        """Isıtma sürerken gelen arama yarım yüklenmiş indeksi görmez."""
+        import pickle
+        import threading
+        import time
+
+        index_path = str(tmp_path / "index.bin")
+        meta_path = str(tmp_path / "meta.pkl")
+        vec = [1.0] + [0.0] * (DIMENSION - 1)
+        VectorStore(index_path=index_path, metadata_path=meta_path).add_documents(
+            [vec], [{"filename": "a.txt", "text": "merhaba"}]
+        )
+
+        real_load = pickle.load
+
+        def slow_load(f):
+            time.sleep(0.2)
+            return real_load(f)
+
+        store = VectorStore(index_path=index_path, metadata_path=meta_path)
+        with patch("rag_app.services.vector_store.pickle.load", slow_load):
+            warm = threading.Thread(target=store.warm_up)
+            warm.start()
+            time.sleep(0.05)
+            results = store.search(vec, k=1)
+            warm.join()
+        assert [r["filename"] for r in results] == ["a.txt"]
+
+
+class _FakeEncoder:
+    """Her batch çağrısını kaydeden sahte embedding servisi."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("encode hatası")
+        return [[float(len(t))] for t in texts]
+
+
+class TestEmbeddingBatcher:
+    """Sorgu embedding mikro-batch dağıtıcısı testleri."""
+
+    def test_concurrent_queries_share_one_batch(self):
+        """Eşzamanlı sorgular tek encode çağrısında toplanır ve doğru sahibine döner."""
+        from rag_app.services.embedding_batcher import EmbeddingBatcher
+
+        encoder = _FakeEncoder()
+        batcher = EmbeddingBatcher(encoder, max_wait_ms=5, max_batch_size=64)
+        queries = ["a" * i for i in range(1, 11)]
+
+        async def run():
+            return await asyncio.gather(*(batcher.embed_query(q) for q in queries))
+
+        results = asyncio.run(run())
+        assert len(encoder.calls) == 1
+        assert results == [[float(len(q))] for q in queries]
+
+    def test_max_batch_size_splits_batches(self):
+        """max_batch_size aşılınca birden fazla batch oluşur."""
+        from rag_app.services.embedding_batcher import EmbeddingBatcher
+
+        encoder = _FakeEncoder()
+        batcher = EmbeddingBatcher(encoder, max_wait_ms=5, max_batch_size=4)
+
+        async def run():
+            return await asyncio.gather(*(batcher.embed_query(str(i)) for i in range(10)))
+
+        results = asyncio.run(run())
+        assert len(results) == 10
+        assert all(len(call) <= 4 for call in encoder.calls)
+        assert sum(len(call) for call in encoder.calls) == 10
+
+    def test_error_propagates_to_all_waiters(self):
+        """Encode hatası batch'teki tüm çağırıcılara iletilir."""
+        from rag_app.services.embedding_batcher import EmbeddingBatcher
+
+        batcher = EmbeddingBatcher(_FakeEncoder(fail=True), max_wait_ms=1)
+
+        async def run():
+            return await asyncio.gather(
+                *(batcher.embed_query(str(i)) for i in range(3)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_works_across_event_loops(self):
+        """CLI'deki gibi ardışık asyncio.run çağrılarında çalışır."""
+        from rag_app.services.embedding_batcher import EmbeddingBatcher
+
+        batcher = EmbeddingBatcher(_FakeEncoder(), max_wait_ms=1)
+        assert asyncio.run(batcher.embed_query("ab")) == [2.0]
+        assert asyncio.run(batcher.embed_query("abc")) == [3.0]
+
+
+class _FakeEmbeddingService:
+    """Sidecar testleri için deterministik sahte embedding servisi."""
+
+    load_error = None
+    is_ready = True
+
+    def warm_up(self, background=True):
+        pass
+
+    def _vec(self, text):
+        vec = [0.0] * DIMENSION
+        vec[len(text) % DIMENSION] = 1.0
+        return vec
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, query):
+        return self._vec(query)
+
+
+@pytest.fixture
+def index_service(tmp_path):
+    """Arka plan thread'inde çalışan sidecar sunucusu + istemcisi."""
+    import threading
+    from rag_app.services.index_server import IndexServer
+    from rag_app.services.index_client import IndexServiceClient
+
+    store = VectorStore(
+        index_path=str(tmp_path / "index.bin"),
+        metadata_path=str(tmp_path / "meta.pkl"),
+    )
+    server = IndexServer(_FakeEmbeddingService(), store)
+    address = f"unix:{tmp_path / 'rag.sock'}"
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start(address))
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(5)
+    yield IndexServiceClient(address, timeout=5), store
+
+    async def shutdown():
+        server.close()
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+class TestIndexService:
+    """Paylaşılan embedding + indeks servisi (sidecar) testleri."""
+
+    def test_parse_address(self):
+        """Unix ve TCP adresleri çözümlenir."""
+        from rag_app.services.index_client import parse_address
+
+        assert parse_address("unix:/tmp/a.sock") == ("unix", "/tmp/a.sock")
+        assert parse_address("unix:///tmp/a.sock") == ("unix", "/tmp/a.sock")
+        assert parse_address("tcp://127.0.0.1:8765") == ("tcp", ("127.0.0.1", 8765))
+        with pytest.raises(ValueError):
+            parse_address("localhost")
+
+    def test_remote_add_search_and_version(self, index_service):
+        """İnce istemciler üzerinden ekleme, arama ve versiyon takibi çalışır."""
+        from rag_app.services.index_client import RemoteEmbeddingService, RemoteVectorStore
+
+        client, store = index_service
+        embedder = RemoteEmbeddingService(client)
+        remote_store = RemoteVectorStore(client)
+
+        vectors = embedder.embed_documents(["abc", "abcde"])
+        remote_store.add_documents(vectors, [
+            {"filename": "a.txt", "text": "abc"},
+            {"filename": "b.txt", "text": "abcde"},
+        ])
+        assert store.metadata[1]["filename"] == "b.txt"
+        assert remote_store.version[1] == store.version == 1
+
+        results = remote_store.search(embedder.embed_query("xyz"), k=1)
+        assert results[0]["filename"] == "a.txt"
+        results = remote_store.search_mmr(embedder.embed_query("xyz"), min_score=0.5, max_k=2)
+        assert [r["filename"] for r in results] == ["a.txt"]
+        assert sorted(remote_store.list_files()) == ["a.txt", "b.txt"]
+
+        remote_store.reset()
+        assert remote_store.list_files() == []
+        assert remote_store.version[1] == 2
+
+    @pytest.mark.parametrize("remote", [False, True], ids=["local", "remote"])
+    def test_remove_files_matches_local_store(self, index_service, remote):
+        """Dosya silme yerel VectorStore ve sidecar istemcisinde aynı davranır."""
+        from rag_app.services.index_client import RemoteVectorStore
+
+        client, local = index_service
+        store = RemoteVectorStore(client) if remote else local
+
+        def vec(n):
+            v = [0.0] * DIMENSION
+            v[n] = 1.0
+            return v
+
+        store.add_documents([vec(0), vec(1), vec(2)], [
+            {"filename": "a.txt", "text": "a"},
+            {"filename": "a.txt", "text": "ortak", "sources": ["a.txt", "b.txt"]},
+            {"filename": "c.txt", "text": "c"},
+        ])
+        assert store.remove_files(["yok.txt"]) == 0
+        assert local.version == 1
+        # Paylaşılan chunk silinmez, diğer kaynağa devredilir
+        assert store.remove_files(["a.txt"]) == 1
+        assert sorted(store.list_files()) == ["b.txt", "c.txt"]
+        assert store.search(vec(1), k=1)[0]["filename"] == "b.txt"
+        assert store.remove_files(["b.txt", "c.txt"]) == 2
+        assert store.list_files() == []
+        assert local.version == 3
+        if remote:
+            assert store.version[1] == 3
+
+    def test_version_distinguishes_server_restart(self, index_service):
+        """Yeniden başlayan sidecar'ın sıfırlanan sayacı eski versiyonla çakışmaz."""
+        from rag_app.services.index_client import RemoteVectorStore
+        from rag_app.services.index_server import IndexServer
+
+        client, _ = index_service
+        remote_store = RemoteVectorStore(client)
+        client.call("ping")
+        before = remote_store.version
+        assert before[0] is not None
+
+        restarted = IndexServer(_FakeEmbeddingService(), VectorStore())
+        client._update_version(restarted.vector_store.version, restarted.epoch)
+        assert remote_store.version[1] == before[1] == 0
+        assert remote_store.version != before
+
+    def test_version_broadcast_reaches_watcher(self, index_service):
+        """Başka bir worker'ın yüklemesi watcher'a versiyon yayını olarak ulaşır."""
+        import time
+        from rag_app.services.index_client import IndexServiceClient, RemoteVectorStore
+
+        client, _ = index_service
+        watcher = IndexServiceClient(client.address, timeout=5)
+        watcher.start_watcher()
+
+        RemoteVectorStore(client).add_documents([[1.0] + [0.0] * (DIMENSION - 1)], [{"filename": "x", "text": "x"}])
+
+        deadline = time.monotonic() + 5
+        while watcher.version != 1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert watcher.version == 1
+
+    def test_worker_query_batches_go_through_server_batcher(self, index_service):
+        """Worker batcher'larının sorguları sunucunun batcher'ından geçer."""
+        from rag_app.services.embedding_batcher import EmbeddingBatcher
+        from rag_app.services.index_client import IndexServiceClient, RemoteEmbeddingService
+        from src.monitoring.metrics import metrics
+
+        client, _ = index_service
+        workers = [
+            EmbeddingBatcher(RemoteEmbeddingService(IndexServiceClient(client.address, timeout=5)), max_wait_ms=5)
+            for _ in range(2)
+        ]
+
+        async def main():
+            return await asyncio.gather(*(
+                worker.embed_query("x" * n) for n in range(1, 7) for worker in workers
+            ))
+
+        metrics.reset()
+        vectors = asyncio.run(main())
+        assert [v.index(1.0) for v in vectors] == [n for n in range(1, 7) for _ in workers]
+        # Her sorgu önce worker'ın, sonra sunucunun batcher'ında sayılır
+        assert metrics.counter("embedding.requests") == 24
+
+    def test_malformed_request_gets_error_reply(self, index_service):
+        """Bozuk JSON satırı bağlantıyı düşürmez; hata yanıtı döner."""
+        import json
+        import socket
+
+        client, _ = index_service
+        sock = socket.socket(socket.AF_UNIX)
+        sock.connect(client.address[len("unix:"):])
+        reader = sock.makefile("rb")
+        sock.sendall(b"{bozuk\n")
+        assert "Geçersiz istek" in json.loads(reader.readline())["error"]
+        sock.sendall(json.dumps({"id": 1, "method": "ping"}).encode() + b"\n")
+        assert json.loads(reader.readline())["result"] == "pong"
+        sock.close()
+
+    def test_server_error_is_raised(self, index_service):
+        """Sunucu hatası istemcide IndexServiceError olarak fırlar."""
+        from rag_app.services.index_client import IndexServiceError
+
+        client, _ = index_service
+        with pytest.raises(IndexServiceError, match="Bilinmeyen metod"):
+            client.call("yok_boyle_bir_metod")
@@ -0,0 +1,158 @@
+"""
+Adaptif top-k ve MMR retrieval birim testleri.
+
+Skor dağılımından k seçimini, MMR'ın örtüşen chunk'lar yerine çeşitli
+sonuçlar seçmesini ve VectorStore.search_mmr'ın aday vektörlerini
+indeksten okumasını test eder.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import numpy as np
+
+from rag_app.services.vector_store import VectorStore, DIMENSION
+from rag_app.utils.retrieval import choose_k, mmr
+
+
+def unit(*components) -> np.ndarray:
+    vec = np.zeros(DIMENSION, dtype="float32")
+    vec[:len(components)] = components
+    return vec / np.linalg.norm(vec)
+
+
+class TestChooseK:
+    """choose_k testleri."""
+
+    def test_counts_scores_close_to_best(self):
+        scores = np.array([0.90, 0.88, 0.85, 0.60, 0.55])
+        assert choose_k(scores, min_k=1, max_k=6, min_score=0.5, margin=0.1) == 3
+
+    def test_bounds(self):
+        scores = np.array([0.90, 0.89, 0.88, 0.87, 0.86])
+        assert choose_k(scores, min_k=1, max_k=2, min_score=0.5, margin=0.1) == 2
+        assert choose_k(scores, min_k=4, max_k=6, min_score=0.885, margin=0.0) == 2
+        assert choose_k(scores, min_k=1, max_k=6, min_score=0.95, margin=0.1) == 0
+
+
+class TestMMR:
+    """mmr testleri."""
+
+    def test_prefers_diverse_candidates(self):
+        query = unit(1, 1)
+        vectors = np.stack([unit(1, 0.9), unit(1, 0.88), unit(0.8, 1)])
+        assert mmr(query, vectors, k=2, lambda_mult=0.5) == [0, 2]
+        # Sadece ilgililik: skor sırası
+        assert mmr(query, vectors, k=2, lambda_mult=1.0) == [0, 1]
+
+    def test_k_larger_than_pool(self):
+        assert mmr(unit(1), np.stack([unit(1), unit(0, 1)]), k=5, lambda_mult=0.7) == [0, 1]
+
+
+class TestVectorStoreMMR:
+    """VectorStore.search_mmr testleri."""
+
+    def make_store(self, tmp_path):
+        store = VectorStore(index_path=str(tmp_path / "i.bin"), metadata_path=str(tmp_path / "m.pkl"))
+        vectors = [unit(1, 0.3), unit(1, 0.31), unit(1, -0.3), unit(0, 1)]
+        store.add_documents(vectors, [
+            {"filename": "a.txt", "text": "a1"},
+            {"filename": "a.txt", "text": "a1-overlap"},
+            {"filename": "b.txt", "text": "b1"},
+            {"filename": "c.txt", "text": "alakasiz"},
+        ], save=False)
+        return store
+
+    def test_skips_overlapping_chunk(self, tmp_path):
+        store = self.make_store(tmp_path)
+        results = store.search_mmr(unit(1, 0.1), min_score=0.5, max_k=2, margin=0.1, lambda_mult=0.5)
+        assert [r["text"] for r in results] == ["a1", "b1"]
+        assert all(r["score"] >= 0.5 for r in results)
+
+    def test_irrelevant_query_returns_nothing(self, tmp_path):
+        store = self.make_store(tmp_path)
+        assert store.search_mmr(unit(0, 0, 1), min_score=0.5) == []
+
+    def test_vectors_stay_aligned_after_removal(self, tmp_path):
+        store = self.make_store(tmp_path)
+        store.remove_files(["a.txt"], save=False)
+        results = store.search_mmr(unit(0, 1), min_score=0.5, max_k=1)
+        assert [r["text"] for r in results] == ["alakasiz"]
+        assert np.allclose(store.index.reconstruct(1), unit(0, 1))
+
+    def test_noop_removal_does_not_rewrite_index(self, tmp_path):
+        store = self.make_store(tmp_path)
+        version = store.version
+        with patch.object(store, "_save_index") as save:
+            assert store.remove_files(["yok.txt"]) == 0
+        save.assert_not_called()
+        assert store.version == version
+
+
+class TestRetrievalCache:
+    """rag_engine.retrieve önbellek testleri."""
+
+    def test_hit_skips_embedding_and_version_bump_invalidates(self, tmp_path):
+        from unittest.mock import AsyncMock, patch
+        from rag_app.services import rag_engine
+
+        store = VectorStore(index_path=str(tmp_path / "i.bin"), metadata_path=str(tmp_path / "m.pkl"))
+        store.add_documents([unit(1)], [{"filename": "a.txt", "text": "eski"}], save=False)
+        embed = AsyncMock(return_value=unit(1))
+        rag_engine.retrieval_cache.clear()
+        with patch.object(rag_engine, "vector_store", store), \
+                patch.object(rag_engine.embedding_batcher, "embed_query", embed):
+            first = asyncio.run(rag_engine.retrieve("Rapor  nedir?"))
+            assert asyncio.run(rag_engine.retrieve("rapor nedir?")) == first
+            assert embed.await_count == 1
+
+            store.reset()
+            store.add_documents([unit(1)], [{"filename": "b.txt", "text": "yeni"}], save=False)
+            assert [r["text"] for r in asyncio.run(rag_engine.retrieve("Rapor nedir?"))] == ["yeni"]
+            assert embed.await_count == 2
+        assert rag_engine.retrieval_cache.stats()["hits"] >= 1
+
+    def test_hit_returns_independent_copy(self, tmp_path):
+        from unittest.mock import AsyncMock, patch
+        from rag_app.services import rag_engine
+
+        store = VectorStore(index_path=str(tmp_path / "i.bin"), metadata_path=str(tmp_path / "m.pkl"))
+        store.add_documents([unit(1)], [{"filename": "a.txt", "text": "metin"}], save=False)
+        rag_engine.retrieval_cache.clear()
+        with patch.object(rag_engine, "vector_store", store), \
+                patch.object(rag_engine.embedding_batcher, "embed_query", AsyncMock(return_value=unit(1))):
+            first = asyncio.run(rag_engine.retrieve("soru"))
+            first[0]["text"] = "değişti"
+            first.clear()
+            second = asyncio.run(rag_engine.retrieve("soru"))
+            second[0]["filename"] = "b.txt"
+            third = asyncio.run(rag_engine.retrieve("soru"))
+        assert [(r["filename"], r["text"]) for r in third] == [("a.txt", "metin")]
+
+    def test_slow_search_does_not_block_event_loop(self):
+        """Sidecar araması (soket çağrısı) event loop'u bloklamaz."""
+        import time
+        from unittest.mock import AsyncMock, MagicMock, patch
+        from rag_app.services import rag_engine
+
+        store = MagicMock(version=("epoch", 1))
+        store.search_mmr.side_effect = lambda *args, **kwargs: time.sleep(0.3) or []
+        rag_engine.retrieval_cache.clear()
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            task = asyncio.create_task(ticker())
+            await rag_engine.retrieve("yavaş soru")
+            task.cancel()
+            return ticks
+
+        with patch.object(rag_engine, "vector_store", store), \
+                patch.object(rag_engine.embedding_batcher, "embed_query", AsyncMock(return_value=unit(1))):
+            assert asyncio.run(main()) >= 10
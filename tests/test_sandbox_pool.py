@@ -0,0 +1,118 @@
+"""
+Kod çalıştırma worker havuzu birim testleri.
+
+code_executor_tool'un havuz üzerinden eski (her çağrıda yeni process)
+yöntemle aynı cevapları verdiğini, işler arasında durum taşınmadığını,
+worker'ların iş sayısına göre yenilendiğini, zaman aşımını ve havuz
+kullanılamadığında yeni process'e düşmeyi test eder.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.monitoring.metrics import metrics
+from src.tools import code_executor
+from src.tools.sandbox_pool import SandboxPool, SandboxUnavailable
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SandboxPool(size=1, max_jobs=100, preload=["math"])
+    yield pool
+    pool.shutdown()
+
+
+def invoke(code: str) -> str:
+    return code_executor.code_executor_tool.invoke({"code": code})
+
+
+class TestCodeExecutorWithPool:
+    """Tool cevapları havuzla ve havuzsuz aynı biçimde."""
+
+    @pytest.mark.parametrize("code", [
+        "print(sum(range(10)))",
+        "x = 1 / 0",
+        "print('kapanmamış",
+        "y = 5",
+        "import math\nprint(math.factorial(20))",
+        "raise SystemExit('çıkış')",
+    ])
+    def test_same_result_as_spawn(self, pool, code):
+        with patch.object(code_executor, "sandbox_pool", SandboxPool(size=0)):
+            spawned = invoke(code)
+        with patch.object(code_executor, "sandbox_pool", pool):
+            pooled = invoke(code)
+        # Traceback'teki dosya adı farklıdır (<kod> / geçici dosya); son satır aynı olmalı
+        assert pooled.splitlines()[0] == spawned.splitlines()[0]
+        assert pooled.splitlines()[-1] == spawned.splitlines()[-1]
+
+    def test_security_check_still_applies(self, pool):
+        with patch.object(code_executor, "sandbox_pool", pool):
+            assert invoke("import os").startswith("Güvenlik Hatası")
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="fork gerekiyor")
+    def test_state_does_not_leak_between_jobs(self, pool):
+        with patch.object(code_executor, "sandbox_pool", pool):
+            assert invoke("import math\nmath.pi = 3\nprint(math.pi)") == "Çıktı:\n3"
+            assert invoke("import math\nprint(math.pi)") == "Çıktı:\n3.141592653589793"
+            assert "NameError" in invoke("print(y)")
+
+
+class TestSandboxPool:
+    """Havuzun worker yaşam döngüsü."""
+
+    def test_worker_recycled_after_max_jobs(self):
+        metrics.reset()
+        pool = SandboxPool(size=1, max_jobs=2, preload=[])
+        try:
+            for _ in range(5):
+                assert pool.run("print(1)", timeout=10).stdout == "1\n"
+        finally:
+            pool.shutdown()
+        # İlk worker + 2. ve 4. işten sonra yenilenenler
+        assert metrics.counter("sandbox.worker_spawns") == 3
+
+    def test_timeout_then_next_job_runs(self, pool):
+        with pytest.raises(subprocess.TimeoutExpired):
+            pool.run("while True:\n    pass", timeout=0.5)
+        assert pool.run("print('devam')", timeout=10).stdout == "devam\n"
+        assert pool.status()["idle"] == 1
+
+    def test_restarts_after_shutdown(self):
+        pool = SandboxPool(size=1, preload=[])
+        assert pool.run("print(1)", timeout=10).returncode == 0
+        pool.shutdown()
+        assert pool.status()["idle"] == 0
+        assert pool.run("print(2)", timeout=10).stdout == "2\n"
+        pool.shutdown()
+
+    def test_busy_pool_raises_instead_of_blocking(self):
+        pool = SandboxPool(size=1, preload=[], start_timeout=0.5)
+        busy = threading.Thread(target=pool.run, args=("import time; time.sleep(3)", 10))
+        try:
+            assert pool.run("print(1)", timeout=10).returncode == 0
+            busy.start()
+            time.sleep(0.3)
+            started = time.monotonic()
+            with pytest.raises(SandboxUnavailable):
+                pool.run("print(2)", timeout=10)
+            assert time.monotonic() - started < 2
+        finally:
+            busy.join()
+            pool.shutdown()
+
+    def test_unavailable_worker_falls_back_to_spawn(self):
+        metrics.reset()
+        pool = SandboxPool(size=1, preload=[], start_timeout=5)
+        with patch("src.tools.sandbox_pool.WORKER_SCRIPT", "/olmayan/worker.py"):
+            with pytest.raises(SandboxUnavailable):
+                pool.run("print(1)", timeout=10)
+            with patch.object(code_executor, "sandbox_pool", pool):
+                assert invoke("print(7 * 6)") == "Çıktı:\n42"
+        pool.shutdown()
+        assert metrics.counter("sandbox.fallbacks") == 1
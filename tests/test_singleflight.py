@@ -0,0 +1,232 @@
+"""
+Single-flight çağrı tekilleştirme birim testleri.
+
+Eşzamanlı özdeş çağrıların tek arka uç çağrısına bağlanmasını, hata
+iletimini, bekleyenler ayrıldığında iptali, paylaşılan akışları ve
+model / tool entegrasyonunu test eder.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from src.monitoring.metrics import metrics
+from src.utils.singleflight import SingleFlight
+
+
+class TestSingleFlightAsync:
+    """SingleFlight.do testleri."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test")
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"cevap": 42}
+
+        async def main():
+            results = await asyncio.gather(*(flight.do("soru", work) for _ in range(10)))
+            other = await flight.do("baska", work)
+            return results, other
+
+        results, other = asyncio.run(main())
+        assert len(calls) == 2
+        assert all(r is results[0] for r in results)
+        assert other == {"cevap": 42}
+
+    def test_error_reaches_all_waiters(self):
+        flight = SingleFlight("test")
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("arka uç hatası")
+
+        async def main():
+            return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+        errors = asyncio.run(main())
+        assert all(isinstance(e, RuntimeError) for e in errors)
+
+    def test_cancel_only_when_all_waiters_leave(self):
+        flight = SingleFlight("test")
+        state = {"started": 0, "cancelled": False}
+
+        async def work():
+            state["started"] += 1
+            try:
+                await asyncio.sleep(0.2)
+                return "bitti"
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        async def main():
+            first = asyncio.create_task(flight.do("k", work))
+            second = asyncio.create_task(flight.do("k", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            # Bir bekleyen ayrıldı, diğeri sonucu almaya devam eder
+            assert await second == "bitti"
+            assert not state["cancelled"]
+
+            third = asyncio.create_task(flight.do("k", work))
+            await asyncio.sleep(0.01)
+            third.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await third
+            await asyncio.sleep(0)
+            assert state["cancelled"]
+            # İptal edilen işin anahtarı unutulur, yeni çağrı baştan başlar
+            assert await flight.do("k", work) == "bitti"
+
+        asyncio.run(main())
+        assert state["started"] == 3
+
+
+class TestSingleFlightStream:
+    """SingleFlight.stream testleri."""
+
+    def test_late_joiner_gets_whole_stream(self):
+        flight = SingleFlight("test")
+        produced = []
+
+        async def source():
+            for i in range(5):
+                produced.append(i)
+                await asyncio.sleep(0.01)
+                yield i
+
+        async def consume(delay):
+            await asyncio.sleep(delay)
+            return [item async for item in flight.stream("k", source)]
+
+        async def main():
+            return await asyncio.gather(consume(0), consume(0.025))
+
+        first, late = asyncio.run(main())
+        assert first == late == [0, 1, 2, 3, 4]
+        assert produced == [0, 1, 2, 3, 4]
+
+    def test_error_reaches_consumers_and_cancel_stops_producer(self):
+        flight = SingleFlight("test")
+        state = {"cancelled": False}
+
+        async def failing():
+            yield "ilk"
+            raise RuntimeError("akış koptu")
+
+        async def endless():
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield "parça"
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        async def main():
+            items = []
+            with pytest.raises(RuntimeError):
+                async for item in flight.stream("hata", failing):
+                    items.append(item)
+            assert items == ["ilk"]
+
+            stream = flight.stream("sonsuz", endless)
+            assert await stream.__anext__() == "parça"
+            await stream.aclose()
+            await asyncio.sleep(0.01)
+
+        asyncio.run(main())
+        assert state["cancelled"]
+
+
+class TestSingleFlightSync:
+    """SingleFlight.do_sync testleri."""
+
+    def test_threads_share_one_execution(self):
+        flight = SingleFlight("test")
+        calls = []
+        results = []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return "sonuc"
+
+        threads = [threading.Thread(target=lambda: results.append(flight.do_sync("k", work))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == ["sonuc"] * 8
+
+
+class TestIntegration:
+    """Model ve tool entegrasyonu."""
+
+    def test_gated_model_deduplicates_invoke_and_stream(self):
+        from src.models.provider_limits import GatedChatModel, ProviderGate
+
+        class SlowModel(GenericFakeChatModel):
+            async def _agenerate(self, *args, **kwargs):
+                await asyncio.sleep(0.05)
+                return self._generate(*args, **kwargs)
+
+            async def _astream(self, *args, **kwargs):
+                for chunk in self._stream(*args, **kwargs):
+                    await asyncio.sleep(0.01)
+                    yield chunk
+
+        metrics.reset()
+        inner = SlowModel(messages=iter([AIMessage(content="yanit"), AIMessage(content="akan uzun yanit"),
+                                         AIMessage(content="sonraki")]))
+        model = GatedChatModel(inner=inner, gate=ProviderGate("test", 0, 10, 0))
+
+        async def stream():
+            return "".join([chunk.content async for chunk in model.astream("Akış sorusu?")])
+
+        async def main():
+            answers = await asyncio.gather(*(model.ainvoke("Trend soru?") for _ in range(5)))
+            streamed = await asyncio.gather(*(stream() for _ in range(3)))
+            return answers, streamed
+
+        answers, streamed = asyncio.run(main())
+        assert [a.content for a in answers] == ["yanit"] * 5
+        # Her çağırana ayrı mesaj nesnesi
+        assert len({id(a) for a in answers}) == 5
+        assert streamed == ["akan uzun yanit"] * 3
+        assert metrics.counter("singleflight.llm.calls") == 2
+        assert metrics.counter("singleflight.llm.shared") == 6
+
+    def test_web_search_deduplicates(self):
+        from src.tools import web_search
+
+        calls = []
+
+        def slow_search(query, max_results):
+            calls.append(query)
+            time.sleep(0.1)
+            return "sonuclar"
+
+        results = []
+        with patch.object(web_search, "_search", slow_search):
+            threads = [
+                threading.Thread(target=lambda q=q: results.append(web_search.web_search_tool.invoke({"query": q})))
+                for q in ("Gündem", "gündem ", "GÜNDEM")
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert len(calls) == 1
+        assert results == ["sonuclar"] * 3
@@ -0,0 +1,244 @@
+"""
+Metin işleme (text processing) birim testleri.
+
+Cümle/paragraf duyarlı, token bazlı chunk üreticisini, eski karakter
+bazlı chunk_text fonksiyonunu, TXT çözümünü ve yükleme spool'unu test eder.
+"""
+
+import asyncio
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from rag_app.utils.text_processing import (
+    TEXT_DECODE_CHUNK_BYTES,
+    chunk_text,
+    estimate_tokens,
+    iter_chunks,
+    iter_text_segments,
+    split_sentences,
+)
+from rag_app.utils.uploads import UploadLimitMiddleware, UploadTooLarge, _PartSizeCounter, spool_upload
+
+
+def word_count(text: str) -> int:
+    """Testlerde tokenizer yerine kelime sayısı kullanılır."""
+    return len(text.split())
+
+
+class TestChunkTextLegacy:
+    """Karakter bazlı eski chunk_text testleri."""
+
+    def test_empty_text(self):
+        """Boş metin boş liste döner."""
+        assert chunk_text("") == []
+
+    def test_overlap(self):
+        """Parçalar overlap kadar örtüşür."""
+        chunks = chunk_text("a" * 1000, chunk_size=500, overlap=50)
+        assert len(chunks) == 3
+        assert all(len(c) <= 500 for c in chunks)
+
+
+class TestIterChunks:
+    """Token bazlı, cümle duyarlı chunk üreticisi testleri."""
+
+    def test_returns_generator(self):
+        """Sonuç bir generator'dır (tüm liste bellekte kurulmaz)."""
+        chunks = iter_chunks("Kısa bir cümle.", count_tokens=word_count)
+        assert iter(chunks) is chunks
+        assert list(chunks) == ["Kısa bir cümle."]
+
+    def test_never_splits_sentences(self):
+        """Hiçbir parça bir cümleyi ortadan bölmez."""
+        sentences = [f"Bu {i}. cümle dört kelime." for i in range(40)]
+        text = " ".join(sentences)
+        chunks = list(iter_chunks(text, max_tokens=20, overlap_tokens=0, count_tokens=word_count))
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            for piece in chunk.split(". "):
+                piece = piece if piece.endswith(".") else piece + "."
+                assert piece in text
+
+    def test_respects_token_limit(self):
+        """Her parça max_tokens sınırında kalır."""
+        text = " ".join(f"Cümle numarası {i} burada bitiyor." for i in range(100))
+        for chunk in iter_chunks(text, max_tokens=25, overlap_tokens=5, count_tokens=word_count):
+            assert word_count(chunk) <= 25
+
+    def test_overlap_repeats_whole_sentences(self):
+        """Overlap, önceki parçanın son tam cümlesini tekrarlar."""
+        text = "Bir iki üç. Dört beş altı. Yedi sekiz dokuz. On on bir on iki."
+        chunks = list(iter_chunks(text, max_tokens=6, overlap_tokens=3, count_tokens=word_count))
+        assert chunks[0] == "Bir iki üç. Dört beş altı."
+        assert chunks[1].startswith("Dört beş altı.")
+
+    def test_long_sentence_is_split_on_words(self):
+        """Sınırı tek başına aşan cümle kelime sınırlarından bölünür."""
+        text = " ".join(["kelime"] * 55) + "."
+        chunks = list(iter_chunks(text, max_tokens=20, overlap_tokens=0, count_tokens=word_count))
+        assert [word_count(c) for c in chunks] == [20, 20, 15]
+
+    def test_unbroken_run_is_hard_split(self):
+        """Boşluksuz, sınırı aşan metin (örn. base64) son çare olarak token sınırından bölünür."""
+        blob = "QUJD" * 1500
+        chunks = list(iter_chunks(f"Ek dosya: {blob} sonu.", max_tokens=50, overlap_tokens=0,
+                                  count_tokens=estimate_tokens))
+        assert len(chunks) > 1
+        assert all(estimate_tokens(c) <= 50 for c in chunks)
+        assert blob in "".join(chunks).replace(" ", "")
+
+    def test_prefers_paragraph_boundaries(self):
+        """Parça yeterince doluysa yeni paragraf yeni parçada başlar."""
+        p1 = "Birinci paragrafın ilk cümlesi. Birinci paragrafın ikinci cümlesi."
+        p2 = "İkinci paragraf biraz daha uzun bir cümle içerir. Ve bir tane daha."
+        chunks = list(iter_chunks(f"{p1}\n\n{p2}", max_tokens=12, overlap_tokens=0, count_tokens=word_count))
+        assert chunks[0] == p1
+
+    def test_streams_segments_across_page_breaks(self):
+        """Sayfa sınırında bölünmüş cümle tek parça olarak birleşir ve kaynak tembel tüketilir."""
+        consumed = []
+
+        def pages():
+            for page in ["İlk sayfa cümlesi. Sayfa sonunda bölünen", " cümle burada biter.\n\n", "Son paragraf."]:
+                consumed.append(page)
+                yield page
+
+        chunks = iter_chunks(pages(), max_tokens=100, count_tokens=word_count)
+        assert consumed == []  # Henüz hiçbir şey okunmadı
+        result = list(chunks)
+        assert "Sayfa sonunda bölünen cümle burada biter." in result[0]
+        assert result[-1].endswith("Son paragraf.")
+
+    def test_empty_source(self):
+        """Boş kaynak parça üretmez."""
+        assert list(iter_chunks("", count_tokens=word_count)) == []
+        assert list(iter_chunks(["", "  \n\n "], count_tokens=word_count)) == []
+
+
+class TestSplitSentences:
+    """Ortak cümle bölücü testleri."""
+
+    def test_splits_and_normalizes_whitespace(self):
+        """Cümle sonlarından bölünür; madde numaraları bölünmez, boşluklar teklenir."""
+        text = "İlk cümle  burada.\nİkinci\tcümle! Sonra 3. madde geliyor."
+        assert split_sentences(text) == ["İlk cümle burada.", "İkinci cümle!", "Sonra 3. madde geliyor."]
+
+    def test_blank_text(self):
+        """Sadece boşluk içeren metin cümle üretmez."""
+        assert split_sentences("  \n ") == []
+
+
+class TestEstimateTokens:
+    """Çevrimdışı token tahmini testleri."""
+
+    def test_counts_words_and_punctuation(self):
+        """Kısa kelimeler ve noktalama birer token sayılır."""
+        assert estimate_tokens("bir iki, üç.") == 5
+
+    def test_long_words_count_more(self):
+        """Uzun kelimeler birden fazla token sayılır."""
+        assert estimate_tokens("karakterizasyon") == pytest.approx(4)
+
+
+class TestTextDecoding:
+    """TXT dosyalarının dilim dilim çözülmesi testleri."""
+
+    def test_path_and_bytes_match_across_slice_boundaries(self, tmp_path):
+        """Dilim sınırına denk gelen çok baytlı karakterler bozulmamalı."""
+        content = ("ğ" * (TEXT_DECODE_CHUNK_BYTES // 2 + 1) + " son").encode("utf-8")
+        path = tmp_path / "a.txt"
+        path.write_bytes(content)
+
+        from_path = list(iter_text_segments(str(path), "a.txt"))
+        assert len(from_path) > 1
+        assert "".join(from_path) == content.decode("utf-8")
+        assert "".join(iter_text_segments(content, "a.txt")) == content.decode("utf-8")
+
+    def test_invalid_utf8_falls_back_to_latin1(self):
+        assert "".join(iter_text_segments("Merhaba ".encode() + b"\xfe\xff", "a.txt")) == "Merhaba þÿ"
+
+
+class TestSpoolUpload:
+    """Yüklemelerin diske aktarılması testleri."""
+
+    def make_upload(self, size: int) -> UploadFile:
+        return UploadFile(io.BytesIO(b"x" * size), filename="a.txt")
+
+    def test_copies_to_disk(self, tmp_path):
+        path = str(tmp_path / "a.txt")
+        written = asyncio.run(spool_upload(self.make_upload(3_000_000), path, 10_000_000, 10_000_000))
+        assert written == os.path.getsize(path) == 3_000_000
+
+    @pytest.mark.parametrize("file_limit, total_limit, message", [
+        (1_000_000, 10_000_000, "Dosya boyutu"),
+        (10_000_000, 1_000_000, "İstek boyutu"),
+    ])
+    def test_limits_remove_partial_file(self, tmp_path, file_limit, total_limit, message):
+        """Sınır aşılınca hata fırlatılır ve yarım dosya silinir."""
+        path = str(tmp_path / "a.txt")
+        with pytest.raises(UploadTooLarge, match=message):
+            asyncio.run(spool_upload(self.make_upload(3_000_000), path, file_limit, total_limit))
+        assert not os.path.exists(path)
+
+
+class TestUploadLimitMiddleware:
+    """Yükleme sınırlarının gövde okunurken uygulanması testleri."""
+
+    def make_client(self, received):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+
+        app = FastAPI()
+        app.add_middleware(UploadLimitMiddleware, path="/upload", max_file_bytes=100_000,
+                           max_request_bytes=1_000_000)
+
+        @app.post("/upload")
+        async def upload(files: list[UploadFile]):
+            received.extend(f.filename for f in files)
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_part_counter_finds_boundary_split_across_chunks(self):
+        """Dilim sınırına bölünmüş sınırlayıcı da parçayı bitirir."""
+        body = b"--b\r\nbaslik\r\n\r\n" + b"x" * 50 + b"\r\n--b\r\n\r\n" + b"y" * 10 + b"\r\n--b--\r\n"
+        counter = _PartSizeCounter(b"b")
+        for n in range(0, len(body), 3):
+            largest = counter.feed(body[n:n + 3])
+        assert 50 < largest < 80
+
+    def test_oversized_file_rejected_before_endpoint(self):
+        received = []
+        client = self.make_client(received)
+        response = client.post("/upload", files=[("files", ("a.txt", b"x" * 300_000))])
+        assert response.status_code == 413
+        assert "Dosya boyutu" in response.json()["detail"]
+        assert received == []
+
+        assert client.post("/upload", files=[("files", ("b.txt", b"x" * 50_000))]).status_code == 200
+        assert received == ["b.txt"]
+
+    def test_chunked_request_without_content_length_is_capped(self):
+        """Content-Length göndermeyen istek de gövde sayılarak kesilir."""
+        received = []
+        client = self.make_client(received)
+
+        def body():
+            yield b"--sinir\r\nContent-Disposition: form-data; name=\"files\"; filename=\"a.txt\"\r\n\r\n"
+            for _ in range(200):
+                yield b"x" * 10_000
+
+        response = client.post("/upload", content=body(),
+                               headers={"content-type": "multipart/form-data; boundary=sinir"})
+        assert response.status_code == 413
+        assert received == []
+
+    def test_content_length_over_request_limit_is_not_read(self):
+        received = []
+        response = self.make_client(received).post(
+            "/upload", content=b"x" * 10, headers={"content-length": "2000000", "content-type": "text/plain"}
+        )
+        assert response.status_code == 413
+        assert "İstek boyutu" in response.json()["detail"]